@@ -0,0 +1,103 @@
+"""
+Micro-benchmarks for the event envelope codec.
+
+    cd agent-runtime && PYTHONPATH=src python benchmarks/bench_envelope.py [--number 20000]
+
+Payloads mirror what evolution-manager publishes for `messages.upsert` (text and image with the
+full provider `raw` block). Install `orjson` to compare backends; the report prints which one is active.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+import uuid
+from datetime import datetime, timezone
+
+from common.infrastructure.events import codec
+from common.infrastructure.events.envelope import EventEnvelopeModel, parse_envelope
+
+
+def _evolution_event(*, media: bool) -> dict:
+    message_id = uuid.uuid4().hex.upper()[:20]
+    data = {
+        "key": {"remoteJid": "5511987654321@s.whatsapp.net", "fromMe": False, "id": message_id},
+        "pushName": "Maria Souza",
+        "status": "DELIVERY_ACK",
+        "messageTimestamp": 1760000000,
+        "instanceId": str(uuid.uuid4()),
+        "source": "android",
+        "contextInfo": {"expiration": 0, "ephemeralSettingTimestamp": 0, "disappearingMode": {"initiator": "CHANGED_IN_CHAT"}},
+        "message": {
+            "conversation": "Olá! Vi o anúncio de vocês e queria saber mais sobre o plano anual, é possível parcelar?",
+            "messageContextInfo": {"deviceListMetadata": {"senderKeyHash": "x" * 28, "recipientKeyHash": "y" * 28}},
+        },
+    }
+    if media:
+        data["message"] = {
+            "imageMessage": {
+                "url": "https://mmg.whatsapp.net/v/t62.7118-24/" + "a" * 120,
+                "mimetype": "image/jpeg",
+                "caption": "Segue o comprovante",
+                "fileSha256": "b" * 44,
+                "fileLength": "182734",
+                "height": 1600,
+                "width": 1200,
+                "mediaKey": "c" * 44,
+                "jpegThumbnail": "d" * 6000,
+            }
+        }
+    return {
+        "id": str(uuid.uuid4()),
+        "type": "message.received",
+        "version": 1,
+        "occurred_at": datetime.now(timezone.utc).isoformat(),
+        "company_id": str(uuid.uuid4()),
+        "source": "evolution-manager",
+        "correlation_id": str(uuid.uuid4()),
+        "causation_id": None,
+        "payload": {
+            "instance_id": str(uuid.uuid4()),
+            "lead_external_id": "5511987654321",
+            "from": "5511987654321",
+            "body": None if media else data["message"]["conversation"],
+            "media": {"type": "image", "url": "https://cdn.example/x.jpg", "mime_type": "image/jpeg"} if media else None,
+            "raw": {"message_id": message_id, "remoteJid": "5511987654321@s.whatsapp.net", "provider": "evolution", "data": data},
+        },
+    }
+
+
+def _bench(label: str, fn, number: int) -> float:
+    best = min(timeit.repeat(fn, number=number, repeat=5))
+    per_op_us = best / number * 1e6
+    print(f"  {label:<44} {per_op_us:8.2f} µs/op")
+    return per_op_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+    trusted = frozenset({"evolution-manager"})
+
+    for name, event in (("text", _evolution_event(media=False)), ("image", _evolution_event(media=True))):
+        wire = json.dumps(event, ensure_ascii=False)
+        print(f"\n{name}: {len(wire)} bytes")
+
+        base_dump = _bench("encode: json.dumps (before)", lambda: json.dumps(event, ensure_ascii=False), args.number)
+        new_dump = _bench("encode: codec.dumps (orjson)", lambda: codec.dumps(event), args.number)
+
+        base_parse = _bench(
+            "parse: json.loads + pydantic (before)",
+            lambda: EventEnvelopeModel.model_validate(json.loads(wire)),
+            args.number,
+        )
+        _bench("parse: codec + pydantic (untrusted)", lambda: parse_envelope(wire, trusted=frozenset()), args.number)
+        new_parse = _bench("parse: codec + trusted fast path", lambda: parse_envelope(wire, trusted=trusted), args.number)
+
+        print(f"  speedup encode x{base_dump / new_dump:.2f}, parse x{base_parse / new_parse:.2f}")
+
+
+if __name__ == "__main__":
+    main()
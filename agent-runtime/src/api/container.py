@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, fields
+from typing import Any
+
+from common.config.settings import get_settings
+from common.infrastructure.cache.redis_client import RedisClient
+from common.infrastructure.database.supabase_client import SupabaseDb
+from common.infrastructure.events.outbox import EventOutbox, OutboxRelay
+from common.infrastructure.idempotency.idempotency_store import IdempotencyStore
+from common.infrastructure.integrations.openai_resolver import OpenAIResolver
+from common.infrastructure.ratelimit.token_bucket import RedisTokenBucket
+from handlers.proactive_handler import ProactiveHandler
+from modules.centurion.handlers.config_handler import ConfigUpdateHandler
+from modules.centurion.handlers.debounce_handler import DebounceWorker
+from modules.centurion.handlers.message_handler import MessageHandler
+from modules.centurion.jobs.conversation_watchdog import ConversationWatchdog
+from modules.centurion.repository.config_repository import ConfigRepository
+from modules.centurion.repository.conversation_repository import ConversationRepository
+from modules.centurion.repository.debounce_store import DebounceStore
+from modules.centurion.repository.lead_repository import LeadRepository
+from modules.centurion.repository.message_repository import MessageRepository
+from modules.centurion.repository.touch_buffer import ContactTouchBuffer
+from modules.centurion.services.centurion_service import CenturionService
+from modules.followups.services.followup_service import FollowupService
+from modules.memory.adapters.knowledge_base_adapter import KnowledgeBaseAdapter
+from modules.memory.adapters.rag_adapter import RagAdapter
+from modules.memory.services.embedding_service import EmbeddingService
+from modules.memory.services.history_cache import ConversationHistoryCache
+from modules.memory.services.memory_cleanup import MemoryCleanupWorker
+from modules.memory.services.short_term_memory import ShortTermMemory
+
+
+@dataclass(frozen=True)
+class ServiceContainer:
+    """
+    Composition root: every repository, cache and client is built once here and handed to the
+    workers, so a cache added to any of them is shared by the whole process.
+    """
+
+    db: SupabaseDb
+    redis: RedisClient
+    history_cache: ConversationHistoryCache
+    touches: ContactTouchBuffer
+    lead_repo: LeadRepository
+    conv_repo: ConversationRepository
+    msg_repo: MessageRepository
+    config_repo: ConfigRepository
+    debounce: DebounceStore
+    idempotency: IdempotencyStore
+    outbox: EventOutbox
+    pacer: RedisTokenBucket | None
+    openai: OpenAIResolver
+    embeddings: EmbeddingService
+    short_term: ShortTermMemory
+    rag: RagAdapter
+    kb: KnowledgeBaseAdapter
+    followups: FollowupService
+    centurion: CenturionService
+    message_handler: MessageHandler
+    config_handler: ConfigUpdateHandler
+    debounce_worker: DebounceWorker
+    proactive_handler: ProactiveHandler
+    memory_cleanup: MemoryCleanupWorker
+    watchdog: ConversationWatchdog
+    outbox_relay: OutboxRelay
+
+    @classmethod
+    def build(cls, *, db: SupabaseDb, redis: RedisClient) -> ServiceContainer:
+        settings = get_settings()
+        history_cache = ConversationHistoryCache(redis=redis)
+        touches = ContactTouchBuffer(
+            db,
+            flush_interval_s=settings.touch_flush_interval_s,
+            batch_size=settings.touch_flush_batch_size,
+            max_pending=settings.touch_max_pending,
+        )
+        lead_repo = LeadRepository(db, touches=touches)
+        conv_repo = ConversationRepository(db, touches=touches)
+        msg_repo = MessageRepository(db, history_cache=history_cache)
+        config_repo = ConfigRepository(db)
+        debounce = DebounceStore(
+            redis=redis,
+            ttl_s=settings.debounce_state_ttl_s,
+            snapshot_every_s=settings.debounce_snapshot_interval_s,
+        )
+        idempotency = IdempotencyStore(
+            db,
+            redis=redis,
+            flush_interval_s=settings.idempotency_flush_interval_s,
+            batch_size=settings.idempotency_flush_batch_size,
+            max_pending=settings.idempotency_max_pending,
+            verify_window_s=settings.idempotency_verify_window_s,
+        )
+        outbox = EventOutbox()
+        pacer = (
+            RedisTokenBucket(
+                redis,
+                rate_per_s=settings.outbound_rate_per_s,
+                burst=settings.outbound_burst,
+                proactive_max_backlog_ms=settings.outbound_proactive_max_backlog_ms,
+                max_wait_s=settings.outbound_pacing_max_wait_s,
+                max_schedule_ahead_ms=settings.outbound_max_schedule_ahead_ms,
+            )
+            if settings.outbound_rate_per_s > 0
+            else None
+        )
+        openai = OpenAIResolver(db)
+        embeddings = EmbeddingService(db=db, redis=redis, openai=openai)
+        short_term = ShortTermMemory(db=db, redis=redis, history_cache=history_cache, msg_repo=msg_repo)
+        rag = RagAdapter(db=db, redis=redis, embeddings=embeddings)
+        kb = KnowledgeBaseAdapter(db=db, redis=redis, embeddings=embeddings)
+        followups = FollowupService(
+            db=db,
+            redis=redis,
+            lead_repo=lead_repo,
+            conv_repo=conv_repo,
+            msg_repo=msg_repo,
+            config_repo=config_repo,
+            short_term=short_term,
+            rag=rag,
+            kb=kb,
+            openai=openai,
+            pacer=pacer,
+        )
+        centurion = CenturionService(
+            db=db,
+            redis=redis,
+            lead_repo=lead_repo,
+            conv_repo=conv_repo,
+            debounce=debounce,
+            history_cache=history_cache,
+            msg_repo=msg_repo,
+            config_repo=config_repo,
+            idempotency=idempotency,
+            openai=openai,
+            short_term=short_term,
+            embeddings=embeddings,
+            rag=rag,
+            kb=kb,
+            followups=followups,
+            outbox=outbox,
+            pacer=pacer,
+        )
+        return cls(
+            db=db,
+            redis=redis,
+            history_cache=history_cache,
+            touches=touches,
+            lead_repo=lead_repo,
+            conv_repo=conv_repo,
+            msg_repo=msg_repo,
+            config_repo=config_repo,
+            debounce=debounce,
+            idempotency=idempotency,
+            outbox=outbox,
+            pacer=pacer,
+            openai=openai,
+            embeddings=embeddings,
+            short_term=short_term,
+            rag=rag,
+            kb=kb,
+            followups=followups,
+            centurion=centurion,
+            message_handler=MessageHandler(
+                db=db,
+                redis=redis,
+                conv_repo=conv_repo,
+                debounce=debounce,
+                msg_repo=msg_repo,
+                config_repo=config_repo,
+                idempotency=idempotency,
+                openai=openai,
+                outbox=outbox,
+            ),
+            config_handler=ConfigUpdateHandler(),
+            debounce_worker=DebounceWorker(
+                db=db, redis=redis, conv_repo=conv_repo, debounce=debounce, centurion=centurion
+            ),
+            proactive_handler=ProactiveHandler(db=db, redis=redis, followups=followups),
+            memory_cleanup=MemoryCleanupWorker(db=db, redis=redis, idempotency=idempotency),
+            watchdog=ConversationWatchdog(db=db, redis=redis, conv_repo=conv_repo, debounce=debounce),
+            outbox_relay=OutboxRelay(
+                db=db,
+                redis=redis,
+                outbox=outbox,
+                batch_size=settings.outbox_relay_batch_size,
+                poll_interval_s=settings.outbox_relay_poll_interval_s,
+            ),
+        )
+
+    def report(self) -> dict[str, Any]:
+        """Which container entries each component holds (one attribute level deep)."""
+        # Optional entries (e.g. pacer) may be None; id(None) would match every unset attribute.
+        names = {id(getattr(self, f.name)): f.name for f in fields(self) if getattr(self, f.name) is not None}
+        graph: dict[str, list[str]] = {}
+        for f in fields(self):
+            component = getattr(self, f.name)
+            attrs = getattr(component, "__dict__", None) or {}
+            graph[f.name] = sorted({names[id(v)] for v in attrs.values() if id(v) in names and v is not component})
+        holders = Counter(dep for deps in graph.values() for dep in deps)
+        return {
+            "components": {f.name: type(getattr(self, f.name)).__name__ for f in fields(self)},
+            "graph": graph,
+            # entry -> number of components holding the same instance
+            "shared": {name: n for name, n in sorted(holders.items()) if n > 1},
+        }
@@ -4,6 +4,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from api.container import ServiceContainer
 from api.routes.centurions import router as centurions_router
 from api.routes.health import router as health_router
 from api.routes.metrics import router as metrics_router
@@ -12,14 +13,11 @@ from common.config.settings import get_settings
 from common.infrastructure.cache.redis_client import RedisClient
 from common.infrastructure.database.connection_pool import ConnectionPool
 from common.infrastructure.database.supabase_client import SupabaseDb
+from common.infrastructure.messaging.dispatcher import KeyedDispatcher
 from common.infrastructure.messaging.pubsub import RedisPubSubSubscriber
+from common.infrastructure.messaging.streams import RedisStreamsConsumer
 from common.infrastructure.tracing.tracer import init_tracing
 from common.middleware.logging import LoggingMiddleware
-from handlers.proactive_handler import ProactiveHandler
-from modules.centurion.handlers.debounce_handler import DebounceWorker
-from modules.centurion.handlers.message_handler import MessageHandler
-from modules.centurion.jobs.conversation_watchdog import ConversationWatchdog
-from modules.memory.services.memory_cleanup import MemoryCleanupWorker
 
 logger = logging.getLogger(__name__)
 
@@ -38,40 +36,81 @@ async def lifespan(app: FastAPI):
     app.state.connection_mode = "disabled" if settings.disable_connections else "connecting"
 
     pool = None
+    replica_pool = None
     db = None
     redis = None
+    container = None
     pubsub = None
-    subscriber_task = debounce_task = proactive_task = cleanup_task = watchdog_task = None
+    streams = None
+    subscriber_task = streams_task = debounce_task = proactive_task = cleanup_task = watchdog_task = None
+    relay_task = None
 
     if not settings.disable_connections:
         try:
             pool = ConnectionPool(settings.supabase_db_url, min_size=settings.db_pool_min, max_size=settings.db_pool_max)
             await asyncio.wait_for(pool.start(), timeout=settings.connection_timeout_s)
-            db = SupabaseDb(pool)
-
+            replica_url = getattr(settings, "supabase_db_replica_url", None)
+            if replica_url:
+                replica_pool = ConnectionPool(
+                    replica_url,
+                    min_size=settings.db_replica_pool_min,
+                    max_size=settings.db_replica_pool_max,
+                    name="replica",
+                )
+                await asyncio.wait_for(replica_pool.start(), timeout=settings.connection_timeout_s)
             redis = RedisClient(settings.redis_url)
             await asyncio.wait_for(redis.connect(), timeout=settings.connection_timeout_s)
 
+            db = SupabaseDb(
+                pool,
+                replica=replica_pool,
+                redis=redis,
+                replica_max_lag_s=getattr(settings, "db_replica_max_lag_s", 2.0),
+                replica_lag_check_interval_s=getattr(settings, "db_replica_lag_check_interval_s", 1.0),
+                slow_query_ms=getattr(settings, "db_slow_query_ms", 500.0),
+                slow_query_sample_rate=getattr(settings, "db_slow_query_sample_rate", 1.0),
+            )
+
             app.state.pool = pool
             app.state.db = db
             app.state.redis = redis
             app.state.connection_mode = "connected"
 
-            pubsub = RedisPubSubSubscriber(redis)
-            message_handler = MessageHandler(db=db, redis=redis)
-            pubsub.register("message.received", message_handler.handle_message_received)
-
-            debounce_worker = DebounceWorker(db=db, redis=redis)
-            proactive_handler = ProactiveHandler(db=db, redis=redis)
-            memory_cleanup = MemoryCleanupWorker(db=db, redis=redis)
-            watchdog = ConversationWatchdog(db=db)
+            container = ServiceContainer.build(db=db, redis=redis)
+            app.state.container = container
+            logger.info("startup.container", extra={"extra": container.report()})
+
+            concurrency = getattr(settings, "event_dispatch_concurrency", 16)
+            queue_size = getattr(settings, "event_dispatch_queue_size", 1000)
+            pubsub = RedisPubSubSubscriber(
+                redis, dispatcher=KeyedDispatcher(name="pubsub", concurrency=concurrency, queue_size=queue_size)
+            )
+            # Cache invalidation must reach every replica, so it stays on pub/sub.
+            pubsub.register("config.updated", container.config_handler.handle_config_updated)
+            if getattr(settings, "event_transport", "pubsub") == "streams":
+                streams = RedisStreamsConsumer(
+                    redis,
+                    group=settings.event_stream_group,
+                    batch_size=settings.event_stream_batch_size,
+                    block_ms=settings.event_stream_block_ms,
+                    claim_idle_ms=settings.event_stream_claim_idle_ms,
+                    claim_interval_s=settings.event_stream_claim_interval_s,
+                    max_deliveries=settings.event_stream_max_deliveries,
+                    dispatcher=KeyedDispatcher(name="streams", concurrency=concurrency, queue_size=queue_size),
+                )
+                streams.register("message.received", container.message_handler.handle_message_received)
+            else:
+                pubsub.register("message.received", container.message_handler.handle_message_received)
 
             if not settings.disable_workers:
                 subscriber_task = asyncio.create_task(pubsub.run_forever())
-                debounce_task = asyncio.create_task(debounce_worker.run_forever())
-                proactive_task = asyncio.create_task(proactive_handler.run_forever())
-                cleanup_task = asyncio.create_task(memory_cleanup.run_forever())
-                watchdog_task = asyncio.create_task(watchdog.run_forever())
+                if streams:
+                    streams_task = asyncio.create_task(streams.run_forever())
+                debounce_task = asyncio.create_task(container.debounce_worker.run_forever())
+                proactive_task = asyncio.create_task(container.proactive_handler.run_forever())
+                cleanup_task = asyncio.create_task(container.memory_cleanup.run_forever())
+                watchdog_task = asyncio.create_task(container.watchdog.run_forever())
+                relay_task = asyncio.create_task(container.outbox_relay.run_forever())
         except Exception as e:
             app.state.connection_mode = "failed"
             app.state.connection_error_type = type(e).__name__
@@ -80,13 +119,29 @@ async def lifespan(app: FastAPI):
     try:
         yield
     finally:
-        for task in (subscriber_task, debounce_task, proactive_task, cleanup_task, watchdog_task):
+        for task in (
+            subscriber_task,
+            streams_task,
+            debounce_task,
+            proactive_task,
+            cleanup_task,
+            watchdog_task,
+            relay_task,
+        ):
             if task:
                 task.cancel()
         if pubsub:
             await pubsub.close()
+        if streams:
+            await streams.close()
+        if container:
+            # Write-behind idempotency rows still buffered in memory.
+            await container.idempotency.close()
+            await container.touches.close()
         if redis:
             await redis.close()
+        if replica_pool:
+            await replica_pool.close()
         if pool:
             await pool.close()
 
@@ -24,7 +24,8 @@ async def test_centurion(centurion_id: str, payload: TestCenturionRequest, reque
     if db is None or redis is None:
         raise HTTPException(status_code=503, detail="service not ready")
 
-    service = CenturionService(db=db, redis=redis)
+    container = getattr(request.app.state, "container", None)
+    service = container.centurion if container is not None else CenturionService(db=db, redis=redis)
     try:
         return await service.test_centurion(company_id=payload.company_id, centurion_id=centurion_id, message=payload.message)
     except ValueError as exc:
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import contextlib
+
 from agno.agent import Agent
 from agno.memory import MemoryManager
 
+from common.config.settings import get_settings
 from common.infrastructure.agno.storage import CoreAgnoDb, build_user_id
-from common.infrastructure.agno.summary import IncrementalSessionSummaryManager
 from common.infrastructure.database.supabase_client import SupabaseDb
 from common.infrastructure.integrations.openai_resolver import OpenAIResolved
 
@@ -12,9 +14,9 @@ from common.infrastructure.integrations.openai_resolver import OpenAIResolved
 class AgnoAgentFactory:
     """
     Builds Agno Agents configured with:
-    - Storage (core.conversations metadata)
-    - User memories (core.lead_memories with agno marker)
-    - Session summaries (stored in the session blob)
+    - Storage (core.agno_sessions)
+    - User memories from core.lead_memories; extracted by the configured MEMORY_ENGINE only
+    - Session summaries read from the session blob (written off the reply path by SessionSummarizer)
     """
 
     def __init__(self, *, db: SupabaseDb):
@@ -53,8 +55,6 @@ class AgnoAgentFactory:
             add_memories=True,
         )
 
-        summary_manager = IncrementalSessionSummaryManager(model=model)
-
         if tool_hooks is None:
             tool_hooks = self.default_tool_hooks()
 
@@ -64,11 +64,12 @@ class AgnoAgentFactory:
             session_id=conversation_id,
             db=self._agno_db,
             memory_manager=memory_manager,
-            enable_user_memories=True,
+            # One extraction pass per turn: with the "facts" engine the manager only reads memories.
+            enable_user_memories=get_settings().memory_engine == "agno",
             add_memories_to_context=True,
-            enable_session_summaries=True,
+            # No summary LLM call per turn: the existing summary is only injected into context.
+            enable_session_summaries=False,
             add_session_summary_to_context=True,
-            session_summary_manager=summary_manager,
             model=model,
             system_message=system_message,
             tools=tools or None,
@@ -84,6 +85,10 @@ class AgnoAgentFactory:
             store_events=False,
         )
 
+    def memory_snapshot(self, *, company_id: str, lead_id: str) -> contextlib.AbstractAsyncContextManager[None]:
+        """Wrap `agent.arun` in this so the run loads the lead's memories in one round trip."""
+        return self._agno_db.memory_snapshot([build_user_id(company_id=company_id, lead_id=lead_id)])
+
     def default_tool_hooks(self) -> list:
         from modules.tools.agno_hooks.audit_hooks import make_tool_audit_hook
         from modules.tools.agno_hooks.logging_hooks import tool_logging_hook
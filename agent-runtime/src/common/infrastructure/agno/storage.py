@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import contextlib
 import json
+import logging
 import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextvars import ContextVar
 from datetime import date, datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple, Union
 
@@ -9,8 +14,77 @@ from agno.db.base import AsyncBaseDb, SessionType
 from agno.db.schemas.memory import UserMemory
 from agno.session import AgentSession, Session
 
+from common.infrastructure.database.statements import STATEMENTS
 from common.infrastructure.database.supabase_client import SupabaseDb
 
+logger = logging.getLogger(__name__)
+
+# The legacy `conversations.metadata->agno_session` blob was copied here by 00084 and is no longer read.
+_GET_SESSION = STATEMENTS.register(
+    "agno_sessions.get",
+    """
+    select s.session || jsonb_strip_nulls(jsonb_build_object('summary', s.summary)) as agno_session
+    from core.agno_sessions s
+    where s.conversation_id=$1::uuid
+    """,
+    readonly=True,
+)
+
+_UPSERT_SESSION = STATEMENTS.register(
+    "agno_sessions.upsert",
+    """
+    insert into core.agno_sessions (conversation_id, company_id, session)
+    select c.id, c.company_id, $2::jsonb
+    from core.conversations c
+    where c.id=$1::uuid
+    on conflict (conversation_id) do update set
+      session=excluded.session,
+      updated_at=now()
+    """,
+)
+
+# Optional filters are null when unused, so every combination shares one prepared statement.
+_LIST_USER_MEMORIES = STATEMENTS.register(
+    "lead_memories.list_for_agno",
+    """
+    select id, summary, facts, qualification_context, created_at, last_updated_at
+    from core.lead_memories
+    where company_id=$1::uuid
+      and lead_id=$2::uuid
+      and ((coalesce(qualification_context, '{}'::jsonb) ? 'agno') or facts is not null)
+      and ($3::text is null or (qualification_context->'agno'->>'agent_id') = $3)
+      and ($4::text is null or (qualification_context->'agno'->>'team_id') = $4)
+      and ($5::text is null or summary ilike $5)
+      and ($6::text[] is null or (qualification_context->'agno'->'topics') ?| $6::text[])
+    order by last_updated_at desc nulls last, created_at desc
+    limit $7
+    """,
+)
+
+_LIST_USER_MEMORIES_BATCH = STATEMENTS.register(
+    "lead_memories.list_for_agno_batch",
+    """
+    select id, lead_id, summary, facts, qualification_context, created_at, last_updated_at
+    from (
+      select m.*,
+             row_number() over (
+               partition by m.lead_id
+               order by m.last_updated_at desc nulls last, m.created_at desc
+             ) as rn
+      from core.lead_memories m
+      join unnest($1::uuid[], $2::uuid[]) as k(lead_id, company_id)
+        on k.lead_id = m.lead_id and k.company_id = m.company_id
+      where ((coalesce(m.qualification_context, '{}'::jsonb) ? 'agno') or m.facts is not null)
+    ) ranked
+    where rn <= $3
+    order by lead_id, rn
+    """,
+)
+
+# Memories loaded by `CoreAgnoDb.memory_snapshot` for the current run, keyed by user_id. Tasks the run
+# spawns (Agno's memory extraction) copy the context and see the same dict.
+_memory_snapshot: ContextVar[Dict[str, List[UserMemory]] | None] = ContextVar("agno_memory_snapshot", default=None)
+
 
 class AgnoUserIdError(ValueError):
     pass
@@ -37,6 +111,10 @@ def parse_user_id(user_id: str) -> tuple[str | None, str]:
     return (None, user_id)
 
 
+# A lead's company never changes, so the mapping can be cached without invalidation.
+_LEAD_COMPANY_CACHE_MAX = 10_000
+
+
 def _epoch_s(dt: datetime | None) -> int | None:
     if not dt:
         return None
@@ -49,13 +127,53 @@ class CoreAgnoDb(AsyncBaseDb):
     """
     Minimal AsyncBaseDb implementation backed by Wolfgang core tables:
 
-    - Storage (sessions/state/summaries): `core.conversations.metadata->'agno_session'`
-    - User memories: `core.lead_memories` rows flagged via `qualification_context->'agno'`
+    - Storage (sessions/state/summaries): `core.agno_sessions` (one narrow row per conversation)
+    - User memories: `core.lead_memories` rows flagged via `qualification_context->'agno'`; reads also
+      return FactExtractor rows (`facts` set), so both memory engines feed the same context
     """
 
     def __init__(self, *, db: SupabaseDb):
         super().__init__(id="wolfgang-core-agnodb")
         self._db = db
+        self._lead_companies: OrderedDict[str, str] = OrderedDict()
+
+    # --- Lead -> company resolution ---
+    async def _resolve_user(self, user_id: str) -> tuple[str | None, str]:
+        company_id, lead_id = parse_user_id(user_id)
+        if company_id:
+            self._remember_company(lead_id, company_id)
+            return company_id, lead_id
+        resolved = await self.resolve_companies([lead_id])
+        return resolved.get(lead_id), lead_id
+
+    async def resolve_companies(self, lead_ids: List[str]) -> Dict[str, str]:
+        """Maps lead_id -> company_id, hitting `core.leads` once for all cache misses."""
+        out: Dict[str, str] = {}
+        missing: list[str] = []
+        for lead_id in dict.fromkeys(lead_ids):
+            cached = self._lead_companies.get(lead_id)
+            if cached:
+                self._lead_companies.move_to_end(lead_id)
+                out[lead_id] = cached
+            else:
+                missing.append(lead_id)
+
+        if missing:
+            rows = await self._db.fetch(
+                "select id, company_id from core.leads where id = any($1::uuid[])",
+                missing,
+            )
+            for r in rows or []:
+                if r.get("company_id"):
+                    out[str(r["id"])] = str(r["company_id"])
+                    self._remember_company(str(r["id"]), str(r["company_id"]))
+        return out
+
+    def _remember_company(self, lead_id: str, company_id: str) -> None:
+        self._lead_companies[lead_id] = company_id
+        self._lead_companies.move_to_end(lead_id)
+        while len(self._lead_companies) > _LEAD_COMPANY_CACHE_MAX:
+            self._lead_companies.popitem(last=False)
 
     # --- Schema version (no-op; schema managed by repo migrations) ---
     async def table_exists(self, table_name: str) -> bool:  # noqa: ARG002
@@ -69,17 +187,17 @@ class CoreAgnoDb(AsyncBaseDb):
 
     # --- Sessions (Agent) ---
     async def delete_session(self, session_id: str) -> bool:
-        res = await self._db.execute(
+        row = await self._db.fetchrow(
             """
-            update core.conversations
-            set metadata = coalesce(metadata, '{}'::jsonb) - 'agno_session',
-                updated_at=now()
-            where id=$1::uuid
-              and (coalesce(metadata, '{}'::jsonb) ? 'agno_session')
+            with deleted as (
+              delete from core.agno_sessions where conversation_id=$1::uuid returning 1
+            )
+            select count(*) as n from deleted
             """,
             session_id,
         )
-        return "UPDATE 0" not in str(res)
+        await self._db.note_write(session_id)
+        return bool(row and row.get("n"))
 
     async def delete_sessions(self, session_ids: List[str]) -> None:
         for sid in session_ids:
@@ -99,8 +217,10 @@ class CoreAgnoDb(AsyncBaseDb):
             return None
 
         row = await self._db.fetchrow(
-            "select metadata->'agno_session' as agno_session from core.conversations where id=$1::uuid",
+            _GET_SESSION,
             session_id,
+            readonly=True,
+            consistency_key=session_id,
         )
         if not row:
             return None
@@ -152,21 +272,16 @@ class CoreAgnoDb(AsyncBaseDb):
 
         await self._db.execute(
             """
-            update core.conversations
+            update core.agno_sessions
             set
-              metadata = jsonb_set(
-                coalesce(metadata, '{}'::jsonb),
-                '{agno_session,session_data,session_name}',
-                to_jsonb($2::text),
-                true
-              ),
+              session = jsonb_set(session, '{session_data,session_name}', to_jsonb($2::text), true),
               updated_at=now()
-            where id=$1::uuid
-              and (coalesce(metadata, '{}'::jsonb) ? 'agno_session')
+            where conversation_id=$1::uuid
             """,
             session_id,
             session_name,
         )
+        await self._db.note_write(session_id)
         return await self.get_session(session_id, session_type, deserialize=deserialize)
 
     async def upsert_session(
@@ -176,19 +291,18 @@ class CoreAgnoDb(AsyncBaseDb):
             return None
 
         data = session.to_dict()
-        # Keep storage bounded: we persist summary + session_state, but not runs history.
+        # Keep storage bounded: we persist session_state, but not runs history.
         data["runs"] = None
+        # The summary is owned by SessionSummarizer (background), so a run that loaded an older
+        # summary cannot overwrite a newer one.
+        stored = {k: v for k, v in data.items() if k != "summary"}
 
         await self._db.execute(
-            """
-            update core.conversations
-            set metadata = coalesce(metadata, '{}'::jsonb) || jsonb_build_object('agno_session', $2::jsonb),
-                updated_at=now()
-            where id=$1::uuid
-            """,
+            _UPSERT_SESSION,
             session.session_id,
-            json.dumps(data, ensure_ascii=False),
+            json.dumps(stored, ensure_ascii=False),
         )
+        await self._db.note_write(session.session_id)
 
         if not deserialize:
             return dict(data)
@@ -202,13 +316,11 @@ class CoreAgnoDb(AsyncBaseDb):
     async def delete_user_memory(self, memory_id: str, user_id: Optional[str] = None) -> None:
         if not user_id:
             return
-        company_id, lead_id = parse_user_id(user_id)
-        if not company_id:
-            row = await self._db.fetchrow("select company_id from core.leads where id=$1::uuid", lead_id)
-            company_id = str(row["company_id"]) if row and row.get("company_id") else None
+        company_id, lead_id = await self._resolve_user(user_id)
         if not company_id:
             return
 
+        self._drop_from_snapshot(user_id)
         await self._db.execute(
             """
             delete from core.lead_memories
@@ -221,19 +333,37 @@ class CoreAgnoDb(AsyncBaseDb):
         )
 
     async def delete_user_memories(self, memory_ids: List[str], user_id: Optional[str] = None) -> None:
+        if not user_id or not memory_ids:
+            return
+        company_id, lead_id = await self._resolve_user(user_id)
+        if not company_id:
+            return
+
+        ids: list[str] = []
         for mid in memory_ids:
             try:
-                await self.delete_user_memory(mid, user_id=user_id)
+                ids.append(str(uuid.UUID(str(mid))))
             except Exception:
                 continue
+        if not ids:
+            return
+
+        self._drop_from_snapshot(user_id)
+        await self._db.execute(
+            """
+            delete from core.lead_memories
+            where id = any($1::uuid[]) and company_id=$2::uuid and lead_id=$3::uuid
+              and (coalesce(qualification_context, '{}'::jsonb) ? 'agno')
+            """,
+            ids,
+            company_id,
+            lead_id,
+        )
 
     async def get_all_memory_topics(self, user_id: Optional[str] = None) -> List[str]:
         if not user_id:
             return []
-        company_id, lead_id = parse_user_id(user_id)
-        if not company_id:
-            row = await self._db.fetchrow("select company_id from core.leads where id=$1::uuid", lead_id)
-            company_id = str(row["company_id"]) if row and row.get("company_id") else None
+        company_id, lead_id = await self._resolve_user(user_id)
         if not company_id:
             return []
 
@@ -258,19 +388,16 @@ class CoreAgnoDb(AsyncBaseDb):
     ) -> Optional[Union[UserMemory, Dict[str, Any]]]:
         if not user_id:
             return None
-        company_id, lead_id = parse_user_id(user_id)
-        if not company_id:
-            row = await self._db.fetchrow("select company_id from core.leads where id=$1::uuid", lead_id)
-            company_id = str(row["company_id"]) if row and row.get("company_id") else None
+        company_id, lead_id = await self._resolve_user(user_id)
         if not company_id:
             return None
 
         row = await self._db.fetchrow(
             """
-            select id, summary, qualification_context, created_at, last_updated_at
+            select id, summary, facts, qualification_context, created_at, last_updated_at
             from core.lead_memories
             where id=$1::uuid and company_id=$2::uuid and lead_id=$3::uuid
-              and (coalesce(qualification_context, '{}'::jsonb) ? 'agno')
+              and ((coalesce(qualification_context, '{}'::jsonb) ? 'agno') or facts is not null)
             """,
             memory_id,
             company_id,
@@ -297,47 +424,27 @@ class CoreAgnoDb(AsyncBaseDb):
         if not user_id:
             return []
 
-        company_id, lead_id = parse_user_id(user_id)
-        if not company_id:
-            row = await self._db.fetchrow("select company_id from core.leads where id=$1::uuid", lead_id)
-            company_id = str(row["company_id"]) if row and row.get("company_id") else None
+        # Agno's own reads pass only the user_id; those are served by the run's snapshot when there is one.
+        snapshot = _memory_snapshot.get()
+        filtered = agent_id or team_id or topics or search_content or limit
+        if snapshot is not None and user_id in snapshot and not filtered:
+            memories = list(snapshot[user_id])
+            return memories if deserialize else [m.to_dict() for m in memories]
+
+        company_id, lead_id = await self._resolve_user(user_id)
         if not company_id:
             return []
 
-        where = [
-            "company_id=$1::uuid",
-            "lead_id=$2::uuid",
-            "(coalesce(qualification_context, '{}'::jsonb) ? 'agno')",
-        ]
-        args: list[Any] = [company_id, lead_id]
-
-        if agent_id:
-            where.append("(qualification_context->'agno'->>'agent_id') = $3")
-            args.append(agent_id)
-        if team_id:
-            where.append(f"(qualification_context->'agno'->>'team_id') = ${len(args) + 1}")
-            args.append(team_id)
-        if search_content:
-            where.append(f"(summary ilike ${len(args) + 1})")
-            args.append(f"%{search_content}%")
-
-        # Topic filtering: require that at least one topic matches.
-        if topics:
-            where.append(
-                f"(qualification_context->'agno'->'topics') ?| ${len(args) + 1}::text[]"
-            )
-            args.append(list(topics))
-
-        lim = max(1, int(limit or 50))
+        # Topic filtering: at least one topic must match.
         rows = await self._db.fetch(
-            f"""
-            select id, summary, qualification_context, created_at, last_updated_at
-            from core.lead_memories
-            where {' and '.join(where)}
-            order by last_updated_at desc nulls last, created_at desc
-            limit {lim}
-            """,
-            *args,
+            _LIST_USER_MEMORIES,
+            company_id,
+            lead_id,
+            agent_id or None,
+            team_id or None,
+            f"%{search_content}%" if search_content else None,
+            list(topics) if topics else None,
+            max(1, int(limit or 50)),
         )
 
         memories = [self._row_to_user_memory(r, user_id=user_id) for r in rows or []]
@@ -345,6 +452,66 @@ class CoreAgnoDb(AsyncBaseDb):
             return [m.to_dict() for m in memories]
         return memories
 
+    async def get_user_memories_batch(
+        self,
+        user_ids: List[str],
+        *,
+        limit_per_user: int = 50,
+    ) -> Dict[str, List[UserMemory]]:
+        """Memories for several users in one query (newest first, `limit_per_user` each), keyed by user_id."""
+        by_lead: dict[str, str] = {}
+        missing_company: list[str] = []
+        for user_id in user_ids:
+            company_id, lead_id = parse_user_id(user_id)
+            by_lead[lead_id] = user_id
+            if company_id:
+                self._remember_company(lead_id, company_id)
+            else:
+                missing_company.append(lead_id)
+
+        companies = await self.resolve_companies(missing_company) if missing_company else {}
+        pairs = [(lead_id, self._lead_companies.get(lead_id) or companies.get(lead_id)) for lead_id in by_lead]
+        pairs = [(lead_id, company_id) for lead_id, company_id in pairs if company_id]
+        out: Dict[str, List[UserMemory]] = {user_id: [] for user_id in user_ids}
+        if not pairs:
+            return out
+
+        rows = await self._db.fetch(
+            _LIST_USER_MEMORIES_BATCH,
+            [lead_id for lead_id, _ in pairs],
+            [company_id for _, company_id in pairs],
+            max(1, int(limit_per_user)),
+        )
+        for r in rows or []:
+            user_id = by_lead.get(str(r["lead_id"]))
+            if user_id is not None:
+                out[user_id].append(self._row_to_user_memory(r, user_id=user_id))
+        return out
+
+    @contextlib.asynccontextmanager
+    async def memory_snapshot(self, user_ids: List[str]) -> AsyncIterator[None]:
+        """
+        Loads the users' memories once and serves plain `get_user_memories(user_id=...)` calls from
+        that snapshot inside the block. Agno reads the same list for the context and again around
+        memory extraction; a write drops the user from the snapshot so later reads see it.
+        """
+        snapshot: Dict[str, List[UserMemory]] | None = None
+        try:
+            snapshot = await self.get_user_memories_batch(user_ids)
+        except Exception:
+            # Agno falls back to its own per-call reads.
+            logger.warning("agno.memory_snapshot_failed", extra={"extra": {"users": len(user_ids)}})
+        token = _memory_snapshot.set(snapshot)
+        try:
+            yield
+        finally:
+            _memory_snapshot.reset(token)
+
+    def _drop_from_snapshot(self, user_id: str) -> None:
+        snapshot = _memory_snapshot.get()
+        if snapshot is not None:
+            snapshot.pop(user_id, None)
+
     async def get_user_memory_stats(
         self,
         limit: Optional[int] = None,  # noqa: ARG002
@@ -360,10 +527,7 @@ class CoreAgnoDb(AsyncBaseDb):
         if not user_id:
             return None
 
-        company_id, lead_id = parse_user_id(user_id)
-        if not company_id:
-            row = await self._db.fetchrow("select company_id from core.leads where id=$1::uuid", lead_id)
-            company_id = str(row["company_id"]) if row and row.get("company_id") else None
+        company_id, lead_id = await self._resolve_user(user_id)
         if not company_id:
             return None
 
@@ -373,6 +537,7 @@ class CoreAgnoDb(AsyncBaseDb):
         except Exception:
             memory_id = str(uuid.uuid4())
         memory.memory_id = memory_id
+        self._drop_from_snapshot(user_id)
 
         agno_ctx = {
             "agno": {
@@ -407,10 +572,20 @@ class CoreAgnoDb(AsyncBaseDb):
     def _row_to_user_memory(self, row: Any, *, user_id: str) -> UserMemory:
         ctx = dict(row.get("qualification_context") or {})
         agno = dict(ctx.get("agno") or {})
+        topics = list(agno.get("topics") or [])
+        if not topics:
+            # FactExtractor rows: the fact category doubles as the topic.
+            facts = row.get("facts")
+            if isinstance(facts, str):
+                try:
+                    facts = json.loads(facts)
+                except Exception:
+                    facts = None
+            topics = [str(f["category"]) for f in facts or [] if isinstance(f, dict) and f.get("category")]
         return UserMemory(
             memory=str(row.get("summary") or ""),
             memory_id=str(row.get("id")),
-            topics=list(agno.get("topics") or []),
+            topics=topics,
             user_id=user_id,
             input=agno.get("input"),
             feedback=agno.get("feedback"),
@@ -20,8 +20,8 @@ class IncrementalSessionSummaryManager:
     A SessionSummaryManager variant that keeps summaries coherent even when we don't
     persist the full session runs history.
 
-    We store only session state + the latest summary in `core.conversations.metadata->agno_session`.
-    At each run, we update the summary using:
+    We store only session state + the latest summary in `core.agno_sessions`.
+    At each summarization, we update the summary using:
     - previous summary (if any)
     - messages from the current run window
     """
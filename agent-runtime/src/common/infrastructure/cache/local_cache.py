@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+from common.infrastructure.metrics.prometheus import LOCAL_CACHE_INVALIDATIONS_TOTAL, LOCAL_CACHE_REQUESTS_TOTAL
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LocalTtlCache(Generic[K, V]):
+    """
+    Per-process TTL cache for rarely changing rows.
+
+    Concurrent misses on the same key share one load (per-key lock + re-check, as in
+    CompanyIntegrationResolver). `invalidate*` bumps a generation so a load that started before
+    the invalidation does not store its (possibly stale) result. Loader exceptions are not cached;
+    `ttl_for` lets a caller keep some values (e.g. negative results) for less than `ttl_s`.
+    """
+
+    def __init__(self, name: str, *, ttl_s: float, max_entries: int = 10_000):
+        self.name = name
+        self._ttl_s = max(0.0, float(ttl_s))
+        self._max_entries = max(1, int(max_entries))
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._locks: dict[K, asyncio.Lock] = {}
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _fresh(self, key: K) -> tuple[bool, V | None]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            return False, None
+        return True, entry[1]
+
+    def _lock_for(self, key: K) -> asyncio.Lock:
+        if key not in self._locks:
+            if len(self._locks) >= self._max_entries:
+                for k in [k for k, lock in self._locks.items() if not lock.locked()]:
+                    del self._locks[k]
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    async def get_or_load(
+        self,
+        key: K,
+        loader: Callable[[], Awaitable[V]],
+        *,
+        ttl_for: Callable[[V], float] | None = None,
+    ) -> V:
+        found, value = self._fresh(key)
+        if found:
+            LOCAL_CACHE_REQUESTS_TOTAL.labels(cache=self.name, result="hit").inc()
+            return value  # type: ignore[return-value]
+
+        async with self._lock_for(key):
+            found, value = self._fresh(key)
+            if found:
+                LOCAL_CACHE_REQUESTS_TOTAL.labels(cache=self.name, result="hit").inc()
+                return value  # type: ignore[return-value]
+
+            LOCAL_CACHE_REQUESTS_TOTAL.labels(cache=self.name, result="miss").inc()
+            generation = self._generation
+            loaded = await loader()
+            ttl_s = min(self._ttl_s, ttl_for(loaded)) if ttl_for else self._ttl_s
+            if generation == self._generation and ttl_s > 0:
+                self._entries[key] = (time.monotonic() + ttl_s, loaded)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+            return loaded
+
+    def invalidate(self, key: K) -> None:
+        self._generation += 1
+        if self._entries.pop(key, None) is not None:
+            LOCAL_CACHE_INVALIDATIONS_TOTAL.labels(cache=self.name).inc()
+
+    def invalidate_where(self, predicate: Callable[[K], bool]) -> int:
+        self._generation += 1
+        stale = [k for k in self._entries if predicate(k)]
+        for k in stale:
+            self._entries.pop(k, None)
+        if stale:
+            LOCAL_CACHE_INVALIDATIONS_TOTAL.labels(cache=self.name).inc(len(stale))
+        return len(stale)
+
+    def clear(self) -> int:
+        return self.invalidate_where(lambda _k: True)
@@ -53,6 +53,13 @@ class RedisClient:
     async def publish(self, channel: str, message: str) -> None:
         await self.client.publish(channel, message)
 
+    async def publish_many(self, messages: list[tuple[str, str]]) -> None:
+        """Publishes (channel, message) pairs in order, in one round trip."""
+        async with self.client.pipeline(transaction=False) as pipe:
+            for channel, message in messages:
+                pipe.publish(channel, message)
+            await pipe.execute()
+
     async def subscribe(self, channel: str, handler: Callable[[str], Awaitable[None]]):
         pubsub = self.client.pubsub()
         await pubsub.subscribe(channel)
@@ -1,8 +1,13 @@
 import asyncpg
 
+from common.infrastructure.metrics.prometheus import DB_POOL_CONNECTIONS
+
+from .statements import STATEMENTS
+
 
 class ConnectionPool:
-    def __init__(self, dsn: str, *, min_size: int = 1, max_size: int = 5):
+    def __init__(self, dsn: str, *, min_size: int = 1, max_size: int = 5, name: str = "primary"):
+        self.name = name
         self._dsn = dsn
         self._min_size = min_size
         self._max_size = max_size
@@ -11,7 +16,16 @@ class ConnectionPool:
     async def start(self) -> None:
         if self._pool:
             return
-        self._pool = await asyncpg.create_pool(dsn=self._dsn, min_size=self._min_size, max_size=self._max_size)
+        self._pool = await asyncpg.create_pool(
+            dsn=self._dsn, min_size=self._min_size, max_size=self._max_size, init=self._init_connection
+        )
+        # Read at scrape time, so saturation is visible without a poller.
+        for state in ("open", "idle", "in_use", "max"):
+            DB_POOL_CONNECTIONS.labels(pool=self.name, state=state).set_function(lambda state=state: self.stats()[state])
+
+    async def _init_connection(self, conn: asyncpg.Connection) -> None:
+        # A replica only ever runs read-only statements.
+        await STATEMENTS.warm(conn, readonly_only=self.name != "primary")
 
     @property
     def pool(self) -> asyncpg.Pool:
@@ -19,8 +33,14 @@ class ConnectionPool:
             raise RuntimeError("ConnectionPool not started")
         return self._pool
 
+    def stats(self) -> dict[str, int]:
+        if not self._pool:
+            return {"open": 0, "idle": 0, "in_use": 0, "max": self._max_size}
+        open_ = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        return {"open": open_, "idle": idle, "in_use": open_ - idle, "max": self._max_size}
+
     async def close(self) -> None:
         if self._pool:
             await self._pool.close()
             self._pool = None
-
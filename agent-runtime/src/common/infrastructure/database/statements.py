@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import logging
+import weakref
+from typing import Any
+
+from common.infrastructure.metrics.prometheus import DB_REGISTERED_STATEMENTS, DB_STATEMENT_CACHE_TOTAL
+
+logger = logging.getLogger(__name__)
+
+
+class Statement(str):
+    """
+    SQL text with a registry name. Being a `str`, it also works on raw connections (e.g. inside
+    `SupabaseDb.transaction()`), where asyncpg's per-connection cache keys on the text.
+    """
+
+    name: str
+    readonly: bool
+
+    def __new__(cls, name: str, sql: str, *, readonly: bool = False) -> Statement:
+        stmt = super().__new__(cls, sql)
+        stmt.name = name
+        stmt.readonly = readonly
+        return stmt
+
+
+def _unwrap(conn: Any) -> Any:
+    # `pool.acquire()` hands out a PoolConnectionProxy; the `init` hook gets the raw Connection.
+    return getattr(conn, "_con", None) or conn
+
+
+class StatementRegistry:
+    """
+    Named statements, prepared once per pool connection.
+
+    Repositories register their hot queries at import time; `warm` (the pool `init` hook) prepares
+    them on every new connection and `prepared` hands back the connection's PreparedStatement,
+    preparing lazily on a miss. Prepared statements are keyed by the underlying asyncpg connection
+    (pids are only unique per server, and the primary and replica pools share this registry) and
+    dropped when the connection closes. Dynamic SQL should be registered as a fixed set of variants instead of
+    being formatted per call.
+    """
+
+    def __init__(self) -> None:
+        self._statements: dict[str, Statement] = {}
+        self._prepared: weakref.WeakKeyDictionary[Any, dict[str, Any]] = weakref.WeakKeyDictionary()
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    def register(self, name: str, sql: str, *, readonly: bool = False) -> Statement:
+        existing = self._statements.get(name)
+        if existing is not None:
+            if str(existing) != sql:
+                raise ValueError(f"Statement {name!r} already registered with different SQL")
+            return existing
+        stmt = Statement(name, sql, readonly=readonly)
+        self._statements[name] = stmt
+        return stmt
+
+    async def warm(self, conn: Any, *, readonly_only: bool = False) -> None:
+        raw = _unwrap(conn)
+        by_name: dict[str, Any] = {}
+        self._prepared[raw] = by_name
+        conn.add_termination_listener(lambda _conn: self._prepared.pop(raw, None))
+        for stmt in list(self._statements.values()):
+            if readonly_only and not stmt.readonly:
+                continue
+            try:
+                by_name[stmt.name] = await conn.prepare(stmt)
+            except Exception as e:
+                # Left to be prepared (and fail loudly) on first use.
+                logger.warning(
+                    "db.statement_prepare_failed",
+                    extra={"extra": {"statement": stmt.name, "error_type": type(e).__name__}},
+                )
+
+    async def prepared(self, conn: Any, stmt: Statement) -> Any:
+        by_name = self._prepared.setdefault(_unwrap(conn), {})
+        prepared = by_name.get(stmt.name)
+        if prepared is not None:
+            DB_STATEMENT_CACHE_TOTAL.labels(result="hit").inc()
+            return prepared
+        DB_STATEMENT_CACHE_TOTAL.labels(result="miss").inc()
+        prepared = await conn.prepare(stmt)
+        by_name[stmt.name] = prepared
+        return prepared
+
+    def forget(self, conn: Any, stmt: Statement) -> None:
+        DB_STATEMENT_CACHE_TOTAL.labels(result="invalidated").inc()
+        self._prepared.get(_unwrap(conn), {}).pop(stmt.name, None)
+
+
+STATEMENTS = StatementRegistry()
+DB_REGISTERED_STATEMENTS.set_function(lambda: len(STATEMENTS))
@@ -1,30 +1,304 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from collections import OrderedDict
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import Any, AsyncIterator
 
+from asyncpg.exceptions import InvalidCachedStatementError, InvalidSQLStatementNameError
+
+from common.config.logging import _redact
+from common.infrastructure.cache.redis_client import RedisClient
+from common.infrastructure.metrics.prometheus import (
+    DB_POOL_ACQUIRE_SECONDS,
+    DB_POOL_WAITERS,
+    DB_QUERY_SECONDS,
+    DB_READ_ROUTES_TOTAL,
+    DB_REPLICA_LAG_SECONDS,
+    DB_SLOW_QUERIES_TOTAL,
+    DB_STATEMENT_CACHE_TOTAL,
+)
+
 from .connection_pool import ConnectionPool
+from .statements import STATEMENTS, Statement
+
+logger = logging.getLogger(__name__)
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_VERB_RE = re.compile(r"^\s*\(?\s*([a-z]+)")
+_TARGET_RE = re.compile(r"\b(?:from|into|update|join)\s+([a-z_][\w.]*)")
+_MAX_SQL_CHARS = 500
+_MAX_ARG_CHARS = 64
+_MAX_TRACKED_WRITES = 50_000
+_WRITE_MARKER_PREFIX = "rw:"
+
+# 0 when the replica has replayed everything it received (an idle primary would otherwise look
+# lagged), or when the "replica" URL points at a primary.
+_REPLICA_LAG_SQL = """
+select case
+  when not pg_is_in_recovery() or pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() then 0
+  else coalesce(extract(epoch from now() - pg_last_xact_replay_timestamp()), 0)
+end::float8 as lag_s
+"""
+
+
+@lru_cache(maxsize=2048)
+def query_label(query: str) -> str:
+    """Statement fingerprint used when a call has no explicit label, e.g. `select:core.leads`."""
+    sql = _COMMENT_RE.sub(" ", query).lower()
+    verb = _VERB_RE.match(sql)
+    target = _TARGET_RE.search(sql)
+    label = verb.group(1) if verb else "query"
+    return f"{label}:{target.group(1)}" if target else label
+
+
+def _arg_preview(value: Any) -> Any:
+    # JSON text parameters are decoded so `_redact` can mask secret keys inside them.
+    if isinstance(value, str) and value[:1] in ("{", "["):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+    if isinstance(value, str) and len(value) > _MAX_ARG_CHARS:
+        return f"{value[:_MAX_ARG_CHARS]}…(+{len(value) - _MAX_ARG_CHARS})"
+    if isinstance(value, (list, tuple)) and len(value) > 10:
+        return [*value[:10], f"…(+{len(value) - 10})"]
+    return value
+
+
+async def _call_prepared(prepared: Any, method: str, args: tuple[Any, ...]) -> Any:
+    if method == "execute":
+        await prepared.fetch(*args)
+        return prepared.get_statusmsg()
+    return await getattr(prepared, method)(*args)
 
 
 class SupabaseDb:
-    def __init__(self, pool: ConnectionPool):
+    """
+    asyncpg pool wrapper. `query` may be a registered `Statement` (run through the connection's
+    prepared statement) or plain SQL. Every call is timed per `label` (explicit, the statement
+    name, or `query_label(query)`): pool wait and execution go to separate histograms, and calls
+    slower than `slow_query_ms` in total are logged (sampled by `slow_query_sample_rate`) with
+    truncated, redacted arguments.
+
+    With a `replica` pool, `fetch`/`fetchrow` calls marked `readonly=True` go to it while its
+    measured lag is at most `replica_max_lag_s`. Read-your-writes: a read with a
+    `consistency_key` stays on the primary if `note_write(key)` was called for that key within
+    the lag budget. Writers and readers of a conversation can be different replicas (stream
+    consumers, debounce worker), so the marker is a Redis key `rw:{key}` expiring with the budget;
+    a local copy saves the round trip for same-process reads. Without `redis` the marker is
+    per-process only. Replica and marker errors fall back to the primary.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        *,
+        replica: ConnectionPool | None = None,
+        redis: RedisClient | None = None,
+        replica_max_lag_s: float = 2.0,
+        replica_lag_check_interval_s: float = 1.0,
+        slow_query_ms: float = 500.0,
+        slow_query_sample_rate: float = 1.0,
+    ):
         self._pool = pool
+        self._replica = replica
+        self._redis = redis
+        self._replica_max_lag_s = max(0.0, float(replica_max_lag_s))
+        self._lag_check_interval_s = max(0.1, float(replica_lag_check_interval_s))
+        # A write older than this is visible on any replica we are still willing to read from.
+        self._write_window_s = self._replica_max_lag_s + self._lag_check_interval_s
+        self._replica_lag_s: float | None = None
+        self._lag_checked_at = float("-inf")
+        self._lag_lock = asyncio.Lock()
+        self._writes: OrderedDict[str, float] = OrderedDict()
+        self._slow_query_s = max(0.0, float(slow_query_ms)) / 1000.0
+        self._slow_query_sample_rate = min(1.0, max(0.0, float(slow_query_sample_rate)))
+
+    @asynccontextmanager
+    async def _acquire(self, label: str, pool: ConnectionPool | None = None) -> AsyncIterator[tuple[Any, float]]:
+        started = time.perf_counter()
+        DB_POOL_WAITERS.inc()
+        acquired = False
+        try:
+            async with (pool or self._pool).pool.acquire() as conn:
+                acquired = True
+                DB_POOL_WAITERS.dec()
+                waited = time.perf_counter() - started
+                DB_POOL_ACQUIRE_SECONDS.labels(label=label).observe(waited)
+                yield conn, waited
+        finally:
+            if not acquired:
+                DB_POOL_WAITERS.dec()
+
+    async def note_write(self, key: str) -> None:
+        """Marks `key` (e.g. a conversation id) as just written, pinning its reads to the primary."""
+        if self._replica is None:
+            return
+        if self._redis is not None:
+            try:
+                await self._redis.client.set(
+                    f"{_WRITE_MARKER_PREFIX}{key}", "1", px=max(1, int(self._write_window_s * 1000))
+                )
+            except Exception as e:
+                logger.warning("db.write_marker_failed", extra={"extra": {"error_type": type(e).__name__}})
+        now = time.monotonic()
+        self._writes[key] = now
+        self._writes.move_to_end(key)
+        while self._writes:
+            oldest_key, oldest_at = next(iter(self._writes.items()))
+            if now - oldest_at < self._write_window_s and len(self._writes) <= _MAX_TRACKED_WRITES:
+                break
+            self._writes.pop(oldest_key)
+
+    async def _refresh_replica_lag(self) -> None:
+        assert self._replica is not None
+        try:
+            async with self._replica.pool.acquire() as conn:
+                row = await conn.fetchrow(_REPLICA_LAG_SQL)
+            self._replica_lag_s = float(row["lag_s"])
+        except Exception as e:
+            self._replica_lag_s = None
+            logger.warning("db.replica_lag_check_failed", extra={"extra": {"error_type": type(e).__name__}})
+        self._lag_checked_at = time.monotonic()
+        DB_REPLICA_LAG_SECONDS.set(-1 if self._replica_lag_s is None else self._replica_lag_s)
+
+    async def _read_target(self, consistency_key: str | None) -> ConnectionPool | None:
+        """The replica pool when it can serve this read, else None (primary)."""
+        assert self._replica is not None
+        if consistency_key:
+            written_at = self._writes.get(consistency_key)
+            if written_at is not None and time.monotonic() - written_at < self._write_window_s:
+                DB_READ_ROUTES_TOTAL.labels(target="primary", reason="recent_write").inc()
+                return None
+            if self._redis is not None:
+                try:
+                    marked = await self._redis.client.exists(f"{_WRITE_MARKER_PREFIX}{consistency_key}")
+                except Exception:
+                    DB_READ_ROUTES_TOTAL.labels(target="primary", reason="marker_error").inc()
+                    return None
+                if marked:
+                    DB_READ_ROUTES_TOTAL.labels(target="primary", reason="recent_write").inc()
+                    return None
+        if time.monotonic() - self._lag_checked_at >= self._lag_check_interval_s and not self._lag_lock.locked():
+            async with self._lag_lock:
+                await self._refresh_replica_lag()
+        if self._replica_lag_s is None or self._replica_lag_s > self._replica_max_lag_s:
+            DB_READ_ROUTES_TOTAL.labels(target="primary", reason="lag").inc()
+            return None
+        DB_READ_ROUTES_TOTAL.labels(target="replica", reason="ok").inc()
+        return self._replica
 
-    async def fetchrow(self, query: str, *args: Any):
-        async with self._pool.pool.acquire() as conn:
-            return await conn.fetchrow(query, *args)
+    async def _read(
+        self, method: str, query: str, args: tuple[Any, ...], label: str | None, consistency_key: str | None
+    ) -> Any:
+        if self._replica is None:
+            return await self._run(method, query, args, label)
+        replica = await self._read_target(consistency_key)
+        if replica is None:
+            return await self._run(method, query, args, label)
+        try:
+            return await self._run(method, query, args, label, pool=replica)
+        except Exception as e:
+            # Until the next lag check succeeds, reads stay on the primary.
+            self._replica_lag_s = None
+            DB_REPLICA_LAG_SECONDS.set(-1)
+            DB_READ_ROUTES_TOTAL.labels(target="primary", reason="replica_error").inc()
+            logger.warning(
+                "db.replica_read_failed",
+                extra={"extra": {"label": label or query_label(query), "error_type": type(e).__name__}},
+            )
+            return await self._run(method, query, args, label)
 
-    async def fetch(self, query: str, *args: Any):
-        async with self._pool.pool.acquire() as conn:
-            return await conn.fetch(query, *args)
+    async def _run(
+        self, method: str, query: str, args: tuple[Any, ...], label: str | None, *, pool: ConnectionPool | None = None
+    ) -> Any:
+        if isinstance(query, Statement):
+            label = label or query.name
+        else:
+            label = label or query_label(query)
+            DB_STATEMENT_CACHE_TOTAL.labels(result="adhoc").inc()
+        async with self._acquire(label, pool) as (conn, waited):
+            started = time.perf_counter()
+            result = "error"
+            try:
+                if isinstance(query, Statement):
+                    out = await self._run_prepared(conn, method, query, args)
+                else:
+                    out = await getattr(conn, method)(query, *args)
+                result = "ok"
+                return out
+            finally:
+                elapsed = time.perf_counter() - started
+                DB_QUERY_SECONDS.labels(label=label, result=result).observe(elapsed)
+                if waited + elapsed >= self._slow_query_s > 0:
+                    self._slow_query(label, query, args, waited=waited, elapsed=elapsed, result=result)
 
-    async def execute(self, query: str, *args: Any) -> str:
-        async with self._pool.pool.acquire() as conn:
-            return await conn.execute(query, *args)
+    async def _run_prepared(self, conn: Any, method: str, stmt: Statement, args: tuple[Any, ...]) -> Any:
+        prepared = await STATEMENTS.prepared(conn, stmt)
+        try:
+            return await _call_prepared(prepared, method, args)
+        except (InvalidCachedStatementError, InvalidSQLStatementNameError):
+            # Schema changed under the plan (migration) or the server dropped it; the statement did
+            # not run, so re-preparing once is safe.
+            STATEMENTS.forget(conn, stmt)
+            return await _call_prepared(await STATEMENTS.prepared(conn, stmt), method, args)
+
+    def _slow_query(
+        self, label: str, query: str, args: tuple[Any, ...], *, waited: float, elapsed: float, result: str
+    ) -> None:
+        DB_SLOW_QUERIES_TOTAL.labels(label=label).inc()
+        if random.random() >= self._slow_query_sample_rate:
+            return
+        logger.warning(
+            "db.slow_query",
+            extra={
+                "extra": {
+                    "label": label,
+                    "result": result,
+                    "duration_ms": round((waited + elapsed) * 1000, 1),
+                    "acquire_ms": round(waited * 1000, 1),
+                    "query": " ".join(query.split())[:_MAX_SQL_CHARS],
+                    "args": _redact({f"${i}": _arg_preview(a) for i, a in enumerate(args, start=1)}),
+                }
+            },
+        )
+
+    async def fetchrow(
+        self,
+        query: str,
+        *args: Any,
+        label: str | None = None,
+        readonly: bool = False,
+        consistency_key: str | None = None,
+    ):
+        if readonly:
+            return await self._read("fetchrow", query, args, label, consistency_key)
+        return await self._run("fetchrow", query, args, label)
+
+    async def fetch(
+        self,
+        query: str,
+        *args: Any,
+        label: str | None = None,
+        readonly: bool = False,
+        consistency_key: str | None = None,
+    ):
+        if readonly:
+            return await self._read("fetch", query, args, label, consistency_key)
+        return await self._run("fetch", query, args, label)
+
+    async def execute(self, query: str, *args: Any, label: str | None = None) -> str:
+        return await self._run("execute", query, args, label)
 
     @asynccontextmanager
-    async def transaction(self) -> AsyncIterator[Any]:
-        async with self._pool.pool.acquire() as conn:
+    async def transaction(self, *, label: str = "transaction") -> AsyncIterator[Any]:
+        async with self._acquire(label) as (conn, _):
             async with conn.transaction():
                 yield conn
-
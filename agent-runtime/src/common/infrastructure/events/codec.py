@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import orjson
+
+
+def dumps(obj: Any) -> str:
+    try:
+        return orjson.dumps(obj).decode("utf-8")
+    except TypeError:
+        # Types orjson does not serialize natively (e.g. ints beyond 64 bits).
+        return json.dumps(obj, ensure_ascii=False)
+
+
+def loads(raw: str | bytes) -> Any:
+    return orjson.loads(raw)
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-import json
 import uuid
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Any, Mapping
 
 from pydantic import BaseModel, Field, ValidationError
 
+from common.config.settings import get_settings
+from common.infrastructure.events import codec
+
 
 class EventEnvelopeModel(BaseModel):
     id: str = Field(min_length=8)
@@ -45,18 +48,63 @@ class EventParseError(ValueError):
         self.raw = raw
 
 
-def parse_envelope(raw: str | bytes | Mapping[str, Any], *, expected_type: str | None = None) -> EventEnvelope:
+def _fast_envelope(obj: dict[str, Any]) -> EventEnvelope | None:
+    """Cheap structural checks for envelopes from trusted producers; None falls back to Pydantic."""
+    try:
+        fields = (obj["id"], obj["type"], obj["company_id"], obj["source"], obj["correlation_id"])
+        version, occurred_at, payload = obj["version"], obj["occurred_at"], obj.get("payload") or {}
+        causation_id = obj.get("causation_id")
+    except KeyError:
+        return None
+    if not all(isinstance(f, str) for f in fields) or not isinstance(payload, dict):
+        return None
+    event_id, event_type, company_id, source, correlation_id = fields
+    if len(event_id) < 8 or not event_type or len(company_id) < 3 or not source or len(correlation_id) < 8:
+        return None
+    if type(version) is not int or version < 1 or not isinstance(occurred_at, str):
+        return None
+    if causation_id is not None and not isinstance(causation_id, str):
+        return None
+    try:
+        occurred = datetime.fromisoformat(occurred_at)
+    except ValueError:
+        return None
+    return EventEnvelope(
+        id=event_id,
+        type=event_type,
+        version=version,
+        occurred_at=occurred,
+        company_id=company_id,
+        source=source,
+        correlation_id=correlation_id,
+        causation_id=causation_id or None,
+        payload=payload,
+    )
+
+
+@lru_cache(maxsize=1)
+def trusted_sources() -> frozenset[str]:
+    raw = getattr(get_settings(), "event_trusted_sources", "") or ""
+    return frozenset(s.strip() for s in raw.split(",") if s.strip())
+
+
+def parse_envelope(
+    raw: str | bytes | Mapping[str, Any],
+    *,
+    expected_type: str | None = None,
+    trusted: frozenset[str] | None = None,
+) -> EventEnvelope:
+    """
+    Envelopes whose `source` is in `trusted` (default: EVENT_TRUSTED_SOURCES, producers that already
+    validate against @wolfgang/contracts) skip the Pydantic model when the cheap checks pass.
+    """
     obj: Any
-    if isinstance(raw, (bytes, bytearray)):
+    if isinstance(raw, (str, bytes, bytearray)):
         try:
-            obj = json.loads(raw.decode("utf-8"))
+            obj = codec.loads(raw)
         except Exception as err:
-            raise EventParseError("Invalid JSON", reason="invalid_json", raw="<bytes>") from err
-    elif isinstance(raw, str):
-        try:
-            obj = json.loads(raw)
-        except Exception as err:
-            raise EventParseError("Invalid JSON", reason="invalid_json", raw=raw[:2000]) from err
+            sample = raw[:2000] if isinstance(raw, str) else "<bytes>"
+            raise EventParseError("Invalid JSON", reason="invalid_json", raw=sample) from err
     else:
         obj = dict(raw)
 
@@ -66,6 +114,11 @@ def parse_envelope(raw: str | bytes | Mapping[str, Any], *, expected_type: str |
     if expected_type and obj.get("type") != expected_type:
         raise EventParseError("Unexpected event type", reason="unexpected_type")
 
+    if obj.get("source") in (trusted if trusted is not None else trusted_sources()):
+        fast = _fast_envelope(obj)
+        if fast is not None:
+            return fast
+
     try:
         model = EventEnvelopeModel.model_validate(obj)
     except ValidationError as err:
@@ -109,3 +162,7 @@ def build_envelope(
         "payload": payload,
     }
 
+
+def encode_envelope(event: dict[str, Any]) -> str:
+    """Wire form of an outbound envelope (orjson)."""
+    return codec.dumps(event)
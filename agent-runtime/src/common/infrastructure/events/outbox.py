@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from typing import Any
+
+from common.infrastructure.cache.redis_client import RedisClient
+from common.infrastructure.database.supabase_client import SupabaseDb
+from common.infrastructure.metrics.prometheus import OUTBOX_EVENTS_RELAYED_TOTAL, OUTBOX_RELAY_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class EventOutbox:
+    """
+    Writes encoded envelopes to `core.event_outbox` on the caller's transaction connection, so the
+    event commits (or rolls back) with the state change. `notify()` after commit wakes the relay.
+    """
+
+    def __init__(self) -> None:
+        self._wake = asyncio.Event()
+
+    async def add_many(self, conn: Any, events: list[tuple[str, str, str | None]]) -> None:
+        """`events`: (channel, encoded envelope, company_id) tuples, published in this order."""
+        if not events:
+            return
+        await conn.execute(
+            """
+            insert into core.event_outbox (channel, envelope, company_id)
+            select e.channel, e.envelope, e.company_id
+            from unnest($1::text[], $2::text[], $3::uuid[]) with ordinality as e(channel, envelope, company_id, n)
+            order by e.n
+            """,
+            [c for c, _, _ in events],
+            [e for _, e, _ in events],
+            [co for _, _, co in events],
+        )
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    async def wait(self, timeout_s: float) -> None:
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._wake.wait(), timeout=timeout_s)
+        self._wake.clear()
+
+
+class OutboxRelay:
+    """
+    Moves outbox rows to Redis: per batch, one transaction deletes up to `batch_size` rows
+    (`skip locked`, so replicas split the backlog) and publishes them in one pipeline before
+    committing. A failed publish rolls the delete back; a crash after publishing redelivers
+    (at-least-once, consumers dedupe).
+    """
+
+    def __init__(
+        self,
+        *,
+        db: SupabaseDb,
+        redis: RedisClient,
+        outbox: EventOutbox | None = None,
+        batch_size: int = 200,
+        poll_interval_s: float = 0.5,
+    ):
+        self._db = db
+        self._redis = redis
+        self._outbox = outbox or EventOutbox()
+        self._batch_size = max(1, int(batch_size))
+        self._poll_interval_s = max(0.01, float(poll_interval_s))
+
+    async def run_forever(self) -> None:
+        while True:
+            relayed = 0
+            try:
+                relayed = await self.relay_once()
+            except Exception:
+                logger.exception("outbox.relay_failed")
+            if relayed < self._batch_size:
+                await self._outbox.wait(self._poll_interval_s)
+
+    async def relay_once(self) -> int:
+        async with self._db.transaction() as conn:
+            rows = await conn.fetch(
+                """
+                with batch as (
+                  select id
+                  from core.event_outbox
+                  order by id
+                  limit $1
+                  for update skip locked
+                )
+                delete from core.event_outbox o
+                using batch
+                where o.id = batch.id
+                returning o.id, o.channel, o.envelope, extract(epoch from now() - o.created_at) as lag_s
+                """,
+                self._batch_size,
+            )
+            if not rows:
+                return 0
+            rows = sorted(rows, key=lambda r: r["id"])
+            await self._redis.publish_many([(str(r["channel"]), str(r["envelope"])) for r in rows])
+
+        for r in rows:
+            OUTBOX_EVENTS_RELAYED_TOTAL.labels(channel=str(r["channel"])).inc()
+            OUTBOX_RELAY_LAG_SECONDS.observe(max(0.0, float(r["lag_s"] or 0)))
+        return len(rows)
@@ -1,10 +1,90 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import hashlib
+import json
+import logging
+import time
 from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
+from common.infrastructure.cache.redis_client import RedisClient
 from common.infrastructure.database.supabase_client import SupabaseDb
+from common.infrastructure.metrics.prometheus import IDEMPOTENCY_CLAIMS_TOTAL, IDEMPOTENCY_WRITE_BEHIND_ROWS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+_WARM_SINCE_KEY = "idem:warm_since"
+
+# KEYS: warm_since, claim...
+# ARGV: value, now_s, ttl_s, reset_warm (0|1)
+# Returns {warm_since_s, claimed (0|1) per claim key}. warm_since is set on first use and lost with the
+# rest of Redis (flush/restart without persistence), telling the caller how far back Redis can vouch for.
+# reset_warm restarts it after claims were made in Postgres only (Redis outage).
+CLAIM_MANY_LUA = """
+local since = redis.call("get", KEYS[1])
+if not since or ARGV[4] == "1" then
+  redis.call("set", KEYS[1], ARGV[2])
+  since = ARGV[2]
+end
+local out = {since}
+for i = 2, #KEYS do
+  if redis.call("set", KEYS[i], ARGV[1], "NX", "EX", ARGV[3]) then
+    table.insert(out, 1)
+  else
+    table.insert(out, 0)
+  end
+end
+return out
+"""
+
+_FLUSH_SQL = """
+insert into core.event_consumptions (
+  company_id,
+  consumer,
+  dedupe_key,
+  event_type,
+  event_id,
+  correlation_id,
+  causation_id,
+  metadata,
+  expires_at
+)
+select
+  r.company_id,
+  r.consumer,
+  r.dedupe_key,
+  r.event_type,
+  r.event_id,
+  r.correlation_id,
+  r.causation_id,
+  coalesce(r.metadata, '{}'::jsonb),
+  r.expires_at
+from jsonb_to_recordset($1::jsonb) as r(
+  company_id uuid,
+  consumer text,
+  dedupe_key text,
+  event_type text,
+  event_id text,
+  correlation_id text,
+  causation_id text,
+  metadata jsonb,
+  expires_at timestamptz
+)
+on conflict (company_id, consumer, dedupe_key) do update
+set
+  event_type=excluded.event_type,
+  event_id=excluded.event_id,
+  correlation_id=excluded.correlation_id,
+  causation_id=excluded.causation_id,
+  metadata=excluded.metadata,
+  expires_at=excluded.expires_at
+where core.event_consumptions.expires_at <= now()
+"""
+
+_MAX_FLUSH_ATTEMPTS = 3
 
 
 @dataclass(frozen=True)
@@ -17,9 +97,57 @@ class IdempotencyKey:
         return self.key[:512]
 
 
+def _payload_hash(meta: dict[str, Any]) -> str | None:
+    try:
+        return hashlib.sha256(str(meta).encode("utf-8")).hexdigest()
+    except Exception:
+        return None
+
+
 class IdempotencyStore:
-    def __init__(self, db: SupabaseDb):
+    """
+    Dedupe claims over `core.event_consumptions`.
+
+    With `redis`, a claim is one `SET NX EX` per key in a single script (CLAIM_MANY_LUA) and the
+    rows are written behind in batches (`flush`, driven by a background task started on first use).
+    Postgres is only read when Redis has no record *and* Redis has been up for less than
+    `verify_window_s` (fresh/flushed Redis), which covers the redeliveries that follow a restart
+    without paying a SELECT per claim for the whole TTL. Redis errors fall back to the synchronous
+    Postgres claim; since those keys are missing from Redis, the next successful claim resets
+    `idem:warm_since` so Postgres is consulted for another verify window.
+    Without `redis` every claim is the Postgres upsert.
+    """
+
+    def __init__(
+        self,
+        db: SupabaseDb,
+        *,
+        redis: RedisClient | None = None,
+        flush_interval_s: float = 1.0,
+        batch_size: int = 500,
+        max_pending: int = 20_000,
+        verify_window_s: int = 300,
+    ):
         self._db = db
+        self._redis = redis
+        self._flush_interval_s = max(0.01, float(flush_interval_s))
+        self._batch_size = max(1, int(batch_size))
+        self._max_pending = max(self._batch_size, int(max_pending))
+        self._verify_window_s = max(0, int(verify_window_s))
+        self._pending: dict[tuple[str, str, str], tuple[int, dict[str, Any]]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._reset_warm = False
+
+    @staticmethod
+    def _redis_key(company_id: str, consumer: str, dedupe_key: str) -> str:
+        digest = hashlib.sha1(dedupe_key.encode("utf-8")).hexdigest()
+        return f"idem:{company_id}:{consumer}:{digest}"
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
 
     async def claim(
         self,
@@ -33,16 +161,288 @@ class IdempotencyStore:
         correlation_id: str | None = None,
         causation_id: str | None = None,
         metadata: dict[str, Any] | None = None,
+    ) -> bool:
+        if self._redis is None:
+            return await self._claim_postgres(
+                company_id=company_id,
+                consumer=consumer,
+                key=key,
+                ttl_seconds=ttl_seconds,
+                event_type=event_type,
+                event_id=event_id,
+                correlation_id=correlation_id,
+                causation_id=causation_id,
+                metadata=metadata,
+            )
+
+        claimed = await self.claim_many(
+            company_id=company_id,
+            consumer=consumer,
+            keys=[key],
+            ttl_seconds=ttl_seconds,
+            event_type=event_type,
+            event_id=event_id,
+            correlation_id=correlation_id,
+            causation_id=causation_id,
+            metadata=[metadata or {}],
+        )
+        return claimed[0]
+
+    async def claim_many(
+        self,
+        *,
+        company_id: str,
+        consumer: str,
+        keys: list[str],
+        ttl_seconds: int,
+        event_type: str | None = None,
+        event_id: str | None = None,
+        correlation_id: str | None = None,
+        causation_id: str | None = None,
+        metadata: list[dict[str, Any]] | None = None,
+    ) -> list[bool]:
+        """Claims several keys of one event in a single round trip; returns one flag per key, in order."""
+        if not keys:
+            return []
+        ttl_seconds = max(30, int(ttl_seconds))
+        dedupe_keys = [str(k)[:512] for k in keys]
+        metas = [m or {} for m in (metadata or [])] + [{}] * (len(keys) - len(metadata or []))
+        fields = {
+            "event_type": event_type,
+            "event_id": event_id,
+            "correlation_id": correlation_id,
+            "causation_id": causation_id,
+        }
+        if self._redis is None:
+            return await self._claim_many_postgres(
+                company_id=company_id,
+                consumer=consumer,
+                dedupe_keys=dedupe_keys,
+                metas=metas,
+                ttl_seconds=ttl_seconds,
+                **fields,
+            )
+
+        now_s = int(time.time())
+        try:
+            raw = await self._redis.client.eval(
+                CLAIM_MANY_LUA,
+                1 + len(dedupe_keys),
+                _WARM_SINCE_KEY,
+                *[self._redis_key(company_id, consumer, k) for k in dedupe_keys],
+                "1",
+                now_s,
+                ttl_seconds,
+                "1" if self._reset_warm else "0",
+            )
+            warm_since, claimed = int(raw[0]), [bool(int(c)) for c in raw[1:]]
+            self._reset_warm = False
+        except Exception as e:
+            logger.warning(
+                "idempotency.redis_failed",
+                extra={"extra": {"consumer": consumer, "error_type": type(e).__name__}},
+            )
+            self._reset_warm = True
+            return await self._claim_many_postgres(
+                company_id=company_id,
+                consumer=consumer,
+                dedupe_keys=dedupe_keys,
+                metas=metas,
+                ttl_seconds=ttl_seconds,
+                **fields,
+            )
+
+        IDEMPOTENCY_CLAIMS_TOTAL.labels(tier="redis", result="duplicate").inc(claimed.count(False))
+        fresh = [k for k, c in zip(dedupe_keys, claimed) if c]
+        if fresh and now_s - warm_since < min(ttl_seconds, self._verify_window_s):
+            seen = await self._existing_postgres(company_id=company_id, consumer=consumer, dedupe_keys=fresh)
+            if seen:
+                IDEMPOTENCY_CLAIMS_TOTAL.labels(tier="postgres", result="duplicate").inc(len(seen))
+                claimed = [c and k not in seen for k, c in zip(dedupe_keys, claimed)]
+
+        expires_at = (datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)).isoformat()
+        for dedupe_key, meta, c in zip(dedupe_keys, metas, claimed):
+            if not c:
+                continue
+            IDEMPOTENCY_CLAIMS_TOTAL.labels(tier="redis", result="claimed").inc()
+            self._enqueue(
+                {
+                    "company_id": company_id,
+                    "consumer": consumer,
+                    "dedupe_key": dedupe_key,
+                    **fields,
+                    "metadata": {**meta, "payload_hash": _payload_hash(meta)},
+                    "expires_at": expires_at,
+                }
+            )
+        return claimed
+
+    async def _existing_postgres(self, *, company_id: str, consumer: str, dedupe_keys: list[str]) -> set[str]:
+        rows = await self._db.fetch(
+            """
+            select dedupe_key
+            from core.event_consumptions
+            where company_id=$1::uuid
+              and consumer=$2
+              and dedupe_key = any($3::text[])
+              and expires_at > now()
+            """,
+            company_id,
+            consumer,
+            dedupe_keys,
+        )
+        return {str(r["dedupe_key"]) for r in rows or []}
+
+    async def _claim_many_postgres(
+        self,
+        *,
+        company_id: str,
+        consumer: str,
+        dedupe_keys: list[str],
+        metas: list[dict[str, Any]],
+        ttl_seconds: int,
+        event_type: str | None,
+        event_id: str | None,
+        correlation_id: str | None,
+        causation_id: str | None,
+    ) -> list[bool]:
+        if len(dedupe_keys) == 1:
+            claimed = await self._claim_postgres(
+                company_id=company_id,
+                consumer=consumer,
+                key=dedupe_keys[0],
+                ttl_seconds=ttl_seconds,
+                event_type=event_type,
+                event_id=event_id,
+                correlation_id=correlation_id,
+                causation_id=causation_id,
+                metadata=metas[0],
+            )
+            return [claimed]
+
+        records = [
+            {"dedupe_key": k, "metadata": {**m, "payload_hash": _payload_hash(m)}} for k, m in zip(dedupe_keys, metas)
+        ]
+        rows = await self._db.fetch(
+            """
+            insert into core.event_consumptions (
+              company_id,
+              consumer,
+              dedupe_key,
+              event_type,
+              event_id,
+              correlation_id,
+              causation_id,
+              metadata,
+              expires_at
+            )
+            select
+              $1::uuid,
+              $2,
+              r.dedupe_key,
+              $4,
+              $5,
+              $6,
+              $7,
+              coalesce(r.metadata, '{}'::jsonb),
+              now() + ($8::int * interval '1 second')
+            from jsonb_to_recordset($3::jsonb) as r(dedupe_key text, metadata jsonb)
+            on conflict (company_id, consumer, dedupe_key) do update
+            set
+              event_type=excluded.event_type,
+              event_id=excluded.event_id,
+              correlation_id=excluded.correlation_id,
+              causation_id=excluded.causation_id,
+              metadata=excluded.metadata,
+              expires_at=excluded.expires_at
+            where core.event_consumptions.expires_at <= now()
+            returning dedupe_key
+            """,
+            company_id,
+            consumer,
+            json.dumps(records, default=str),
+            event_type,
+            event_id,
+            correlation_id,
+            causation_id,
+            ttl_seconds,
+        )
+        won = {str(r["dedupe_key"]) for r in rows or []}
+        return [k in won for k in dedupe_keys]
+
+    def _enqueue(self, row: dict[str, Any]) -> None:
+        key = (row["company_id"], row["consumer"], row["dedupe_key"])
+        self._pending.pop(key, None)
+        self._pending[key] = (0, row)
+        while len(self._pending) > self._max_pending:
+            self._pending.pop(next(iter(self._pending)))
+            IDEMPOTENCY_WRITE_BEHIND_ROWS_TOTAL.labels(result="dropped").inc()
+        if len(self._pending) >= self._batch_size:
+            self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), timeout=self._flush_interval_s)
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("idempotency.flush_loop_failed")
+
+    async def flush(self) -> int:
+        """Writes buffered claims in batches of `batch_size`. Failed batches are retried on the next flush."""
+        written = 0
+        async with self._flush_lock:
+            while self._pending:
+                keys = list(self._pending)[: self._batch_size]
+                batch = [self._pending.pop(k) for k in keys]
+                try:
+                    await self._db.execute(_FLUSH_SQL, json.dumps([row for _, row in batch], default=str))
+                except Exception as e:
+                    retry = [(k, (n + 1, row)) for k, (n, row) in zip(keys, batch) if n + 1 < _MAX_FLUSH_ATTEMPTS]
+                    # Claims made meanwhile are newer than the failed rows; keep them.
+                    self._pending = {**dict(retry), **self._pending}
+                    IDEMPOTENCY_WRITE_BEHIND_ROWS_TOTAL.labels(result="failed").inc(len(batch))
+                    IDEMPOTENCY_WRITE_BEHIND_ROWS_TOTAL.labels(result="dropped").inc(len(batch) - len(retry))
+                    logger.warning(
+                        "idempotency.flush_failed",
+                        extra={"extra": {"rows": len(batch), "error_type": type(e).__name__}},
+                    )
+                    break
+                written += len(batch)
+                IDEMPOTENCY_WRITE_BEHIND_ROWS_TOTAL.labels(result="written").inc(len(batch))
+        return written
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._pending:
+            await self.flush()
+
+    async def _claim_postgres(
+        self,
+        *,
+        company_id: str,
+        consumer: str,
+        key: str,
+        ttl_seconds: int,
+        event_type: str | None = None,
+        event_id: str | None = None,
+        correlation_id: str | None = None,
+        causation_id: str | None = None,
+        metadata: dict[str, Any] | None = None,
     ) -> bool:
         ttl_seconds = max(30, int(ttl_seconds))
         dedupe_key = str(key)[:512]
         meta = metadata or {}
 
-        payload_hash = None
-        try:
-            payload_hash = hashlib.sha256(str(meta).encode("utf-8")).hexdigest()
-        except Exception:
-            payload_hash = None
+        payload_hash = _payload_hash(meta)
 
         row = await self._db.fetchrow(
             """
@@ -95,6 +495,16 @@ class IdempotencyStore:
 
     async def release(self, *, company_id: str, consumer: str, key: str) -> None:
         dedupe_key = str(key)[:512]
+        if self._redis is None:
+            await self._delete_postgres(company_id=company_id, consumer=consumer, dedupe_key=dedupe_key)
+            return
+        # Under the flush lock so an in-flight batch cannot re-insert the row after the delete.
+        async with self._flush_lock:
+            self._pending.pop((company_id, consumer, dedupe_key), None)
+            await self._redis.client.delete(self._redis_key(company_id, consumer, dedupe_key))
+            await self._delete_postgres(company_id=company_id, consumer=consumer, dedupe_key=dedupe_key)
+
+    async def _delete_postgres(self, *, company_id: str, consumer: str, dedupe_key: str) -> None:
         await self._db.execute(
             """
             delete from core.event_consumptions
@@ -126,3 +536,19 @@ class IdempotencyStore:
             limit,
         )
         return len(rows or [])
+
+    async def count_expired(self, *, cap: int = 10_000) -> int:
+        """Bounded count of expired rows (for backlog metrics; never scans past `cap`)."""
+        row = await self._db.fetchrow(
+            """
+            select count(*) as n
+            from (
+              select 1
+              from core.event_consumptions
+              where expires_at is not null and expires_at <= now()
+              limit $1
+            ) s
+            """,
+            max(1, int(cap)),
+        )
+        return int(row["n"]) if row and row.get("n") is not None else 0
@@ -3,9 +3,10 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any
 
+from common.infrastructure.cache.local_cache import LocalTtlCache
 from common.infrastructure.database.supabase_client import SupabaseDb
 
-from .resolver import CompanyIntegrationResolver
+from .resolver import CompanyIntegrationResolver, IntegrationLookup
 
 
 @dataclass(frozen=True)
@@ -27,8 +28,9 @@ def _read_str(obj: dict[str, Any], *keys: str) -> str | None:
 
 
 class OpenAIResolver:
-    def __init__(self, db: SupabaseDb, *, cache_ttl_s: float = 30.0):
-        self._integrations = CompanyIntegrationResolver(db, cache_ttl_s=cache_ttl_s)
+    # Cheap to build: every instance reads the same process-wide integration cache.
+    def __init__(self, db: SupabaseDb, *, cache: LocalTtlCache[tuple[str, str], IntegrationLookup] | None = None):
+        self._integrations = CompanyIntegrationResolver(db, cache=cache)
 
     async def resolve_optional(self, *, company_id: str) -> OpenAIResolved | None:
         try:
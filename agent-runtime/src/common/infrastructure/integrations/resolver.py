@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import asyncio
-import time
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any, Literal
 
+from common.config.settings import get_settings
+from common.infrastructure.cache.local_cache import LocalTtlCache
 from common.infrastructure.database.supabase_client import SupabaseDb
 
 from .crypto import SecretKeyring, decrypt_json, load_keyring_from_env
@@ -22,12 +23,35 @@ class ResolvedIntegration:
     secrets: dict[str, Any]
 
 
+class IntegrationConfigError(RuntimeError):
+    """The binding points at something unusable (missing credential set, undecryptable secrets)."""
+
+
+@dataclass(frozen=True)
+class IntegrationLookup:
+    # value=None and error=None means the integration is disabled for the company.
+    value: ResolvedIntegration | None = None
+    error: str | None = None
+
+
+@lru_cache(maxsize=1)
+def get_integration_cache() -> LocalTtlCache[tuple[str, str], IntegrationLookup]:
+    """Process-wide (company_id, provider) cache shared by every resolver (and the `config.updated` handler)."""
+    return LocalTtlCache("integration", ttl_s=getattr(get_settings(), "integration_cache_ttl_s", 60.0))
+
+
 class CompanyIntegrationResolver:
-    def __init__(self, db: SupabaseDb, *, cache_ttl_s: float = 30.0):
+    """
+    Resolves (and decrypts) a company's integration once per cache TTL for the whole process.
+
+    "disabled" and misconfigured bindings are cached too, the latter for
+    `integration_negative_cache_ttl_s` only; DB errors are not cached.
+    """
+
+    def __init__(self, db: SupabaseDb, *, cache: LocalTtlCache[tuple[str, str], IntegrationLookup] | None = None):
         self._db = db
-        self._cache_ttl_s = cache_ttl_s
-        self._cache: dict[tuple[str, str], tuple[float, ResolvedIntegration | None]] = {}
-        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+        self._cache = cache if cache is not None else get_integration_cache()
+        self._negative_ttl_s = float(getattr(get_settings(), "integration_negative_cache_ttl_s", 10.0))
         self._keyring: SecretKeyring | None = None
 
     def _get_keyring(self) -> SecretKeyring:
@@ -35,28 +59,27 @@ class CompanyIntegrationResolver:
             self._keyring = load_keyring_from_env()
         return self._keyring
 
-    def _lock_for(self, company_id: str, provider: IntegrationProvider) -> asyncio.Lock:
-        key = (company_id, provider)
-        if key not in self._locks:
-            self._locks[key] = asyncio.Lock()
-        return self._locks[key]
+    def _decrypt(self, encrypted: str) -> dict[str, Any]:
+        try:
+            return decrypt_json(encrypted, keyring=self._get_keyring())
+        except Exception as err:
+            raise IntegrationConfigError(f"Failed to decrypt integration secrets: {type(err).__name__}") from err
 
     async def resolve(self, *, company_id: str, provider: IntegrationProvider) -> ResolvedIntegration | None:
-        cache_key = (company_id, provider)
-        now = time.monotonic()
-        cached = self._cache.get(cache_key)
-        if cached and cached[0] > now:
-            return cached[1]
-
-        lock = self._lock_for(company_id, provider)
-        async with lock:
-            cached = self._cache.get(cache_key)
-            if cached and cached[0] > time.monotonic():
-                return cached[1]
-
-            value = await self._resolve_uncached(company_id=company_id, provider=provider)
-            self._cache[cache_key] = (time.monotonic() + self._cache_ttl_s, value)
-            return value
+        lookup = await self._cache.get_or_load(
+            (company_id, provider),
+            lambda: self._lookup(company_id=company_id, provider=provider),
+            ttl_for=lambda found: self._negative_ttl_s if found.error else float("inf"),
+        )
+        if lookup.error:
+            raise IntegrationConfigError(lookup.error)
+        return lookup.value
+
+    async def _lookup(self, *, company_id: str, provider: IntegrationProvider) -> IntegrationLookup:
+        try:
+            return IntegrationLookup(value=await self._resolve_uncached(company_id=company_id, provider=provider))
+        except IntegrationConfigError as err:
+            return IntegrationLookup(error=str(err))
 
     async def _resolve_uncached(self, *, company_id: str, provider: IntegrationProvider) -> ResolvedIntegration | None:
         row = await self._db.fetchrow(
@@ -82,7 +105,7 @@ class CompanyIntegrationResolver:
                 source="global",
                 credential_set_id=str(default_set["id"]),
                 config=dict(default_set.get("config") or {}),
-                secrets=decrypt_json(str(default_set.get("secrets_enc") or ""), keyring=self._get_keyring()),
+                secrets=self._decrypt(str(default_set.get("secrets_enc") or "")),
             )
 
         mode: str = str(row.get("mode") or "")
@@ -95,7 +118,7 @@ class CompanyIntegrationResolver:
                 source="custom",
                 credential_set_id=None,
                 config=dict(row.get("config_override") or {}),
-                secrets=decrypt_json(str(row.get("secrets_override_enc") or ""), keyring=self._get_keyring()),
+                secrets=self._decrypt(str(row.get("secrets_override_enc") or "")),
             )
 
         # mode=global
@@ -106,7 +129,7 @@ class CompanyIntegrationResolver:
             source="global",
             credential_set_id=str(set_row["id"]),
             config=dict(set_row.get("config") or {}),
-            secrets=decrypt_json(str(set_row.get("secrets_enc") or ""), keyring=self._get_keyring()),
+            secrets=self._decrypt(str(set_row.get("secrets_enc") or "")),
         )
 
     async def _load_default_set(self, *, provider: IntegrationProvider):
@@ -121,7 +144,7 @@ class CompanyIntegrationResolver:
             provider,
         )
         if not row:
-            raise RuntimeError(f"Missing default credential set for provider={provider}")
+            raise IntegrationConfigError(f"Missing default credential set for provider={provider}")
         return row
 
     async def _load_set_by_id(self, set_id: str):
@@ -135,6 +158,6 @@ class CompanyIntegrationResolver:
             set_id,
         )
         if not row:
-            raise RuntimeError(f"Credential set not found: {set_id}")
+            raise IntegrationConfigError(f"Credential set not found: {set_id}")
         return row
 
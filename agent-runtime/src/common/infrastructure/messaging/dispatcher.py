@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import zlib
+from collections.abc import Awaitable, Callable
+
+from common.infrastructure.events import codec
+from common.infrastructure.metrics.prometheus import (
+    EVENT_DISPATCH_BACKPRESSURE_TOTAL,
+    EVENT_DISPATCH_HANDLER_SECONDS,
+    EVENT_DISPATCH_QUEUE_DEPTH,
+)
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+# Payload fields that identify "the same lead/conversation", most specific first.
+_ORDER_FIELDS = ("conversation_id", "lead_id", "lead_external_id", "from")
+
+
+def envelope_partition_key(data: str) -> str:
+    """`company:lead` for an event envelope; events without a lead are keyed by their own id (no ordering)."""
+    try:
+        obj = codec.loads(data)
+    except Exception:
+        return data[:64]
+    if not isinstance(obj, dict):
+        return data[:64]
+    company_id = str(obj.get("company_id") or "")
+    payload = obj.get("payload") if isinstance(obj.get("payload"), dict) else {}
+    for field in _ORDER_FIELDS:
+        value = payload.get(field)
+        if value:
+            return f"{company_id}:{value}"
+    return str(obj.get("id") or company_id)
+
+
+class KeyedDispatcher:
+    """
+    Bounded-concurrency executor: jobs with the same key run in submission order on one lane,
+    different keys spread over `concurrency` lanes. `submit` waits while the target lane is full,
+    which pauses the reader (backpressure) instead of growing memory.
+    """
+
+    def __init__(self, *, name: str, concurrency: int = 16, queue_size: int = 1000):
+        self.name = name
+        self._concurrency = max(1, int(concurrency))
+        self._lane_size = max(1, int(queue_size) // self._concurrency)
+        self._lanes: list[asyncio.Queue[tuple[str, Job]]] = []
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def _start(self) -> None:
+        self._lanes = [asyncio.Queue(maxsize=self._lane_size) for _ in range(self._concurrency)]
+        self._tasks = [asyncio.create_task(self._run_lane(lane)) for lane in self._lanes]
+
+    async def submit(self, key: str, job: Job, *, channel: str) -> None:
+        if not self._lanes:
+            self._start()
+        lane = self._lanes[zlib.crc32(key.encode("utf-8")) % self._concurrency]
+        if lane.full():
+            EVENT_DISPATCH_BACKPRESSURE_TOTAL.labels(dispatcher=self.name).inc()
+        await lane.put((channel, job))
+        EVENT_DISPATCH_QUEUE_DEPTH.labels(dispatcher=self.name).inc()
+
+    async def _run_lane(self, lane: asyncio.Queue[tuple[str, Job]]) -> None:
+        while True:
+            channel, job = await lane.get()
+            started = time.perf_counter()
+            try:
+                await job()
+            except Exception:
+                logger.exception("dispatch.job_failed", extra={"extra": {"dispatcher": self.name, "channel": channel}})
+            finally:
+                EVENT_DISPATCH_HANDLER_SECONDS.labels(channel=channel).observe(time.perf_counter() - started)
+                EVENT_DISPATCH_QUEUE_DEPTH.labels(dispatcher=self.name).dec()
+                lane.task_done()
+
+    async def drain(self) -> None:
+        """Waits until every submitted job has finished."""
+        for lane in self._lanes:
+            await lane.join()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._lanes = []
@@ -5,6 +5,7 @@ from collections.abc import Awaitable, Callable
 from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential
 
 from common.infrastructure.cache.redis_client import RedisClient
+from common.infrastructure.messaging.dispatcher import KeyedDispatcher, envelope_partition_key
 
 logger = logging.getLogger(__name__)
 
@@ -12,10 +13,13 @@ Handler = Callable[[str], Awaitable[None]]
 
 
 class RedisPubSubSubscriber:
-    def __init__(self, redis: RedisClient):
+    """Handlers run on a KeyedDispatcher: one lead's events stay in order, other leads don't wait on it."""
+
+    def __init__(self, redis: RedisClient, *, dispatcher: KeyedDispatcher | None = None):
         self._redis = redis
         self._handlers: dict[str, Handler] = {}
         self._pubsub = None
+        self._dispatcher = dispatcher or KeyedDispatcher(name="pubsub")
 
     def register(self, channel: str, handler: Handler) -> None:
         self._handlers[channel] = handler
@@ -42,18 +46,28 @@ class RedisPubSubSubscriber:
             if not handler:
                 continue
 
-            try:
-                async for attempt in AsyncRetrying(
-                    stop=stop_after_attempt(3),
-                    wait=wait_exponential(min=0.2, max=2.0),
-                    reraise=True,
-                ):
-                    with attempt:
-                        await handler(data)
-            except Exception:
-                logger.exception("pubsub.handler_failed", extra={"extra": {"channel": channel}})
+            await self._dispatcher.submit(
+                envelope_partition_key(data),
+                lambda handler=handler, channel=channel, data=data: self._handle(handler, channel, data),
+                channel=channel,
+            )
+
+        await self._dispatcher.drain()
+
+    async def _handle(self, handler: Handler, channel: str, data: str) -> None:
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(3),
+                wait=wait_exponential(min=0.2, max=2.0),
+                reraise=True,
+            ):
+                with attempt:
+                    await handler(data)
+        except Exception:
+            logger.exception("pubsub.handler_failed", extra={"extra": {"channel": channel}})
 
     async def close(self) -> None:
+        await self._dispatcher.close()
         if self._pubsub:
             try:
                 await self._pubsub.close()
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import time
+from typing import Any
+
+from redis.exceptions import ResponseError
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential
+
+from common.infrastructure.cache.redis_client import RedisClient
+from common.infrastructure.messaging.dispatcher import KeyedDispatcher, envelope_partition_key
+from common.infrastructure.messaging.pubsub import Handler
+from common.infrastructure.metrics.prometheus import EVENT_STREAM_ENTRIES_TOTAL
+
+logger = logging.getLogger(__name__)
+
+
+def stream_key(channel: str) -> str:
+    return f"stream:{channel}"
+
+
+def default_consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class RedisStreamsConsumer:
+    """
+    Same `register(channel, handler)` API as RedisPubSubSubscriber, backed by a consumer group on
+    `stream:{channel}`: replicas split the entries instead of all receiving each one.
+
+    An entry is XACKed once its handler succeeds. Failed entries stay pending and are taken over
+    with XAUTOCLAIM after `claim_idle_ms` (also covering replicas that died mid-batch); after
+    `max_deliveries` they are moved to `stream:{channel}:dead` and acked. Entries run on a
+    KeyedDispatcher (per-lead order, bounded concurrency) and are acked from there.
+
+    XAUTOCLAIM idle time counts from delivery, not from when the handler finishes, so entries this
+    consumer still holds (queued in a dispatcher lane or inside handler retries) are tracked as
+    in-flight: they are never submitted twice here, and their idle time is reset (XCLAIM JUSTID)
+    every `claim_idle_ms / 3` so other replicas do not take them over.
+    """
+
+    def __init__(
+        self,
+        redis: RedisClient,
+        *,
+        group: str,
+        consumer: str | None = None,
+        batch_size: int = 32,
+        block_ms: int = 5000,
+        claim_idle_ms: int = 60000,
+        claim_interval_s: float = 30.0,
+        max_deliveries: int = 5,
+        dispatcher: KeyedDispatcher | None = None,
+    ):
+        self._redis = redis
+        self._group = group
+        self._consumer = consumer or default_consumer_name()
+        self._batch_size = max(1, int(batch_size))
+        self._block_ms = max(1, int(block_ms))
+        self._claim_idle_ms = max(1000, int(claim_idle_ms))
+        self._claim_interval_s = max(1.0, float(claim_interval_s))
+        self._max_deliveries = max(1, int(max_deliveries))
+        self._handlers: dict[str, Handler] = {}
+        self._dispatcher = dispatcher or KeyedDispatcher(name="streams")
+        self._next_claim_at = 0.0
+        self._closed = False
+        self._inflight: dict[str, set[str]] = {}
+
+    def register(self, channel: str, handler: Handler) -> None:
+        self._handlers[channel] = handler
+
+    async def run_forever(self) -> None:
+        if not self._handlers:
+            logger.warning("streams.no_handlers")
+            await asyncio.Future()
+            return
+
+        await self._ensure_groups()
+        logger.info(
+            "streams.subscribed",
+            extra={"extra": {"channels": list(self._handlers), "group": self._group, "consumer": self._consumer}},
+        )
+
+        keep_alive = asyncio.create_task(self._keep_alive_loop())
+        try:
+            while not self._closed:
+                try:
+                    if time.monotonic() >= self._next_claim_at:
+                        self._next_claim_at = time.monotonic() + self._claim_interval_s
+                        await self._reclaim()
+
+                    response = await self._redis.client.xreadgroup(
+                        groupname=self._group,
+                        consumername=self._consumer,
+                        streams={stream_key(channel): ">" for channel in self._handlers},
+                        count=self._batch_size,
+                        block=self._block_ms,
+                    )
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("streams.read_failed")
+                    await asyncio.sleep(1.0)
+                    continue
+
+                for key, entries in response or []:
+                    channel = self._channel_for(key)
+                    for entry_id, fields in entries:
+                        await self._submit(channel, entry_id, fields)
+            await self._dispatcher.drain()
+        finally:
+            keep_alive.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await keep_alive
+            await self._dispatcher.close()
+
+    async def close(self) -> None:
+        self._closed = True
+
+    async def _submit(self, channel: str, entry_id: str, fields: dict[str, Any] | None) -> None:
+        inflight = self._inflight.setdefault(channel, set())
+        if entry_id in inflight:
+            return
+        inflight.add(entry_id)
+        data = (fields or {}).get("data")
+        await self._dispatcher.submit(
+            envelope_partition_key(data) if isinstance(data, str) else entry_id,
+            lambda: self._dispatch(channel, entry_id, fields),
+            channel=channel,
+        )
+
+    def _channel_for(self, key: Any) -> str:
+        return str(key).removeprefix("stream:")
+
+    async def _ensure_groups(self) -> None:
+        for channel in self._handlers:
+            try:
+                await self._redis.client.xgroup_create(stream_key(channel), self._group, id="$", mkstream=True)
+            except ResponseError as err:
+                if "BUSYGROUP" not in str(err):
+                    raise
+
+    async def _dispatch(self, channel: str, entry_id: str, fields: dict[str, Any] | None) -> None:
+        try:
+            await self._handle(channel, entry_id, fields)
+        finally:
+            self._inflight.get(channel, set()).discard(entry_id)
+
+    async def _handle(self, channel: str, entry_id: str, fields: dict[str, Any] | None) -> None:
+        key = stream_key(channel)
+        handler = self._handlers.get(channel)
+        data = (fields or {}).get("data")
+        if handler is None or not isinstance(data, str):
+            await self._redis.client.xack(key, self._group, entry_id)
+            EVENT_STREAM_ENTRIES_TOTAL.labels(channel=channel, result="skipped").inc()
+            return
+
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(3),
+                wait=wait_exponential(min=0.2, max=2.0),
+                reraise=True,
+            ):
+                with attempt:
+                    await handler(data)
+        except Exception:
+            # Left pending: XAUTOCLAIM hands it out again after claim_idle_ms.
+            logger.exception("streams.handler_failed", extra={"extra": {"channel": channel, "entry_id": entry_id}})
+            EVENT_STREAM_ENTRIES_TOTAL.labels(channel=channel, result="failed").inc()
+            return
+
+        await self._redis.client.xack(key, self._group, entry_id)
+        EVENT_STREAM_ENTRIES_TOTAL.labels(channel=channel, result="acked").inc()
+
+    async def _keep_alive_loop(self) -> None:
+        while True:
+            await asyncio.sleep(max(0.5, self._claim_idle_ms / 3000.0))
+            try:
+                await self._refresh_inflight()
+            except Exception as e:
+                logger.warning("streams.keep_alive_failed", extra={"extra": {"error_type": type(e).__name__}})
+
+    async def _refresh_inflight(self) -> None:
+        """Resets the idle time of entries this consumer is still working on."""
+        for channel, ids in self._inflight.items():
+            if ids:
+                await self._redis.client.xclaim(
+                    stream_key(channel), self._group, self._consumer, 0, list(ids), justid=True
+                )
+
+    async def _reclaim(self) -> None:
+        for channel in list(self._handlers):
+            key = stream_key(channel)
+            start = "0-0"
+            while True:
+                result = await self._redis.client.xautoclaim(
+                    key,
+                    self._group,
+                    self._consumer,
+                    min_idle_time=self._claim_idle_ms,
+                    start_id=start,
+                    count=self._batch_size,
+                )
+                start, entries = str(result[0]), result[1]
+                for entry_id, fields in entries:
+                    if fields is None:
+                        # Trimmed out of the stream while pending.
+                        await self._redis.client.xack(key, self._group, entry_id)
+                        continue
+                    EVENT_STREAM_ENTRIES_TOTAL.labels(channel=channel, result="reclaimed").inc()
+                    if await self._deliveries(key, entry_id) > self._max_deliveries:
+                        await self._dead_letter(channel, entry_id, fields)
+                        continue
+                    await self._submit(channel, entry_id, fields)
+                if start == "0-0" or not entries:
+                    break
+
+    async def _deliveries(self, key: str, entry_id: str) -> int:
+        pending = await self._redis.client.xpending_range(key, self._group, min=entry_id, max=entry_id, count=1)
+        return int(pending[0].get("times_delivered") or 0) if pending else 0
+
+    async def _dead_letter(self, channel: str, entry_id: str, fields: dict[str, Any]) -> None:
+        key = stream_key(channel)
+        await self._redis.client.xadd(f"{key}:dead", {**fields, "source_id": entry_id}, maxlen=10000, approximate=True)
+        await self._redis.client.xack(key, self._group, entry_id)
+        EVENT_STREAM_ENTRIES_TOTAL.labels(channel=channel, result="dead_lettered").inc()
+        logger.error("streams.dead_lettered", extra={"extra": {"channel": channel, "entry_id": entry_id}})
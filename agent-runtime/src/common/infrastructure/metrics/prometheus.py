@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 HTTP_REQUESTS_TOTAL = Counter(
     "http_requests_total",
@@ -39,3 +39,165 @@ LEADS_QUALIFIED_TOTAL = Counter(
     [],
 )
 
+
+MEMORY_CLEANUP_ROWS_TOTAL = Counter(
+    "memory_cleanup_rows_total",
+    "Total de linhas arquivadas/removidas pelo memory cleanup",
+    ["task"],
+)
+
+MEMORY_CLEANUP_ROWS_PER_SECOND = Gauge(
+    "memory_cleanup_rows_per_second",
+    "Vazão (linhas/s) do último tick do memory cleanup",
+    ["task"],
+)
+
+MEMORY_CLEANUP_BACKLOG = Gauge(
+    "memory_cleanup_backlog",
+    "Linhas pendentes estimadas após o último tick do memory cleanup (limitado a 10000)",
+    ["task"],
+)
+
+MESSAGES_DEFAULT_PARTITION_ROWS = Gauge(
+    "messages_default_partition_rows",
+    "Linhas em core.messages_default (deveria ser 0; indica partição mensal faltando, limitado a 10000)",
+)
+
+LOCAL_CACHE_REQUESTS_TOTAL = Counter(
+    "local_cache_requests_total",
+    "Leituras dos caches in-process (configs/instâncias) por resultado",
+    ["cache", "result"],
+)
+
+LOCAL_CACHE_INVALIDATIONS_TOTAL = Counter(
+    "local_cache_invalidations_total",
+    "Entradas removidas dos caches in-process por invalidação",
+    ["cache"],
+)
+
+EVENT_STREAM_ENTRIES_TOTAL = Counter(
+    "event_stream_entries_total",
+    "Entradas de Redis Streams processadas pelo consumer group por resultado",
+    ["channel", "result"],
+)
+
+EVENT_DISPATCH_QUEUE_DEPTH = Gauge(
+    "event_dispatch_queue_depth",
+    "Eventos enfileirados (aguardando ou em execução) no dispatcher por chave",
+    ["dispatcher"],
+)
+
+EVENT_DISPATCH_HANDLER_SECONDS = Histogram(
+    "event_dispatch_handler_seconds",
+    "Duração dos handlers de eventos (incluindo retries) em segundos",
+    ["channel"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+EVENT_DISPATCH_BACKPRESSURE_TOTAL = Counter(
+    "event_dispatch_backpressure_total",
+    "Vezes em que o leitor esperou por espaço na fila do dispatcher",
+    ["dispatcher"],
+)
+
+IDEMPOTENCY_CLAIMS_TOTAL = Counter(
+    "idempotency_claims_total",
+    "Claims de idempotência por camada que decidiu (redis|postgres) e resultado",
+    ["tier", "result"],
+)
+
+IDEMPOTENCY_WRITE_BEHIND_ROWS_TOTAL = Counter(
+    "idempotency_write_behind_rows_total",
+    "Linhas de core.event_consumptions gravadas em lote (write-behind) por resultado",
+    ["result"],
+)
+
+OUTBOX_EVENTS_RELAYED_TOTAL = Counter(
+    "outbox_events_relayed_total",
+    "Eventos do core.event_outbox publicados no Redis pelo relay",
+    ["channel"],
+)
+
+OUTBOX_RELAY_LAG_SECONDS = Histogram(
+    "outbox_relay_lag_seconds",
+    "Tempo entre o commit no outbox e a publicação no Redis, em segundos",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+OUTBOUND_PACING_WAIT_SECONDS = Histogram(
+    "outbound_pacing_wait_seconds",
+    "Atraso imposto pelo token bucket por instância ao primeiro chunk de um envio, por prioridade",
+    ["priority"],
+    buckets=(0.0, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+OUTBOUND_PACING_DEFERRED_TOTAL = Counter(
+    "outbound_pacing_deferred_total",
+    "Vezes em que um envio esperou por capacidade do token bucket (proativos cedem aos ao vivo)",
+    ["priority"],
+)
+
+OUTBOUND_PACING_OVER_HORIZON_TOTAL = Counter(
+    "outbound_pacing_over_horizon_total",
+    "Envios reservados além do horizonte de send_at após esgotar a espera (o evolution-manager os envia antes do slot)",
+    ["priority"],
+)
+
+DB_POOL_ACQUIRE_SECONDS = Histogram(
+    "db_pool_acquire_seconds",
+    "Espera por uma conexão do pool do Postgres, por label da query",
+    ["label"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds",
+    "Tempo de execução das queries no Postgres (sem a espera do pool), por label e resultado",
+    ["label", "result"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+DB_SLOW_QUERIES_TOTAL = Counter(
+    "db_slow_queries_total",
+    "Queries acima do limiar de slow query (logadas ou não pela amostragem), por label",
+    ["label"],
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Conexões de cada pool do Postgres (primary|replica) por estado (open|idle|in_use|max)",
+    ["pool", "state"],
+)
+
+DB_POOL_WAITERS = Gauge(
+    "db_pool_waiters",
+    "Chamadas aguardando uma conexão livre do pool do Postgres",
+)
+
+DB_READ_ROUTES_TOTAL = Counter(
+    "db_read_routes_total",
+    "Leituras marcadas como read-only por destino (replica|primary) e motivo",
+    ["target", "reason"],
+)
+
+DB_REPLICA_LAG_SECONDS = Gauge(
+    "db_replica_lag_seconds",
+    "Último atraso de replicação medido na réplica de leitura (-1 quando indisponível)",
+)
+
+DB_STATEMENT_CACHE_TOTAL = Counter(
+    "db_statement_cache_total",
+    "Execuções por origem do plano: hit/miss no registro de statements preparados, invalidated, ou adhoc",
+    ["result"],
+)
+
+DB_REGISTERED_STATEMENTS = Gauge(
+    "db_registered_statements",
+    "Statements nomeados no registro (preparados em cada conexão nova do pool)",
+)
+
+CONTACT_TOUCH_ROWS_TOTAL = Counter(
+    "contact_touch_rows_total",
+    "Atualizações de last_contact_at/last_outbound_at em write-behind por tabela e resultado (coalesced = absorvida por outra pendente)",
+    ["table", "result"],
+)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from common.infrastructure.cache.redis_client import RedisClient
+from common.infrastructure.metrics.prometheus import (
+    OUTBOUND_PACING_DEFERRED_TOTAL,
+    OUTBOUND_PACING_OVER_HORIZON_TOTAL,
+    OUTBOUND_PACING_WAIT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Token bucket as GCRA: the key holds the bucket's "theoretical arrival time" (tat, ms). A send at
+# t is allowed when t >= tat - tolerance (tolerance = (burst - 1) * interval); it pushes tat to
+# max(tat, t) + interval.
+# KEYS: bucket
+# ARGV: now_ms, interval_ms, tolerance_ms, max_backlog_ms, max_ahead_ms (-1: no limit), offsets_ms...
+# Returns {1, slot_ms...} (one slot per offset, reserved) or {0, retry_in_ms} when the next free
+# slot is more than max_backlog_ms away or the last slot more than max_ahead_ms (nothing reserved).
+RESERVE_LUA = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local tolerance = tonumber(ARGV[3])
+local max_backlog = tonumber(ARGV[4])
+local max_ahead = tonumber(ARGV[5])
+local tat = tonumber(redis.call("get", KEYS[1]) or "0")
+if tat < now then
+  tat = now
+end
+local backlog = tat - tolerance - now
+if max_backlog >= 0 and backlog > max_backlog then
+  return {0, backlog - max_backlog}
+end
+local out = {1}
+for i = 6, #ARGV do
+  local slot = math.max(now + tonumber(ARGV[i]), tat - tolerance)
+  table.insert(out, slot)
+  tat = math.max(tat, slot) + interval
+end
+if max_ahead >= 0 and out[#out] - now > max_ahead then
+  return {0, out[#out] - now - max_ahead}
+end
+redis.call("set", KEYS[1], tat, "PX", tat - now + tolerance + 60000)
+return out
+"""
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class RedisTokenBucket:
+    """
+    Outbound pacing shared by every replica: one bucket per channel instance (`pace:{instance_id}`)
+    refilling at `rate_per_s` with room for `burst` back-to-back sends.
+
+    `reserve` turns chunk offsets into absolute send slots (ms) that go out as `payload.send_at`,
+    so live replies normally never sleep here. evolution-manager only honors `send_at` up to its
+    MAX_SEND_AT_WAIT_MS (60s), so no slot is reserved more than `max_schedule_ahead_ms` ahead: the
+    send waits here instead. Proactive sends (follow-ups) also only reserve when the bucket has at
+    most `proactive_max_backlog_ms` queued, leaving the capacity to live replies. Past `max_wait_s`
+    a send reserves anyway (counted in OUTBOUND_PACING_OVER_HORIZON_TOTAL when beyond the
+    horizon). Redis errors fail open.
+    """
+
+    def __init__(
+        self,
+        redis: RedisClient,
+        *,
+        rate_per_s: float,
+        burst: int = 5,
+        proactive_max_backlog_ms: int = 0,
+        max_wait_s: float = 60.0,
+        max_schedule_ahead_ms: int = 50_000,
+    ):
+        self._redis = redis
+        self._interval_ms = max(1, int(1000 / max(0.001, float(rate_per_s))))
+        self._tolerance_ms = max(0, int(burst) - 1) * self._interval_ms
+        self._proactive_max_backlog_ms = max(0, int(proactive_max_backlog_ms))
+        self._max_wait_s = max(0.0, float(max_wait_s))
+        self._max_ahead_ms = max(0, int(max_schedule_ahead_ms))
+
+    async def reserve(self, instance_id: str, offsets_ms: list[int], *, priority: str = "live") -> list[int]:
+        if not offsets_ms:
+            return []
+        started = time.monotonic()
+        proactive = priority == "proactive"
+        offsets = [max(0, int(o)) for o in offsets_ms]
+        # Chunk delays the caller asked for are never the pacing's fault.
+        max_ahead_ms = max(self._max_ahead_ms, offsets[-1])
+        try:
+            while True:
+                now_ms = _now_ms()
+                limited = time.monotonic() - started < self._max_wait_s
+                raw = await self._redis.client.eval(
+                    RESERVE_LUA,
+                    1,
+                    f"pace:{instance_id}",
+                    now_ms,
+                    self._interval_ms,
+                    self._tolerance_ms,
+                    self._proactive_max_backlog_ms if limited and proactive else -1,
+                    max_ahead_ms if limited else -1,
+                    *offsets,
+                )
+                if int(raw[0]):
+                    slots = [int(s) for s in raw[1:]]
+                    break
+                OUTBOUND_PACING_DEFERRED_TOTAL.labels(priority=priority).inc()
+                await asyncio.sleep(min(int(raw[1]) / 1000.0, self._max_wait_s))
+        except Exception as e:
+            logger.warning(
+                "outbound_pacing.redis_failed",
+                extra={"extra": {"instance_id": instance_id, "error_type": type(e).__name__}},
+            )
+            now_ms = _now_ms()
+            return [now_ms + o for o in offsets]
+
+        if slots[-1] - now_ms > max_ahead_ms:
+            OUTBOUND_PACING_OVER_HORIZON_TOTAL.labels(priority=priority).inc()
+        # Time added by pacing (sleeping + slot beyond the requested offset) for the first chunk.
+        waited_s = time.monotonic() - started + max(0, slots[0] - now_ms - offsets[0]) / 1000.0
+        OUTBOUND_PACING_WAIT_SECONDS.labels(priority=priority).observe(waited_s)
+        return slots
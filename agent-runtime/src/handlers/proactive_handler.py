@@ -12,8 +12,8 @@ logger = logging.getLogger(__name__)
 
 
 class ProactiveHandler:
-    def __init__(self, *, db: SupabaseDb, redis: RedisClient):
-        self._followups = FollowupService(db=db, redis=redis)
+    def __init__(self, *, db: SupabaseDb, redis: RedisClient, followups: FollowupService | None = None):
+        self._followups = followups or FollowupService(db=db, redis=redis)
 
     async def run_forever(self) -> None:
         settings = get_settings()
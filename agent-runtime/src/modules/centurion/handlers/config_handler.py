@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import logging
+
+from common.infrastructure.cache.local_cache import LocalTtlCache
+from common.infrastructure.events.envelope import EventParseError, parse_envelope
+from common.infrastructure.integrations.resolver import IntegrationLookup, get_integration_cache
+from modules.centurion.repository.config_repository import ConfigCaches, get_config_caches
+
+logger = logging.getLogger(__name__)
+
+_ENTITIES = {"centurion_config", "channel_instance"}
+
+
+class ConfigUpdateHandler:
+    """Drops cached configs / channel instances / integrations when the backoffice publishes `config.updated`."""
+
+    def __init__(
+        self,
+        *,
+        caches: ConfigCaches | None = None,
+        integrations: LocalTtlCache[tuple[str, str], IntegrationLookup] | None = None,
+    ):
+        self._caches = caches or get_config_caches()
+        self._integrations = integrations if integrations is not None else get_integration_cache()
+
+    async def handle_config_updated(self, raw: str) -> None:
+        try:
+            envelope = parse_envelope(raw, expected_type="config.updated")
+        except EventParseError as err:
+            logger.warning("config_updated.invalid_envelope", extra={"extra": {"reason": err.reason}})
+            return
+
+        company_id = envelope.company_id
+        entity = (envelope.payload or {}).get("entity")
+        if entity == "integration_credential_set":
+            # Global credential sets back every company bound to them (or to the provider default).
+            dropped = self._integrations.clear()
+        elif entity == "integration":
+            dropped = self._integrations.invalidate_where(lambda k: k[0] == company_id)
+        elif entity in _ENTITIES:
+            dropped = self._caches.invalidate_company(company_id, entity=entity)
+        else:
+            # Unknown/missing entity: drop everything cached for the company.
+            dropped = self._caches.invalidate_company(company_id)
+            dropped += self._integrations.invalidate_where(lambda k: k[0] == company_id)
+        logger.info(
+            "config_updated.invalidated",
+            extra={"extra": {"company_id": company_id, "entity": entity, "dropped": dropped}},
+        )
@@ -2,24 +2,41 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
 
 from common.config.settings import get_settings
 from common.infrastructure.cache.redis_client import RedisClient
 from common.infrastructure.database.supabase_client import SupabaseDb
 from common.infrastructure.locks.redis_lock import RedisLockManager
 from modules.centurion.repository.conversation_repository import ConversationRepository
+from modules.centurion.repository.debounce_store import DebounceStore
 from modules.centurion.services.centurion_service import CenturionService
 
 logger = logging.getLogger(__name__)
 
 
 class DebounceWorker:
-    def __init__(self, *, db: SupabaseDb, redis: RedisClient):
+    def __init__(
+        self,
+        *,
+        db: SupabaseDb,
+        redis: RedisClient,
+        conv_repo: ConversationRepository | None = None,
+        debounce: DebounceStore | None = None,
+        centurion: CenturionService | None = None,
+    ):
+        settings = get_settings()
         self._db = db
         self._redis = redis
-        self._conversations = ConversationRepository(db)
-        self._centurion = CenturionService(db=db, redis=redis)
+        self._conversations = conv_repo or ConversationRepository(db)
+        self._store = debounce or DebounceStore(
+            redis=redis,
+            ttl_s=settings.debounce_state_ttl_s,
+            snapshot_every_s=settings.debounce_snapshot_interval_s,
+        )
+        self._centurion = centurion or CenturionService(db=db, redis=redis)
         self._locks = RedisLockManager(redis, prefix="locks:conversation:")
+        self._next_sweep_at = 0.0
 
     async def run_forever(self) -> None:
         settings = get_settings()
@@ -32,15 +49,38 @@ class DebounceWorker:
 
     async def _tick(self) -> None:
         settings = get_settings()
-        due = await self._conversations.find_due_conversations(limit=20)
+        if time.monotonic() >= self._next_sweep_at:
+            self._next_sweep_at = time.monotonic() + settings.debounce_sweep_interval_s
+            try:
+                await self._sweep_snapshots(overdue_s=settings.debounce_sweep_interval_s)
+            except Exception:
+                logger.exception("debounce.sweep_failed")
+
+        due = await self._store.find_due(limit=20)
         if not due:
             return
-        for conv in due:
+        for conv_id in due:
             async with self._locks.hold(
-                conv.id,
+                conv_id,
                 ttl_s=settings.debounce_lock_ttl_s,
                 refresh_every_s=settings.debounce_lock_refresh_s,
             ) as acquired:
                 if not acquired:
                     continue
-                await self._centurion.process_due_conversation(conv.id)
+                await self._centurion.process_due_conversation(conv_id)
+
+    async def _sweep_snapshots(self, *, overdue_s: float) -> None:
+        """
+        Postgres snapshots still `waiting` well past their due time mean Redis lost the state
+        (restart/eviction) or a terminal snapshot was not written: rehydrate or repair them.
+        """
+        rows = await self._conversations.find_due_conversations(limit=100, overdue_s=overdue_s)
+        for conv in rows:
+            result = await self._store.restore(conv.id, until=conv.debounce_until, pending_messages=conv.pending_messages)
+            if result == 1:
+                logger.warning(
+                    "debounce.restored_from_snapshot",
+                    extra={"extra": {"conversation_id": conv.id, "pending_count": len(conv.pending_messages)}},
+                )
+            elif result == 2:
+                await self._conversations.clear_pending(conv.id)
@@ -1,46 +1,63 @@
 from __future__ import annotations
 
-import json
 import logging
 import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from common.config.logging import company_id_ctx, correlation_id_ctx, request_id_ctx
+from common.config.settings import get_settings
 from common.infrastructure.cache.redis_client import RedisClient
 from common.infrastructure.database.supabase_client import SupabaseDb
-from common.infrastructure.events.envelope import EventParseError, build_envelope, parse_envelope
+from common.infrastructure.events.envelope import EventParseError, build_envelope, encode_envelope, parse_envelope
+from common.infrastructure.events.outbox import EventOutbox
 from common.infrastructure.idempotency.idempotency_store import IdempotencyStore
+from common.infrastructure.integrations.openai_resolver import OpenAIResolver
 from common.infrastructure.metrics.prometheus import DOMAIN_EVENTS_TOTAL, LEADS_CREATED_TOTAL, MESSAGES_TOTAL
 from modules.centurion.repository.config_repository import ConfigRepository
 from modules.centurion.repository.conversation_repository import ConversationRepository
-from modules.centurion.repository.lead_repository import LeadRepository
+from modules.centurion.repository.debounce_store import DebounceStore
 from modules.centurion.repository.message_repository import MessageRepository
 from modules.channels.services.media_downloader import MediaDownloader
 from modules.channels.services.channel_router import ChannelRouter
 from modules.channels.services.stt_service import SpeechToTextService
 from modules.channels.services.vision_service import VisionService
-from modules.followups.services.followup_service import FollowupService
-from modules.memory.services.short_term_memory import ShortTermMemory
+from modules.memory.services.history_cache import ConversationHistoryCache
 
 logger = logging.getLogger(__name__)
 
 
 class MessageHandler:
-    def __init__(self, *, db: SupabaseDb, redis: RedisClient):
+    def __init__(
+        self,
+        *,
+        db: SupabaseDb,
+        redis: RedisClient,
+        conv_repo: ConversationRepository | None = None,
+        debounce: DebounceStore | None = None,
+        msg_repo: MessageRepository | None = None,
+        config_repo: ConfigRepository | None = None,
+        idempotency: IdempotencyStore | None = None,
+        openai: OpenAIResolver | None = None,
+        outbox: EventOutbox | None = None,
+    ):
         self._db = db
         self._redis = redis
-        self._lead_repo = LeadRepository(db)
-        self._conv_repo = ConversationRepository(db)
-        self._msg_repo = MessageRepository(db)
-        self._config_repo = ConfigRepository(db)
-        self._short_term = ShortTermMemory(db=db, redis=redis)
-        self._followups = FollowupService(db=db, redis=redis)
-        self._idempotency = IdempotencyStore(db)
+        self._conv_repo = conv_repo or ConversationRepository(db)
+        settings = get_settings()
+        self._debounce = debounce or DebounceStore(
+            redis=redis,
+            ttl_s=settings.debounce_state_ttl_s,
+            snapshot_every_s=settings.debounce_snapshot_interval_s,
+        )
+        self._msg_repo = msg_repo or MessageRepository(db, history_cache=ConversationHistoryCache(redis=redis))
+        self._config_repo = config_repo or ConfigRepository(db)
+        self._idempotency = idempotency or IdempotencyStore(db)
+        self._outbox = outbox or EventOutbox()
 
         self._downloader = MediaDownloader()
-        self._stt = SpeechToTextService(db=db)
-        self._vision = VisionService(db=db)
+        self._stt = SpeechToTextService(db=db, openai=openai)
+        self._vision = VisionService(db=db, openai=openai)
         self._channel_router = ChannelRouter()
 
     async def handle_message_received(self, raw: str) -> None:
@@ -91,27 +108,10 @@ class MessageHandler:
             if not instance_id or not from_number:
                 return
 
-            instance = await self._db.fetchrow(
-                "select channel_type from core.channel_instances where id=$1 and company_id=$2",
-                instance_id,
-                company_id,
-            )
-            channel_type = str(instance.get("channel_type") or "whatsapp") if instance else "whatsapp"
+            channel_type = await self._config_repo.get_channel_type(company_id=company_id, instance_id=instance_id) or "whatsapp"
 
             normalized = self._channel_router.normalize_inbound(channel_type=channel_type, payload=payload)
 
-            lead, created = await self._lead_repo.get_or_create(company_id=company_id, phone=normalized.from_id)
-            await self._followups.cancel_pending(company_id=company_id, lead_id=lead.id)
-            config = await self._config_repo.get_centurion_config(company_id=company_id, centurion_id=lead.centurion_id)
-
-            conversation = await self._conv_repo.get_or_create(
-                company_id=company_id,
-                lead_id=lead.id,
-                centurion_id=str(config["id"]),
-                channel_type=channel_type,
-                channel_instance_id=instance_id,
-            )
-
             content_type = "text"
             media_url: str | None = None
             media_mime: str | None = None
@@ -122,25 +122,15 @@ class MessageHandler:
 
             inbound_content = normalized.body if isinstance(normalized.body, str) else None
             channel_message_id = normalized.raw.get("message_id") if isinstance(normalized.raw, dict) else None
+            if not isinstance(channel_message_id, str):
+                channel_message_id = None
 
-            # Secondary dedupe guard: if the channel_message_id already exists in DB, skip.
-            if isinstance(channel_message_id, str) and channel_message_id.strip():
-                already = await self._msg_repo.exists_channel_message_id(
-                    company_id=company_id,
-                    channel_message_id=channel_message_id.strip(),
-                )
-                if already:
-                    logger.info(
-                        "message_received.duplicate_channel_message",
-                        extra={"extra": {"channel_message_id": channel_message_id}},
-                    )
-                    return
-
-            message_id = await self._msg_repo.save_message(
-                conversation_id=conversation.id,
+            # Lead/conversation upsert, follow-up cancel, config and the deduped insert in one round trip.
+            ingested = await self._msg_repo.ingest_inbound(
                 company_id=company_id,
-                lead_id=lead.id,
-                direction="inbound",
+                phone=normalized.from_id,
+                channel_type=channel_type,
+                channel_instance_id=instance_id,
                 content_type=content_type,
                 content=inbound_content,
                 channel_message_id=channel_message_id,
@@ -151,15 +141,25 @@ class MessageHandler:
                     "raw": normalized.raw or {},
                 },
             )
+            if ingested.duplicate:
+                logger.info(
+                    "message_received.duplicate_channel_message",
+                    extra={"extra": {"channel_message_id": channel_message_id}},
+                )
+                return
             MESSAGES_TOTAL.labels(direction="inbound", channel_type=channel_type, content_type=content_type).inc()
-            await self._lead_repo.touch_inbound(company_id=company_id, lead_id=lead.id)
-            await self._short_term.invalidate_cache(conversation.id)
+
+            config = ingested.config
+            conversation_id = str(ingested.conversation_id)
+            message_id = str(ingested.message_id)
+            lead_id = ingested.lead_id
 
             enriched_text = inbound_content or ""
             if media_url:
                 enriched_text = await self._process_media(
                     company_id=company_id,
                     message_id=message_id,
+                    message_created_at=ingested.message_created_at,
                     content_type=content_type,
                     media_url=media_url,
                     mime_type=media_mime or "application/octet-stream",
@@ -168,32 +168,38 @@ class MessageHandler:
                     fallback=enriched_text,
                 )
 
-            if created:
+            if ingested.lead_created:
+                # core.ingest_inbound_message wrote lead.created to the outbox with the lead.
                 LEADS_CREATED_TOTAL.labels(channel_type=channel_type).inc()
-                await self._publish_lead_created(
-                    company_id=company_id,
-                    lead_id=lead.id,
-                    channel=channel_type,
-                    correlation_id=envelope.correlation_id,
-                    causation_id=envelope.id,
-                )
+                DOMAIN_EVENTS_TOTAL.labels(type="lead.created").inc()
+                self._outbox.notify()
 
             debounce_ms = int(config.get("debounce_wait_ms") or 3000)
             until = datetime.now(timezone.utc) + timedelta(milliseconds=debounce_ms)
-            pending_count = await self._conv_repo.append_pending_message(
-                conversation_id=conversation.id,
+            appended = await self._debounce.append(
+                conversation_id=conversation_id,
                 message=enriched_text or "",
                 debounce_until=until,
-                last_inbound_at=datetime.now(timezone.utc),
-                metadata_patch={"last_event_id": envelope.id, "last_correlation_id": envelope.correlation_id},
+                last_event_id=envelope.id,
+                last_correlation_id=envelope.correlation_id,
             )
+            if appended.snapshot is not None:
+                # Periodic durability snapshot; the hot path only touches Redis.
+                await self._conv_repo.update_debounce(
+                    conversation_id=conversation_id,
+                    state="waiting",
+                    until=until,
+                    pending_messages=appended.snapshot,
+                    last_inbound_at=datetime.now(timezone.utc),
+                    metadata_patch={"last_event_id": envelope.id, "last_correlation_id": envelope.correlation_id},
+                )
             await self._publish_debounce_timer(
                 company_id=company_id,
-                conversation_id=conversation.id,
-                lead_id=lead.id,
+                conversation_id=conversation_id,
+                lead_id=lead_id,
                 instance_id=instance_id,
                 debounce_until=until,
-                pending_count=pending_count,
+                pending_count=appended.pending_count,
                 correlation_id=envelope.correlation_id,
                 causation_id=envelope.id,
             )
@@ -219,6 +225,7 @@ class MessageHandler:
         *,
         company_id: str,
         message_id: str,
+        message_created_at: datetime | None,
         content_type: str,
         media_url: str,
         mime_type: str,
@@ -235,7 +242,10 @@ class MessageHandler:
         if content_type == "audio" and can_process_audio:
             try:
                 transcription = await self._stt.transcribe(company_id=company_id, audio_bytes=data)
-                await self._msg_repo.set_media_enrichment(message_id=message_id, audio_transcription=transcription)
+                if message_created_at is not None:
+                    await self._msg_repo.set_media_enrichment(
+                        message_id=message_id, created_at=message_created_at, audio_transcription=transcription
+                    )
                 return transcription
             except Exception:
                 logger.exception("media.stt_failed")
@@ -244,7 +254,10 @@ class MessageHandler:
         if content_type == "image" and can_process_image:
             try:
                 description = await self._vision.describe(company_id=company_id, image_bytes=data, mime_type=ct)
-                await self._msg_repo.set_media_enrichment(message_id=message_id, image_description=description)
+                if message_created_at is not None:
+                    await self._msg_repo.set_media_enrichment(
+                        message_id=message_id, created_at=message_created_at, image_description=description
+                    )
                 return description
             except Exception:
                 logger.exception("media.vision_failed")
@@ -252,26 +265,6 @@ class MessageHandler:
 
         return fallback
 
-    async def _publish_lead_created(
-        self,
-        *,
-        company_id: str,
-        lead_id: str,
-        channel: str,
-        correlation_id: str,
-        causation_id: str | None,
-    ) -> None:
-        event = build_envelope(
-            type="lead.created",
-            company_id=company_id,
-            source="agent-runtime",
-            correlation_id=correlation_id,
-            causation_id=causation_id,
-            payload={"lead_id": lead_id, "company_id": company_id, "channel": channel, "source": "unknown"},
-        )
-        DOMAIN_EVENTS_TOTAL.labels(type="lead.created").inc()
-        await self._redis.publish("lead.created", json.dumps(event, ensure_ascii=False))
-
     async def _publish_debounce_timer(
         self,
         *,
@@ -299,4 +292,4 @@ class MessageHandler:
             },
         )
         DOMAIN_EVENTS_TOTAL.labels(type="debounce.timer").inc()
-        await self._redis.publish("debounce.timer", json.dumps(event, ensure_ascii=False))
+        await self._redis.publish("debounce.timer", encode_envelope(event))
@@ -2,16 +2,29 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from datetime import datetime, timedelta, timezone
 
 from common.config.settings import get_settings
+from common.infrastructure.cache.redis_client import RedisClient
 from common.infrastructure.database.supabase_client import SupabaseDb
+from modules.centurion.repository.conversation_repository import ConversationRepository
+from modules.centurion.repository.debounce_store import DebounceStore
 
 logger = logging.getLogger(__name__)
 
 
 class ConversationWatchdog:
-    def __init__(self, *, db: SupabaseDb):
+    def __init__(
+        self,
+        *,
+        db: SupabaseDb,
+        redis: RedisClient,
+        conv_repo: ConversationRepository | None = None,
+        debounce: DebounceStore | None = None,
+    ):
         self._db = db
+        self._conversations = conv_repo or ConversationRepository(db)
+        self._store = debounce or DebounceStore(redis=redis)
 
     async def run_forever(self) -> None:
         settings = get_settings()
@@ -28,48 +41,17 @@ class ConversationWatchdog:
         stuck_after_s = int(getattr(settings, "watchdog_stuck_after_s", 120) or 120)
         limit = int(getattr(settings, "watchdog_batch_size", 50) or 50)
 
-        rows = await self._db.fetch(
-            """
-            select id, pending_messages
-            from core.conversations
-            where debounce_state='processing'
-              and updated_at < now() - ($1::int * interval '1 second')
-            order by updated_at asc
-            limit $2
-            """,
-            stuck_after_s,
-            limit,
-        )
-
-        for row in rows or []:
-            conv_id = str(row.get("id"))
-            pending = list(row.get("pending_messages") or [])
+        started_before = datetime.now(timezone.utc) - timedelta(seconds=stuck_after_s)
+        for conv_id in await self._store.find_stuck(started_before=started_before, limit=limit):
             if not conv_id:
                 continue
 
-            if pending:
-                await self._db.execute(
-                    """
-                    update core.conversations
-                    set debounce_state='waiting',
-                        debounce_until=now(),
-                        updated_at=now()
-                    where id=$1
-                    """,
-                    conv_id,
-                )
-                logger.warning("watchdog.recovered_to_waiting", extra={"extra": {"conversation_id": conv_id, "pending_count": len(pending)}})
+            # In-flight messages go back in front of pending in one Lua step; the debounce worker picks them up.
+            pending_count = await self._store.requeue(conv_id, started_before=started_before)
+            if pending_count is None:
+                continue
+            if pending_count:
+                logger.warning("watchdog.recovered_to_waiting", extra={"extra": {"conversation_id": conv_id, "pending_count": pending_count}})
             else:
-                await self._db.execute(
-                    """
-                    update core.conversations
-                    set debounce_state='idle',
-                        debounce_until=null,
-                        pending_messages='[]'::jsonb,
-                        updated_at=now()
-                    where id=$1
-                    """,
-                    conv_id,
-                )
+                await self._conversations.clear_pending(conv_id)
                 logger.warning("watchdog.recovered_to_idle", extra={"extra": {"conversation_id": conv_id}})
-
@@ -5,12 +5,31 @@ from typing import Any, Literal
 
 from agno.tools.function import Function
 
+from common.infrastructure.database.statements import STATEMENTS
 from common.infrastructure.database.supabase_client import SupabaseDb
 
 logger = logging.getLogger(__name__)
 
 MediaType = Literal["audio", "image", "video", "document"]
 
+# One statement for every filter combination (null = filter off), so the plan is prepared once.
+_SEARCH_ASSETS = STATEMENTS.register(
+    "media_assets.search",
+    """
+    select id, company_id, centurion_id, name, description, media_type, mime_type, tags, file_size_bytes, created_at
+    from core.media_assets
+    where company_id=$1::uuid
+      and is_active=true
+      and (centurion_id is null or centurion_id=$2::uuid)
+      and ($3::text is null or name ilike $3 or description ilike $3)
+      and ($4::core.media_asset_type is null or media_type=$4::core.media_asset_type)
+      and ($5::text[] is null or tags ?| $5::text[])
+    order by created_at desc
+    limit $6
+    """,
+    readonly=True,
+)
+
 
 def _coerce_tags(value: Any) -> list[str]:
     if not value:
@@ -60,36 +79,16 @@ class MediaTool:
                 parsed_limit = 5
             resolved_limit = max(1, min(10, parsed_limit))
 
-            where = [
-                "company_id=$1::uuid",
-                "is_active=true",
-                "(centurion_id is null or centurion_id=$2::uuid)",
-            ]
-            args: list[Any] = [company_id, centurion_id]
-
-            if query:
-                where.append("(name ilike $3 or description ilike $3)")
-                args.append(f"%{query}%")
-
-            if resolved_type:
-                where.append(f"media_type=${len(args) + 1}::core.media_asset_type")
-                args.append(resolved_type)
-
-            if resolved_tags:
-                where.append(f"tags ?| ${len(args) + 1}::text[]")
-                args.append(resolved_tags)
-
-            sql = (
-                "select id, company_id, centurion_id, name, description, media_type, mime_type, tags, file_size_bytes, created_at "
-                "from core.media_assets "
-                f"where {' and '.join(where)} "
-                "order by created_at desc "
-                f"limit ${len(args) + 1}"
-            )
-            args.append(resolved_limit)
-
             try:
-                rows = await self._db.fetch(sql, *args)
+                rows = await self._db.fetch(
+                    _SEARCH_ASSETS,
+                    company_id,
+                    centurion_id,
+                    f"%{query}%" if query else None,
+                    resolved_type,
+                    resolved_tags or None,
+                    resolved_limit,
+                )
             except Exception as err:
                 logger.exception(
                     "media_tool.search_failed",
@@ -1,15 +1,62 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
+from common.config.settings import get_settings
+from common.infrastructure.cache.local_cache import LocalTtlCache
 from common.infrastructure.database.supabase_client import SupabaseDb
 
 
+@dataclass(frozen=True)
+class ConfigCaches:
+    # (company_id, centurion_id | "") -> centurion_configs row
+    centurion_configs: LocalTtlCache[tuple[str, str], dict[str, Any]]
+    # (company_id, instance_id) -> channel_type (None when the instance does not exist)
+    channel_instances: LocalTtlCache[tuple[str, str], str | None]
+
+    def invalidate_company(self, company_id: str, *, entity: str | None = None) -> int:
+        dropped = 0
+        if entity in (None, "centurion_config"):
+            dropped += self.centurion_configs.invalidate_where(lambda k: k[0] == company_id)
+        if entity in (None, "channel_instance"):
+            dropped += self.channel_instances.invalidate_where(lambda k: k[0] == company_id)
+        return dropped
+
+
+@lru_cache(maxsize=1)
+def get_config_caches() -> ConfigCaches:
+    """Process-wide caches shared by every ConfigRepository (and the `config.updated` handler)."""
+    settings = get_settings()
+    return ConfigCaches(
+        centurion_configs=LocalTtlCache("centurion_config", ttl_s=getattr(settings, "config_cache_ttl_s", 30.0)),
+        channel_instances=LocalTtlCache(
+            "channel_instance", ttl_s=getattr(settings, "channel_instance_cache_ttl_s", 300.0)
+        ),
+    )
+
+
 class ConfigRepository:
-    def __init__(self, db: SupabaseDb):
+    def __init__(self, db: SupabaseDb, *, caches: ConfigCaches | None = None):
         self._db = db
+        self._caches = caches or get_config_caches()
 
     async def get_centurion_config(self, *, company_id: str, centurion_id: str | None) -> dict[str, Any]:
+        config = await self._caches.centurion_configs.get_or_load(
+            (company_id, centurion_id or ""),
+            lambda: self._load_centurion_config(company_id=company_id, centurion_id=centurion_id),
+        )
+        # Callers may tweak the dict; the cached copy stays untouched.
+        return dict(config)
+
+    async def get_channel_type(self, *, company_id: str, instance_id: str) -> str | None:
+        return await self._caches.channel_instances.get_or_load(
+            (company_id, instance_id),
+            lambda: self._load_channel_type(company_id=company_id, instance_id=instance_id),
+        )
+
+    async def _load_centurion_config(self, *, company_id: str, centurion_id: str | None) -> dict[str, Any]:
         if centurion_id:
             row = await self._db.fetchrow(
                 "select * from core.centurion_configs where id=$1 and company_id=$2 and is_active=true",
@@ -33,3 +80,10 @@ class ConfigRepository:
             raise RuntimeError("No active centurion_config for company")
         return dict(row)
 
+    async def _load_channel_type(self, *, company_id: str, instance_id: str) -> str | None:
+        row = await self._db.fetchrow(
+            "select channel_type from core.channel_instances where id=$1 and company_id=$2",
+            instance_id,
+            company_id,
+        )
+        return str(row.get("channel_type") or "whatsapp") if row else None
@@ -5,52 +5,22 @@ from typing import Any
 
 from common.infrastructure.database.supabase_client import SupabaseDb
 from modules.centurion.domain.conversation import Conversation
+from modules.centurion.repository.touch_buffer import ContactTouchBuffer
 
 
 class ConversationRepository:
-    def __init__(self, db: SupabaseDb):
+    def __init__(self, db: SupabaseDb, *, touches: ContactTouchBuffer | None = None):
         self._db = db
+        self._touches = touches
 
-    async def get_or_create(
-        self,
-        *,
-        company_id: str,
-        lead_id: str,
-        centurion_id: str,
-        channel_type: str,
-        channel_instance_id: str | None,
-    ) -> Conversation:
-        row = await self._db.fetchrow(
-            """
-            select *
-            from core.conversations
-            where company_id=$1 and lead_id=$2 and centurion_id=$3 and channel_type=$4
-              and ($5::uuid is null or channel_instance_id=$5::uuid)
-            order by created_at desc
-            limit 1
-            """,
-            company_id,
-            lead_id,
-            centurion_id,
-            channel_type,
-            channel_instance_id,
-        )
-        if row:
-            return self._map(row)
-
-        row = await self._db.fetchrow(
-            """
-            insert into core.conversations (company_id, lead_id, centurion_id, channel_instance_id, channel_type)
-            values ($1, $2, $3, $4, $5)
-            returning *
-            """,
-            company_id,
-            lead_id,
-            centurion_id,
-            channel_instance_id,
-            channel_type,
+    async def touch_outbound(self, *, conversation_id: str, at: datetime | None = None) -> None:
+        if self._touches is not None:
+            self._touches.touch_conversation(conversation_id=conversation_id, at=at)
+            return
+        await self._db.execute(
+            "update core.conversations set last_outbound_at=now(), updated_at=now() where id=$1",
+            conversation_id,
         )
-        return self._map(row)
 
     async def update_debounce(
         self,
@@ -83,47 +53,6 @@ class ConversationRepository:
             patch,
         )
 
-    async def append_pending_message(
-        self,
-        *,
-        conversation_id: str,
-        message: str,
-        debounce_until: datetime,
-        last_inbound_at: datetime,
-        metadata_patch: dict[str, Any] | None = None,
-    ) -> int:
-        """
-        Atomically appends a message to pending_messages and moves the conversation to `waiting`.
-        Returns the new pending_count.
-        """
-        patch = metadata_patch or {}
-        row = await self._db.fetchrow(
-            """
-            update core.conversations
-            set
-              debounce_state='waiting',
-              debounce_until=$2,
-              pending_messages=coalesce(pending_messages, '[]'::jsonb) || to_jsonb(array[$3]::text[]),
-              last_inbound_at=$4,
-              metadata=coalesce(metadata, '{}'::jsonb) || coalesce($5::jsonb, '{}'::jsonb),
-              updated_at=now()
-            where id=$1
-            returning jsonb_array_length(pending_messages) as pending_count
-            """,
-            conversation_id,
-            debounce_until,
-            message,
-            last_inbound_at,
-            patch,
-        )
-        return int(row["pending_count"]) if row and row.get("pending_count") is not None else 0
-
-    async def mark_processing(self, conversation_id: str) -> None:
-        await self._db.execute(
-            "update core.conversations set debounce_state='processing', updated_at=now() where id=$1",
-            conversation_id,
-        )
-
     async def clear_pending(self, conversation_id: str) -> None:
         await self._db.execute(
             """
@@ -134,18 +63,20 @@ class ConversationRepository:
             conversation_id,
         )
 
-    async def find_due_conversations(self, *, limit: int = 20) -> list[Conversation]:
+    async def find_due_conversations(self, *, limit: int = 20, overdue_s: float = 0.0) -> list[Conversation]:
+        """Snapshots still `waiting` past their due time (+ overdue_s); used to rehydrate the Redis store."""
         rows = await self._db.fetch(
             """
             select *
             from core.conversations
             where debounce_state='waiting'
               and debounce_until is not null
-              and debounce_until <= now()
+              and debounce_until <= now() - ($2::float8 * interval '1 second')
             order by debounce_until asc
             limit $1
             """,
             limit,
+            overdue_s,
         )
         return [self._map(r) for r in rows]
 
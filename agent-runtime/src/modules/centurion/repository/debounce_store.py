@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from common.infrastructure.cache.redis_client import RedisClient
+
+_DUE_KEY = "debounce:due"
+_PROCESSING_KEY = "debounce:processing"
+
+# KEYS: state, pending, due
+# ARGV: conversation_id, message, until_ms, now_ms, ttl_s, snapshot_every_ms, last_event_id, last_correlation_id
+# Returns {pending_count, snapshot_due, pending...(only when snapshot_due)}
+APPEND_LUA = """
+redis.call("rpush", KEYS[2], ARGV[2])
+if redis.call("hget", KEYS[1], "state") ~= "processing" then
+  redis.call("hset", KEYS[1], "state", "waiting")
+end
+redis.call("hset", KEYS[1], "until_ms", ARGV[3], "last_inbound_ms", ARGV[4], "last_event_id", ARGV[7], "last_correlation_id", ARGV[8])
+redis.call("zadd", KEYS[3], ARGV[3], ARGV[1])
+redis.call("expire", KEYS[1], ARGV[5])
+redis.call("expire", KEYS[2], ARGV[5])
+local count = redis.call("llen", KEYS[2])
+local last_snapshot = tonumber(redis.call("hget", KEYS[1], "snapshot_ms") or "0")
+if tonumber(ARGV[4]) - last_snapshot < tonumber(ARGV[6]) then
+  return {count, 0}
+end
+redis.call("hset", KEYS[1], "snapshot_ms", ARGV[4])
+local out = {count, 1}
+for _, m in ipairs(redis.call("lrange", KEYS[2], 0, -1)) do
+  table.insert(out, m)
+end
+return out
+"""
+
+# KEYS: state, pending, inflight, due, processing
+# ARGV: conversation_id, now_ms, ttl_s
+# Returns {} when nothing is pending, else {last_event_id, last_correlation_id, messages...}
+BEGIN_LUA = """
+local moved = redis.call("lrange", KEYS[2], 0, -1)
+for _, m in ipairs(moved) do
+  redis.call("rpush", KEYS[3], m)
+end
+redis.call("del", KEYS[2])
+redis.call("zrem", KEYS[4], ARGV[1])
+local inflight = redis.call("lrange", KEYS[3], 0, -1)
+if #inflight == 0 then
+  redis.call("hset", KEYS[1], "state", "idle")
+  redis.call("zrem", KEYS[5], ARGV[1])
+  return {}
+end
+redis.call("hset", KEYS[1], "state", "processing")
+redis.call("zadd", KEYS[5], ARGV[2], ARGV[1])
+redis.call("expire", KEYS[1], ARGV[3])
+redis.call("expire", KEYS[3], ARGV[3])
+local meta = redis.call("hmget", KEYS[1], "last_event_id", "last_correlation_id")
+local out = {meta[1] or "", meta[2] or ""}
+for _, m in ipairs(inflight) do
+  table.insert(out, m)
+end
+return out
+"""
+
+# KEYS: state, pending, inflight, processing
+# ARGV: conversation_id, now_ms
+# Returns {state, until_ms, last_inbound_ms, last_event_id, last_correlation_id, pending...}
+FINISH_LUA = """
+redis.call("del", KEYS[3])
+redis.call("zrem", KEYS[4], ARGV[1])
+local pending = redis.call("lrange", KEYS[2], 0, -1)
+local state = "idle"
+if #pending > 0 then
+  state = "waiting"
+end
+redis.call("hset", KEYS[1], "state", state, "snapshot_ms", ARGV[2])
+local meta = redis.call("hmget", KEYS[1], "until_ms", "last_inbound_ms", "last_event_id", "last_correlation_id")
+local out = {state, meta[1] or "", meta[2] or "", meta[3] or "", meta[4] or ""}
+for _, m in ipairs(pending) do
+  table.insert(out, m)
+end
+return out
+"""
+
+# KEYS: state, pending, inflight, due, processing
+# ARGV: conversation_id, now_ms, started_before_ms
+# Returns -1 when the conversation is no longer stuck, else the pending count after requeue.
+REQUEUE_LUA = """
+local started = redis.call("zscore", KEYS[5], ARGV[1])
+if not started or tonumber(started) > tonumber(ARGV[3]) then
+  return -1
+end
+local inflight = redis.call("lrange", KEYS[3], 0, -1)
+for i = #inflight, 1, -1 do
+  redis.call("lpush", KEYS[2], inflight[i])
+end
+redis.call("del", KEYS[3])
+redis.call("zrem", KEYS[5], ARGV[1])
+local count = redis.call("llen", KEYS[2])
+if count > 0 then
+  redis.call("hset", KEYS[1], "state", "waiting", "until_ms", ARGV[2])
+  redis.call("zadd", KEYS[4], ARGV[2], ARGV[1])
+else
+  redis.call("hset", KEYS[1], "state", "idle")
+  redis.call("zrem", KEYS[4], ARGV[1])
+end
+return count
+"""
+
+# KEYS: state, pending, due
+# ARGV: conversation_id, until_ms, now_ms, ttl_s, messages...
+# Returns 1 when restored, 0 when Redis already tracks the conversation (2 if it is idle there).
+RESTORE_LUA = """
+local state = redis.call("hget", KEYS[1], "state")
+if state then
+  if state == "idle" then
+    return 2
+  end
+  return 0
+end
+for i = 5, #ARGV do
+  redis.call("rpush", KEYS[2], ARGV[i])
+end
+redis.call("hset", KEYS[1], "state", "waiting", "until_ms", ARGV[2], "snapshot_ms", ARGV[3])
+redis.call("zadd", KEYS[3], ARGV[2], ARGV[1])
+redis.call("expire", KEYS[1], ARGV[4])
+redis.call("expire", KEYS[2], ARGV[4])
+return 1
+"""
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _to_ms(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _from_ms(raw: Any) -> datetime | None:
+    try:
+        return datetime.fromtimestamp(int(raw) / 1000, tz=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class PendingAppend:
+    pending_count: int
+    # Full pending list when a Postgres snapshot is due, None otherwise.
+    snapshot: list[str] | None = None
+
+
+@dataclass(frozen=True)
+class PendingBatch:
+    messages: list[str] = field(default_factory=list)
+    last_event_id: str | None = None
+    last_correlation_id: str | None = None
+
+
+@dataclass(frozen=True)
+class DebounceSnapshot:
+    state: str
+    until: datetime | None
+    last_inbound_at: datetime | None
+    pending_messages: list[str] = field(default_factory=list)
+    metadata_patch: dict[str, Any] = field(default_factory=dict)
+
+
+class DebounceStore:
+    """
+    Debounce state per conversation, kept in Redis:
+
+    - `conv:{id}:debounce` hash: state (idle|waiting|processing), until_ms, last_inbound_ms, last ids
+    - `conv:{id}:pending` list: inbound texts not yet picked up
+    - `conv:{id}:inflight` list: texts being answered (moved back to pending if the worker dies)
+    - `debounce:due` / `debounce:processing` zsets: due time / processing start per conversation
+
+    Every transition is a single Lua script. `core.conversations` only receives the snapshots
+    returned here (periodic on append, terminal on finish).
+    """
+
+    def __init__(self, *, redis: RedisClient, ttl_s: int = 7 * 24 * 3600, snapshot_every_s: float = 5.0):
+        self._redis = redis
+        self._ttl_s = max(60, int(ttl_s))
+        self._snapshot_every_ms = max(0, int(snapshot_every_s * 1000))
+
+    def _keys(self, conversation_id: str) -> tuple[str, str, str]:
+        base = f"conv:{conversation_id}"
+        return f"{base}:debounce", f"{base}:pending", f"{base}:inflight"
+
+    async def append(
+        self,
+        *,
+        conversation_id: str,
+        message: str,
+        debounce_until: datetime,
+        last_event_id: str,
+        last_correlation_id: str,
+    ) -> PendingAppend:
+        state_key, pending_key, _ = self._keys(conversation_id)
+        raw = await self._redis.client.eval(
+            APPEND_LUA,
+            3,
+            state_key,
+            pending_key,
+            _DUE_KEY,
+            conversation_id,
+            message,
+            _to_ms(debounce_until),
+            _now_ms(),
+            self._ttl_s,
+            self._snapshot_every_ms,
+            last_event_id,
+            last_correlation_id,
+        )
+        count = int(raw[0])
+        snapshot = [str(m) for m in raw[2:]] if int(raw[1]) else None
+        return PendingAppend(pending_count=count, snapshot=snapshot)
+
+    async def find_due(self, *, limit: int = 20) -> list[str]:
+        ids = await self._redis.client.zrangebyscore(_DUE_KEY, "-inf", _now_ms(), start=0, num=limit)
+        return [str(i) for i in ids or []]
+
+    async def begin(self, conversation_id: str) -> PendingBatch | None:
+        """Moves pending messages to in-flight and marks the conversation `processing`. None when nothing is pending."""
+        state_key, pending_key, inflight_key = self._keys(conversation_id)
+        raw = await self._redis.client.eval(
+            BEGIN_LUA,
+            5,
+            state_key,
+            pending_key,
+            inflight_key,
+            _DUE_KEY,
+            _PROCESSING_KEY,
+            conversation_id,
+            _now_ms(),
+            self._ttl_s,
+        )
+        if not raw:
+            return None
+        return PendingBatch(
+            messages=[str(m) for m in raw[2:]],
+            last_event_id=str(raw[0]) or None,
+            last_correlation_id=str(raw[1]) or None,
+        )
+
+    async def finish(self, conversation_id: str) -> DebounceSnapshot:
+        """Drops the in-flight batch; returns the terminal snapshot (messages that arrived meanwhile stay pending)."""
+        state_key, pending_key, inflight_key = self._keys(conversation_id)
+        raw = await self._redis.client.eval(
+            FINISH_LUA,
+            4,
+            state_key,
+            pending_key,
+            inflight_key,
+            _PROCESSING_KEY,
+            conversation_id,
+            _now_ms(),
+        )
+        state = str(raw[0])
+        patch = {k: str(v) for k, v in (("last_event_id", raw[3]), ("last_correlation_id", raw[4])) if v}
+        return DebounceSnapshot(
+            state=state,
+            until=_from_ms(raw[1]) if state == "waiting" else None,
+            last_inbound_at=_from_ms(raw[2]),
+            pending_messages=[str(m) for m in raw[5:]],
+            metadata_patch=patch,
+        )
+
+    async def find_stuck(self, *, started_before: datetime, limit: int = 50) -> list[str]:
+        ids = await self._redis.client.zrangebyscore(_PROCESSING_KEY, "-inf", _to_ms(started_before), start=0, num=limit)
+        return [str(i) for i in ids or []]
+
+    async def requeue(self, conversation_id: str, *, started_before: datetime) -> int | None:
+        """Puts a stuck in-flight batch back in front of pending. None when it is no longer stuck."""
+        state_key, pending_key, inflight_key = self._keys(conversation_id)
+        n = int(
+            await self._redis.client.eval(
+                REQUEUE_LUA,
+                5,
+                state_key,
+                pending_key,
+                inflight_key,
+                _DUE_KEY,
+                _PROCESSING_KEY,
+                conversation_id,
+                _now_ms(),
+                _to_ms(started_before),
+            )
+        )
+        return None if n < 0 else n
+
+    async def restore(self, conversation_id: str, *, until: datetime | None, pending_messages: list[str]) -> int:
+        """Rehydrates a conversation from its Postgres snapshot when Redis lost it (restart/eviction)."""
+        state_key, pending_key, _ = self._keys(conversation_id)
+        return int(
+            await self._redis.client.eval(
+                RESTORE_LUA,
+                3,
+                state_key,
+                pending_key,
+                _DUE_KEY,
+                conversation_id,
+                _to_ms(until) if until else _now_ms(),
+                _now_ms(),
+                self._ttl_s,
+                *[str(m) for m in pending_messages],
+            )
+        )
@@ -1,28 +1,117 @@
 from __future__ import annotations
 
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Any
 
+from common.infrastructure.database.statements import STATEMENTS
 from common.infrastructure.database.supabase_client import SupabaseDb
 from modules.centurion.domain.message import Message
+from modules.memory.services.history_cache import ConversationHistoryCache
+
+logger = logging.getLogger(__name__)
+
+_INSERT_MESSAGE = STATEMENTS.register(
+    "messages.insert",
+    """
+    insert into core.messages (
+      conversation_id, company_id, lead_id,
+      direction, content_type, content,
+      channel_message_id, metadata
+    )
+    values ($1, $2, $3, $4, $5, $6, $7, coalesce($8::jsonb, '{}'::jsonb))
+    returning id, created_at
+    """,
+)
+
+_INGEST_INBOUND = STATEMENTS.register(
+    "messages.ingest_inbound",
+    "select * from core.ingest_inbound_message($1, $2, $3, $4, $5, $6, $7, $8::jsonb)",
+)
+
+_SET_MEDIA_ENRICHMENT = STATEMENTS.register(
+    "messages.set_media_enrichment",
+    """
+    update core.messages
+    set audio_transcription = coalesce($2, audio_transcription),
+        image_description = coalesce($3, image_description)
+    where id=$1
+      and created_at=$4
+    returning conversation_id, audio_transcription, image_description
+    """,
+)
+
+# Served by idx_messages_conversation_active; `order by created_at desc limit` walks the monthly
+# partitions newest-first and stops once the window is filled.
+_LIST_RECENT = STATEMENTS.register(
+    "messages.list_recent",
+    """
+    select *
+    from core.messages
+    where conversation_id=$1
+      and archived_at is null
+    order by created_at desc
+    limit $2
+    """,
+    readonly=True,
+)
+
+_LIST_RECENT_WITH_ARCHIVED = STATEMENTS.register(
+    "messages.list_recent_with_archived",
+    """
+    select *
+    from core.messages
+    where conversation_id=$1
+    order by created_at desc
+    limit $2
+    """,
+    readonly=True,
+)
+
+# Keyset page after a (created_at, id) cursor, oldest first: rows sharing the cursor's timestamp are
+# not lost and nothing between two pages is skipped. Cursors without an id start at that timestamp.
+_LIST_SINCE = STATEMENTS.register(
+    "messages.list_since",
+    """
+    select *
+    from core.messages
+    where conversation_id=$1
+      and (
+        $2::timestamptz is null
+        or (created_at, id) > ($2::timestamptz, coalesce($3::uuid, '00000000-0000-0000-0000-000000000000'::uuid))
+      )
+    order by created_at asc, id asc
+    limit $4
+    """,
+    readonly=True,
+)
+
+
+@dataclass(frozen=True)
+class MessageCursor:
+    """Position right after a message in (created_at, id) order."""
+
+    created_at: datetime
+    message_id: str | None = None
+
+
+@dataclass(frozen=True)
+class InboundIngest:
+    lead_id: str
+    lead_created: bool
+    duplicate: bool = False
+    conversation_id: str | None = None
+    message_id: str | None = None
+    message_created_at: datetime | None = None
+    followups_canceled: int = 0
+    config: dict[str, Any] = field(default_factory=dict)
 
 
 class MessageRepository:
-    def __init__(self, db: SupabaseDb):
+    def __init__(self, db: SupabaseDb, *, history_cache: ConversationHistoryCache | None = None):
         self._db = db
-
-    async def exists_channel_message_id(self, *, company_id: str, channel_message_id: str) -> bool:
-        row = await self._db.fetchrow(
-            """
-            select id
-            from core.messages
-            where company_id=$1
-              and channel_message_id=$2
-            limit 1
-            """,
-            company_id,
-            channel_message_id,
-        )
-        return bool(row and row.get("id"))
+        self._history = history_cache
 
     async def save_message(
         self,
@@ -36,16 +125,36 @@ class MessageRepository:
         channel_message_id: str | None = None,
         metadata: dict[str, Any] | None = None,
     ) -> str:
-        row = await self._db.fetchrow(
-            """
-            insert into core.messages (
-              conversation_id, company_id, lead_id,
-              direction, content_type, content,
-              channel_message_id, metadata
-            )
-            values ($1, $2, $3, $4, $5, $6, $7, coalesce($8::jsonb, '{}'::jsonb))
-            returning id
-            """,
+        message = await self.insert_message(
+            self._db,
+            conversation_id=conversation_id,
+            company_id=company_id,
+            lead_id=lead_id,
+            direction=direction,
+            content_type=content_type,
+            content=content,
+            channel_message_id=channel_message_id,
+            metadata=metadata,
+        )
+        await self.remember(message)
+        return message.id
+
+    async def insert_message(
+        self,
+        conn: Any,
+        *,
+        conversation_id: str,
+        company_id: str,
+        lead_id: str,
+        direction: str,
+        content_type: str,
+        content: str | None,
+        channel_message_id: str | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> Message:
+        """Insert on `conn` (e.g. a transaction) without touching the history cache; call `remember` after commit."""
+        row = await conn.fetchrow(
+            _INSERT_MESSAGE,
             conversation_id,
             company_id,
             lead_id,
@@ -55,29 +164,132 @@ class MessageRepository:
             channel_message_id,
             metadata or {},
         )
-        return str(row["id"])
+        return Message(
+            id=str(row["id"]),
+            conversation_id=str(conversation_id),
+            company_id=str(company_id),
+            lead_id=str(lead_id),
+            direction=direction,
+            content_type=content_type,
+            content=content,
+            channel_message_id=channel_message_id,
+            metadata=dict(metadata or {}),
+            created_at=row.get("created_at"),
+        )
+
+    async def ingest_inbound(
+        self,
+        *,
+        company_id: str,
+        phone: str,
+        channel_type: str,
+        channel_instance_id: str | None,
+        content_type: str,
+        content: str | None,
+        channel_message_id: str | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> InboundIngest:
+        """
+        Lead upsert, follow-up cancel, centurion config, conversation get_or_create, dedupe on
+        channel_message_id, message insert and touch_inbound in one round trip
+        (`core.ingest_inbound_message`).
+        """
+        row = await self._db.fetchrow(
+            _INGEST_INBOUND,
+            company_id,
+            phone,
+            channel_type,
+            channel_instance_id,
+            content_type,
+            content,
+            channel_message_id,
+            metadata or {},
+        )
+        if not row:
+            raise RuntimeError("ingest_inbound_message returned no row")
+
+        lead_id = str(row["lead_id"])
+        if row.get("duplicate"):
+            return InboundIngest(lead_id=lead_id, lead_created=bool(row.get("lead_created")), duplicate=True)
+
+        ingested = InboundIngest(
+            lead_id=lead_id,
+            lead_created=bool(row.get("lead_created")),
+            conversation_id=str(row["conversation_id"]),
+            message_id=str(row["message_id"]),
+            message_created_at=row.get("message_created_at"),
+            followups_canceled=int(row.get("followups_canceled") or 0),
+            config=dict(row.get("config") or {}),
+        )
+        await self.remember(
+            Message(
+                id=ingested.message_id or "",
+                conversation_id=ingested.conversation_id or "",
+                company_id=str(company_id),
+                lead_id=lead_id,
+                direction="inbound",
+                content_type=content_type,
+                content=content,
+                channel_message_id=(channel_message_id or "").strip() or None,
+                metadata=dict(metadata or {}),
+                created_at=ingested.message_created_at,
+            )
+        )
+        return ingested
+
+    async def remember(self, message: Message) -> None:
+        # Every message write ends here (after commit); pins history reads to the primary.
+        await self._db.note_write(message.conversation_id)
+        if self._history is None:
+            return
+        try:
+            await self._history.append(message)
+        except Exception:
+            logger.warning("history_cache.append_failed", extra={"extra": {"conversation_id": message.conversation_id}})
 
     async def set_media_enrichment(
         self,
         *,
         message_id: str,
+        created_at: datetime,
         audio_transcription: str | None = None,
         image_description: str | None = None,
     ) -> None:
-        await self._db.execute(
-            """
-            update core.messages
-            set audio_transcription = coalesce($2, audio_transcription),
-                image_description = coalesce($3, image_description)
-            where id=$1
-            """,
+        # created_at prunes the update to the message's monthly partition.
+        row = await self._db.fetchrow(
+            _SET_MEDIA_ENRICHMENT,
             message_id,
             audio_transcription,
             image_description,
+            created_at,
         )
+        if row:
+            await self._db.note_write(str(row["conversation_id"]))
+        if self._history is not None and row:
+            try:
+                await self._history.patch(
+                    str(row["conversation_id"]),
+                    str(message_id),
+                    audio_transcription=row.get("audio_transcription"),
+                    image_description=row.get("image_description"),
+                )
+            except Exception:
+                logger.warning("history_cache.patch_failed", extra={"extra": {"message_id": message_id}})
 
-    async def delete_message(self, *, message_id: str) -> None:
-        await self._db.execute("delete from core.messages where id=$1", message_id)
+    async def delete_message(self, *, message_id: str, created_at: datetime) -> None:
+        row = await self._db.fetchrow(
+            "delete from core.messages where id=$1 and created_at=$2 returning conversation_id",
+            message_id,
+            created_at,
+        )
+        if row:
+            await self._db.note_write(str(row["conversation_id"]))
+        if self._history is not None and row:
+            # Deletes are rare (failed publishes); dropping the list keeps the "newest N" invariant simple.
+            try:
+                await self._history.invalidate(str(row["conversation_id"]))
+            except Exception:
+                logger.warning("history_cache.invalidate_failed", extra={"extra": {"message_id": message_id}})
 
     async def list_recent(
         self,
@@ -86,26 +298,36 @@ class MessageRepository:
         limit: int,
         include_archived: bool = False,
     ) -> list[Message]:
-        archived_filter = ""
-        if not include_archived:
-            archived_filter = "and not (coalesce(metadata, '{}'::jsonb) ? 'archived')"
-
         rows = await self._db.fetch(
-            f"""
-            select *
-            from core.messages
-            where conversation_id=$1
-              {archived_filter}
-            order by created_at desc
-            limit $2
-            """,
+            _LIST_RECENT_WITH_ARCHIVED if include_archived else _LIST_RECENT,
             conversation_id,
             limit,
+            readonly=True,
+            consistency_key=conversation_id,
         )
         messages = [self._map(r) for r in rows]
         messages.reverse()
         return messages
 
+    async def list_since(
+        self,
+        *,
+        conversation_id: str,
+        after: MessageCursor | None,
+        limit: int,
+    ) -> list[Message]:
+        """Oldest `limit` messages after `after` (from the start when None), oldest first."""
+        rows = await self._db.fetch(
+            _LIST_SINCE,
+            conversation_id,
+            after.created_at if after else None,
+            after.message_id if after else None,
+            limit,
+            readonly=True,
+            consistency_key=conversation_id,
+        )
+        return [self._map(r) for r in rows]
+
     def _map(self, row: Any) -> Message:
         return Message(
             id=str(row["id"]),
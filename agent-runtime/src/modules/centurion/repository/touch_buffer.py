@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+from datetime import datetime, timezone
+
+from common.infrastructure.database.statements import STATEMENTS
+from common.infrastructure.database.supabase_client import SupabaseDb
+from common.infrastructure.metrics.prometheus import CONTACT_TOUCH_ROWS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+_MAX_FLUSH_ATTEMPTS = 3
+
+# Same transition and guard as a single touch_outbound; `greatest` keeps a late flush from moving
+# last_contact_at back behind a newer inbound (ingest_inbound_message writes it directly).
+_FLUSH_LEADS = STATEMENTS.register(
+    "leads.touch_outbound_batch",
+    """
+    update core.leads l
+    set
+      last_contact_at=greatest(l.last_contact_at, t.at),
+      first_contact_at=coalesce(l.first_contact_at, t.at),
+      lifecycle_stage = case
+        when l.lifecycle_stage='new' then 'proactive_contacted'
+        else l.lifecycle_stage
+      end,
+      updated_at=now()
+    from jsonb_to_recordset($1::jsonb) as t(company_id uuid, lead_id uuid, at timestamptz)
+    where l.id=t.lead_id
+      and l.company_id=t.company_id
+      and l.lifecycle_stage not in ('qualified', 'handoff_done', 'closed_lost')
+    """,
+)
+
+_FLUSH_CONVERSATIONS = STATEMENTS.register(
+    "conversations.touch_outbound_batch",
+    """
+    update core.conversations c
+    set last_outbound_at=greatest(c.last_outbound_at, t.at), updated_at=now()
+    from jsonb_to_recordset($1::jsonb) as t(id uuid, at timestamptz)
+    where c.id=t.id
+    """,
+)
+
+
+class ContactTouchBuffer:
+    """
+    Write-behind for the per-turn contact timestamps: `core.leads` (last/first contact, 'new' ->
+    'proactive_contacted') and `core.conversations.last_outbound_at`.
+
+    Touches are merged per row (latest timestamp wins) and written in batches every
+    `flush_interval_s` by a background task started on first use. Lifecycle transitions that
+    others depend on (qualification, handoff, follow-up stages) keep their own immediate UPDATEs;
+    call `flush_lead` before one of them so the pending touch is not lost behind its guard.
+    """
+
+    def __init__(
+        self,
+        db: SupabaseDb,
+        *,
+        flush_interval_s: float = 1.0,
+        batch_size: int = 500,
+        max_pending: int = 20_000,
+    ):
+        self._db = db
+        self._flush_interval_s = max(0.01, float(flush_interval_s))
+        self._batch_size = max(1, int(batch_size))
+        self._max_pending = max(self._batch_size, int(max_pending))
+        self._leads: dict[tuple[str, str], tuple[int, datetime]] = {}
+        self._conversations: dict[str, tuple[int, datetime]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._leads) + len(self._conversations)
+
+    def touch_lead(self, *, company_id: str, lead_id: str, at: datetime | None = None) -> None:
+        self._merge(self._leads, (str(company_id), str(lead_id)), at or datetime.now(timezone.utc), "leads")
+
+    def touch_conversation(self, *, conversation_id: str, at: datetime | None = None) -> None:
+        self._merge(self._conversations, str(conversation_id), at or datetime.now(timezone.utc), "conversations")
+
+    def _merge(self, pending: dict, key: object, at: datetime, table: str) -> None:
+        current = pending.get(key)
+        if current is not None:
+            CONTACT_TOUCH_ROWS_TOTAL.labels(table=table, result="coalesced").inc()
+            at = max(at, current[1])
+        pending[key] = (0, at)
+        while len(pending) > self._max_pending:
+            pending.pop(next(iter(pending)))
+            CONTACT_TOUCH_ROWS_TOTAL.labels(table=table, result="dropped").inc()
+        if self.pending_count >= self._batch_size:
+            self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), timeout=self._flush_interval_s)
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("contact_touch.flush_loop_failed")
+
+    async def flush(self) -> int:
+        """Writes buffered touches in batches of `batch_size`. Failed batches are retried on the next flush."""
+        async with self._flush_lock:
+            written = await self._flush_table(
+                "leads",
+                self._leads,
+                _FLUSH_LEADS,
+                lambda key, at: {"company_id": key[0], "lead_id": key[1], "at": at.isoformat()},
+            )
+            written += await self._flush_table(
+                "conversations",
+                self._conversations,
+                _FLUSH_CONVERSATIONS,
+                lambda key, at: {"id": key, "at": at.isoformat()},
+            )
+        return written
+
+    async def flush_lead(self, *, company_id: str, lead_id: str) -> None:
+        """Writes this lead's pending touch now (before a lifecycle transition that would skip it)."""
+        key = (str(company_id), str(lead_id))
+        async with self._flush_lock:
+            entry = self._leads.pop(key, None)
+            if entry is None:
+                return
+            await self._db.execute(
+                _FLUSH_LEADS, json.dumps([{"company_id": key[0], "lead_id": key[1], "at": entry[1].isoformat()}])
+            )
+            CONTACT_TOUCH_ROWS_TOTAL.labels(table="leads", result="written").inc()
+
+    async def _flush_table(self, table: str, pending: dict, statement: str, to_row) -> int:
+        written = 0
+        while pending:
+            # Sorted so concurrent flushers (other replicas) lock rows in the same order.
+            keys = sorted(list(pending)[: self._batch_size])
+            batch = [pending.pop(k) for k in keys]
+            try:
+                await self._db.execute(statement, json.dumps([to_row(k, at) for k, (_, at) in zip(keys, batch)]))
+            except Exception as e:
+                for key, (attempts, at) in zip(keys, batch):
+                    if attempts + 1 >= _MAX_FLUSH_ATTEMPTS:
+                        CONTACT_TOUCH_ROWS_TOTAL.labels(table=table, result="dropped").inc()
+                        continue
+                    # A touch made meanwhile is newer; keep it (with the retry count reset).
+                    if key not in pending:
+                        pending[key] = (attempts + 1, at)
+                CONTACT_TOUCH_ROWS_TOTAL.labels(table=table, result="failed").inc(len(batch))
+                logger.warning(
+                    "contact_touch.flush_failed",
+                    extra={"extra": {"table": table, "rows": len(batch), "error_type": type(e).__name__}},
+                )
+                break
+            written += len(batch)
+            CONTACT_TOUCH_ROWS_TOTAL.labels(table=table, result="written").inc(len(batch))
+        return written
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self.pending_count:
+            await self.flush()
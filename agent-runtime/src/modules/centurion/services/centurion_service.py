@@ -1,39 +1,46 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import contextlib
 import logging
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from common.config.logging import company_id_ctx, correlation_id_ctx, request_id_ctx
 from common.config.settings import get_settings
 from common.infrastructure.agno.memory import AgnoAgentFactory
 from common.infrastructure.cache.redis_client import RedisClient
+from common.infrastructure.database.statements import STATEMENTS
 from common.infrastructure.database.supabase_client import SupabaseDb
-from common.infrastructure.events.envelope import build_envelope
+from common.infrastructure.events.envelope import build_envelope, encode_envelope
+from common.infrastructure.events.outbox import EventOutbox
 from common.infrastructure.idempotency.idempotency_store import IdempotencyStore
 from common.infrastructure.integrations.openai_resolver import OpenAIResolver
 from common.infrastructure.metrics.prometheus import DOMAIN_EVENTS_TOTAL, LEADS_QUALIFIED_TOTAL
+from common.infrastructure.ratelimit.token_bucket import RedisTokenBucket
 from modules.centurion.domain.message import Message as DomainMessage
 from modules.centurion.media.media_tool import MediaTool
 from modules.centurion.repository.config_repository import ConfigRepository
 from modules.centurion.repository.conversation_repository import ConversationRepository
+from modules.centurion.repository.debounce_store import DebounceStore
 from modules.centurion.repository.lead_repository import LeadRepository
-from modules.centurion.repository.message_repository import MessageRepository
+from modules.centurion.repository.message_repository import MessageCursor, MessageRepository
 from modules.centurion.qualification.criteria_engine import compute_rules_hash
 from modules.centurion.services.prompt_builder import PromptBuilder
 from modules.centurion.services.qualification_service import QualificationService
 from modules.centurion.services.response_builder import ChunkConfig, ResponseBuilder
-from modules.centurion.services.whatsapp_sender import WhatsAppSender
+from modules.centurion.services.whatsapp_sender import WhatsAppSender, chunk_offsets_ms
 from modules.channels.services.channel_router import ChannelRouter
+from modules.memory.services.history_cache import ConversationHistoryCache
+from modules.memory.services.session_summarizer import SessionSummarizer
 from modules.memory.services.short_term_memory import ShortTermMemory
 from modules.memory.adapters.rag_adapter import RagAdapter
 from modules.memory.adapters.knowledge_base_adapter import KnowledgeBaseAdapter
 from modules.memory.repository.fact_repository import FactRepository
 from modules.memory.services.embedding_service import EmbeddingService
 from modules.memory.services.fact_extractor import FactExtractor
+from modules.memory.services.fact_watermark import FactExtractionWatermark
 from modules.followups.services.followup_service import FollowupService
 from modules.handoff.services.handoff_service import HandoffService
 from modules.tools.repository.tool_repository import ToolRepository
@@ -41,32 +48,117 @@ from modules.tools.services.tool_registry import ToolRegistry
 
 logger = logging.getLogger(__name__)
 
+_INSERT_QUALIFICATION_EVENT = STATEMENTS.register(
+    "lead_qualification_events.insert",
+    """
+    insert into core.lead_qualification_events (
+      company_id,
+      lead_id,
+      conversation_id,
+      centurion_id,
+      correlation_id,
+      causation_id,
+      rules_hash,
+      rules,
+      threshold,
+      score,
+      is_qualified,
+      required_met,
+      criteria,
+      extracted,
+      summary,
+      metadata
+    )
+    values (
+      $1::uuid,
+      $2::uuid,
+      $3::uuid,
+      $4::uuid,
+      $5,
+      $6,
+      $7,
+      $8::jsonb,
+      $9,
+      $10,
+      $11,
+      $12,
+      $13::jsonb,
+      $14::jsonb,
+      $15,
+      $16::jsonb
+    )
+    """,
+)
+
 
 class CenturionService:
-    def __init__(self, *, db: SupabaseDb, redis: RedisClient):
+    def __init__(
+        self,
+        *,
+        db: SupabaseDb,
+        redis: RedisClient,
+        lead_repo: LeadRepository | None = None,
+        conv_repo: ConversationRepository | None = None,
+        debounce: DebounceStore | None = None,
+        history_cache: ConversationHistoryCache | None = None,
+        msg_repo: MessageRepository | None = None,
+        config_repo: ConfigRepository | None = None,
+        idempotency: IdempotencyStore | None = None,
+        openai: OpenAIResolver | None = None,
+        short_term: ShortTermMemory | None = None,
+        embeddings: EmbeddingService | None = None,
+        rag: RagAdapter | None = None,
+        kb: KnowledgeBaseAdapter | None = None,
+        followups: FollowupService | None = None,
+        outbox: EventOutbox | None = None,
+        pacer: RedisTokenBucket | None = None,
+    ):
         self._db = db
         self._redis = redis
-        self._lead_repo = LeadRepository(db)
-        self._conv_repo = ConversationRepository(db)
-        self._msg_repo = MessageRepository(db)
-        self._config_repo = ConfigRepository(db)
+        self._lead_repo = lead_repo or LeadRepository(db)
+        self._conv_repo = conv_repo or ConversationRepository(db)
+        settings = get_settings()
+        self._debounce = debounce or DebounceStore(
+            redis=redis,
+            ttl_s=settings.debounce_state_ttl_s,
+            snapshot_every_s=settings.debounce_snapshot_interval_s,
+        )
+        self._history_cache = history_cache or ConversationHistoryCache(redis=redis)
+        self._msg_repo = msg_repo or MessageRepository(db, history_cache=self._history_cache)
+        self._config_repo = config_repo or ConfigRepository(db)
         self._prompt_builder = PromptBuilder()
         self._response_builder = ResponseBuilder()
         self._qualification = QualificationService(prompt_builder=self._prompt_builder)
-        self._idempotency = IdempotencyStore(db)
-        self._sender = WhatsAppSender(redis, idempotency=self._idempotency)
-        self._short_term = ShortTermMemory(db=db, redis=redis)
-        self._rag = RagAdapter(db=db, redis=redis)
-        self._kb = KnowledgeBaseAdapter(db=db, redis=redis)
+        self._idempotency = idempotency or IdempotencyStore(db)
+        self._openai = openai or OpenAIResolver(db)
+        self._sender = WhatsAppSender(redis, idempotency=self._idempotency, pacer=pacer)
+        self._outbox = outbox or EventOutbox()
+        self._short_term = short_term or ShortTermMemory(
+            db=db, redis=redis, history_cache=self._history_cache, msg_repo=self._msg_repo
+        )
+        self._embeddings = embeddings or EmbeddingService(db=db, redis=redis, openai=self._openai)
+        self._rag = rag or RagAdapter(db=db, redis=redis, embeddings=self._embeddings)
+        self._kb = kb or KnowledgeBaseAdapter(db=db, redis=redis, embeddings=self._embeddings)
         self._fact_repo = FactRepository(db)
-        self._embeddings = EmbeddingService(db=db, redis=redis)
-        self._fact_extractor = FactExtractor(db=db)
+        self._fact_extractor = FactExtractor(db=db, openai=self._openai)
+        self._fact_watermark = FactExtractionWatermark(redis=redis)
+        self._summarizer = SessionSummarizer(db=db, redis=redis, openai=self._openai, msg_repo=self._msg_repo)
         self._tools = ToolRegistry(repo=ToolRepository(db))
         self._media_tool = MediaTool(db=db)
         self._channel_router = ChannelRouter()
-        self._followups = FollowupService(db=db, redis=redis)
+        self._followups = followups or FollowupService(
+            db=db,
+            redis=redis,
+            lead_repo=self._lead_repo,
+            conv_repo=self._conv_repo,
+            msg_repo=self._msg_repo,
+            config_repo=self._config_repo,
+            short_term=self._short_term,
+            rag=self._rag,
+            kb=self._kb,
+            openai=self._openai,
+        )
         self._handoff = HandoffService(db=db)
-        self._openai = OpenAIResolver(db)
         self._agno_factory = AgnoAgentFactory(db=db)
         self._tool_hooks = self._agno_factory.default_tool_hooks()
 
@@ -91,32 +183,43 @@ class CenturionService:
         return {"ok": True, "model": (resolved.chat_model if resolved else get_settings().openai_chat_model), "response": response_text, "usage": {}}
 
     async def process_due_conversation(self, conversation_id: str, *, causation_id: str | None = None) -> None:
-        conv_row = await self._db.fetchrow("select * from core.conversations where id=$1", conversation_id)
+        batch = await self._debounce.begin(conversation_id)
+        if batch is None:
+            return
+
+        conv_row = await self._db.fetchrow(
+            """
+            select c.*, s.summary as agno_summary, s.summary_watermark as agno_summary_watermark
+            from core.conversations c
+            left join core.agno_sessions s on s.conversation_id = c.id
+            where c.id=$1
+            """,
+            conversation_id,
+        )
         if not conv_row:
+            await self._debounce.finish(conversation_id)
             return
 
         meta = dict(conv_row.get("metadata") or {})
         company_id = str(conv_row["company_id"])
         correlation_id = str(
-            meta.get("last_correlation_id")
+            batch.last_correlation_id
+            or meta.get("last_correlation_id")
             or meta.get("correlation_id")
             or causation_id
             or conversation_id
         )
-        derived_causation_id = meta.get("last_event_id") or meta.get("causation_id") or causation_id
+        derived_causation_id = batch.last_event_id or meta.get("last_event_id") or meta.get("causation_id") or causation_id
         resolved_causation_id = str(derived_causation_id) if derived_causation_id else None
 
         token_req = request_id_ctx.set(str(uuid.uuid4()))
         token_corr = correlation_id_ctx.set(correlation_id)
         token_company = company_id_ctx.set(company_id)
 
-        pending_messages: list[str] = []
+        pending_messages = [m for m in batch.messages if m is not None]
         try:
-            await self._conv_repo.mark_processing(conversation_id)
-
-            pending_messages = list(conv_row.get("pending_messages") or [])
             if not pending_messages:
-                await self._conv_repo.clear_pending(conversation_id)
+                await self._finish_debounce(conversation_id)
                 return
 
             lead_id = str(conv_row["lead_id"])
@@ -125,17 +228,17 @@ class CenturionService:
             channel_type = str(conv_row.get("channel_type") or "whatsapp")
 
             if not instance_id:
-                await self._conv_repo.clear_pending(conversation_id)
+                await self._finish_debounce(conversation_id)
                 return
 
             lead_row = await self._db.fetchrow("select * from core.leads where id=$1", lead_id)
             if not lead_row:
-                await self._conv_repo.clear_pending(conversation_id)
+                await self._finish_debounce(conversation_id)
                 return
 
             lead_phone = lead_row.get("phone")
             if not lead_phone:
-                await self._conv_repo.clear_pending(conversation_id)
+                await self._finish_debounce(conversation_id)
                 return
             lead_data = dict(lead_row.get("qualification_data") or {})
 
@@ -145,12 +248,12 @@ class CenturionService:
                 capabilities.supports_outbound_type(t) for t in ("image", "video", "audio", "document")
             )
 
-            history_limit = 25
-            agno_session = meta.get("agno_session")
-            if isinstance(agno_session, dict) and agno_session.get("summary"):
-                history_limit = 15
-
-            history = await self._short_term.get_conversation_history(conversation_id=conversation_id, limit=history_limit)
+            history = await self._short_term.get_windowed_history(
+                conversation_id=conversation_id,
+                summary=conv_row.get("agno_summary"),
+                summary_watermark=conv_row.get("agno_summary_watermark"),
+                pending_count=len(pending_messages),
+            )
             consolidated = "\n".join([m for m in pending_messages if m]).strip()
 
             rag_items = []
@@ -208,61 +311,39 @@ class CenturionService:
                 outbound_messages = [{"type": "text", "text": cleaned_text}]
             # correlation_id/causation_id already resolved from the last inbound message context.
 
-            for idx, msg in enumerate(outbound_messages):
-                msg_type = msg.get("type")
-                content_type = msg_type if msg_type in ("text", "audio", "image", "video", "document") else "text"
-                content = msg.get("text") if content_type == "text" else msg.get("caption")
-                msg_id = await self._msg_repo.save_message(
-                    conversation_id=conversation_id,
+            # Messages and their message.sent events commit together (outbox); chunk pacing travels as send_at.
+            reply_at = datetime.now(timezone.utc)
+            await self._deliver_outbound(
+                company_id=company_id,
+                conversation_id=conversation_id,
+                lead_id=lead_id,
+                instance_id=instance_id,
+                lead_phone=lead_phone,
+                channel_type=channel_type,
+                correlation_id=correlation_id,
+                causation_id=resolved_causation_id,
+                messages=outbound_messages,
+                message_metadata=[{"asset_id": msg.get("asset_id")} for msg in outbound_messages],
+                delay_ms=chunk_cfg.delay_ms,
+                send_at=reply_at,
+            )
+            reply_done_at = reply_at + timedelta(
+                milliseconds=chunk_offsets_ms(outbound_messages, chunk_cfg.delay_ms)[-1] + chunk_cfg.delay_ms
+            )
+
+            # Contact timestamps may be write-behind (ContactTouchBuffer); follow-ups get the time directly.
+            touched_at = datetime.now(timezone.utc)
+            await self._conv_repo.touch_outbound(conversation_id=conversation_id, at=touched_at)
+            await self._finish_debounce(conversation_id)
+            await self._lead_repo.touch_outbound(company_id=company_id, lead_id=lead_id, at=touched_at)
+            if channel_type == "whatsapp":
+                await self._followups.schedule_for_lead(
                     company_id=company_id,
                     lead_id=lead_id,
-                    direction="outbound",
-                    content_type=content_type,
-                    content=content,
-                    metadata={
-                        "chunk_index": idx,
-                        "chunks_total": len(outbound_messages),
-                        "correlation_id": correlation_id,
-                        "causation_id": resolved_causation_id,
-                        "asset_id": msg.get("asset_id"),
-                    },
+                    centurion_id=centurion_id,
+                    last_contact_at=touched_at,
                 )
 
-                try:
-                    sent = await self._sender.send_message(
-                        company_id=company_id,
-                        instance_id=instance_id,
-                        to_number=lead_phone,
-                        message=msg,
-                        channel_type=channel_type,
-                        correlation_id=correlation_id,
-                        causation_id=resolved_causation_id,
-                        metadata={"chunk_index": idx, "chunks_total": len(outbound_messages)},
-                    )
-                    if not sent:
-                        await self._msg_repo.delete_message(message_id=msg_id)
-                        continue
-                except Exception:
-                    await self._msg_repo.delete_message(message_id=msg_id)
-                    raise
-
-                if (
-                    content_type == "text"
-                    and idx < len(outbound_messages) - 1
-                    and outbound_messages[idx + 1].get("type") == "text"
-                ):
-                    await asyncio.sleep(chunk_cfg.delay_ms / 1000.0)
-
-            await self._db.execute(
-                "update core.conversations set last_outbound_at=now(), updated_at=now() where id=$1",
-                conversation_id,
-            )
-            await self._conv_repo.clear_pending(conversation_id)
-            await self._short_term.invalidate_cache(conversation_id)
-            await self._lead_repo.touch_outbound(company_id=company_id, lead_id=lead_id)
-            if channel_type == "whatsapp":
-                await self._followups.schedule_for_lead(company_id=company_id, lead_id=lead_id, centurion_id=centurion_id)
-
             rules = dict(config.get("qualification_rules") or {})
             latest_context = self._append_context(history, consolidated, cleaned_text)
             conversation_text = "\n".join([m.as_prompt_text for m in latest_context if m.as_prompt_text])
@@ -297,66 +378,52 @@ class CenturionService:
                 logger.exception("qualification_event.persist_failed")
 
             if result.qualified_at and not bool(lead_row.get("is_qualified")):
-                await self._lead_repo.update_qualification(
-                    lead_id=lead_id,
-                    company_id=company_id,
-                    score=result.score,
-                    data={"criteria": result.criteria_met, "summary": result.summary, **result.extracted},
-                    qualified_at=result.qualified_at,
-                )
-                await self._publish_lead_qualified(
-                    company_id=company_id,
-                    lead_id=lead_id,
-                    score=result.score,
-                    criteria=[k for k, v in result.criteria_met.items() if v],
-                    summary=result.summary,
-                    correlation_id=correlation_id,
-                    causation_id=resolved_causation_id,
-                )
+                # The touch update skips qualified leads; write it before the transition.
+                await self._lead_repo.flush_touches(company_id=company_id, lead_id=lead_id)
+                async with self._db.transaction() as conn:
+                    await self._lead_repo.update_qualification(
+                        lead_id=lead_id,
+                        company_id=company_id,
+                        score=result.score,
+                        data={"criteria": result.criteria_met, "summary": result.summary, **result.extracted},
+                        qualified_at=result.qualified_at,
+                        conn=conn,
+                    )
+                    await self._publish_lead_qualified(
+                        conn,
+                        company_id=company_id,
+                        lead_id=lead_id,
+                        score=result.score,
+                        criteria=[k for k, v in result.criteria_met.items() if v],
+                        summary=result.summary,
+                        correlation_id=correlation_id,
+                        causation_id=resolved_causation_id,
+                    )
+                self._outbox.notify()
                 await self._followups.cancel_pending(company_id=company_id, lead_id=lead_id)
 
                 try:
                     deal = await self._handoff.execute_handoff(company_id=company_id, lead_id=lead_id)
                     closing = "Perfeito! Vou encaminhar suas informações para um especialista e ele vai continuar o atendimento com você. Obrigado!"
-                    msg_id = await self._msg_repo.save_message(
-                        conversation_id=conversation_id,
+                    await self._deliver_outbound(
                         company_id=company_id,
+                        conversation_id=conversation_id,
                         lead_id=lead_id,
-                        direction="outbound",
-                        content_type="text",
-                        content=closing,
-                        metadata={
-                            "chunk_index": len(outbound_messages),
-                            "chunks_total": len(outbound_messages) + 1,
-                            "correlation_id": correlation_id,
-                            "causation_id": resolved_causation_id,
+                        instance_id=instance_id,
+                        lead_phone=lead_phone,
+                        channel_type=channel_type,
+                        correlation_id=correlation_id,
+                        causation_id=resolved_causation_id,
+                        messages=[{"type": "text", "text": closing}],
+                        extra={
                             "handoff": True,
                             "deal_index_id": deal.deal_index_id,
                             "local_deal_id": deal.local_deal_id,
                         },
+                        first_chunk_index=len(outbound_messages),
+                        chunks_total=len(outbound_messages) + 1,
+                        send_at=max(reply_done_at, datetime.now(timezone.utc)),
                     )
-                    try:
-                        sent = await self._sender.send_message(
-                            company_id=company_id,
-                            instance_id=instance_id,
-                            to_number=lead_phone,
-                            message={"type": "text", "text": closing},
-                            channel_type=channel_type,
-                            correlation_id=correlation_id,
-                            causation_id=resolved_causation_id,
-                            metadata={
-                                "chunk_index": len(outbound_messages),
-                                "chunks_total": len(outbound_messages) + 1,
-                                "handoff": True,
-                                "deal_index_id": deal.deal_index_id,
-                                "local_deal_id": deal.local_deal_id,
-                            },
-                        )
-                        if not sent:
-                            await self._msg_repo.delete_message(message_id=msg_id)
-                    except Exception:
-                        await self._msg_repo.delete_message(message_id=msg_id)
-                        raise
 
                     await self._db.execute(
                         """
@@ -366,7 +433,6 @@ class CenturionService:
                         """,
                         conversation_id,
                     )
-                    await self._short_term.invalidate_cache(conversation_id)
                 except Exception:
                     logger.exception("handoff.failed")
 
@@ -374,14 +440,27 @@ class CenturionService:
                 self._update_long_term_memory(
                     company_id=company_id,
                     lead_id=lead_id,
-                    conversation_text=conversation_text,
+                    conversation_id=conversation_id,
                 )
             )
+            asyncio.create_task(self._summarizer.maybe_summarize(company_id=company_id, conversation_id=conversation_id))
         finally:
             request_id_ctx.reset(token_req)
             correlation_id_ctx.reset(token_corr)
             company_id_ctx.reset(token_company)
 
+    async def _finish_debounce(self, conversation_id: str) -> None:
+        """Closes the in-flight batch in Redis and writes the terminal snapshot to core.conversations."""
+        snapshot = await self._debounce.finish(conversation_id)
+        await self._conv_repo.update_debounce(
+            conversation_id=conversation_id,
+            state=snapshot.state,
+            until=snapshot.until,
+            pending_messages=snapshot.pending_messages,
+            last_inbound_at=snapshot.last_inbound_at,
+            metadata_patch=snapshot.metadata_patch,
+        )
+
     async def _call_llm(
         self,
         messages: list[dict[str, str]],
@@ -432,7 +511,9 @@ class CenturionService:
 
         tool_call_limit = int(config.get("tool_call_limit") or 8)
 
+        memories: contextlib.AbstractAsyncContextManager[None] = contextlib.nullcontext()
         if conversation_id and lead_id:
+            memories = self._agno_factory.memory_snapshot(company_id=company_id, lead_id=lead_id)
             agent = self._agno_factory.build_agent(
                 company_id=company_id,
                 lead_id=lead_id,
@@ -463,7 +544,8 @@ class CenturionService:
             )
 
         try:
-            output = await agent.arun(chat_messages, stream=False)
+            async with memories:
+                output = await agent.arun(chat_messages, stream=False)
             content = getattr(output, "content", None)
             if isinstance(content, str):
                 return content
@@ -500,23 +582,115 @@ class CenturionService:
         )
         return enriched
 
-    async def _update_long_term_memory(self, *, company_id: str, lead_id: str, conversation_text: str) -> None:
+    async def _update_long_term_memory(self, *, company_id: str, lead_id: str, conversation_id: str) -> None:
+        settings = get_settings()
+        if settings.memory_engine != "facts":
+            # The Agno MemoryManager already extracted memories during the run.
+            return
         try:
             if not await self._openai.resolve_optional(company_id=company_id):
                 return
-            facts = await self._fact_extractor.extract(company_id=company_id, conversation_text=conversation_text)
-            if not facts:
+
+            # Only messages after the last extraction are sent, oldest page first; below the minimum the
+            # watermark stays put so the new text accumulates into the next turn.
+            after = await self._fact_watermark.get(conversation_id)
+            fresh = await self._msg_repo.list_since(
+                conversation_id=conversation_id,
+                after=after,
+                limit=max(1, settings.fact_extraction_max_messages),
+            )
+            if not fresh:
                 return
-            embeddings = await self._embeddings.embed(company_id=company_id, texts=[f.text for f in facts])
-            for fact, vec in zip(facts, embeddings, strict=False):
-                if not vec:
-                    continue
-                await self._fact_repo.save_fact(company_id=company_id, lead_id=lead_id, fact=fact, embedding=vec)
+            conversation_text = "\n".join([m.as_prompt_text for m in fresh if m.as_prompt_text])
+            if len(conversation_text.strip()) < settings.fact_extraction_min_chars:
+                return
+
+            facts = await self._fact_extractor.extract(company_id=company_id, conversation_text=conversation_text)
+            if facts:
+                embeddings = await self._embeddings.embed(company_id=company_id, texts=[f.text for f in facts])
+                for fact, vec in zip(facts, embeddings, strict=False):
+                    if not vec:
+                        continue
+                    await self._fact_repo.save_fact(company_id=company_id, lead_id=lead_id, fact=fact, embedding=vec)
+
+            last = fresh[-1]
+            if last.created_at:
+                await self._fact_watermark.advance(conversation_id, MessageCursor(last.created_at, last.id))
         except Exception:
             logger.exception("rag.update_failed")
 
+    async def _deliver_outbound(
+        self,
+        *,
+        company_id: str,
+        conversation_id: str,
+        lead_id: str,
+        instance_id: str,
+        lead_phone: str,
+        channel_type: str,
+        correlation_id: str,
+        causation_id: str | None,
+        messages: list[dict[str, Any]],
+        message_metadata: list[dict[str, Any]] | None = None,
+        extra: dict[str, Any] | None = None,
+        first_chunk_index: int = 0,
+        chunks_total: int | None = None,
+        delay_ms: int = 0,
+        send_at: datetime | None = None,
+    ) -> list[bool]:
+        """
+        Claims the chunks, then saves the outbound messages and their `message.sent` events in one
+        transaction (outbox). Chunks already sent under this correlation_id are skipped.
+        """
+        total = chunks_total if chunks_total is not None else len(messages)
+        chunk_meta = [
+            {"chunk_index": first_chunk_index + i, "chunks_total": total, **(extra or {})} for i in range(len(messages))
+        ]
+        batch = await self._sender.prepare_batch(
+            company_id=company_id,
+            instance_id=instance_id,
+            to_number=lead_phone,
+            messages=messages,
+            channel_type=channel_type,
+            correlation_id=correlation_id,
+            causation_id=causation_id,
+            metadata=chunk_meta,
+            delay_ms=delay_ms,
+            send_at=send_at,
+        )
+        stored_meta = message_metadata or [{} for _ in messages]
+        saved: list[DomainMessage] = []
+        try:
+            async with self._db.transaction() as conn:
+                for msg, meta, stored, claimed in zip(messages, chunk_meta, stored_meta, batch.claimed):
+                    if not claimed:
+                        continue
+                    msg_type = msg.get("type")
+                    content_type = msg_type if msg_type in ("text", "audio", "image", "video", "document") else "text"
+                    saved.append(
+                        await self._msg_repo.insert_message(
+                            conn,
+                            conversation_id=conversation_id,
+                            company_id=company_id,
+                            lead_id=lead_id,
+                            direction="outbound",
+                            content_type=content_type,
+                            content=msg.get("text") if content_type == "text" else msg.get("caption"),
+                            metadata={**meta, "correlation_id": correlation_id, "causation_id": causation_id, **stored},
+                        )
+                    )
+                await self._outbox.add_many(conn, [(channel, env, company_id) for channel, env in batch.events])
+        except Exception:
+            await self._sender.release_batch(batch)
+            raise
+        self._outbox.notify()
+        for message in saved:
+            await self._msg_repo.remember(message)
+        return batch.claimed
+
     async def _publish_lead_qualified(
         self,
+        conn: Any,
         *,
         company_id: str,
         lead_id: str,
@@ -526,6 +700,7 @@ class CenturionService:
         correlation_id: str,
         causation_id: str | None,
     ) -> None:
+        """Writes `lead.qualified` to the outbox on `conn` (the qualification update's transaction)."""
         event = build_envelope(
             type="lead.qualified",
             company_id=company_id,
@@ -542,7 +717,7 @@ class CenturionService:
         )
         DOMAIN_EVENTS_TOTAL.labels(type="lead.qualified").inc()
         LEADS_QUALIFIED_TOTAL.inc()
-        await self._redis.publish("lead.qualified", json.dumps(event, ensure_ascii=False))
+        await self._outbox.add_many(conn, [("lead.qualified", encode_envelope(event), company_id)])
 
     async def _record_qualification_event(
         self,
@@ -575,45 +750,8 @@ class CenturionService:
             return
 
         try:
-            await self._db.fetchrow(
-                """
-                insert into core.lead_qualification_events (
-                  company_id,
-                  lead_id,
-                  conversation_id,
-                  centurion_id,
-                  correlation_id,
-                  causation_id,
-                  rules_hash,
-                  rules,
-                  threshold,
-                  score,
-                  is_qualified,
-                  required_met,
-                  criteria,
-                  extracted,
-                  summary,
-                  metadata
-                )
-                values (
-                  $1::uuid,
-                  $2::uuid,
-                  $3::uuid,
-                  $4::uuid,
-                  $5,
-                  $6,
-                  $7,
-                  $8::jsonb,
-                  $9,
-                  $10,
-                  $11,
-                  $12,
-                  $13::jsonb,
-                  $14::jsonb,
-                  $15,
-                  $16::jsonb
-                )
-                """,
+            await self._db.execute(
+                _INSERT_QUALIFICATION_EVENT,
                 company_id,
                 lead_id,
                 conversation_id,
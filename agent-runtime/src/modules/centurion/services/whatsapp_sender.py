@@ -1,99 +1,227 @@
 from __future__ import annotations
 
-import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from common.infrastructure.cache.redis_client import RedisClient
-from common.infrastructure.events.envelope import build_envelope
+from common.infrastructure.events.envelope import build_envelope, encode_envelope
 from common.infrastructure.idempotency.idempotency_store import IdempotencyStore
 from common.infrastructure.metrics.prometheus import DOMAIN_EVENTS_TOTAL, MESSAGES_TOTAL
+from common.infrastructure.ratelimit.token_bucket import RedisTokenBucket
+
+_MEDIA_TYPES = ("audio", "image", "video", "document")
+
+
+def chunk_offsets_ms(messages: list[dict[str, Any]], delay_ms: int) -> list[int]:
+    """Send offset per chunk: a text chunk that follows a text chunk goes `delay_ms` after it."""
+    offsets: list[int] = []
+    offset = 0
+    for idx, msg in enumerate(messages):
+        if idx > 0 and msg.get("type") == "text" and messages[idx - 1].get("type") == "text":
+            offset += max(0, int(delay_ms))
+        offsets.append(offset)
+    return offsets
+
+
+@dataclass(frozen=True)
+class OutboundBatch:
+    company_id: str
+    # One flag per chunk (False: already sent under this correlation_id/chunk_index).
+    claimed: list[bool]
+    dedupe_keys: list[str]
+    # (channel, encoded envelope) for the claimed chunks, in order.
+    events: list[tuple[str, str]]
+
+
+_CONSUMER = "agent-runtime:message.sent"
 
 
 class WhatsAppSender:
-    def __init__(self, redis: RedisClient, *, idempotency: IdempotencyStore | None = None):
+    def __init__(
+        self,
+        redis: RedisClient,
+        *,
+        idempotency: IdempotencyStore | None = None,
+        pacer: RedisTokenBucket | None = None,
+    ):
         self._redis = redis
         self._idempotency = idempotency
+        self._pacer = pacer
 
-    async def send_message(
+    async def send_batch(
         self,
         *,
         company_id: str,
         instance_id: str,
         to_number: str,
-        message: dict[str, Any],
+        messages: list[dict[str, Any]],
         channel_type: str = "whatsapp",
         correlation_id: str,
         causation_id: str | None,
-        metadata: dict[str, Any] | None = None,
-    ) -> bool:
-        msg_type = message.get("type")
-        if msg_type == "text":
-            return await self.send_text(
+        metadata: list[dict[str, Any]] | None = None,
+        delay_ms: int = 0,
+        send_at: datetime | None = None,
+        priority: str = "live",
+    ) -> list[bool]:
+        """Claims and publishes a reply in one pipeline (see `prepare_batch`). Returns one flag per chunk."""
+        batch = await self.prepare_batch(
+            company_id=company_id,
+            instance_id=instance_id,
+            to_number=to_number,
+            messages=messages,
+            channel_type=channel_type,
+            correlation_id=correlation_id,
+            causation_id=causation_id,
+            metadata=metadata,
+            delay_ms=delay_ms,
+            send_at=send_at,
+            priority=priority,
+        )
+        if not batch.events:
+            return batch.claimed
+        try:
+            if len(batch.events) == 1:
+                await self._redis.publish(*batch.events[0])
+            else:
+                await self._redis.publish_many(batch.events)
+            return batch.claimed
+        except Exception:
+            await self.release_batch(batch)
+            raise
+
+    async def prepare_batch(
+        self,
+        *,
+        company_id: str,
+        instance_id: str,
+        to_number: str,
+        messages: list[dict[str, Any]],
+        channel_type: str = "whatsapp",
+        correlation_id: str,
+        causation_id: str | None,
+        metadata: list[dict[str, Any]] | None = None,
+        delay_ms: int = 0,
+        send_at: datetime | None = None,
+        priority: str = "live",
+    ) -> OutboundBatch:
+        """
+        Claims every chunk key in one call and encodes one `message.sent` per claimed chunk, without
+        publishing (callers may write the events to the outbox instead). Pacing travels as
+        `payload.send_at` (see `chunk_offsets_ms`) and is applied by evolution-manager; with a
+        `pacer`, the per-instance token bucket turns the offsets into reserved slots.
+        """
+        normalized: list[dict[str, Any]] = []
+        for msg in messages:
+            msg_type = msg.get("type")
+            if msg_type == "text":
+                normalized.append({"type": "text", "text": str(msg.get("text") or "")})
+            elif msg_type in _MEDIA_TYPES:
+                normalized.append(msg)
+            else:
+                raise ValueError(f"Unsupported outbound message type: {msg_type}")
+
+        metas = [dict(m or {}) for m in (metadata or [])]
+        metas += [{} for _ in range(len(normalized) - len(metas))]
+        chunk_indexes = [m["chunk_index"] if isinstance(m.get("chunk_index"), int) else i for i, m in enumerate(metas)]
+        dedupe_keys = [f"{correlation_id}:{i}" for i in chunk_indexes]
+        claimed = [True] * len(normalized)
+
+        if self._idempotency is not None and normalized:
+            claimed = await self._idempotency.claim_many(
                 company_id=company_id,
-                instance_id=instance_id,
-                to_number=to_number,
-                text=str(message.get("text") or ""),
+                consumer=_CONSUMER,
+                keys=dedupe_keys,
+                ttl_seconds=7 * 24 * 3600,
+                event_type="message.sent",
                 correlation_id=correlation_id,
                 causation_id=causation_id,
-                metadata=metadata,
+                metadata=[
+                    {"instance_id": instance_id, "to": to_number, "chunk_index": i, "type": msg["type"]}
+                    for i, msg in zip(chunk_indexes, normalized)
+                ],
             )
 
-        if msg_type not in ("audio", "image", "video", "document"):
-            raise ValueError(f"Unsupported outbound message type: {msg_type}")
-
-        meta = metadata or {}
-        chunk_index = meta.get("chunk_index")
-        if not isinstance(chunk_index, int):
-            chunk_index = 0
-
-        consumer = "agent-runtime:message.sent"
-        dedupe_key = f"{correlation_id}:{chunk_index}"
-        claimed = False
+        now = datetime.now(timezone.utc)
+        base = send_at or now
+        offsets = chunk_offsets_ms(normalized, delay_ms)
+        slots: list[datetime | None] = [
+            base + timedelta(milliseconds=offset) if send_at is not None or offset else None for offset in offsets
+        ]
+        if self._pacer is not None and any(claimed):
+            lead_ms = max(0, int((base - now).total_seconds() * 1000))
+            reserved = iter(
+                await self._pacer.reserve(
+                    instance_id, [lead_ms + o for o, ok in zip(offsets, claimed) if ok], priority=priority
+                )
+            )
+            slots = [datetime.fromtimestamp(next(reserved) / 1000, tz=timezone.utc) if ok else None for ok in claimed]
 
-        if self._idempotency is not None:
-            claimed = await self._idempotency.claim(
+        events: list[tuple[str, str]] = []
+        for msg, meta, slot, ok in zip(normalized, metas, slots, claimed):
+            if not ok:
+                continue
+            payload: dict[str, Any] = {
+                "instance_id": instance_id,
+                "to": to_number,
+                "messages": [msg],
+                "raw": meta,
+            }
+            if slot is not None:
+                payload["send_at"] = slot.isoformat()
+            event = build_envelope(
+                type="message.sent",
                 company_id=company_id,
-                consumer=consumer,
-                key=dedupe_key,
-                ttl_seconds=7 * 24 * 3600,
-                event_type="message.sent",
+                source="agent-runtime",
                 correlation_id=correlation_id,
                 causation_id=causation_id,
-                metadata={"instance_id": instance_id, "to": to_number, "chunk_index": chunk_index, "type": msg_type},
+                payload=payload,
             )
-            if not claimed:
-                return False
+            events.append(("message.sent", encode_envelope(event)))
+            DOMAIN_EVENTS_TOTAL.labels(type="message.sent").inc()
+            MESSAGES_TOTAL.labels(direction="outbound", channel_type=channel_type, content_type=str(msg["type"])).inc()
+
+        return OutboundBatch(company_id=company_id, claimed=claimed, dedupe_keys=dedupe_keys, events=events)
+
+    async def release_batch(self, batch: OutboundBatch) -> None:
+        """Drops the claims of a batch that was not delivered, so a retry can send it."""
+        if self._idempotency is None:
+            return
+        for key, ok in zip(batch.dedupe_keys, batch.claimed):
+            if not ok:
+                continue
+            try:
+                await self._idempotency.release(company_id=batch.company_id, consumer=_CONSUMER, key=key)
+            except Exception:
+                pass
 
-        event = build_envelope(
-            type="message.sent",
+    async def send_message(
+        self,
+        *,
+        company_id: str,
+        instance_id: str,
+        to_number: str,
+        message: dict[str, Any],
+        channel_type: str = "whatsapp",
+        correlation_id: str,
+        causation_id: str | None,
+        metadata: dict[str, Any] | None = None,
+        send_at: datetime | None = None,
+        priority: str = "live",
+    ) -> bool:
+        sent = await self.send_batch(
             company_id=company_id,
-            source="agent-runtime",
+            instance_id=instance_id,
+            to_number=to_number,
+            messages=[message],
+            channel_type=channel_type,
             correlation_id=correlation_id,
             causation_id=causation_id,
-            payload={
-                "instance_id": instance_id,
-                "to": to_number,
-                "messages": [message],
-                "raw": meta,
-            },
+            metadata=[metadata or {}],
+            send_at=send_at,
+            priority=priority,
         )
-
-        DOMAIN_EVENTS_TOTAL.labels(type="message.sent").inc()
-        MESSAGES_TOTAL.labels(direction="outbound", channel_type=channel_type, content_type=str(msg_type)).inc()
-        try:
-            await self._redis.publish("message.sent", json.dumps(event, ensure_ascii=False))
-            return True
-        except Exception:
-            if claimed and self._idempotency is not None:
-                try:
-                    await self._idempotency.release(
-                        company_id=company_id,
-                        consumer=consumer,
-                        key=dedupe_key,
-                    )
-                except Exception:
-                    pass
-            raise
+        return sent[0]
 
     async def send_text(
         self,
@@ -106,57 +234,16 @@ class WhatsAppSender:
         correlation_id: str,
         causation_id: str | None,
         metadata: dict[str, Any] | None = None,
+        priority: str = "live",
     ) -> bool:
-        meta = metadata or {}
-        chunk_index = meta.get("chunk_index")
-        if not isinstance(chunk_index, int):
-            chunk_index = 0
-
-        consumer = "agent-runtime:message.sent"
-        dedupe_key = f"{correlation_id}:{chunk_index}"
-        claimed = False
-
-        if self._idempotency is not None:
-            claimed = await self._idempotency.claim(
-                company_id=company_id,
-                consumer=consumer,
-                key=dedupe_key,
-                ttl_seconds=7 * 24 * 3600,
-                event_type="message.sent",
-                correlation_id=correlation_id,
-                causation_id=causation_id,
-                metadata={"instance_id": instance_id, "to": to_number, "chunk_index": chunk_index},
-            )
-            if not claimed:
-                return False
-
-        event = build_envelope(
-            type="message.sent",
+        return await self.send_message(
             company_id=company_id,
-            source="agent-runtime",
+            instance_id=instance_id,
+            to_number=to_number,
+            message={"type": "text", "text": text},
+            channel_type=channel_type,
             correlation_id=correlation_id,
             causation_id=causation_id,
-            payload={
-                "instance_id": instance_id,
-                "to": to_number,
-                "messages": [{"type": "text", "text": text}],
-                "raw": meta,
-            },
+            metadata=metadata,
+            priority=priority,
         )
-
-        DOMAIN_EVENTS_TOTAL.labels(type="message.sent").inc()
-        MESSAGES_TOTAL.labels(direction="outbound", channel_type=channel_type, content_type="text").inc()
-        try:
-            await self._redis.publish("message.sent", json.dumps(event, ensure_ascii=False))
-            return True
-        except Exception:
-            if claimed and self._idempotency is not None:
-                try:
-                    await self._idempotency.release(
-                        company_id=company_id,
-                        consumer=consumer,
-                        key=dedupe_key,
-                    )
-                except Exception:
-                    pass
-            raise
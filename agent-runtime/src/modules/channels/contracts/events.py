@@ -93,3 +93,5 @@ class MessageSentPayload(BaseModel):
     to: str = Field(min_length=1)
     messages: list[OutboundMessage] = Field(min_length=1)
     raw: dict[str, Any] = Field(default_factory=dict)
+    # ISO timestamp before which evolution-manager must not deliver (chunk pacing).
+    send_at: str | None = None
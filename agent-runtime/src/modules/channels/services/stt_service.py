@@ -19,8 +19,9 @@ class SpeechToTextService:
         db: SupabaseDb | None = None,
         egress_policy: EgressPolicy | None = None,
         limits: PayloadLimits | None = None,
+        openai: OpenAIResolver | None = None,
     ):
-        self._openai = OpenAIResolver(db) if db else None
+        self._openai = openai or (OpenAIResolver(db) if db else None)
         self._egress = egress_policy or EgressPolicy.from_env()
         self._limits = limits or PayloadLimits.from_env()
 
@@ -8,6 +8,7 @@ from typing import Any
 from common.infrastructure.cache.redis_client import RedisClient
 from common.infrastructure.database.supabase_client import SupabaseDb
 from common.infrastructure.integrations.openai_resolver import OpenAIResolver
+from common.infrastructure.ratelimit.token_bucket import RedisTokenBucket
 from modules.centurion.domain.message import Message as DomainMessage
 from modules.centurion.repository.config_repository import ConfigRepository
 from modules.centurion.repository.conversation_repository import ConversationRepository
@@ -18,36 +19,64 @@ from modules.centurion.services.whatsapp_sender import WhatsAppSender
 from modules.followups.repository.followup_repository import FollowupQueueItem, FollowupRepository
 from modules.memory.adapters.knowledge_base_adapter import KnowledgeBaseAdapter
 from modules.memory.adapters.rag_adapter import RagAdapter
+from modules.memory.services.history_cache import ConversationHistoryCache
 from modules.memory.services.short_term_memory import ShortTermMemory
 
 logger = logging.getLogger(__name__)
 
 
 class FollowupService:
-    def __init__(self, *, db: SupabaseDb, redis: RedisClient):
+    def __init__(
+        self,
+        *,
+        db: SupabaseDb,
+        redis: RedisClient,
+        lead_repo: LeadRepository | None = None,
+        conv_repo: ConversationRepository | None = None,
+        msg_repo: MessageRepository | None = None,
+        config_repo: ConfigRepository | None = None,
+        short_term: ShortTermMemory | None = None,
+        rag: RagAdapter | None = None,
+        kb: KnowledgeBaseAdapter | None = None,
+        openai: OpenAIResolver | None = None,
+        pacer: RedisTokenBucket | None = None,
+    ):
         self._db = db
         self._redis = redis
         self._repo = FollowupRepository(db)
-        self._lead_repo = LeadRepository(db)
-        self._conv_repo = ConversationRepository(db)
-        self._msg_repo = MessageRepository(db)
-        self._config_repo = ConfigRepository(db)
+        self._lead_repo = lead_repo or LeadRepository(db)
+        self._conv_repo = conv_repo or ConversationRepository(db)
+        self._history_cache = ConversationHistoryCache(redis=redis)
+        self._msg_repo = msg_repo or MessageRepository(db, history_cache=self._history_cache)
+        self._config_repo = config_repo or ConfigRepository(db)
         self._prompt_builder = PromptBuilder()
-        self._sender = WhatsAppSender(redis)
-        self._short_term = ShortTermMemory(db=db, redis=redis)
-        self._rag = RagAdapter(db=db, redis=redis)
-        self._kb = KnowledgeBaseAdapter(db=db, redis=redis)
-        self._openai = OpenAIResolver(db)
+        self._sender = WhatsAppSender(redis, pacer=pacer)
+        self._short_term = short_term or ShortTermMemory(
+            db=db, redis=redis, history_cache=self._history_cache, msg_repo=self._msg_repo
+        )
+        self._rag = rag or RagAdapter(db=db, redis=redis)
+        self._kb = kb or KnowledgeBaseAdapter(db=db, redis=redis)
+        self._openai = openai or OpenAIResolver(db)
 
     async def cancel_pending(self, *, company_id: str, lead_id: str) -> int:
         return await self._repo.cancel_pending_for_lead(company_id=company_id, lead_id=lead_id)
 
-    async def schedule_for_lead(self, *, company_id: str, lead_id: str, centurion_id: str) -> int:
-        lead_row = await self._db.fetchrow("select last_contact_at from core.leads where id=$1 and company_id=$2", lead_id, company_id)
-        if not lead_row or not lead_row.get("last_contact_at"):
-            return 0
-
-        last_contact_at: datetime = lead_row["last_contact_at"]
+    async def schedule_for_lead(
+        self,
+        *,
+        company_id: str,
+        lead_id: str,
+        centurion_id: str,
+        last_contact_at: datetime | None = None,
+    ) -> int:
+        # Callers that just touched the lead pass the contact time (the touch may still be buffered).
+        if last_contact_at is None:
+            lead_row = await self._db.fetchrow(
+                "select last_contact_at from core.leads where id=$1 and company_id=$2", lead_id, company_id
+            )
+            if not lead_row or not lead_row.get("last_contact_at"):
+                return 0
+            last_contact_at = lead_row["last_contact_at"]
         rules = await self._repo.list_active_rules(company_id=company_id, centurion_id=centurion_id)
         if not rules:
             return 0
@@ -161,6 +190,7 @@ class FollowupService:
                 correlation_id=item.id,
                 causation_id=item.id,
                 metadata={"followup_queue_id": item.id, "rule_id": rule.id, "attempt": item.attempt_number},
+                priority="proactive",
             )
 
             await self._repo.mark_sent(queue_id=item.id, message_id=str(msg_id))
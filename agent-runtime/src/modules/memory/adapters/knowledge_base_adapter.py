@@ -8,9 +8,15 @@ from modules.memory.services.embedding_service import EmbeddingService, format_v
 
 
 class KnowledgeBaseAdapter:
-    def __init__(self, *, db: SupabaseDb, redis: RedisClient | None = None):
+    def __init__(
+        self,
+        *,
+        db: SupabaseDb,
+        redis: RedisClient | None = None,
+        embeddings: EmbeddingService | None = None,
+    ):
         self._db = db
-        self._embeddings = EmbeddingService(db=db, redis=redis)
+        self._embeddings = embeddings or EmbeddingService(db=db, redis=redis)
 
     async def search_knowledge(
         self,
@@ -47,5 +53,6 @@ class KnowledgeBaseAdapter:
             company_id,
             max_distance,
             top_k,
+            readonly=True,
         )
         return [dict(r) for r in rows]
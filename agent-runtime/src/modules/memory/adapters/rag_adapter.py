@@ -9,10 +9,16 @@ from modules.memory.services.embedding_service import EmbeddingService
 
 
 class RagAdapter:
-    def __init__(self, *, db: SupabaseDb, redis: RedisClient | None = None):
+    def __init__(
+        self,
+        *,
+        db: SupabaseDb,
+        redis: RedisClient | None = None,
+        embeddings: EmbeddingService | None = None,
+    ):
         self._db = db
         self._repo = FactRepository(db)
-        self._embeddings = EmbeddingService(db=db, redis=redis)
+        self._embeddings = embeddings or EmbeddingService(db=db, redis=redis)
 
     async def get_relevant_context(
         self,
@@ -1,12 +1,64 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from modules.centurion.domain.message import Message
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 chars per token is close enough for budgeting pt-BR/en chat text without a tokenizer.
+    return (len(text or "") + 3) // 4
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
 
 
 @dataclass(frozen=True)
 class MemoryWindow:
     max_messages: int = 25
+    min_messages: int = 4
+    max_tokens: int = 2000
 
     def clamp(self, count: int) -> int:
         return max(1, min(self.max_messages, count))
 
+    def select(
+        self,
+        history: list[Message],
+        *,
+        covered_until: datetime | None = None,
+        pending_count: int = 0,
+    ) -> list[Message]:
+        """
+        Picks the newest messages that fit the token budget (oldest -> newest).
+
+        The trailing `pending_count` inbound messages are always kept and not charged to the budget
+        (PromptBuilder sends them consolidated). Messages at or before `covered_until` are already in
+        the session summary, so only `min_messages` of them are kept for conversational continuity.
+        """
+        history = list(history[-self.max_messages :])
+
+        tail_start = len(history)
+        remaining_pending = max(0, pending_count)
+        while tail_start > 0 and remaining_pending > 0:
+            tail_start -= 1
+            if history[tail_start].direction == "inbound":
+                remaining_pending -= 1
+
+        covered = _as_utc(covered_until) if covered_until else None
+        selected: list[Message] = []
+        tokens = 0
+        for msg in reversed(history[:tail_start]):
+            if len(selected) >= self.min_messages:
+                if covered and msg.created_at and _as_utc(msg.created_at) <= covered:
+                    break
+                cost = estimate_tokens(msg.as_prompt_text)
+                if tokens + cost > self.max_tokens:
+                    break
+            tokens += estimate_tokens(msg.as_prompt_text)
+            selected.append(msg)
+
+        selected.reverse()
+        return selected + history[tail_start:]
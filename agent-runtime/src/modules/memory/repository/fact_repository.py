@@ -69,5 +69,6 @@ class FactRepository:
             lead_id,
             max_distance,
             limit,
+            readonly=True,
         )
         return [dict(r) for r in rows]
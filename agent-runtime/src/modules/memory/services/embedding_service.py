@@ -15,9 +15,15 @@ logger = logging.getLogger(__name__)
 
 
 class EmbeddingService:
-    def __init__(self, *, db: SupabaseDb | None = None, redis: RedisClient | None = None):
+    def __init__(
+        self,
+        *,
+        db: SupabaseDb | None = None,
+        redis: RedisClient | None = None,
+        openai: OpenAIResolver | None = None,
+    ):
         self._redis = redis
-        self._openai = OpenAIResolver(db) if db else None
+        self._openai = openai or (OpenAIResolver(db) if db else None)
 
     async def embed(self, *, company_id: str, texts: list[str]) -> list[list[float]]:
         if self._openai:
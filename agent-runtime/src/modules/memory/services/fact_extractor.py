@@ -15,8 +15,8 @@ logger = logging.getLogger(__name__)
 
 
 class FactExtractor:
-    def __init__(self, *, db: SupabaseDb | None = None):
-        self._openai = OpenAIResolver(db) if db else None
+    def __init__(self, *, db: SupabaseDb | None = None, openai: OpenAIResolver | None = None):
+        self._openai = openai or (OpenAIResolver(db) if db else None)
 
     async def extract(self, *, company_id: str, conversation_text: str) -> list[Fact]:
         text = (conversation_text or "").strip()
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime
+
+from common.infrastructure.cache.redis_client import RedisClient
+from modules.centurion.repository.message_repository import MessageCursor
+
+logger = logging.getLogger(__name__)
+
+_WATERMARK_TTL_S = 90 * 24 * 3600
+
+
+class FactExtractionWatermark:
+    """
+    Tracks, per conversation, the newest message already sent to fact extraction (as a `MessageCursor`).
+
+    Losing the watermark is harmless: the next extraction re-reads a bounded window and
+    `FactRepository.save_fact` dedupes facts by text.
+    """
+
+    def __init__(self, *, redis: RedisClient):
+        self._redis = redis
+
+    async def get(self, conversation_id: str) -> MessageCursor | None:
+        try:
+            raw = await self._redis.get(self._key(conversation_id))
+        except Exception:
+            logger.warning("fact_watermark.read_failed", extra={"extra": {"conversation_id": conversation_id}})
+            return None
+        if not isinstance(raw, str) or not raw.strip():
+            return None
+        raw = raw.strip()
+        try:
+            if not raw.startswith("{"):
+                # Watermarks written before the cursor carried the message id.
+                return MessageCursor(created_at=datetime.fromisoformat(raw))
+            data = json.loads(raw)
+            message_id = data.get("message_id")
+            return MessageCursor(
+                created_at=datetime.fromisoformat(str(data["created_at"])),
+                message_id=str(message_id) if message_id else None,
+            )
+        except (ValueError, KeyError, AttributeError):
+            return None
+
+    async def advance(self, conversation_id: str, until: MessageCursor) -> None:
+        value = json.dumps({"created_at": until.created_at.isoformat(), "message_id": until.message_id})
+        await self._redis.set(self._key(conversation_id), value, ttl_s=_WATERMARK_TTL_S)
+
+    def _key(self, conversation_id: str) -> str:
+        return f"conv:{conversation_id}:facts:watermark"
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import replace
+from datetime import datetime
+from typing import Any
+
+from common.infrastructure.cache.redis_client import RedisClient
+from modules.centurion.domain.message import Message
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MAX_MESSAGES = 50
+_DEFAULT_TTL_S = 24 * 3600
+# After a write misses a cold list, refuse cache fills for a few seconds so a fill that read
+# the DB before the insert cannot publish a window without the new message.
+_FILL_FENCE_TTL_S = 5
+
+_APPEND_LUA = """
+if redis.call("exists", KEYS[1]) == 1 then
+  redis.call("rpush", KEYS[1], ARGV[1])
+  redis.call("ltrim", KEYS[1], -tonumber(ARGV[2]), -1)
+  redis.call("expire", KEYS[1], tonumber(ARGV[3]))
+  return 1
+end
+redis.call("set", KEYS[2], "1", "EX", tonumber(ARGV[4]))
+return 0
+"""
+
+_FILL_LUA = """
+if redis.call("exists", KEYS[1]) == 1 or redis.call("exists", KEYS[2]) == 1 then
+  return 0
+end
+if #ARGV > 1 then
+  redis.call("rpush", KEYS[1], unpack(ARGV, 2))
+  redis.call("expire", KEYS[1], tonumber(ARGV[1]))
+end
+return 1
+"""
+
+_REPLACE_LUA = """
+local items = redis.call("lrange", KEYS[1], 0, -1)
+for i, raw in ipairs(items) do
+  if raw == ARGV[1] then
+    redis.call("lset", KEYS[1], i - 1, ARGV[2])
+    return 1
+  end
+end
+return 0
+"""
+
+
+class ConversationHistoryCache:
+    """
+    Write-through history cache: one capped Redis list per conversation (oldest -> newest).
+
+    The list always holds the newest `min(total, max_messages)` messages of a warm conversation,
+    so any window up to `max_messages` is served by a single LRANGE. Writes only touch lists that
+    already exist; cold conversations are filled from the DB on the next read.
+    """
+
+    def __init__(
+        self,
+        *,
+        redis: RedisClient,
+        max_messages: int = _DEFAULT_MAX_MESSAGES,
+        ttl_s: int = _DEFAULT_TTL_S,
+    ):
+        self._redis = redis
+        self._max_messages = max(1, int(max_messages))
+        self._ttl_s = max(1, int(ttl_s))
+
+    @property
+    def max_messages(self) -> int:
+        return self._max_messages
+
+    async def get_window(self, conversation_id: str, *, limit: int) -> list[Message] | None:
+        """Returns the newest `limit` messages, or None when the conversation is cold (or limit exceeds the cap)."""
+        if limit > self._max_messages:
+            return None
+        raw_items = await self._redis.client.lrange(self._key(conversation_id), -max(1, limit), -1)
+        if not raw_items:
+            return None
+        try:
+            return [self._decode(raw) for raw in raw_items]
+        except Exception:
+            logger.warning("history_cache.invalid_entry", extra={"extra": {"conversation_id": conversation_id}})
+            await self.invalidate(conversation_id)
+            return None
+
+    async def fill(self, conversation_id: str, messages: list[Message]) -> bool:
+        window = messages[-self._max_messages :]
+        res = await self._redis.client.eval(
+            _FILL_LUA,
+            2,
+            self._key(conversation_id),
+            self._fence_key(conversation_id),
+            str(self._ttl_s),
+            *[self._encode(m) for m in window],
+        )
+        return bool(res)
+
+    async def append(self, message: Message) -> bool:
+        res = await self._redis.client.eval(
+            _APPEND_LUA,
+            2,
+            self._key(message.conversation_id),
+            self._fence_key(message.conversation_id),
+            self._encode(message),
+            str(self._max_messages),
+            str(self._ttl_s),
+            str(_FILL_FENCE_TTL_S),
+        )
+        return bool(res)
+
+    async def patch(self, conversation_id: str, message_id: str, **changes: Any) -> bool:
+        """Patches one cached message in place (compare-and-set on the serialized entry)."""
+        key = self._key(conversation_id)
+        for raw in await self._redis.client.lrange(key, 0, -1) or []:
+            if not raw.startswith(self._id_prefix(message_id)):
+                continue
+            patched = replace(self._decode(raw), **changes)
+            res = await self._redis.client.eval(_REPLACE_LUA, 1, key, raw, self._encode(patched))
+            return bool(res)
+        return False
+
+    async def invalidate(self, conversation_id: str) -> None:
+        await self._redis.delete(self._key(conversation_id))
+
+    def _key(self, conversation_id: str) -> str:
+        return f"conv:{conversation_id}:history"
+
+    def _fence_key(self, conversation_id: str) -> str:
+        return f"conv:{conversation_id}:history:fence"
+
+    def _id_prefix(self, message_id: str) -> str:
+        # `_encode` always serializes `id` first with compact separators.
+        return '{"id":' + json.dumps(str(message_id), ensure_ascii=False) + ","
+
+    def _encode(self, m: Message) -> str:
+        return json.dumps(
+            {
+                "id": m.id,
+                "conversation_id": m.conversation_id,
+                "company_id": m.company_id,
+                "lead_id": m.lead_id,
+                "direction": m.direction,
+                "content_type": m.content_type,
+                "content": m.content,
+                "audio_transcription": m.audio_transcription,
+                "image_description": m.image_description,
+                "channel_message_id": m.channel_message_id,
+                "metadata": m.metadata,
+                "created_at": m.created_at.isoformat() if m.created_at else None,
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+
+    def _decode(self, raw: str) -> Message:
+        d = json.loads(raw)
+        created_at: datetime | None = None
+        raw_created_at = d.get("created_at")
+        if isinstance(raw_created_at, str) and raw_created_at.strip():
+            iso = raw_created_at.strip()
+            if iso.endswith("Z"):
+                iso = iso[:-1] + "+00:00"
+            try:
+                created_at = datetime.fromisoformat(iso)
+            except Exception:
+                created_at = None
+
+        return Message(
+            id=str(d.get("id")),
+            conversation_id=str(d.get("conversation_id")),
+            company_id=str(d.get("company_id")),
+            lead_id=str(d.get("lead_id")),
+            direction=str(d.get("direction")),
+            content_type=str(d.get("content_type")),
+            content=d.get("content"),
+            audio_transcription=d.get("audio_transcription"),
+            image_description=d.get("image_description"),
+            channel_message_id=d.get("channel_message_id"),
+            metadata=dict(d.get("metadata") or {}),
+            created_at=created_at,
+        )
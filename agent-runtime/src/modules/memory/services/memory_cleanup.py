@@ -2,69 +2,291 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
+from dataclasses import dataclass
 
 from common.config.settings import get_settings
 from common.infrastructure.cache.redis_client import RedisClient
 from common.infrastructure.database.supabase_client import SupabaseDb
 from common.infrastructure.idempotency.idempotency_store import IdempotencyStore
+from common.infrastructure.locks.redis_lock import RedisLockManager
+from common.infrastructure.metrics.prometheus import (
+    MEMORY_CLEANUP_BACKLOG,
+    MEMORY_CLEANUP_ROWS_PER_SECOND,
+    MEMORY_CLEANUP_ROWS_TOTAL,
+    MESSAGES_DEFAULT_PARTITION_ROWS,
+)
 
 logger = logging.getLogger(__name__)
 
+_MIN_UUID = "00000000-0000-0000-0000-000000000000"
+_CURSOR_TTL_S = 7 * 24 * 3600
+_BACKLOG_CAP = 10_000
+
+_DETACH_MESSAGES_SQL = """
+select core.detach_messages_partitions_before(date_trunc('month', now()) - make_interval(months => $1::int)) as name
+"""
+
+_COUNT_DEFAULT_MESSAGES_SQL = """
+select count(*) as n
+from (select 1 from core.messages_default limit $1) s
+"""
+
+
+@dataclass(frozen=True)
+class CleanupTask:
+    """
+    One keyset-paginated cleanup pass over `table` (aliased `t`), walking the uuid `key` in order.
+
+    `where` selects the rows to touch; `action` is the UPDATE/DELETE applied to the `batch` CTE
+    (whose key column is exposed as `batch.id`) and must return the key as `id`. Each batch is its own short statement, so no long transaction is held.
+    """
+
+    name: str
+    table: str
+    where: str
+    action: str
+    key: str = "id"
+
+    @property
+    def batch_sql(self) -> str:
+        return f"""
+            with batch as (
+              select t.{self.key} as id
+              from {self.table} t
+              where t.{self.key} > $1::uuid
+                and {self.where}
+              order by t.{self.key}
+              limit $2
+            )
+            {self.action}
+            """
+
+    @property
+    def backlog_sql(self) -> str:
+        return f"""
+            select count(*) as n
+            from (select 1 from {self.table} t where {self.where} limit $1) s
+            """
+
+
+CLEANUP_TASKS: tuple[CleanupTask, ...] = (
+    # Marca mensagens antigas com archived_at, mantendo histórico para auditoria.
+    # O filtro em created_at faz partition pruning dos meses recentes.
+    CleanupTask(
+        name="archive_messages",
+        table="core.messages",
+        where="""
+                t.created_at < now() - interval '30 days'
+                and t.archived_at is null
+                and t.conversation_id in (
+                  select c.id
+                  from core.conversations c
+                  where coalesce(c.last_inbound_at, c.last_outbound_at, c.created_at) < now() - interval '30 days'
+                )
+        """,
+        action="""
+            update core.messages t
+            set archived_at = now()
+            from batch
+            where t.id = batch.id
+              and t.created_at < now() - interval '30 days'
+            returning t.id
+        """,
+    ),
+    # Remove sessões Agno de conversas antigas.
+    # A memória canônica fica em `core.messages` e `core.lead_memories`.
+    CleanupTask(
+        name="strip_agno_sessions",
+        table="core.agno_sessions",
+        key="conversation_id",
+        where="""
+                t.updated_at < now() - interval '90 days'
+                and exists (
+                  select 1
+                  from core.conversations c
+                  where c.id = t.conversation_id
+                    and coalesce(c.last_inbound_at, c.last_outbound_at, c.created_at) < now() - interval '90 days'
+                )
+        """,
+        action="""
+            delete from core.agno_sessions t
+            using batch
+            where t.conversation_id = batch.id
+            returning t.conversation_id as id
+        """,
+    ),
+    # Prune de user memories geradas pelo Agno (evita crescimento infinito).
+    CleanupTask(
+        name="prune_agno_memories",
+        table="core.lead_memories",
+        where="""
+                (coalesce(t.qualification_context, '{}'::jsonb) ? 'agno')
+                and coalesce(t.last_updated_at, t.created_at) < now() - interval '180 days'
+        """,
+        action="""
+            delete from core.lead_memories t
+            using batch
+            where t.id = batch.id
+            returning t.id
+        """,
+    ),
+    # Chaves de dedupe de inbound (core.ingest_inbound_message): só importam na janela de redelivery.
+    CleanupTask(
+        name="prune_inbound_message_keys",
+        table="core.inbound_message_keys",
+        where="t.created_at < now() - interval '30 days'",
+        action="""
+            delete from core.inbound_message_keys t
+            using batch
+            where t.id = batch.id
+            returning t.id
+        """,
+    ),
+)
+
 
 class MemoryCleanupWorker:
-    def __init__(self, *, db: SupabaseDb, redis: RedisClient):
+    """
+    Archival/pruning in small keyset batches under a per-tick time budget.
+
+    Cursors are checkpointed in Redis so a restart resumes where the last tick stopped; a pass
+    that reaches the end of a table resets its cursor. While any task still has backlog the worker
+    polls at `cleanup_busy_interval_s`, otherwise it sleeps the full `cleanup_interval_s`.
+    """
+
+    def __init__(
+        self,
+        *,
+        db: SupabaseDb,
+        redis: RedisClient,
+        tasks: tuple[CleanupTask, ...] = CLEANUP_TASKS,
+        idempotency: IdempotencyStore | None = None,
+    ):
         self._db = db
         self._redis = redis
-        self._idempotency = IdempotencyStore(db)
+        self._idempotency = idempotency or IdempotencyStore(db)
+        self._locks = RedisLockManager(redis, prefix="locks:")
+        self._tasks = tasks
 
     async def run_forever(self) -> None:
         settings = get_settings()
         while True:
+            has_backlog = False
             try:
-                await self._cleanup()
+                has_backlog = await self._cleanup()
             except Exception:
                 logger.exception("memory_cleanup.failed")
-            await asyncio.sleep(settings.cleanup_interval_s)
+            await asyncio.sleep(settings.cleanup_busy_interval_s if has_backlog else settings.cleanup_interval_s)
 
-    async def _cleanup(self) -> None:
-        # Marca mensagens antigas como "archived" na metadata, mantendo histórico para auditoria.
-        await self._db.execute(
-            """
-            update core.messages m
-            set metadata = coalesce(m.metadata, '{}'::jsonb) || '{"archived": true}'::jsonb
-            where m.created_at < now() - interval '30 days'
-              and not (coalesce(m.metadata, '{}'::jsonb) ? 'archived')
-              and m.conversation_id in (
-                select c.id
-                from core.conversations c
-                where coalesce(c.last_inbound_at, c.last_outbound_at, c.created_at) < now() - interval '30 days'
-              )
-            """,
-        )
-
-        # Remove session blobs de conversas antigas para manter metadata pequena.
-        # A memória canônica fica em `core.messages` e `core.lead_memories`.
-        await self._db.execute(
-            """
-            update core.conversations c
-            set metadata = coalesce(c.metadata, '{}'::jsonb) - 'agno_session',
-                updated_at=now()
-            where coalesce(c.last_inbound_at, c.last_outbound_at, c.created_at) < now() - interval '90 days'
-              and (coalesce(c.metadata, '{}'::jsonb) ? 'agno_session')
-            """,
-        )
-
-        # Prune de user memories geradas pelo Agno (evita crescimento infinito).
-        await self._db.execute(
-            """
-            delete from core.lead_memories lm
-            where (coalesce(lm.qualification_context, '{}'::jsonb) ? 'agno')
-              and coalesce(lm.last_updated_at, lm.created_at) < now() - interval '180 days'
-            """,
-        )
+    async def _cleanup(self) -> bool:
+        """Runs one budgeted tick. Returns True when some task still has rows left to process."""
+        settings = get_settings()
+        async with self._locks.hold("memory_cleanup", ttl_s=max(30, int(settings.cleanup_tick_budget_s * 3))) as acquired:
+            if not acquired:
+                return False
+
+            await self._maintain_message_partitions(settings.messages_detach_after_months)
+
+            per_task_budget_s = settings.cleanup_tick_budget_s / (len(self._tasks) + 1)
+            batch_size = max(1, int(settings.cleanup_batch_size))
+
+            has_backlog = False
+            for task in self._tasks:
+                drained = await self._run_task(task, batch_size=batch_size, budget_s=per_task_budget_s)
+                has_backlog = has_backlog or not drained
+
+            drained = await self._run_idempotency_cleanup(batch_size=batch_size, budget_s=per_task_budget_s)
+            has_backlog = has_backlog or not drained
+
+        logger.info("memory_cleanup.completed", extra={"extra": {"has_backlog": has_backlog}})
+        return has_backlog
+
+    async def _maintain_message_partitions(self, detach_after_months: int) -> None:
+        # core.messages é particionada por mês: cria as próximas partições antes de precisarmos delas,
+        # destaca os meses fora da retenção e vigia a partição default (linhas ali bloqueiam novas partições).
+        try:
+            await self._db.execute("select core.ensure_messages_partitions()")
+            if detach_after_months > 0:
+                rows = await self._db.fetch(_DETACH_MESSAGES_SQL, int(detach_after_months))
+                detached = [str(r["name"]) for r in rows or []]
+                if detached:
+                    logger.info("memory_cleanup.partitions_detached", extra={"extra": {"partitions": detached}})
+            row = await self._db.fetchrow(_COUNT_DEFAULT_MESSAGES_SQL, _BACKLOG_CAP)
+        except Exception:
+            logger.warning("memory_cleanup.partition_maintenance_failed")
+            return
+        in_default = int(row["n"]) if row and row.get("n") is not None else 0
+        MESSAGES_DEFAULT_PARTITION_ROWS.set(in_default)
+        if in_default:
+            logger.warning("memory_cleanup.messages_in_default_partition", extra={"extra": {"rows": in_default}})
+
+    async def _run_task(self, task: CleanupTask, *, batch_size: int, budget_s: float) -> bool:
+        cursor = await self._load_cursor(task.name)
+        started = time.monotonic()
+        processed = 0
+        drained = False
+
+        while True:
+            rows = await self._db.fetch(task.batch_sql, cursor, batch_size)
+            ids = [str(r["id"]) for r in rows or []]
+            processed += len(ids)
+            if ids:
+                cursor = max(ids)
+            if len(ids) < batch_size:
+                drained = True
+                break
+            if time.monotonic() - started >= budget_s:
+                break
+
+        await self._save_cursor(task.name, _MIN_UUID if drained else cursor)
+        self._record(task.name, processed=processed, elapsed_s=time.monotonic() - started)
+
+        backlog = 0
+        if not drained:
+            row = await self._db.fetchrow(task.backlog_sql, _BACKLOG_CAP)
+            backlog = int(row["n"]) if row and row.get("n") is not None else 0
+        MEMORY_CLEANUP_BACKLOG.labels(task=task.name).set(backlog)
+        return drained
+
+    async def _run_idempotency_cleanup(self, *, batch_size: int, budget_s: float) -> bool:
+        started = time.monotonic()
+        processed = 0
+        drained = False
+
+        while True:
+            deleted = await self._idempotency.cleanup_expired(limit=batch_size)
+            processed += deleted
+            if deleted < batch_size:
+                drained = True
+                break
+            if time.monotonic() - started >= budget_s:
+                break
+
+        self._record("idempotency", processed=processed, elapsed_s=time.monotonic() - started)
+        backlog = 0 if drained else await self._idempotency.count_expired(cap=_BACKLOG_CAP)
+        MEMORY_CLEANUP_BACKLOG.labels(task="idempotency").set(backlog)
+        if processed:
+            logger.info("idempotency.cleanup_deleted", extra={"extra": {"deleted": processed}})
+        return drained
+
+    def _record(self, task: str, *, processed: int, elapsed_s: float) -> None:
+        MEMORY_CLEANUP_ROWS_TOTAL.labels(task=task).inc(processed)
+        MEMORY_CLEANUP_ROWS_PER_SECOND.labels(task=task).set(processed / elapsed_s if elapsed_s > 0 else 0.0)
+
+    async def _load_cursor(self, task: str) -> str:
+        try:
+            raw = await self._redis.get(self._cursor_key(task))
+        except Exception:
+            logger.warning("memory_cleanup.cursor_load_failed", extra={"extra": {"task": task}})
+            return _MIN_UUID
+        return raw if isinstance(raw, str) and raw else _MIN_UUID
 
-        deleted = await self._idempotency.cleanup_expired(limit=5000)
-        if deleted:
-            logger.info("idempotency.cleanup_deleted", extra={"extra": {"deleted": deleted}})
+    async def _save_cursor(self, task: str, cursor: str) -> None:
+        try:
+            await self._redis.set(self._cursor_key(task), cursor, ttl_s=_CURSOR_TTL_S)
+        except Exception:
+            logger.warning("memory_cleanup.cursor_save_failed", extra={"extra": {"task": task}})
 
-        logger.info("memory_cleanup.completed")
+    def _cursor_key(self, task: str) -> str:
+        return f"memory_cleanup:{task}:cursor"
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from agno.run.agent import Message as AgnoMessage
+from agno.session.summary import SessionSummary
+
+from common.config.settings import get_settings
+from common.infrastructure.agno.summary import IncrementalSessionSummaryManager
+from common.infrastructure.cache.redis_client import RedisClient
+from common.infrastructure.database.supabase_client import SupabaseDb
+from common.infrastructure.integrations.openai_resolver import OpenAIResolved, OpenAIResolver
+from common.infrastructure.locks.redis_lock import RedisLockManager
+from modules.centurion.domain.message import Message
+from modules.centurion.repository.message_repository import MessageCursor, MessageRepository
+from modules.memory.domain.memory_window import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+_LOCK_TTL_S = 120
+
+
+@dataclass
+class _SummaryInput:
+    """The slice of AgentSession that IncrementalSessionSummaryManager reads."""
+
+    messages: list[AgnoMessage] = field(default_factory=list)
+    summary: SessionSummary | None = None
+
+    def get_messages(self) -> list[AgnoMessage]:
+        return self.messages
+
+
+class SessionSummarizer:
+    """
+    Updates `core.agno_sessions.summary` off the reply path, only once the unsummarized tail passes
+    `summary_trigger_messages` or `summary_trigger_tokens`.
+
+    The newest summarized message is stored as `summary_watermark` so the next run (and the
+    history window) starts right after it.
+    """
+
+    def __init__(
+        self,
+        *,
+        db: SupabaseDb,
+        redis: RedisClient,
+        openai: OpenAIResolver | None = None,
+        msg_repo: MessageRepository | None = None,
+    ):
+        self._db = db
+        self._openai = openai or OpenAIResolver(db)
+        self._msg_repo = msg_repo or MessageRepository(db)
+        self._locks = RedisLockManager(redis, prefix="locks:")
+
+    async def maybe_summarize(self, *, company_id: str, conversation_id: str) -> bool:
+        """Returns True when a new summary was stored."""
+        try:
+            async with self._locks.hold(f"session_summary:{conversation_id}", ttl_s=_LOCK_TTL_S) as acquired:
+                if not acquired:
+                    return False
+                return await self._summarize(company_id=company_id, conversation_id=conversation_id)
+        except Exception:
+            logger.exception("session_summary.failed", extra={"extra": {"conversation_id": conversation_id}})
+            return False
+
+    async def _summarize(self, *, company_id: str, conversation_id: str) -> bool:
+        settings = get_settings()
+        row = await self._db.fetchrow(
+            """
+            select summary, summary_watermark as watermark
+            from core.agno_sessions
+            where conversation_id=$1
+            """,
+            conversation_id,
+        )
+        if not row:
+            return False
+
+        previous = self._load_summary(row.get("summary"))
+        after = self._load_watermark(row.get("watermark")) if previous else None
+        fresh = await self._msg_repo.list_since(
+            conversation_id=conversation_id,
+            after=after,
+            limit=max(1, settings.summary_max_messages),
+        )
+        tokens = sum(estimate_tokens(m.as_prompt_text) for m in fresh)
+        if len(fresh) < settings.summary_trigger_messages and tokens < settings.summary_trigger_tokens:
+            return False
+
+        resolved = await self._openai.resolve_optional(company_id=company_id)
+        if not resolved:
+            return False
+
+        manager = self._build_manager(resolved)
+        summary = await manager.acreate_session_summary(
+            _SummaryInput(messages=self._to_agno_messages(fresh), summary=previous)
+        )
+        if summary is None:
+            return False
+
+        last = fresh[-1]
+        watermark = {"message_id": last.id, "created_at": last.created_at.isoformat() if last.created_at else None}
+        await self._db.execute(
+            """
+            update core.agno_sessions
+            set summary=$2::jsonb,
+                summary_watermark=$3::jsonb,
+                updated_at=now()
+            where conversation_id=$1
+            """,
+            conversation_id,
+            json.dumps(summary.to_dict(), ensure_ascii=False),
+            json.dumps(watermark),
+        )
+        logger.info(
+            "session_summary.updated",
+            extra={"extra": {"conversation_id": conversation_id, "messages": len(fresh), "tokens": tokens}},
+        )
+        return True
+
+    def _build_manager(self, resolved: OpenAIResolved) -> IncrementalSessionSummaryManager:
+        from agno.models.openai import OpenAIChat
+
+        model = OpenAIChat(
+            id=resolved.chat_model,
+            api_key=resolved.api_key,
+            base_url=resolved.base_url,
+            temperature=0.3,
+            timeout=30.0,
+        )
+        return IncrementalSessionSummaryManager(model=model)
+
+    def _to_agno_messages(self, messages: list[Message]) -> list[AgnoMessage]:
+        out: list[AgnoMessage] = []
+        for m in messages:
+            text = m.as_prompt_text
+            if not text:
+                continue
+            out.append(AgnoMessage(role="user" if m.direction == "inbound" else "assistant", content=text))
+        return out
+
+    def _load_summary(self, raw: Any) -> SessionSummary | None:
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except Exception:
+                return None
+        if not isinstance(raw, dict) or not raw.get("summary"):
+            return None
+        try:
+            return SessionSummary.from_dict(dict(raw))
+        except Exception:
+            return None
+
+    def _load_watermark(self, raw: Any) -> MessageCursor | None:
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except Exception:
+                return None
+        if not isinstance(raw, dict):
+            return None
+        value = raw.get("created_at")
+        if not isinstance(value, str) or not value.strip():
+            return None
+        try:
+            created_at = datetime.fromisoformat(value.strip())
+        except ValueError:
+            return None
+        message_id = raw.get("message_id")
+        return MessageCursor(created_at=created_at, message_id=str(message_id) if message_id else None)
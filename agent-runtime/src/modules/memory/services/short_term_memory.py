@@ -4,98 +4,107 @@ import logging
 from datetime import datetime
 from typing import Any
 
+from common.config.settings import get_settings
 from common.infrastructure.cache.redis_client import RedisClient
 from common.infrastructure.database.supabase_client import SupabaseDb
 from modules.centurion.domain.message import Message
 from modules.centurion.repository.message_repository import MessageRepository
+from modules.memory.domain.memory_window import MemoryWindow
+from modules.memory.services.history_cache import ConversationHistoryCache
 
 logger = logging.getLogger(__name__)
 
-_DEFAULT_CACHE_TTL_S = 60
-_HISTORY_LIMITS_TO_INVALIDATE = (10, 15, 25)
+
+def _parse_iso(raw: Any) -> datetime | None:
+    if not isinstance(raw, str) or not raw.strip():
+        return None
+    try:
+        return datetime.fromisoformat(raw.strip())
+    except ValueError:
+        return None
+
+
+def summary_covered_until(summary: Any, watermark: Any = None) -> datetime | None:
+    """Point up to which the `core.agno_sessions` summary already covers the conversation."""
+    if not isinstance(summary, dict) or not summary.get("summary"):
+        return None
+    # `summary_watermark` (SessionSummarizer) is the last summarized message; older summaries only have updated_at.
+    if isinstance(watermark, dict):
+        covered = _parse_iso(watermark.get("created_at"))
+        if covered:
+            return covered
+    return _parse_iso(summary.get("updated_at"))
 
 
 class ShortTermMemory:
-    def __init__(self, *, db: SupabaseDb, redis: RedisClient):
+    def __init__(
+        self,
+        *,
+        db: SupabaseDb,
+        redis: RedisClient,
+        history_cache: ConversationHistoryCache | None = None,
+        msg_repo: MessageRepository | None = None,
+    ):
         self._db = db
         self._redis = redis
-        self._repo = MessageRepository(db)
-
-    async def get_conversation_history(self, *, conversation_id: str, limit: int | None = None) -> list[Message]:
-        if limit is None:
-            limit = await self._recommended_history_limit(conversation_id)
+        self._cache = history_cache or ConversationHistoryCache(redis=redis)
+        self._repo = msg_repo or MessageRepository(db, history_cache=self._cache)
+        settings = get_settings()
+        self._window = MemoryWindow(
+            max_messages=settings.history_max_messages,
+            min_messages=settings.history_min_messages,
+            max_tokens=settings.history_token_budget,
+        )
 
-        key = f"conv:{conversation_id}:history:{limit}"
-        cached = await self._redis.get_json(key)
-        if isinstance(cached, list):
-            try:
-                return [self._from_dict(d) for d in cached if isinstance(d, dict)]
-            except Exception:
-                logger.warning("short_term_memory.cache_invalid", extra={"extra": {"conversation_id": conversation_id}})
+    @property
+    def history_cache(self) -> ConversationHistoryCache:
+        return self._cache
 
-        messages = await self._repo.list_recent(conversation_id=conversation_id, limit=limit, include_archived=False)
-        await self._redis.set_json(key, [self._to_dict(m) for m in messages], ttl_s=_DEFAULT_CACHE_TTL_S)
-        return messages
+    async def get_windowed_history(
+        self,
+        *,
+        conversation_id: str,
+        summary: dict[str, Any] | None = None,
+        summary_watermark: dict[str, Any] | None = None,
+        pending_count: int = 0,
+    ) -> list[Message]:
+        """
+        History sized by token budget and summary coverage, using the session summary the caller
+        already loaded with the conversation row (no extra lookup).
+        """
+        history = await self.get_conversation_history(conversation_id=conversation_id, limit=self._window.max_messages)
+        return self._window.select(
+            history,
+            covered_until=summary_covered_until(summary, summary_watermark),
+            pending_count=pending_count,
+        )
 
-    async def invalidate_cache(self, conversation_id: str) -> None:
-        for limit in _HISTORY_LIMITS_TO_INVALIDATE:
-            await self._redis.delete(f"conv:{conversation_id}:history:{limit}")
+    async def get_conversation_history(self, *, conversation_id: str, limit: int | None = None) -> list[Message]:
+        if limit is None:
+            limit = self._window.max_messages
+        limit = max(1, int(limit))
 
-    async def _recommended_history_limit(self, conversation_id: str) -> int:
         try:
-            row = await self._db.fetchrow(
-                "select metadata->'agno_session' as agno_session from core.conversations where id=$1::uuid",
-                conversation_id,
-            )
-            agno_session = row.get("agno_session") if row else None
-            if isinstance(agno_session, dict) and agno_session.get("summary"):
-                return 15
+            cached = await self._cache.get_window(conversation_id, limit=limit)
         except Exception:
-            logger.exception(
-                "short_term_memory.summary_lookup_failed",
-                extra={"extra": {"conversation_id": conversation_id}},
-            )
-        return 25
+            logger.warning("short_term_memory.cache_read_failed", extra={"extra": {"conversation_id": conversation_id}})
+            cached = None
+        if cached is not None:
+            return cached
 
-    def _to_dict(self, m: Message) -> dict[str, Any]:
-        return {
-            "id": m.id,
-            "conversation_id": m.conversation_id,
-            "company_id": m.company_id,
-            "lead_id": m.lead_id,
-            "direction": m.direction,
-            "content_type": m.content_type,
-            "content": m.content,
-            "audio_transcription": m.audio_transcription,
-            "image_description": m.image_description,
-            "channel_message_id": m.channel_message_id,
-            "metadata": m.metadata,
-            "created_at": m.created_at.isoformat() if m.created_at else None,
-        }
-
-    def _from_dict(self, d: dict[str, Any]) -> Message:
-        created_at: datetime | None = None
-        raw_created_at = d.get("created_at")
-        if isinstance(raw_created_at, str) and raw_created_at.strip():
-            iso = raw_created_at.strip()
-            if iso.endswith("Z"):
-                iso = iso[:-1] + "+00:00"
+        # Cold conversation: load the whole cacheable window once so later turns are served from Redis.
+        fill = limit <= self._cache.max_messages
+        messages = await self._repo.list_recent(
+            conversation_id=conversation_id,
+            limit=self._cache.max_messages if fill else limit,
+            include_archived=False,
+        )
+        if fill and messages:
             try:
-                created_at = datetime.fromisoformat(iso)
+                await self._cache.fill(conversation_id, messages)
             except Exception:
-                created_at = None
+                logger.warning("short_term_memory.cache_fill_failed", extra={"extra": {"conversation_id": conversation_id}})
+        return messages[-limit:]
 
-        return Message(
-            id=str(d.get("id")),
-            conversation_id=str(d.get("conversation_id")),
-            company_id=str(d.get("company_id")),
-            lead_id=str(d.get("lead_id")),
-            direction=str(d.get("direction")),
-            content_type=str(d.get("content_type")),
-            content=d.get("content"),
-            audio_transcription=d.get("audio_transcription"),
-            image_description=d.get("image_description"),
-            channel_message_id=d.get("channel_message_id"),
-            metadata=dict(d.get("metadata") or {}),
-            created_at=created_at,
-        )
+    async def invalidate_cache(self, conversation_id: str) -> None:
+        await self._cache.invalidate(conversation_id)
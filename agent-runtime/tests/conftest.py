@@ -6,10 +6,22 @@ from fastapi.testclient import TestClient
 os.environ.setdefault("DISABLE_CONNECTIONS", "true")
 os.environ.setdefault("DISABLE_WORKERS", "true")
 
+from common.infrastructure.integrations.resolver import get_integration_cache
 from main import app
+from modules.centurion.repository.config_repository import get_config_caches
 
 
 @pytest.fixture()
 def client() -> TestClient:
     with TestClient(app) as client:
         yield client
+
+
+@pytest.fixture(autouse=True)
+def _fresh_config_caches():
+    # Process-wide caches would otherwise leak rows between tests.
+    get_config_caches.cache_clear()
+    get_integration_cache.cache_clear()
+    yield
+    get_config_caches.cache_clear()
+    get_integration_cache.cache_clear()
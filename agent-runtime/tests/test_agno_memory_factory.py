@@ -40,3 +40,11 @@ def test_build_agent_sets_session_and_user_ids():
     assert agent.user_id == "co1:l1"
     assert agent.id == "ct1"
 
+    # Summaries are produced off the reply path; the agent only reads them into context.
+    assert agent.enable_session_summaries is False
+    assert agent.add_session_summary_to_context is True
+    assert agent.session_summary_manager is None
+    # Default "facts" engine: memories are read into context but not extracted by Agno.
+    assert agent.enable_user_memories is False
+    assert agent.add_memories_to_context is True
+    assert agent.memory_manager is not None
@@ -3,6 +3,7 @@ import json
 import pytest
 
 from agno.db.base import SessionType
+from agno.db.schemas.memory import UserMemory
 from agno.session import AgentSession
 
 from common.infrastructure.agno import storage as agno_storage
@@ -16,6 +17,8 @@ class _Db:
         self.execute_calls: list[tuple[str, tuple[object, ...]]] = []
         self._fetchrow_queue: list[dict | None] = []
         self._fetch_queue: list[list[dict]] = []
+        self.read_options: list[dict] = []
+        self.writes: list[str] = []
 
     def queue_fetchrow(self, *rows: dict | None) -> None:
         self._fetchrow_queue.extend(rows)
@@ -23,12 +26,17 @@ class _Db:
     def queue_fetch(self, *rows: list[dict]) -> None:
         self._fetch_queue.extend(rows)
 
-    async def fetchrow(self, query: str, *args):
+    async def note_write(self, key: str) -> None:
+        self.writes.append(key)
+
+    async def fetchrow(self, query: str, *args, **options):
         self.fetchrow_calls.append((query, args))
+        self.read_options.append(options)
         return self._fetchrow_queue.pop(0) if self._fetchrow_queue else None
 
-    async def fetch(self, query: str, *args):
+    async def fetch(self, query: str, *args, **options):
         self.fetch_calls.append((query, args))
+        self.read_options.append(options)
         return self._fetch_queue.pop(0) if self._fetch_queue else []
 
     async def execute(self, query: str, *args):
@@ -51,7 +59,7 @@ def test_epoch_s_handles_naive_and_aware_datetimes():
 
 
 @pytest.mark.asyncio
-async def test_get_session_deserializes_agent_session_from_metadata():
+async def test_get_session_deserializes_agent_session():
     db = _Db()
     db.queue_fetchrow(
         {
@@ -70,6 +78,11 @@ async def test_get_session_deserializes_agent_session_from_metadata():
     session = await agno_db.get_session("c1", SessionType.AGENT, deserialize=True)
     assert isinstance(session, AgentSession)
     assert session.session_id == "c1"
+    # Only core.agno_sessions is read; the legacy metadata blob is ignored.
+    query = db.fetchrow_calls[0][0]
+    assert "from core.agno_sessions s" in query
+    assert "metadata" not in query
+    assert db.read_options[0] == {"readonly": True, "consistency_key": "c1"}
 
     # Non-agent sessions are ignored.
     assert await agno_db.get_session("c1", SessionType.TEAM, deserialize=True) is None
@@ -100,6 +113,13 @@ async def test_upsert_session_persists_without_runs():
     stored = json.loads(payload)
     assert stored["session_id"] == "c1"
     assert stored["runs"] is None
+    # Stored summary wins over the one the run loaded (SessionSummarizer owns it).
+    assert "summary" not in stored
+    query = db.execute_calls[0][0]
+    assert "insert into core.agno_sessions" in query
+    assert "core.conversations c" in query
+    assert "metadata" not in query
+    assert db.writes == ["c1"]
 
     raw = await agno_db.upsert_session(session, deserialize=False)
     assert isinstance(raw, dict)
@@ -134,6 +154,30 @@ async def test_memory_methods_roundtrip_user_memory(monkeypatch):
     assert memories[0].memory == "prefere respostas curtas"
 
 
+@pytest.mark.asyncio
+async def test_get_user_memories_includes_fact_extractor_rows():
+    db = _Db()
+    agno_db = CoreAgnoDb(db=db)  # type: ignore[arg-type]
+    db.queue_fetch(
+        [
+            {
+                "id": "00000000-0000-0000-0000-000000000001",
+                "summary": "Orçamento de R$ 5.000",
+                "facts": json.dumps([{"text": "Orçamento de R$ 5.000", "category": "requirement"}]),
+                "qualification_context": None,
+                "created_at": None,
+                "last_updated_at": None,
+            }
+        ]
+    )
+
+    memories = await agno_db.get_user_memories(user_id="co1:l1", deserialize=True)
+
+    assert [m.memory for m in memories] == ["Orçamento de R$ 5.000"]
+    assert memories[0].topics == ["requirement"]
+    assert "facts is not null" in db.fetch_calls[0][0]
+
+
 @pytest.mark.asyncio
 async def test_schema_version_methods_are_noops():
     db = _Db()
@@ -144,10 +188,14 @@ async def test_schema_version_methods_are_noops():
 
 
 @pytest.mark.asyncio
-async def test_delete_session_removes_metadata_key():
+async def test_delete_session_removes_row():
     db = _Db()
     agno_db = CoreAgnoDb(db=db)  # type: ignore[arg-type]
+    db.queue_fetchrow({"n": 1}, {"n": 0})
     assert await agno_db.delete_session("c1") is True
+    assert "delete from core.agno_sessions" in db.fetchrow_calls[0][0]
+    assert "core.conversations" not in db.fetchrow_calls[0][0]
+    assert await agno_db.delete_session("c1") is False
 
 
 @pytest.mark.asyncio
@@ -264,12 +312,112 @@ async def test_unimplemented_components_raise_not_implemented():
 async def test_delete_user_memory_resolves_company_id_from_lead_when_missing():
     db = _Db()
     # resolve company_id from core.leads
-    db.queue_fetchrow({"company_id": "co1"})
+    db.queue_fetch([{"id": "00000000-0000-0000-0000-000000000001", "company_id": "co1"}])
     agno_db = CoreAgnoDb(db=db)  # type: ignore[arg-type]
 
     await agno_db.delete_user_memory(
         "00000000-0000-0000-0000-000000000000",
         user_id="00000000-0000-0000-0000-000000000001",
     )
-    assert db.fetchrow_calls
-    assert db.execute_calls
+    assert "from core.leads" in db.fetch_calls[0][0]
+    assert db.execute_calls[0][1][1] == "co1"
+
+    # The lead -> company mapping is cached: later calls skip core.leads.
+    await agno_db.get_all_memory_topics(user_id="00000000-0000-0000-0000-000000000001")
+    assert [q for q, _ in db.fetch_calls if "from core.leads" in q] == [db.fetch_calls[0][0]]
+
+
+@pytest.mark.asyncio
+async def test_resolve_companies_batches_misses_and_bounds_cache(monkeypatch):
+    monkeypatch.setattr(agno_storage, "_LEAD_COMPANY_CACHE_MAX", 2)
+    db = _Db()
+    agno_db = CoreAgnoDb(db=db)  # type: ignore[arg-type]
+    await agno_db.get_all_memory_topics(user_id="co1:l1")  # prefixed ids warm the cache for free
+
+    db.queue_fetch([{"id": "l2", "company_id": "co2"}, {"id": "l3", "company_id": None}])
+    resolved = await agno_db.resolve_companies(["l1", "l2", "l3", "l2"])
+
+    assert resolved == {"l1": "co1", "l2": "co2"}
+    leads_queries = [args for q, args in db.fetch_calls if "from core.leads" in q]
+    assert leads_queries == [(["l2", "l3"],)]
+    assert list(agno_db._lead_companies) == ["l1", "l2"]  # noqa: SLF001
+
+
+@pytest.mark.asyncio
+async def test_delete_user_memories_is_one_statement():
+    db = _Db()
+    agno_db = CoreAgnoDb(db=db)  # type: ignore[arg-type]
+
+    await agno_db.delete_user_memories(
+        ["00000000-0000-0000-0000-00000000000a", "not-a-uuid", "00000000-0000-0000-0000-00000000000b"],
+        user_id="co1:l1",
+    )
+
+    assert len(db.execute_calls) == 1
+    query, args = db.execute_calls[0]
+    assert "any($1::uuid[])" in query
+    assert args[0] == ["00000000-0000-0000-0000-00000000000a", "00000000-0000-0000-0000-00000000000b"]
+
+
+@pytest.mark.asyncio
+async def test_get_user_memories_batch_groups_rows_by_user():
+    db = _Db()
+    agno_db = CoreAgnoDb(db=db)  # type: ignore[arg-type]
+    db.queue_fetch([{"id": "l2", "company_id": "co1"}])
+    db.queue_fetch(
+        [
+            {
+                "id": "00000000-0000-0000-0000-000000000001",
+                "lead_id": "l1",
+                "summary": "gosta de café",
+                "qualification_context": {"agno": {"topics": ["preference"]}},
+            },
+            {
+                "id": "00000000-0000-0000-0000-000000000002",
+                "lead_id": "l2",
+                "summary": "mora em SP",
+                "facts": [{"text": "mora em SP", "category": "personal"}],
+            },
+        ]
+    )
+
+    res = await agno_db.get_user_memories_batch(["co1:l1", "l2", "co9:l9"], limit_per_user=3)
+
+    assert [m.memory for m in res["co1:l1"]] == ["gosta de café"]
+    assert [m.topics for m in res["l2"]] == [["personal"]]
+    assert res["co9:l9"] == []
+    query, args = db.fetch_calls[-1]
+    assert "row_number()" in query
+    assert args == (["l1", "l2", "l9"], ["co1", "co1", "co9"], 3)
+
+
+@pytest.mark.asyncio
+async def test_memory_snapshot_serves_repeated_reads_until_a_write():
+    db = _Db()
+    agno_db = CoreAgnoDb(db=db)  # type: ignore[arg-type]
+    user_id = "00000000-0000-0000-0000-0000000000c1:00000000-0000-0000-0000-0000000000a1"
+    row = {
+        "id": "00000000-0000-0000-0000-000000000001",
+        "lead_id": "00000000-0000-0000-0000-0000000000a1",
+        "summary": "gosta de café",
+    }
+    db.queue_fetch([row])
+
+    async with agno_db.memory_snapshot([user_id]):
+        # Context building and the extraction pass read the same list: one query for both.
+        assert [m.memory for m in await agno_db.get_user_memories(user_id=user_id)] == ["gosta de café"]
+        assert [m["memory"] for m in await agno_db.get_user_memories(user_id=user_id, deserialize=False)] == [
+            "gosta de café"
+        ]
+        assert len(db.fetch_calls) == 1
+
+        # Filtered reads are not served from the snapshot.
+        await agno_db.get_user_memories(user_id=user_id, topics=["preference"])
+        assert len(db.fetch_calls) == 2
+
+        await agno_db.upsert_user_memory(UserMemory(memory="mora em SP", user_id=user_id))
+        await agno_db.get_user_memories(user_id=user_id)
+        assert len(db.fetch_calls) == 3
+
+    await agno_db.get_user_memories(user_id=user_id)
+    assert len(db.fetch_calls) == 4
@@ -33,7 +33,7 @@ class _FakeRedis:
 
 
 class _FakePubSub:
-    def __init__(self, redis):  # noqa: ARG002
+    def __init__(self, redis, **kwargs):  # noqa: ARG002
         self.registered: list[str] = []
         self.closed = False
 
@@ -55,6 +55,23 @@ class _DummyWorker:
         return None
 
 
+class _DummyContainer:
+    def __init__(self):
+        worker = _DummyWorker()
+        self.message_handler = self.debounce_worker = self.proactive_handler = worker
+        self.memory_cleanup = self.watchdog = self.outbox_relay = worker
+        self.idempotency = types.SimpleNamespace(close=worker.run_forever)
+        self.touches = types.SimpleNamespace(close=worker.run_forever)
+        self.config_handler = types.SimpleNamespace(handle_config_updated=worker.handle_message_received)
+
+    @classmethod
+    def build(cls, *, db, redis):  # noqa: ARG003
+        return cls()
+
+    def report(self):
+        return {}
+
+
 @pytest.mark.asyncio
 async def test_lifespan_short_circuits_when_connections_disabled(monkeypatch):
     settings = types.SimpleNamespace(
@@ -94,19 +111,18 @@ async def test_lifespan_initializes_and_closes_resources(monkeypatch):
     monkeypatch.setattr(api_main, "setup_logging", lambda *a, **k: None)
     monkeypatch.setattr(api_main, "init_tracing", lambda *a, **k: None)
     monkeypatch.setattr(api_main, "ConnectionPool", _FakePool)
-    monkeypatch.setattr(api_main, "SupabaseDb", lambda pool: types.SimpleNamespace(fetchrow=lambda *a, **k: {"ok": 1}))  # noqa: ARG005
+    monkeypatch.setattr(api_main, "SupabaseDb", lambda pool, **_: types.SimpleNamespace(fetchrow=lambda *a, **k: {"ok": 1}))  # noqa: ARG005
     monkeypatch.setattr(api_main, "RedisClient", _FakeRedis)
     monkeypatch.setattr(api_main, "RedisPubSubSubscriber", _FakePubSub)
-    monkeypatch.setattr(api_main, "MessageHandler", _DummyWorker)
-    monkeypatch.setattr(api_main, "DebounceWorker", _DummyWorker)
-    monkeypatch.setattr(api_main, "ProactiveHandler", _DummyWorker)
-    monkeypatch.setattr(api_main, "MemoryCleanupWorker", _DummyWorker)
+    monkeypatch.setattr(api_main, "ServiceContainer", _DummyContainer)
 
     app = FastAPI()
     async with api_main.lifespan(app):
         assert app.state.disable_connections is False
         assert app.state.pool.started is True
         assert app.state.redis.connected is True
+        assert isinstance(app.state.container, _DummyContainer)
+        assert app.state.connection_mode == "connected"
 
     assert app.state.pool.closed is True
     assert app.state.redis.closed is True
@@ -1,4 +1,5 @@
 import json
+from contextlib import asynccontextmanager
 
 import pytest
 
@@ -10,6 +11,10 @@ class _FakeDb:
     def __init__(self, row):
         self._row = row
         self.calls: list[tuple[str, tuple[object, ...]]] = []
+        self.writes: list[str] = []
+
+    async def note_write(self, key: str) -> None:
+        self.writes.append(key)
 
     async def fetchrow(self, query: str, *args):
         self.calls.append((query, args))
@@ -76,13 +81,24 @@ async def test_test_centurion_raises_value_error_when_missing():
         await service.test_centurion(company_id="co1", centurion_id="missing", message="oi")
 
 
+class _FakeConn:
+    def __init__(self):
+        self.executed: list[tuple[str, tuple[object, ...]]] = []
+
+    async def execute(self, query: str, *args):
+        self.executed.append((query, args))
+        return "INSERT 0 1"
+
+
 @pytest.mark.asyncio
-async def test_publish_lead_qualified_emits_event():
+async def test_publish_lead_qualified_writes_to_outbox():
     db = _FakeDb({})
     redis = _FakeRedis()
+    conn = _FakeConn()
     service = CenturionService(db=db, redis=redis)  # type: ignore[arg-type]
 
     await service._publish_lead_qualified(  # noqa: SLF001
+        conn,
         company_id="co1",
         lead_id="l1",
         score=1.0,
@@ -92,11 +108,12 @@ async def test_publish_lead_qualified_emits_event():
         causation_id=None,
     )
 
-    assert len(redis.published) == 1
-    channel, payload = redis.published[0]
-    assert channel == "lead.qualified"
+    assert redis.published == []
+    query, (channels, envelopes, companies) = conn.executed[0]
+    assert "core.event_outbox" in query
+    assert channels == ["lead.qualified"] and companies == ["co1"]
 
-    data = json.loads(payload)
+    data = json.loads(envelopes[0])
     assert data["type"] == "lead.qualified"
     assert data["company_id"] == "co1"
     assert data["correlation_id"] == "corr1"
@@ -140,6 +157,13 @@ async def test_call_llm_includes_media_tool_when_openai_is_configured(monkeypatc
     monkeypatch.setattr(service._tools, "get_tools", fake_get_tools)  # noqa: SLF001
     monkeypatch.setattr(service._agno_factory, "build_agent", fake_build_agent)  # noqa: SLF001
 
+    @asynccontextmanager
+    async def fake_memory_snapshot(*, company_id: str, lead_id: str):
+        captured["snapshot"] = (company_id, lead_id)
+        yield
+
+    monkeypatch.setattr(service._agno_factory, "memory_snapshot", fake_memory_snapshot)  # noqa: SLF001
+
     content = await service._call_llm(  # noqa: SLF001
         [{"role": "system", "content": "system"}, {"role": "user", "content": "oi"}],
         config={"prompt": "system"},
@@ -150,7 +174,218 @@ async def test_call_llm_includes_media_tool_when_openai_is_configured(monkeypatc
         include_media_tools=True,
     )
     assert content == "ok"
+    # The run loads the lead's memories once, up front.
+    assert captured["snapshot"] == ("co1", "lead1")
 
     tools = captured.get("tools")
     assert isinstance(tools, list)
     assert any(getattr(t, "name", None) == "media_search_assets" for t in tools)
+
+
+def _history_message(idx: int, content: str):
+    from datetime import datetime, timedelta, timezone
+
+    from modules.centurion.domain.message import Message
+
+    return Message(
+        id=f"m{idx}",
+        conversation_id="conv1",
+        company_id="co1",
+        lead_id="l1",
+        direction="inbound" if idx % 2 else "outbound",
+        content_type="text",
+        content=content,
+        created_at=datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=idx),
+    )
+
+
+class _Watermark:
+    def __init__(self, value=None):
+        self.value = value
+        self.advanced: list = []
+
+    async def get(self, conversation_id: str):  # noqa: ARG002
+        return self.value
+
+    async def advance(self, conversation_id: str, until):  # noqa: ARG002
+        self.advanced.append(until)
+        self.value = until
+
+
+def _wire_long_term_memory(monkeypatch: pytest.MonkeyPatch, service: CenturionService, fresh, watermark: _Watermark):
+    calls: dict[str, list] = {"list_since": [], "extract": [], "saved": []}
+
+    async def fake_resolve_optional(*, company_id: str):  # noqa: ARG001
+        return object()
+
+    async def fake_list_since(*, conversation_id: str, after, limit: int):
+        calls["list_since"].append((conversation_id, after, limit))
+        return list(fresh)
+
+    async def fake_extract(*, company_id: str, conversation_text: str):  # noqa: ARG001
+        from modules.memory.domain.fact import Fact
+
+        calls["extract"].append(conversation_text)
+        return [Fact(text="Gosta de pizza", category="preference")]
+
+    async def fake_embed(*, company_id: str, texts):  # noqa: ARG001
+        return [[0.1] for _ in texts]
+
+    async def fake_save_fact(**kwargs):  # noqa: ANN003
+        calls["saved"].append(kwargs["fact"].text)
+        return "f1"
+
+    monkeypatch.setattr(service._openai, "resolve_optional", fake_resolve_optional)  # noqa: SLF001
+    monkeypatch.setattr(service._msg_repo, "list_since", fake_list_since)  # noqa: SLF001
+    monkeypatch.setattr(service._fact_extractor, "extract", fake_extract)  # noqa: SLF001
+    monkeypatch.setattr(service._embeddings, "embed", fake_embed)  # noqa: SLF001
+    monkeypatch.setattr(service._fact_repo, "save_fact", fake_save_fact)  # noqa: SLF001
+    service._fact_watermark = watermark  # type: ignore[assignment]  # noqa: SLF001
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_update_long_term_memory_extracts_only_messages_after_watermark(monkeypatch: pytest.MonkeyPatch):
+    from modules.centurion.repository.message_repository import MessageCursor
+
+    service = CenturionService(db=_FakeDb({}), redis=_FakeRedis())  # type: ignore[arg-type]
+    previous = MessageCursor(_history_message(0, "antiga").created_at, "m0")
+    fresh = [_history_message(1, "x" * 150), _history_message(2, "y" * 150)]
+    watermark = _Watermark(previous)
+    calls = _wire_long_term_memory(monkeypatch, service, fresh, watermark)
+
+    await service._update_long_term_memory(company_id="co1", lead_id="l1", conversation_id="conv1")  # noqa: SLF001
+
+    assert calls["list_since"][0][:2] == ("conv1", previous)
+    assert calls["extract"] and "antiga" not in calls["extract"][0]
+    assert calls["saved"] == ["Gosta de pizza"]
+    assert watermark.advanced == [MessageCursor(fresh[-1].created_at, "m2")]
+
+
+@pytest.mark.asyncio
+async def test_update_long_term_memory_without_new_messages_keeps_watermark(monkeypatch: pytest.MonkeyPatch):
+    import types
+
+    service = CenturionService(db=_FakeDb({}), redis=_FakeRedis())  # type: ignore[arg-type]
+    watermark = _Watermark()
+    calls = _wire_long_term_memory(monkeypatch, service, [], watermark)
+    monkeypatch.setattr(
+        "modules.centurion.services.centurion_service.get_settings",
+        lambda: types.SimpleNamespace(memory_engine="facts", fact_extraction_max_messages=40, fact_extraction_min_chars=0),
+    )
+
+    await service._update_long_term_memory(company_id="co1", lead_id="l1", conversation_id="conv1")  # noqa: SLF001
+
+    assert len(calls["list_since"]) == 1
+    assert calls["extract"] == []
+    assert watermark.advanced == []
+
+
+@pytest.mark.asyncio
+async def test_update_long_term_memory_waits_for_minimum_new_text(monkeypatch: pytest.MonkeyPatch):
+    service = CenturionService(db=_FakeDb({}), redis=_FakeRedis())  # type: ignore[arg-type]
+    watermark = _Watermark()
+    calls = _wire_long_term_memory(monkeypatch, service, [_history_message(1, "oi")], watermark)
+
+    await service._update_long_term_memory(company_id="co1", lead_id="l1", conversation_id="conv1")  # noqa: SLF001
+
+    assert calls["extract"] == []
+    assert watermark.advanced == []
+
+
+@pytest.mark.asyncio
+async def test_update_long_term_memory_is_skipped_with_agno_engine(monkeypatch: pytest.MonkeyPatch):
+    import types
+
+    service = CenturionService(db=_FakeDb({}), redis=_FakeRedis())  # type: ignore[arg-type]
+    watermark = _Watermark()
+    calls = _wire_long_term_memory(monkeypatch, service, [_history_message(1, "x" * 300)], watermark)
+    monkeypatch.setattr(
+        "modules.centurion.services.centurion_service.get_settings",
+        lambda: types.SimpleNamespace(memory_engine="agno"),
+    )
+
+    await service._update_long_term_memory(company_id="co1", lead_id="l1", conversation_id="conv1")  # noqa: SLF001
+
+    assert calls["list_since"] == []
+    assert calls["extract"] == []
+
+
+class _TxConn(_FakeConn):
+    def __init__(self, *, fail_outbox: bool = False):
+        super().__init__()
+        self.inserted: list[tuple[object, ...]] = []
+        self.fail_outbox = fail_outbox
+
+    async def fetchrow(self, query: str, *args):  # noqa: ARG002
+        self.inserted.append(args)
+        return {"id": f"m{len(self.inserted)}", "created_at": None}
+
+    async def execute(self, query: str, *args):
+        if self.fail_outbox:
+            raise RuntimeError("db down")
+        return await super().execute(query, *args)
+
+
+class _TxDb(_FakeDb):
+    def __init__(self, conn: _TxConn):
+        super().__init__({})
+        self.conn = conn
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield self.conn
+
+
+class _Claims:
+    def __init__(self, claimed: list[bool]):
+        self.claimed = claimed
+        self.released: list[str] = []
+
+    async def claim_many(self, **kwargs):  # noqa: ARG002
+        return self.claimed
+
+    async def release(self, *, company_id: str, consumer: str, key: str):  # noqa: ARG002
+        self.released.append(key)
+
+
+async def _deliver(service: CenturionService):
+    return await service._deliver_outbound(  # noqa: SLF001
+        company_id="co1",
+        conversation_id="conv1",
+        lead_id="l1",
+        instance_id="inst1",
+        lead_phone="+5511999",
+        channel_type="whatsapp",
+        correlation_id="corr12345",
+        causation_id=None,
+        messages=[{"type": "text", "text": "a"}, {"type": "text", "text": "b"}],
+        message_metadata=[{"asset_id": None}, {"asset_id": None}],
+        delay_ms=1000,
+    )
+
+
+@pytest.mark.asyncio
+async def test_deliver_outbound_saves_messages_and_events_in_one_transaction():
+    conn = _TxConn()
+    db = _TxDb(conn)
+    redis = _FakeRedis()
+    service = CenturionService(db=db, redis=redis, idempotency=_Claims([True, False]))  # type: ignore[arg-type]
+
+    assert await _deliver(service) == [True, False]
+    assert len(conn.inserted) == 1 and conn.inserted[0][5] == "a"
+    assert conn.inserted[0][7]["chunk_index"] == 0 and conn.inserted[0][7]["chunks_total"] == 2
+    (_, (channels, envelopes, _)), = conn.executed
+    assert channels == ["message.sent"]
+    assert json.loads(envelopes[0])["payload"]["messages"] == [{"type": "text", "text": "a"}]
+    assert redis.published == []
+
+
+@pytest.mark.asyncio
+async def test_deliver_outbound_releases_claims_when_transaction_fails():
+    claims = _Claims([True, True])
+    service = CenturionService(db=_TxDb(_TxConn(fail_outbox=True)), redis=_FakeRedis(), idempotency=claims)  # type: ignore[arg-type]
+
+    with pytest.raises(RuntimeError):
+        await _deliver(service)
+    assert claims.released == ["corr12345:0", "corr12345:1"]
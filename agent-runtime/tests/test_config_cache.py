@@ -0,0 +1,175 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from common.infrastructure.cache.local_cache import LocalTtlCache
+from modules.centurion.handlers.config_handler import ConfigUpdateHandler
+from modules.centurion.repository.config_repository import ConfigCaches, ConfigRepository
+
+
+class _Db:
+    def __init__(self):
+        self.queries: list[tuple[str, tuple]] = []
+
+    async def fetchrow(self, query: str, *args):
+        self.queries.append((query, args))
+        await asyncio.sleep(0)
+        if "channel_instances" in query:
+            return {"channel_type": "instagram"} if args[0] == "inst1" else None
+        return {"id": "ct1", "company_id": args[-1], "debounce_wait_ms": 3000}
+
+
+def _caches(ttl_s: float = 60.0) -> ConfigCaches:
+    return ConfigCaches(
+        centurion_configs=LocalTtlCache("centurion_config_test", ttl_s=ttl_s),
+        channel_instances=LocalTtlCache("channel_instance_test", ttl_s=ttl_s),
+    )
+
+
+def _event(company_id: str, entity: str | None) -> str:
+    return json.dumps(
+        {
+            "id": "evt12345678",
+            "type": "config.updated",
+            "version": 1,
+            "occurred_at": datetime.now(timezone.utc).isoformat(),
+            "company_id": company_id,
+            "source": "backoffice-api",
+            "correlation_id": "corr12345678",
+            "causation_id": None,
+            "payload": {"entity": entity, "entity_id": "ct1", "action": "updated"} if entity else {},
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache: LocalTtlCache[str, int] = LocalTtlCache("stampede_test", ttl_s=60)
+    calls = {"n": 0}
+
+    async def loader():
+        calls["n"] += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*[cache.get_or_load("k", loader) for _ in range(20)])
+    assert results == [42] * 20
+    assert calls["n"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_and_loader_errors_are_not_served():
+    cache: LocalTtlCache[str, int] = LocalTtlCache("ttl_test", ttl_s=0.01)
+    assert await cache.get_or_load("k", _const(1)) == 1
+    await asyncio.sleep(0.02)
+    assert await cache.get_or_load("k", _const(2)) == 2
+
+    async def boom():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("other", boom)
+    assert await cache.get_or_load("other", _const(3)) == 3
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_load_does_not_store_stale_value():
+    cache: LocalTtlCache[str, int] = LocalTtlCache("generation_test", ttl_s=60)
+
+    async def slow_loader():
+        cache.invalidate("k")  # e.g. config.updated arriving mid-query
+        return 1
+
+    assert await cache.get_or_load("k", slow_loader) == 1
+    assert len(cache) == 0
+    assert await cache.get_or_load("k", _const(2)) == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded():
+    cache: LocalTtlCache[int, int] = LocalTtlCache("bounded_test", ttl_s=60, max_entries=2)
+    for i in range(3):
+        await cache.get_or_load(i, _const(i))
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_repository_serves_configs_and_instances_from_cache():
+    db = _Db()
+    repo = ConfigRepository(db, caches=_caches())  # type: ignore[arg-type]
+
+    first = await repo.get_centurion_config(company_id="co1", centurion_id="ct1")
+    first["debounce_wait_ms"] = 1
+    second = await repo.get_centurion_config(company_id="co1", centurion_id="ct1")
+    assert second["debounce_wait_ms"] == 3000
+    assert await repo.get_channel_type(company_id="co1", instance_id="inst1") == "instagram"
+    assert await repo.get_channel_type(company_id="co1", instance_id="inst1") == "instagram"
+    assert await repo.get_channel_type(company_id="co1", instance_id="missing") is None
+    assert await repo.get_channel_type(company_id="co1", instance_id="missing") is None
+    assert len(db.queries) == 3
+
+
+@pytest.mark.asyncio
+async def test_config_updated_event_drops_only_that_company():
+    db = _Db()
+    caches = _caches()
+    repo = ConfigRepository(db, caches=caches)  # type: ignore[arg-type]
+    handler = ConfigUpdateHandler(caches=caches)
+
+    for company in ("co1", "co2"):
+        await repo.get_centurion_config(company_id=company, centurion_id=None)
+        await repo.get_channel_type(company_id=company, instance_id="inst1")
+    assert len(db.queries) == 4
+
+    await handler.handle_config_updated(_event("co1", "centurion_config"))
+    await repo.get_centurion_config(company_id="co1", centurion_id=None)
+    await repo.get_channel_type(company_id="co1", instance_id="inst1")
+    await repo.get_centurion_config(company_id="co2", centurion_id=None)
+    assert len(db.queries) == 5
+
+    await handler.handle_config_updated(_event("co2", None))
+    await repo.get_channel_type(company_id="co2", instance_id="inst1")
+    assert len(db.queries) == 6
+
+    await handler.handle_config_updated("{bad")
+    assert len(caches.centurion_configs) == 1
+
+
+def _const(value: int):
+    async def loader():
+        return value
+
+    return loader
+
+
+@pytest.mark.asyncio
+async def test_ttl_for_shortens_selected_entries(monkeypatch):
+    cache: LocalTtlCache[str, int] = LocalTtlCache("ttl_for_test", ttl_s=60.0)
+    now = [1000.0]
+    monkeypatch.setattr("common.infrastructure.cache.local_cache.time.monotonic", lambda: now[0])
+
+    await cache.get_or_load("neg", _const(0), ttl_for=lambda v: 5.0 if v == 0 else float("inf"))
+    await cache.get_or_load("pos", _const(1), ttl_for=lambda v: 5.0 if v == 0 else float("inf"))
+    now[0] += 10.0
+
+    assert await cache.get_or_load("neg", _const(2)) == 2
+    assert await cache.get_or_load("pos", _const(3)) == 1
+
+
+@pytest.mark.asyncio
+async def test_config_updated_event_drops_integrations():
+    integrations: LocalTtlCache[tuple[str, str], object] = LocalTtlCache("integration_test", ttl_s=60.0)
+    handler = ConfigUpdateHandler(caches=_caches(), integrations=integrations)  # type: ignore[arg-type]
+    for key in (("co1", "openai"), ("co1", "evolution"), ("co2", "openai")):
+        await integrations.get_or_load(key, _const(1))
+
+    await handler.handle_config_updated(_event("co1", "centurion_config"))
+    assert len(integrations) == 3
+
+    await handler.handle_config_updated(_event("co1", "integration"))
+    assert len(integrations) == 1
+
+    await handler.handle_config_updated(_event("global", "integration_credential_set"))
+    assert len(integrations) == 0
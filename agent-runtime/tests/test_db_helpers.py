@@ -18,7 +18,8 @@ class _FakeAsyncpgPool:
 async def test_connection_pool_start_and_close(monkeypatch):
     created: list[dict[str, object]] = []
 
-    async def fake_create_pool(*, dsn: str, min_size: int, max_size: int):  # noqa: ARG001
+    async def fake_create_pool(*, dsn: str, min_size: int, max_size: int, init):  # noqa: ARG001
+        assert callable(init)
         created.append({"dsn": dsn, "min_size": min_size, "max_size": max_size})
         return _FakeAsyncpgPool()
 
@@ -89,3 +90,301 @@ async def test_supabase_db_proxies_queries():
 
     assert [c[0] for c in calls] == ["fetchrow", "fetch", "execute"]
 
+
+
+def test_query_label_fingerprints_statements():
+    from common.infrastructure.database.supabase_client import query_label
+
+    assert query_label("select * from core.leads where id = $1") == "select:core.leads"
+    assert query_label("-- comentário\n  INSERT INTO core.messages (id) values ($1)") == "insert:core.messages"
+    assert query_label("update core.conversations set x = 1") == "update:core.conversations"
+    assert query_label("with b as (select id from core.followup_queue) delete ...") == "with:core.followup_queue"
+    assert query_label("select 1") == "select"
+
+
+@pytest.mark.asyncio
+async def test_supabase_db_times_queries_and_logs_slow_ones_redacted(monkeypatch, caplog):
+    from common.infrastructure.database import supabase_client
+    from common.infrastructure.metrics.prometheus import DB_QUERY_SECONDS, DB_SLOW_QUERIES_TOTAL
+
+    clock = [100.0]
+    monkeypatch.setattr(supabase_client.time, "perf_counter", lambda: clock[0])
+
+    async def fetchrow(query: str, *args):  # noqa: ARG001
+        clock[0] += 0.8
+        return {"ok": 1}
+
+    async def execute(query: str, *args):  # noqa: ARG001
+        raise RuntimeError("boom")
+
+    fake_conn = types.SimpleNamespace(fetchrow=fetchrow, execute=execute)
+    pool = types.SimpleNamespace(pool=types.SimpleNamespace(acquire=lambda: _Acquire(fake_conn)))
+    db = SupabaseDb(pool, slow_query_ms=500)  # type: ignore[arg-type]
+
+    def sample(label: str, result: str) -> float:
+        return DB_QUERY_SECONDS.labels(label=label, result=result)._sum.get()  # noqa: SLF001
+
+    before_ok = sample("lead.by_phone", "ok")
+    before_slow = DB_SLOW_QUERIES_TOTAL.labels(label="lead.by_phone")._value.get()  # noqa: SLF001
+    with caplog.at_level("WARNING", logger=supabase_client.__name__):
+        await db.fetchrow(
+            "select *\n  from core.leads where phone = $1",
+            "+5511999",
+            '{"api_key": "sk-123", "name": "x"}',
+            "y" * 200,
+            label="lead.by_phone",
+        )
+
+    assert sample("lead.by_phone", "ok") - before_ok == pytest.approx(0.8)
+    assert DB_SLOW_QUERIES_TOTAL.labels(label="lead.by_phone")._value.get() == before_slow + 1  # noqa: SLF001
+    record = next(r for r in caplog.records if r.getMessage() == "db.slow_query")
+    extra = record.extra  # type: ignore[attr-defined]
+    assert extra["label"] == "lead.by_phone"
+    assert extra["query"] == "select * from core.leads where phone = $1"
+    assert extra["args"]["$2"] == {"api_key": "[REDACTED]", "name": "x"}
+    assert extra["args"]["$3"].startswith("y" * 64) and len(extra["args"]["$3"]) < 80
+
+    before_err = sample("update:core.leads", "error")
+    with pytest.raises(RuntimeError):
+        await db.execute("update core.leads set x = 1")
+    assert DB_QUERY_SECONDS.labels(label="update:core.leads", result="error")._sum.get() == before_err  # noqa: SLF001
+
+
+def test_connection_pool_stats():
+    pool = ConnectionPool("postgres://example", min_size=1, max_size=4)
+    assert pool.stats() == {"open": 0, "idle": 0, "in_use": 0, "max": 4}
+
+    pool._pool = types.SimpleNamespace(get_size=lambda: 3, get_idle_size=lambda: 1)  # type: ignore[assignment]  # noqa: SLF001
+    assert pool.stats() == {"open": 3, "idle": 1, "in_use": 2, "max": 4}
+
+
+class _RoutedConn:
+    def __init__(self, name: str, *, lag_s: float = 0.0, fail: bool = False):
+        self.name = name
+        self.lag_s = lag_s
+        self.fail = fail
+        self.queries: list[str] = []
+
+    async def fetchrow(self, query: str, *args):  # noqa: ARG002
+        if "pg_is_in_recovery" in query:
+            return {"lag_s": self.lag_s}
+        self.queries.append(query)
+        if self.fail:
+            raise ConnectionError("replica down")
+        return {"from": self.name}
+
+    async def fetch(self, query: str, *args):
+        return [await self.fetchrow(query, *args)]
+
+
+def _routed_pool(conn: _RoutedConn):
+    return types.SimpleNamespace(pool=types.SimpleNamespace(acquire=lambda: _Acquire(conn)))
+
+
+@pytest.mark.asyncio
+async def test_readonly_reads_go_to_replica_unless_lagging_or_recently_written(monkeypatch):
+    from common.infrastructure.database import supabase_client
+
+    clock = [1000.0]
+    monkeypatch.setattr(supabase_client.time, "monotonic", lambda: clock[0])
+    primary, replica = _RoutedConn("primary"), _RoutedConn("replica")
+    db = SupabaseDb(
+        _routed_pool(primary),  # type: ignore[arg-type]
+        replica=_routed_pool(replica),  # type: ignore[arg-type]
+        replica_max_lag_s=2.0,
+        replica_lag_check_interval_s=1.0,
+    )
+
+    assert await db.fetchrow("select 1", readonly=True) == {"from": "replica"}
+    assert await db.fetch("select 2", readonly=True, consistency_key="conv1") == [{"from": "replica"}]
+    # Writes and unmarked reads always use the primary.
+    assert await db.fetchrow("select 3") == {"from": "primary"}
+
+    await db.note_write("conv1")
+    assert await db.fetchrow("select 4", readonly=True, consistency_key="conv1") == {"from": "primary"}
+    assert await db.fetchrow("select 5", readonly=True, consistency_key="conv2") == {"from": "replica"}
+    clock[0] += 3.5
+    assert await db.fetchrow("select 6", readonly=True, consistency_key="conv1") == {"from": "replica"}
+
+    replica.lag_s = 5.0
+    clock[0] += 1.0
+    assert await db.fetchrow("select 7", readonly=True) == {"from": "primary"}
+    replica.lag_s = 0.5
+    assert await db.fetchrow("select 8", readonly=True) == {"from": "primary"}  # lag re-checked once per interval
+    clock[0] += 1.0
+    assert await db.fetchrow("select 9", readonly=True) == {"from": "replica"}
+
+
+@pytest.mark.asyncio
+async def test_replica_errors_fall_back_to_primary():
+    primary, replica = _RoutedConn("primary"), _RoutedConn("replica", fail=True)
+    db = SupabaseDb(_routed_pool(primary), replica=_routed_pool(replica))  # type: ignore[arg-type]
+
+    assert await db.fetchrow("select 1", readonly=True) == {"from": "primary"}
+    assert replica.queries == ["select 1"]
+    # Stays on the primary until the next lag check.
+    assert await db.fetchrow("select 2", readonly=True) == {"from": "primary"}
+    assert replica.queries == ["select 1"]
+
+
+class _MarkerRedisInner:
+    def __init__(self):
+        self.keys: dict[str, int] = {}
+        self.fail = False
+
+    async def set(self, key: str, value: str, *, px: int):  # noqa: ARG002
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.keys[key] = px
+
+    async def exists(self, key: str) -> int:
+        if self.fail:
+            raise ConnectionError("redis down")
+        return int(key in self.keys)
+
+
+@pytest.mark.asyncio
+async def test_write_markers_are_shared_across_processes_through_redis():
+    redis = types.SimpleNamespace(client=_MarkerRedisInner())
+    primary, replica = _RoutedConn("primary"), _RoutedConn("replica")
+
+    def _db():
+        return SupabaseDb(
+            _routed_pool(primary),  # type: ignore[arg-type]
+            replica=_routed_pool(replica),  # type: ignore[arg-type]
+            redis=redis,  # type: ignore[arg-type]
+            replica_max_lag_s=2.0,
+            replica_lag_check_interval_s=1.0,
+        )
+
+    writer, reader = _db(), _db()  # e.g. the ingest consumer and the debounce worker
+    await writer.note_write("conv1")
+    assert redis.client.keys == {"rw:conv1": 3000}
+    assert await reader.fetch("select 1", readonly=True, consistency_key="conv1") == [{"from": "primary"}]
+    assert await reader.fetch("select 2", readonly=True, consistency_key="conv2") == [{"from": "replica"}]
+
+    # Without the marker store a keyed read cannot prove freshness.
+    redis.client.fail = True
+    await writer.note_write("conv3")
+    assert await reader.fetch("select 3", readonly=True, consistency_key="conv2") == [{"from": "primary"}]
+    assert await reader.fetch("select 4", readonly=True) == [{"from": "replica"}]
+
+
+class _Prepared:
+    def __init__(self, sql: str, conn: "_PreparingConn"):
+        self.sql = sql
+        self.conn = conn
+
+    async def fetchrow(self, *args):
+        self.conn.executed.append((self.sql, args))
+        if self.conn.invalid:
+            self.conn.invalid -= 1
+            from asyncpg.exceptions import InvalidCachedStatementError
+
+            raise InvalidCachedStatementError("cached plan must not change result type")
+        return {"args": args}
+
+    async def fetch(self, *args):
+        return [await self.fetchrow(*args)]
+
+    def get_statusmsg(self) -> str:
+        return "UPDATE 1"
+
+
+class _PreparingConn:
+    def __init__(self, pid: int = 42):
+        self.pid = pid
+        self.prepared: list[str] = []
+        self.executed: list[tuple[str, tuple]] = []
+        self.listeners: list = []
+        self.invalid = 0
+
+    def get_server_pid(self) -> int:
+        return self.pid
+
+    def add_termination_listener(self, callback) -> None:
+        self.listeners.append(callback)
+
+    async def prepare(self, sql: str):
+        self.prepared.append(str(sql))
+        return _Prepared(str(sql), self)
+
+
+@pytest.mark.asyncio
+async def test_statement_registry_warms_and_reuses_prepared_statements():
+    from common.infrastructure.database.statements import Statement, StatementRegistry
+
+    registry = StatementRegistry()
+    write = registry.register("leads.touch", "update core.leads set x=1 where id=$1")
+    read = registry.register("leads.get", "select * from core.leads where id=$1", readonly=True)
+    assert isinstance(read, Statement) and isinstance(read, str) and read.name == "leads.get"
+    assert registry.register("leads.get", "select * from core.leads where id=$1", readonly=True) is read
+    with pytest.raises(ValueError):
+        registry.register("leads.get", "select 1")
+    assert len(registry) == 2
+
+    replica_conn = _PreparingConn(pid=7)
+    await registry.warm(replica_conn, readonly_only=True)
+    assert replica_conn.prepared == [str(read)]
+
+    conn = _PreparingConn()
+    await registry.warm(conn)
+    assert conn.prepared == [str(write), str(read)]
+    assert (await registry.prepared(conn, read)).sql == str(read)
+    assert len(conn.prepared) == 2
+
+    registry.forget(conn, read)
+    await registry.prepared(conn, read)
+    assert len(conn.prepared) == 3
+
+    # Closing the connection drops its prepared statements.
+    conn.listeners[0](conn)
+    await registry.prepared(conn, write)
+    assert len(conn.prepared) == 4
+
+
+@pytest.mark.asyncio
+async def test_statement_registry_keeps_same_pid_connections_apart():
+    from common.infrastructure.database.statements import StatementRegistry
+
+    registry = StatementRegistry()
+    write = registry.register("leads.touch", "update core.leads set x=1 where id=$1")
+    read = registry.register("leads.get", "select * from core.leads where id=$1", readonly=True)
+
+    # Primary and replica are different servers: their backend pids can collide.
+    primary, replica = _PreparingConn(pid=42), _PreparingConn(pid=42)
+    await registry.warm(primary)
+    await registry.warm(replica, readonly_only=True)
+
+    assert (await registry.prepared(primary, write)).conn is primary
+    assert (await registry.prepared(primary, read)).conn is primary
+    assert (await registry.prepared(replica, read)).conn is replica
+    assert primary.prepared == [str(write), str(read)]
+
+    # Pool proxies resolve to the connection they wrap.
+    proxy = types.SimpleNamespace(_con=primary)
+    assert (await registry.prepared(proxy, read)).conn is primary
+
+    replica.listeners[0](replica)
+    assert (await registry.prepared(primary, write)).conn is primary
+    assert len(primary.prepared) == 2
+
+
+@pytest.mark.asyncio
+async def test_supabase_db_runs_statements_through_prepared_and_reprepares_invalidated_plans():
+    from common.infrastructure.database.statements import STATEMENTS
+
+    stmt = STATEMENTS.register("test.db_helpers.select", "select * from core.leads where id=$1")
+    conn = _PreparingConn(pid=1001)
+    pool = types.SimpleNamespace(pool=types.SimpleNamespace(acquire=lambda: _Acquire(conn)))
+    db = SupabaseDb(pool)  # type: ignore[arg-type]
+
+    assert await db.fetchrow(stmt, "l1") == {"args": ("l1",)}
+    assert await db.fetch(stmt, "l2") == [{"args": ("l2",)}]
+    assert await db.execute(stmt, "l3") == "UPDATE 1"
+    assert conn.prepared == [str(stmt)]
+
+    conn.invalid = 1
+    assert await db.fetchrow(stmt, "l4") == {"args": ("l4",)}
+    assert conn.prepared == [str(stmt), str(stmt)]
+    assert [args for _, args in conn.executed][-2:] == [("l4",), ("l4",)]
@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from modules.centurion.repository import debounce_store as ds
+from modules.centurion.repository.debounce_store import DebounceStore
+
+
+class _Client:
+    """In-memory emulation of the debounce Lua scripts (hashes, lists and zsets only)."""
+
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.lists: dict[str, list[str]] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+
+    async def zrangebyscore(self, key, lo, hi, start=0, num=None):  # noqa: ARG002
+        items = sorted((s, m) for m, s in self.zsets.get(key, {}).items() if s <= float(hi))
+        return [m for _, m in items][start : (start + num) if num else None]
+
+    async def eval(self, script, nkeys, *args):
+        keys, argv = list(args[:nkeys]), [str(a) for a in args[nkeys:]]
+        if script == ds.APPEND_LUA:
+            return self._append(keys, argv)
+        if script == ds.BEGIN_LUA:
+            return self._begin(keys, argv)
+        if script == ds.FINISH_LUA:
+            return self._finish(keys, argv)
+        if script == ds.REQUEUE_LUA:
+            return self._requeue(keys, argv)
+        if script == ds.RESTORE_LUA:
+            return self._restore(keys, argv)
+        raise AssertionError("unexpected script")
+
+    def _append(self, keys, argv):
+        state, pending, due = keys
+        self.lists.setdefault(pending, []).append(argv[1])
+        h = self.hashes.setdefault(state, {})
+        if h.get("state") != "processing":
+            h["state"] = "waiting"
+        h.update(until_ms=argv[2], last_inbound_ms=argv[3], last_event_id=argv[6], last_correlation_id=argv[7])
+        self.zsets.setdefault(due, {})[argv[0]] = float(argv[2])
+        count = len(self.lists[pending])
+        if int(argv[3]) - int(h.get("snapshot_ms") or 0) < int(argv[5]):
+            return [count, 0]
+        h["snapshot_ms"] = argv[3]
+        return [count, 1, *self.lists[pending]]
+
+    def _begin(self, keys, argv):
+        state, pending, inflight, due, processing = keys
+        self.lists.setdefault(inflight, []).extend(self.lists.pop(pending, []))
+        self.zsets.get(due, {}).pop(argv[0], None)
+        h = self.hashes.setdefault(state, {})
+        if not self.lists[inflight]:
+            h["state"] = "idle"
+            self.zsets.get(processing, {}).pop(argv[0], None)
+            return []
+        h["state"] = "processing"
+        self.zsets.setdefault(processing, {})[argv[0]] = float(argv[1])
+        return [h.get("last_event_id", ""), h.get("last_correlation_id", ""), *self.lists[inflight]]
+
+    def _finish(self, keys, argv):
+        state, pending, inflight, processing = keys
+        self.lists.pop(inflight, None)
+        self.zsets.get(processing, {}).pop(argv[0], None)
+        rest = self.lists.get(pending, [])
+        h = self.hashes.setdefault(state, {})
+        h.update(state="waiting" if rest else "idle", snapshot_ms=argv[1])
+        meta = [h.get(k, "") for k in ("until_ms", "last_inbound_ms", "last_event_id", "last_correlation_id")]
+        return [h["state"], *meta, *rest]
+
+    def _requeue(self, keys, argv):
+        state, pending, inflight, due, processing = keys
+        started = self.zsets.get(processing, {}).get(argv[0])
+        if started is None or started > float(argv[2]):
+            return -1
+        self.lists[pending] = self.lists.pop(inflight, []) + self.lists.get(pending, [])
+        self.zsets[processing].pop(argv[0], None)
+        count = len(self.lists[pending])
+        h = self.hashes.setdefault(state, {})
+        if count:
+            h.update(state="waiting", until_ms=argv[1])
+            self.zsets.setdefault(due, {})[argv[0]] = float(argv[1])
+        else:
+            h["state"] = "idle"
+            self.zsets.get(due, {}).pop(argv[0], None)
+        return count
+
+    def _restore(self, keys, argv):
+        state, pending, due = keys
+        if state in self.hashes:
+            return 2 if self.hashes[state].get("state") == "idle" else 0
+        self.lists[pending] = list(argv[4:])
+        self.hashes[state] = {"state": "waiting", "until_ms": argv[1], "snapshot_ms": argv[2]}
+        self.zsets.setdefault(due, {})[argv[0]] = float(argv[1])
+        return 1
+
+
+class _Redis:
+    def __init__(self):
+        self.client = _Client()
+
+
+def _past(seconds: float = 1.0) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=seconds)
+
+
+async def _append(store: DebounceStore, text: str, *, until: datetime | None = None, event: str = "e1"):
+    return await store.append(
+        conversation_id="c1",
+        message=text,
+        debounce_until=until or _past(),
+        last_event_id=event,
+        last_correlation_id=f"corr-{event}",
+    )
+
+
+@pytest.mark.asyncio
+async def test_append_snapshots_first_message_then_throttles():
+    store = DebounceStore(redis=_Redis(), snapshot_every_s=60)  # type: ignore[arg-type]
+
+    first = await _append(store, "oi")
+    second = await _append(store, "tudo bem?")
+
+    assert first.pending_count == 1 and first.snapshot == ["oi"]
+    assert second.pending_count == 2 and second.snapshot is None
+
+
+@pytest.mark.asyncio
+async def test_find_due_only_returns_conversations_past_their_window():
+    redis = _Redis()
+    store = DebounceStore(redis=redis)  # type: ignore[arg-type]
+    await _append(store, "oi", until=datetime.now(timezone.utc) + timedelta(minutes=5))
+    assert await store.find_due() == []
+
+    await _append(store, "again")
+    assert await store.find_due() == ["c1"]
+
+
+@pytest.mark.asyncio
+async def test_begin_and_finish_keep_messages_that_arrive_while_processing():
+    redis = _Redis()
+    store = DebounceStore(redis=redis)  # type: ignore[arg-type]
+    await _append(store, "a", event="e1")
+    await _append(store, "b", event="e2")
+
+    batch = await store.begin("c1")
+    assert batch is not None
+    assert batch.messages == ["a", "b"]
+    assert batch.last_event_id == "e2" and batch.last_correlation_id == "corr-e2"
+    assert redis.client.hashes["conv:c1:debounce"]["state"] == "processing"
+
+    await _append(store, "c", event="e3")
+    assert redis.client.hashes["conv:c1:debounce"]["state"] == "processing"
+
+    snapshot = await store.finish("c1")
+    assert snapshot.state == "waiting"
+    assert snapshot.pending_messages == ["c"]
+    assert snapshot.until is not None
+    assert snapshot.metadata_patch == {"last_event_id": "e3", "last_correlation_id": "corr-e3"}
+
+    assert (await store.begin("c1")).messages == ["c"]  # type: ignore[union-attr]
+    final = await store.finish("c1")
+    assert final.state == "idle" and final.pending_messages == [] and final.until is None
+    assert await store.begin("c1") is None
+
+
+@pytest.mark.asyncio
+async def test_requeue_puts_inflight_back_in_front_of_pending():
+    redis = _Redis()
+    store = DebounceStore(redis=redis)  # type: ignore[arg-type]
+    await _append(store, "a")
+    await store.begin("c1")
+    await _append(store, "b")
+
+    cutoff = datetime.now(timezone.utc) + timedelta(seconds=1)
+    assert await store.find_stuck(started_before=cutoff) == ["c1"]
+    assert await store.requeue("c1", started_before=cutoff) == 2
+    assert redis.client.lists["conv:c1:pending"] == ["a", "b"]
+    assert redis.client.hashes["conv:c1:debounce"]["state"] == "waiting"
+
+    # Already recovered (or finished meanwhile): no-op.
+    assert await store.requeue("c1", started_before=cutoff) is None
+
+
+@pytest.mark.asyncio
+async def test_restore_only_rehydrates_missing_state():
+    redis = _Redis()
+    store = DebounceStore(redis=redis)  # type: ignore[arg-type]
+
+    assert await store.restore("c1", until=_past(), pending_messages=["a", "b"]) == 1
+    assert redis.client.lists["conv:c1:pending"] == ["a", "b"]
+    assert await store.find_due() == ["c1"]
+    assert await store.restore("c1", until=_past(), pending_messages=["stale"]) == 0
+
+    await store.begin("c1")
+    await store.finish("c1")
+    assert await store.restore("c1", until=_past(), pending_messages=["stale"]) == 2
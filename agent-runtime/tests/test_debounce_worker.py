@@ -1,4 +1,5 @@
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 
 import pytest
 
@@ -6,8 +7,10 @@ from modules.centurion.handlers.debounce_handler import DebounceWorker
 
 
 class _Conv:
-    def __init__(self, id: str):
+    def __init__(self, id: str, pending: list[str] | None = None):
         self.id = id
+        self.debounce_until = datetime.now(timezone.utc)
+        self.pending_messages = pending or []
 
 
 class _Locks:
@@ -16,41 +19,72 @@ class _Locks:
         yield True
 
 
-@pytest.mark.asyncio
-async def test_tick_no_due_conversations_noops():
-    worker = DebounceWorker(db=object(), redis=object())  # type: ignore[arg-type]
-    async def find_due_conversations(limit: int = 20):  # noqa: ARG001
-        return []
+class _Store:
+    def __init__(self, due: list[str], restore_results: dict[str, int] | None = None):
+        self.due = due
+        self.restore_results = restore_results or {}
+        self.restored: list[tuple[str, list[str]]] = []
 
-    worker._conversations = type("R", (), {"find_due_conversations": staticmethod(find_due_conversations)})()  # type: ignore[attr-defined]
+    async def find_due(self, *, limit: int = 20):  # noqa: ARG002
+        return list(self.due)
 
-    called = {"count": 0}
+    async def restore(self, conversation_id: str, *, until, pending_messages):  # noqa: ARG002
+        self.restored.append((conversation_id, pending_messages))
+        return self.restore_results.get(conversation_id, 0)
 
-    async def process_due_conversation(conversation_id: str, *, causation_id: str | None = None):  # noqa: ARG001
-        called["count"] += 1
 
-    worker._centurion = type("C", (), {"process_due_conversation": staticmethod(process_due_conversation)})()  # type: ignore[attr-defined]
-
-    await worker._tick()  # noqa: SLF001
-    assert called["count"] == 0
+class _Conversations:
+    def __init__(self, rows: list[_Conv] | None = None):
+        self.rows = rows or []
+        self.cleared: list[str] = []
 
+    async def find_due_conversations(self, *, limit: int = 20, overdue_s: float = 0.0):  # noqa: ARG002
+        return list(self.rows)
 
-@pytest.mark.asyncio
-async def test_tick_processes_each_due_conversation():
-    worker = DebounceWorker(db=object(), redis=object())  # type: ignore[arg-type]
+    async def clear_pending(self, conversation_id: str):
+        self.cleared.append(conversation_id)
 
-    async def find_due_conversations(limit: int = 20):  # noqa: ARG001
-        return [_Conv("c1"), _Conv("c2")]
 
-    worker._conversations = type("R", (), {"find_due_conversations": staticmethod(find_due_conversations)})()  # type: ignore[attr-defined]
-    worker._locks = _Locks()  # type: ignore[attr-defined]
+def _worker(store: _Store, conversations: _Conversations | None = None) -> tuple[DebounceWorker, list]:
+    worker = DebounceWorker(db=object(), redis=object())  # type: ignore[arg-type]
+    worker._store = store  # type: ignore[attr-defined]  # noqa: SLF001
+    worker._conversations = conversations or _Conversations()  # type: ignore[attr-defined]  # noqa: SLF001
+    worker._locks = _Locks()  # type: ignore[attr-defined]  # noqa: SLF001
 
     seen: list[tuple[str, str | None]] = []
 
     async def process_due_conversation(conversation_id: str, *, causation_id: str | None = None):
         seen.append((conversation_id, causation_id))
 
-    worker._centurion = type("C", (), {"process_due_conversation": staticmethod(process_due_conversation)})()  # type: ignore[attr-defined]
+    worker._centurion = type("C", (), {"process_due_conversation": staticmethod(process_due_conversation)})()  # type: ignore[attr-defined]  # noqa: SLF001
+    return worker, seen
+
+
+@pytest.mark.asyncio
+async def test_tick_no_due_conversations_noops():
+    worker, seen = _worker(_Store([]))
+    await worker._tick()  # noqa: SLF001
+    assert seen == []
+
 
+@pytest.mark.asyncio
+async def test_tick_processes_each_due_conversation():
+    worker, seen = _worker(_Store(["c1", "c2"]))
     await worker._tick()  # noqa: SLF001
     assert seen == [("c1", None), ("c2", None)]
+
+
+@pytest.mark.asyncio
+async def test_sweep_restores_lost_state_and_repairs_stale_snapshots():
+    store = _Store([], {"lost": 1, "answered": 2, "live": 0})
+    conversations = _Conversations([_Conv("lost", ["a"]), _Conv("answered", ["b"]), _Conv("live", ["c"])])
+    worker, _ = _worker(store, conversations)
+
+    await worker._tick()  # noqa: SLF001
+    assert [cid for cid, _ in store.restored] == ["lost", "answered", "live"]
+    assert conversations.cleared == ["answered"]
+
+    # Next tick is inside the sweep interval: Postgres is not queried again.
+    store.restored.clear()
+    await worker._tick()  # noqa: SLF001
+    assert store.restored == []
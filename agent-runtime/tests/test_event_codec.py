@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from common.infrastructure.events import codec
+from common.infrastructure.events.envelope import EventParseError, build_envelope, encode_envelope, parse_envelope
+
+
+def _event(**overrides):
+    event = build_envelope(
+        type="message.received",
+        company_id="company-1",
+        source="evolution-manager",
+        correlation_id="corr-12345678",
+        causation_id=None,
+        payload={"instance_id": "i1", "from": "5511999999999", "body": "Olá", "raw": {"data": "x" * 4000}},
+    )
+    event.update(overrides)
+    return event
+
+
+def test_codec_round_trips_plain_json():
+    event = _event()
+    wire = codec.dumps(event)
+    assert json.loads(wire) == event
+    assert codec.loads(wire) == codec.loads(wire.encode("utf-8")) == event
+    # Beyond orjson's 64-bit ints: stdlib fallback.
+    assert json.loads(codec.dumps({"n": 2**70})) == {"n": 2**70}
+
+
+def test_trusted_fast_path_matches_full_validation():
+    raw = codec.dumps(_event())
+
+    fast = parse_envelope(raw, expected_type="message.received", trusted=frozenset({"evolution-manager"}))
+    full = parse_envelope(raw, expected_type="message.received", trusted=frozenset())
+    assert fast == full
+
+
+def test_trusted_source_with_bad_fields_falls_back_to_validation():
+    raw = json.dumps(_event(correlation_id="short"))
+    with pytest.raises(EventParseError) as err:
+        parse_envelope(raw, trusted=frozenset({"evolution-manager"}))
+    assert err.value.reason == "validation_error"
+
+
+def test_encode_envelope_round_trips():
+    event = _event()
+    assert parse_envelope(encode_envelope(event)).payload == event["payload"]
+
+
+def test_agent_runtime_is_not_a_trusted_source_by_default():
+    from common.config.settings import Settings
+
+    trusted = Settings.model_fields["event_trusted_sources"].default.split(",")
+    assert "agent-runtime" not in trusted
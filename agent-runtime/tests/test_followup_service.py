@@ -154,3 +154,34 @@ async def test_handle_sends_followup_and_reschedules_when_more_attempts(monkeypa
     assert msg_repo.saved[0]["content"] == "Oi"
     assert repo.scheduled == [("r1", 2)]
     assert len(db.executed) >= 2
+
+
+@pytest.mark.asyncio
+async def test_schedule_for_lead_uses_given_contact_time_without_reading_lead():
+    rule = FollowupRule(
+        id="r1",
+        company_id="co1",
+        centurion_id="ct1",
+        name="r",
+        inactivity_hours=24,
+        template="Oi",
+        max_attempts=2,
+        is_active=True,
+    )
+
+    class _RuleRepo(_Repo):
+        async def list_active_rules(self, *, company_id: str, centurion_id: str):  # noqa: ARG002
+            return [self.rule]
+
+    db = _Db()  # no lead_last_contact row: a DB read would schedule nothing
+    service = FollowupService(db=db, redis=object())  # type: ignore[arg-type]
+    repo = _RuleRepo(rule=rule)
+    service._repo = repo  # type: ignore[attr-defined]
+
+    assert await service.schedule_for_lead(company_id="co1", lead_id="l1", centurion_id="ct1") == 0
+    scheduled = await service.schedule_for_lead(
+        company_id="co1", lead_id="l1", centurion_id="ct1", last_contact_at=datetime.now(timezone.utc)
+    )
+    assert scheduled == 1
+    assert repo.scheduled == [("r1", 1)]
+    assert "follow_up_pending" in db.executed[-1][0]
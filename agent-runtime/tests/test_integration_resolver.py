@@ -7,7 +7,7 @@ from typing import Any
 import pytest
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
-from common.infrastructure.integrations.resolver import CompanyIntegrationResolver
+from common.infrastructure.integrations.resolver import CompanyIntegrationResolver, IntegrationConfigError
 
 
 def _encrypt_v1(plaintext: str, *, key: str) -> str:
@@ -168,7 +168,7 @@ async def test_resolve_uses_cache_without_extra_db_calls(monkeypatch):
             },
         ]
     )
-    resolver = CompanyIntegrationResolver(db, cache_ttl_s=60.0)  # type: ignore[arg-type]
+    resolver = CompanyIntegrationResolver(db)  # type: ignore[arg-type]
 
     first = await resolver.resolve(company_id="c1", provider="openai")
     second = await resolver.resolve(company_id="c1", provider="openai")
@@ -198,7 +198,7 @@ async def test_cache_hit_inside_lock(monkeypatch):
         block_event=release,
         block_on_call=1,
     )
-    resolver = CompanyIntegrationResolver(db, cache_ttl_s=60.0)  # type: ignore[arg-type]
+    resolver = CompanyIntegrationResolver(db)  # type: ignore[arg-type]
 
     task1 = asyncio.create_task(resolver.resolve(company_id="c1", provider="openai"))
     await started.wait()
@@ -240,3 +240,53 @@ async def test_missing_set_id_raises(monkeypatch):
     with pytest.raises(RuntimeError, match="Credential set not found"):
         await resolver.resolve(company_id="c1", provider="openai")
 
+
+
+@pytest.mark.asyncio
+async def test_resolvers_share_one_process_cache(monkeypatch):
+    monkeypatch.setenv("APP_ENCRYPTION_KEY_CURRENT", "k1")
+    db = _FakeDb([{"mode": "disabled", "credential_set_id": None, "config_override": {}, "secrets_override_enc": ""}])
+
+    assert await CompanyIntegrationResolver(db).resolve(company_id="c1", provider="openai") is None  # type: ignore[arg-type]
+    assert await CompanyIntegrationResolver(db).resolve(company_id="c1", provider="openai") is None  # type: ignore[arg-type]
+    assert len(db.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_misconfigured_binding_is_negatively_cached(monkeypatch):
+    monkeypatch.setenv("APP_ENCRYPTION_KEY_CURRENT", "k1")
+    db = _FakeDb(
+        [
+            {
+                "mode": "custom",
+                "credential_set_id": None,
+                "config_override": {},
+                "secrets_override_enc": _encrypt_v1('{"api_key":"x"}', key="other-key"),
+            }
+        ]
+    )
+    resolver = CompanyIntegrationResolver(db)  # type: ignore[arg-type]
+
+    for _ in range(2):
+        with pytest.raises(IntegrationConfigError, match="Failed to decrypt"):
+            await resolver.resolve(company_id="c1", provider="openai")
+    assert len(db.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_db_errors_are_not_cached(monkeypatch):
+    monkeypatch.setenv("APP_ENCRYPTION_KEY_CURRENT", "k1")
+
+    class _FlakyDb(_FakeDb):
+        async def fetchrow(self, query: str, *args):  # type: ignore[no-untyped-def]
+            if not self.calls:
+                self.calls.append((query, args))
+                raise ConnectionError("db down")
+            return await super().fetchrow(query, *args)
+
+    db = _FlakyDb([{"mode": "disabled", "credential_set_id": None, "config_override": {}, "secrets_override_enc": ""}])
+    resolver = CompanyIntegrationResolver(db)  # type: ignore[arg-type]
+
+    with pytest.raises(ConnectionError):
+        await resolver.resolve(company_id="c1", provider="openai")
+    assert await resolver.resolve(company_id="c1", provider="openai") is None
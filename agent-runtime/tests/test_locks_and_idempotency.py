@@ -1,4 +1,6 @@
 import asyncio
+import json
+import time
 
 import pytest
 
@@ -145,3 +147,150 @@ async def test_idempotency_claim_release_cleanup():
     deleted = await store.cleanup_expired(limit=0)
     assert deleted == 3
     assert db.fetch_calls[-1][1][0] == 1
+
+
+class _FakeIdemRedisInner:
+    def __init__(self, *, warm_since: int | None = None):
+        self.store: dict[str, str] = {}
+        if warm_since is not None:
+            self.store["idem:warm_since"] = str(warm_since)
+        self.fail = False
+
+    async def eval(self, script: str, num_keys: int, *args):  # noqa: ARG002
+        if self.fail:
+            raise ConnectionError("redis down")
+        keys, argv = args[:num_keys], args[num_keys:]
+        value, now_s, reset_warm = argv[0], argv[1], argv[3]
+        if reset_warm == "1":
+            self.store[keys[0]] = str(now_s)
+        out = [self.store.setdefault(keys[0], str(now_s))]
+        for key in keys[1:]:
+            out.append(0 if key in self.store else 1)
+            self.store.setdefault(key, value)
+        return out
+
+    async def delete(self, key: str):
+        return 1 if self.store.pop(key, None) is not None else 0
+
+
+class _FakeIdemRedis:
+    def __init__(self, **kwargs):
+        self.client = _FakeIdemRedisInner(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_redis_claims_skip_postgres_and_flush_in_batches():
+    db = _FakeDb()
+    redis = _FakeIdemRedis(warm_since=0)
+    store = IdempotencyStore(db, redis=redis, batch_size=2, flush_interval_s=60)  # type: ignore[arg-type]
+
+    for key in ("a", "b", "c"):
+        assert await store.claim(company_id="co1", consumer="c", key=key, ttl_seconds=60, metadata={"k": key})
+    assert await store.claim(company_id="co1", consumer="c", key="a", ttl_seconds=60) is False
+    assert db.fetchrow_calls == []
+
+    await asyncio.sleep(0)  # batch_size reached: flusher wakes up
+    assert len(db.execute_calls) == 2
+    rows = [r for _, args in db.execute_calls for r in json.loads(args[0])]
+    assert [r["dedupe_key"] for r in rows] == ["a", "b", "c"]
+    assert len(rows[0]["metadata"]["payload_hash"]) == 64
+    assert store.pending_count == 0
+
+    await store.release(company_id="co1", consumer="c", key="a")
+    assert await store.claim(company_id="co1", consumer="c", key="a", ttl_seconds=60) is True
+    await store.close()
+    assert json.loads(db.execute_calls[-1][1][0])[0]["dedupe_key"] == "a"
+
+
+@pytest.mark.asyncio
+async def test_cold_redis_checks_postgres_and_redis_errors_fall_back():
+    db = _FakeDb()
+    redis = _FakeIdemRedis()  # no warm_since: Redis cannot vouch for the TTL window
+    store = IdempotencyStore(db, redis=redis, flush_interval_s=60)  # type: ignore[arg-type]
+
+    db.next_fetch = [{"dedupe_key": "old"}]
+    claimed = await store.claim_many(company_id="co1", consumer="c", keys=["old", "new"], ttl_seconds=3600)
+    assert claimed == [False, True]
+    assert "expires_at > now()" in db.fetch_calls[-1][0]
+    assert store.pending_count == 1
+
+    redis.client.fail = True
+    db.next_fetchrow = {"id": "row1"}
+    assert await store.claim(company_id="co1", consumer="c", key="x", ttl_seconds=3600) is True
+    assert "insert into core.event_consumptions" in db.fetchrow_calls[-1][0]
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_postgres_is_checked_only_within_the_verify_window():
+    db = _FakeDb()
+    redis = _FakeIdemRedis(warm_since=int(time.time()) - 600)
+    store = IdempotencyStore(db, redis=redis, flush_interval_s=60, verify_window_s=300)  # type: ignore[arg-type]
+
+    # A week-long TTL no longer keeps every claim reading Postgres once Redis has been up a while.
+    assert await store.claim(company_id="co1", consumer="c", key="a", ttl_seconds=7 * 24 * 3600) is True
+    assert db.fetch_calls == []
+
+    redis.client.store["idem:warm_since"] = str(int(time.time()) - 60)
+    assert await store.claim(company_id="co1", consumer="c", key="b", ttl_seconds=7 * 24 * 3600) is True
+    assert "expires_at > now()" in db.fetch_calls[-1][0]
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_claims_made_during_redis_outage_are_checked_after_recovery():
+    db = _FakeDb()
+    redis = _FakeIdemRedis(warm_since=0)  # warm long before the outage
+    store = IdempotencyStore(db, redis=redis, flush_interval_s=60)  # type: ignore[arg-type]
+
+    redis.client.fail = True
+    db.next_fetchrow = {"id": "row1"}
+    assert await store.claim(company_id="co1", consumer="c", key="x", ttl_seconds=3600) is True
+
+    # Redis is back with its data intact; the redelivery must still hit the Postgres claim.
+    redis.client.fail = False
+    db.next_fetch = [{"dedupe_key": "x"}]
+    assert await store.claim(company_id="co1", consumer="c", key="x", ttl_seconds=3600) is False
+    assert "expires_at > now()" in db.fetch_calls[-1][0]
+    assert int(redis.client.store["idem:warm_since"]) > 0
+    assert store.pending_count == 0
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows_for_retry():
+    db = _FakeDb()
+
+    async def boom(query: str, *args):  # noqa: ARG001
+        raise RuntimeError("db down")
+
+    store = IdempotencyStore(db, redis=_FakeIdemRedis(warm_since=0), flush_interval_s=60)  # type: ignore[arg-type]
+    assert await store.claim(company_id="co1", consumer="c", key="a", ttl_seconds=60)
+    db.execute = boom  # type: ignore[method-assign]
+    assert await store.flush() == 0
+    assert store.pending_count == 1
+
+    del db.execute
+    assert await store.flush() == 1
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_claim_many_without_redis_is_one_statement():
+    db = _FakeDb()
+    store = IdempotencyStore(db)  # type: ignore[arg-type]
+
+    db.next_fetch = [{"dedupe_key": "corr:0"}, {"dedupe_key": "corr:2"}]
+    claimed = await store.claim_many(
+        company_id="co1",
+        consumer="c",
+        keys=["corr:0", "corr:1", "corr:2"],
+        ttl_seconds=60,
+        metadata=[{"chunk_index": 0}],
+    )
+    assert claimed == [True, False, True]
+    assert len(db.fetch_calls) == 1
+    records = json.loads(db.fetch_calls[0][1][2])
+    assert [r["dedupe_key"] for r in records] == ["corr:0", "corr:1", "corr:2"]
+    assert records[0]["metadata"]["chunk_index"] == 0 and records[1]["metadata"]["payload_hash"]
+    assert await store.claim_many(company_id="co1", consumer="c", keys=[], ttl_seconds=60) == []
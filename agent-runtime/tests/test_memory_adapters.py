@@ -10,9 +10,11 @@ class _Db:
     def __init__(self):
         self.fetch_calls: list[tuple[str, tuple[object, ...]]] = []
         self.rows = []
+        self.readonly: list[bool] = []
 
-    async def fetch(self, query: str, *args):
+    async def fetch(self, query: str, *args, readonly: bool = False):
         self.fetch_calls.append((query, args))
+        self.readonly.append(readonly)
         return list(self.rows)
 
 
@@ -60,3 +62,39 @@ async def test_rag_adapter_returns_empty_when_no_embedding():
 
     out = await adapter.get_relevant_context(company_id="co1", lead_id="l1", query="q")
     assert out == []
+
+
+@pytest.mark.asyncio
+async def test_fact_watermark_roundtrip_and_tolerates_garbage():
+    from datetime import datetime, timezone
+
+    from modules.centurion.repository.message_repository import MessageCursor
+    from modules.memory.services.fact_watermark import FactExtractionWatermark
+
+    class _Redis:
+        def __init__(self):
+            self.kv: dict[str, str] = {}
+            self.ttls: dict[str, int | None] = {}
+
+        async def get(self, key: str):
+            return self.kv.get(key)
+
+        async def set(self, key: str, value: str, *, ttl_s: int | None = None):
+            self.kv[key] = value
+            self.ttls[key] = ttl_s
+
+    redis = _Redis()
+    watermark = FactExtractionWatermark(redis=redis)  # type: ignore[arg-type]
+    assert await watermark.get("conv1") is None
+
+    ts = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+    await watermark.advance("conv1", MessageCursor(ts, "m1"))
+    assert await watermark.get("conv1") == MessageCursor(ts, "m1")
+    assert redis.ttls["conv:conv1:facts:watermark"]
+
+    # Watermarks stored as a bare timestamp still resume from that point.
+    redis.kv["conv:conv1:facts:watermark"] = ts.isoformat()
+    assert await watermark.get("conv1") == MessageCursor(ts)
+
+    redis.kv["conv:conv1:facts:watermark"] = "not-a-date"
+    assert await watermark.get("conv1") is None
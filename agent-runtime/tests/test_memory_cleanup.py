@@ -6,43 +6,54 @@ import pytest
 from modules.memory.services.memory_cleanup import MemoryCleanupWorker
 
 
-class _Db:
-    def __init__(self):
-        self.executed: list[str] = []
-        self.fetched: list[str] = []
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("has_backlog", "expected_sleep"), [(True, 30.0), (False, 3600.0)])
+async def test_cleanup_worker_paces_by_backlog(monkeypatch, has_backlog: bool, expected_sleep: float):
+    worker = MemoryCleanupWorker(db=object(), redis=object())  # type: ignore[arg-type]
 
-    async def execute(self, query: str, *args):  # noqa: ARG002
-        self.executed.append(query)
-        return "OK"
+    monkeypatch.setattr(
+        "modules.memory.services.memory_cleanup.get_settings",
+        lambda: types.SimpleNamespace(cleanup_interval_s=3600.0, cleanup_busy_interval_s=30.0),
+    )
 
-    async def fetch(self, query: str, *args):  # noqa: ARG002
-        self.fetched.append(query)
-        return []
+    async def fake_cleanup():
+        return has_backlog
 
+    worker._cleanup = fake_cleanup  # type: ignore[method-assign]  # noqa: SLF001
+    slept: list[float] = []
 
-@pytest.mark.asyncio
-async def test_cleanup_executes_archive_query():
-    db = _Db()
-    worker = MemoryCleanupWorker(db=db, redis=object())  # type: ignore[arg-type]
+    async def stop_sleep(seconds: float):
+        slept.append(seconds)
+        raise asyncio.CancelledError()
+
+    monkeypatch.setattr("modules.memory.services.memory_cleanup.asyncio.sleep", stop_sleep)
 
-    await worker._cleanup()  # noqa: SLF001
-    assert db.executed
-    assert "update core.messages" in db.executed[0]
+    with pytest.raises(asyncio.CancelledError):
+        await worker.run_forever()
+
+    assert slept == [expected_sleep]
 
 
 @pytest.mark.asyncio
-async def test_cleanup_worker_runs_once_and_can_be_cancelled(monkeypatch):
-    db = _Db()
-    worker = MemoryCleanupWorker(db=db, redis=object())  # type: ignore[arg-type]
+async def test_cleanup_worker_survives_failed_tick(monkeypatch):
+    worker = MemoryCleanupWorker(db=object(), redis=object())  # type: ignore[arg-type]
+    monkeypatch.setattr(
+        "modules.memory.services.memory_cleanup.get_settings",
+        lambda: types.SimpleNamespace(cleanup_interval_s=3600.0, cleanup_busy_interval_s=30.0),
+    )
 
-    monkeypatch.setattr("modules.memory.services.memory_cleanup.get_settings", lambda: types.SimpleNamespace(cleanup_interval_s=0.0))
+    async def boom():
+        raise RuntimeError("db down")
 
-    async def stop_sleep(seconds: float):  # noqa: ARG001
+    worker._cleanup = boom  # type: ignore[method-assign]  # noqa: SLF001
+    slept: list[float] = []
+
+    async def stop_sleep(seconds: float):
+        slept.append(seconds)
         raise asyncio.CancelledError()
 
     monkeypatch.setattr("modules.memory.services.memory_cleanup.asyncio.sleep", stop_sleep)
 
     with pytest.raises(asyncio.CancelledError):
         await worker.run_forever()
-
-    assert db.executed
+    assert slept == [3600.0]
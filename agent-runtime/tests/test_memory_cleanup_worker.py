@@ -1,33 +1,174 @@
+import types
+
 import pytest
 
-from modules.memory.services.memory_cleanup import MemoryCleanupWorker
+from common.infrastructure.locks.redis_lock import _RELEASE_LUA
+from common.infrastructure.metrics.prometheus import MESSAGES_DEFAULT_PARTITION_ROWS
+from modules.memory.services.memory_cleanup import (
+    _COUNT_DEFAULT_MESSAGES_SQL,
+    _DETACH_MESSAGES_SQL,
+    _MIN_UUID,
+    CLEANUP_TASKS,
+    MemoryCleanupWorker,
+)
 
 
-class _Db:
+class _RedisInner:
+    def __init__(self, store: dict[str, str]):
+        self.store = store
+
+    async def set(self, key: str, value: str, *, ex: int | None = None, nx: bool = False):  # noqa: ARG002
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def eval(self, script: str, num_keys: int, key: str, token: str, *args):  # noqa: ARG002
+        assert script == _RELEASE_LUA
+        if self.store.get(key) == token:
+            del self.store[key]
+            return 1
+        return 0
+
+
+class _Redis:
     def __init__(self):
-        self.execute_calls: list[str] = []
+        self.store: dict[str, str] = {}
+        self.client = _RedisInner(self.store)
+
+    async def get(self, key: str):
+        return self.store.get(key)
+
+    async def set(self, key: str, value: str, *, ttl_s: int | None = None):  # noqa: ARG002
+        self.store[key] = value
+
+
+class _Db:
+    """Serves batches per statement; `batches[sql]` is consumed one batch per call."""
+
+    def __init__(self, batches: dict[str, list[list[dict]]] | None = None):
+        self.batches = batches or {}
         self.fetch_calls: list[tuple[str, tuple]] = []
-        self.next_fetch = []
+        self.fetchrow_calls: list[tuple[str, tuple]] = []
+        self.executed: list[str] = []
 
     async def execute(self, query: str, *args):  # noqa: ARG002
-        self.execute_calls.append(query)
+        self.executed.append(query)
 
     async def fetch(self, query: str, *args):
         self.fetch_calls.append((query, args))
-        return self.next_fetch
+        queue = self.batches.get(query)
+        if queue:
+            return queue.pop(0)
+        return []
 
+    async def fetchrow(self, query: str, *args):
+        self.fetchrow_calls.append((query, args))
+        return {"n": 42}
 
-class _Redis: ...
+
+def _settings(**overrides):
+    base = {
+        "cleanup_interval_s": 3600.0,
+        "cleanup_busy_interval_s": 30.0,
+        "cleanup_tick_budget_s": 10.0,
+        "cleanup_batch_size": 2,
+        "messages_detach_after_months": 0,
+    }
+    base.update(overrides)
+    return types.SimpleNamespace(**base)
 
 
 @pytest.mark.asyncio
-async def test_memory_cleanup_runs_idempotency_cleanup():
-    db = _Db()
-    db.next_fetch = [{"id": "a"}, {"id": "b"}]
-    worker = MemoryCleanupWorker(db=db, redis=_Redis())  # type: ignore[arg-type]
+async def test_cleanup_walks_batches_with_keyset_cursor_until_drained(monkeypatch):
+    monkeypatch.setattr("modules.memory.services.memory_cleanup.get_settings", lambda: _settings())
+    archive = CLEANUP_TASKS[0]
+    db = _Db(
+        {
+            archive.batch_sql: [
+                [{"id": "00000000-0000-0000-0000-000000000002"}, {"id": "00000000-0000-0000-0000-000000000001"}],
+                [{"id": "00000000-0000-0000-0000-000000000003"}],
+            ]
+        }
+    )
+    redis = _Redis()
+    worker = MemoryCleanupWorker(db=db, redis=redis)  # type: ignore[arg-type]
+
+    has_backlog = await worker._cleanup()  # noqa: SLF001
+
+    assert has_backlog is False
+    archive_calls = [args for q, args in db.fetch_calls if q == archive.batch_sql]
+    assert archive_calls == [(_MIN_UUID, 2), ("00000000-0000-0000-0000-000000000002", 2)]
+    assert "set archived_at = now()" in archive.batch_sql
+    assert db.executed == ["select core.ensure_messages_partitions()"]
+    # Tables keyed by something other than `id` still expose the keyset column as `batch.id`.
+    sessions = CLEANUP_TASKS[1]
+    assert "select t.conversation_id as id" in sessions.batch_sql
+    assert "t.conversation_id > $1::uuid" in sessions.batch_sql
+    # Drained tasks reset their checkpoint for the next pass; no backlog count is needed.
+    assert redis.store["memory_cleanup:archive_messages:cursor"] == _MIN_UUID
+    assert not any(q == t.backlog_sql for q, _ in db.fetchrow_calls for t in CLEANUP_TASKS)
+    assert not any(k.startswith("locks:") for k in redis.store)
+
+
+@pytest.mark.asyncio
+async def test_cleanup_stops_at_time_budget_and_checkpoints_cursor(monkeypatch):
+    monkeypatch.setattr(
+        "modules.memory.services.memory_cleanup.get_settings", lambda: _settings(cleanup_tick_budget_s=0.0)
+    )
+    archive = CLEANUP_TASKS[0]
+    full_batch = [{"id": "00000000-0000-0000-0000-0000000000aa"}, {"id": "00000000-0000-0000-0000-0000000000bb"}]
+    db = _Db({archive.batch_sql: [list(full_batch), list(full_batch)]})
+    redis = _Redis()
+    redis.store["memory_cleanup:archive_messages:cursor"] = "00000000-0000-0000-0000-000000000010"
+    worker = MemoryCleanupWorker(db=db, redis=redis)  # type: ignore[arg-type]
+
+    has_backlog = await worker._cleanup()  # noqa: SLF001
+
+    assert has_backlog is True
+    archive_calls = [args for q, args in db.fetch_calls if q == archive.batch_sql]
+    assert archive_calls == [("00000000-0000-0000-0000-000000000010", 2)]
+    assert redis.store["memory_cleanup:archive_messages:cursor"] == "00000000-0000-0000-0000-0000000000bb"
+    assert any(q == archive.backlog_sql for q, _ in db.fetchrow_calls)
+
+
+@pytest.mark.asyncio
+async def test_cleanup_detaches_old_partitions_and_reports_default_partition_rows(monkeypatch):
+    monkeypatch.setattr(
+        "modules.memory.services.memory_cleanup.get_settings", lambda: _settings(messages_detach_after_months=12)
+    )
+    db = _Db({_DETACH_MESSAGES_SQL: [[{"name": "archived_messages_2025_01"}]]})
+    worker = MemoryCleanupWorker(db=db, redis=_Redis(), tasks=())  # type: ignore[arg-type]
 
     await worker._cleanup()  # noqa: SLF001
 
-    assert db.execute_calls
-    assert db.fetch_calls
+    assert (_DETACH_MESSAGES_SQL, (12,)) in db.fetch_calls
+    assert db.fetchrow_calls[0] == (_COUNT_DEFAULT_MESSAGES_SQL, (10_000,))
+    assert MESSAGES_DEFAULT_PARTITION_ROWS._value.get() == 42  # noqa: SLF001
+
+
+@pytest.mark.asyncio
+async def test_cleanup_skips_tick_when_another_replica_holds_the_lock(monkeypatch):
+    monkeypatch.setattr("modules.memory.services.memory_cleanup.get_settings", lambda: _settings())
+    db = _Db()
+    redis = _Redis()
+    redis.store["locks:memory_cleanup"] = "other"
+    worker = MemoryCleanupWorker(db=db, redis=redis)  # type: ignore[arg-type]
+
+    assert await worker._cleanup() is False  # noqa: SLF001
+    assert db.fetch_calls == []
+
+
+@pytest.mark.asyncio
+async def test_idempotency_cleanup_loops_in_batches():
+    db = _Db()
+    worker = MemoryCleanupWorker(db=db, redis=_Redis(), tasks=())  # type: ignore[arg-type]
+    deleted = iter([2, 2, 1])
+
+    async def cleanup_expired(*, limit: int):
+        assert limit == 2
+        return next(deleted)
+
+    worker._idempotency = types.SimpleNamespace(cleanup_expired=cleanup_expired)  # type: ignore[attr-defined]
 
+    assert await worker._run_idempotency_cleanup(batch_size=2, budget_s=10.0) is True  # noqa: SLF001
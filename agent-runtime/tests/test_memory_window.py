@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+from modules.centurion.domain.message import Message
+from modules.memory.domain.memory_window import MemoryWindow, estimate_tokens
+
+
+def _msg(idx: int, *, direction: str = "inbound", content: str | None = None) -> Message:
+    return Message(
+        id=f"m{idx}",
+        conversation_id="conv1",
+        company_id="co1",
+        lead_id="l1",
+        direction=direction,
+        content_type="text",
+        content=content if content is not None else f"msg {idx}",
+        created_at=datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=idx),
+    )
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_select_stops_at_token_budget_but_keeps_minimum():
+    history = [_msg(i, content="x" * 400) for i in range(10)]  # 100 tokens each
+    window = MemoryWindow(max_messages=25, min_messages=2, max_tokens=350)
+
+    selected = window.select(history)
+    assert [m.id for m in selected] == ["m7", "m8", "m9"]
+
+    tight = MemoryWindow(max_messages=25, min_messages=2, max_tokens=10)
+    assert [m.id for m in tight.select(history)] == ["m8", "m9"]
+
+
+def test_select_keeps_pending_tail_outside_the_budget():
+    history = [_msg(0, direction="outbound"), _msg(1), _msg(2, direction="outbound"), _msg(3), _msg(4)]
+    window = MemoryWindow(max_messages=25, min_messages=1, max_tokens=1)
+
+    selected = window.select(history, pending_count=2)
+    assert [m.id for m in selected] == ["m2", "m3", "m4"]
+
+
+def test_select_drops_messages_covered_by_summary_beyond_minimum():
+    history = [_msg(i) for i in range(10)]
+    window = MemoryWindow(max_messages=25, min_messages=2, max_tokens=10_000)
+    covered = history[6].created_at.replace(tzinfo=None)  # naive timestamps are treated as UTC
+
+    selected = window.select(history, covered_until=covered)
+    assert [m.id for m in selected] == ["m7", "m8", "m9"]
+
+    selected = window.select(history, covered_until=history[9].created_at)
+    assert [m.id for m in selected] == ["m8", "m9"]
+
+
+def test_select_caps_at_max_messages():
+    window = MemoryWindow(max_messages=3, min_messages=1, max_tokens=10_000)
+    assert [m.id for m in window.select([_msg(i) for i in range(6)])] == ["m3", "m4", "m5"]
+    assert window.clamp(10) == 3
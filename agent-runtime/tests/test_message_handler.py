@@ -4,9 +4,9 @@ from datetime import datetime, timezone
 
 import pytest
 
-from modules.centurion.domain.conversation import Conversation
-from modules.centurion.domain.lead import Lead
 from modules.centurion.handlers.message_handler import MessageHandler
+from modules.centurion.repository.debounce_store import PendingAppend
+from modules.centurion.repository.message_repository import InboundIngest
 
 
 class _Db:
@@ -22,76 +22,51 @@ class _Redis:
         self.published.append((channel, message))
 
 
-class _LeadRepo:
-    def __init__(self, *, lead: Lead, created: bool):
-        self.lead = lead
-        self.created = created
-        self.calls: list[tuple[str, str]] = []
-        self.touched: list[tuple[str, str]] = []
-
-    async def get_or_create(self, *, company_id: str, phone: str):
-        self.calls.append((company_id, phone))
-        return self.lead, self.created
-
-    async def touch_inbound(self, *, company_id: str, lead_id: str):
-        self.touched.append((company_id, lead_id))
-
-
-class _Followups:
+class _ConvRepo:
     def __init__(self):
-        self.canceled: list[tuple[str, str]] = []
+        self.snapshots: list[dict] = []
 
-    async def cancel_pending(self, *, company_id: str, lead_id: str):
-        self.canceled.append((company_id, lead_id))
-        return 1
+    async def update_debounce(self, **kwargs):
+        self.snapshots.append(kwargs)
 
 
-class _ConfigRepo:
-    def __init__(self, config: dict):
-        self.config = config
-
-    async def get_centurion_config(self, *, company_id: str, centurion_id: str | None):  # noqa: ARG002
-        return dict(self.config)
-
-
-class _ConvRepo:
-    def __init__(self, conversation: Conversation):
-        self.conversation = conversation
+class _Debounce:
+    def __init__(self):
         self.appended: list[dict] = []
-        self.created_calls: list[dict] = []
 
-    async def get_or_create(self, **kwargs):
-        self.created_calls.append(kwargs)
-        return self.conversation
-
-    async def append_pending_message(self, **kwargs):
+    async def append(self, **kwargs):
         self.appended.append(kwargs)
-        return len(self.appended)
+        # Snapshot only on the first message of a burst.
+        snapshot = [a["message"] for a in self.appended] if len(self.appended) == 1 else None
+        return PendingAppend(pending_count=len(self.appended), snapshot=snapshot)
 
 
 class _MsgRepo:
-    def __init__(self):
-        self.saved: list[dict] = []
+    def __init__(self, *, config: dict, lead_created: bool = False, duplicate: bool = False):
+        self.config = config
+        self.lead_created = lead_created
+        self.duplicate = duplicate
+        self.ingested: list[dict] = []
         self.enriched: list[dict] = []
 
-    async def exists_channel_message_id(self, **kwargs):  # noqa: ARG002
-        return False
-
-    async def save_message(self, **kwargs):
-        self.saved.append(kwargs)
-        return "msg1"
+    async def ingest_inbound(self, **kwargs):
+        self.ingested.append(kwargs)
+        if self.duplicate:
+            return InboundIngest(lead_id="l1", lead_created=False, duplicate=True)
+        return InboundIngest(
+            lead_id="l1",
+            lead_created=self.lead_created,
+            conversation_id="conv1",
+            message_id="msg1",
+            message_created_at=datetime(2026, 1, 2, tzinfo=timezone.utc),
+            followups_canceled=1,
+            config=dict(self.config),
+        )
 
     async def set_media_enrichment(self, **kwargs):
         self.enriched.append(kwargs)
 
 
-class _ShortTerm:
-    def __init__(self):
-        self.invalidated: list[str] = []
-
-    async def invalidate_cache(self, conversation_id: str):
-        self.invalidated.append(conversation_id)
-
 class _Idempotency:
     async def claim(self, **kwargs):  # noqa: ARG002
         return True
@@ -107,22 +82,9 @@ async def test_handle_message_received_happy_path(monkeypatch):
     handler = MessageHandler(db=db, redis=redis)  # type: ignore[arg-type]
     handler._idempotency = _Idempotency()  # type: ignore[attr-defined]
 
-    lead = Lead(id="l1", company_id="co1", phone="+55119999", centurion_id="ct1")
-    handler._lead_repo = _LeadRepo(lead=lead, created=True)  # type: ignore[attr-defined]
-    handler._followups = _Followups()  # type: ignore[attr-defined]
-    handler._config_repo = _ConfigRepo({"id": "ct1", "debounce_wait_ms": 10})  # type: ignore[attr-defined]
-    handler._conv_repo = _ConvRepo(
-        Conversation(
-            id="conv1",
-            company_id="co1",
-            lead_id="l1",
-            centurion_id="ct1",
-            channel_type="whatsapp",
-            channel_instance_id="inst1",
-        )
-    )  # type: ignore[attr-defined]
-    handler._msg_repo = _MsgRepo()  # type: ignore[attr-defined]
-    handler._short_term = _ShortTerm()  # type: ignore[attr-defined]
+    handler._conv_repo = _ConvRepo()  # type: ignore[attr-defined]
+    handler._msg_repo = _MsgRepo(config={"id": "ct1", "debounce_wait_ms": 10}, lead_created=True)  # type: ignore[attr-defined]
+    handler._debounce = _Debounce()  # type: ignore[attr-defined]
 
     event = {
         "id": "evt123456",
@@ -138,13 +100,15 @@ async def test_handle_message_received_happy_path(monkeypatch):
 
     await handler.handle_message_received(json.dumps(event))
 
-    assert handler._lead_repo.calls == [("co1", "+55119999")]  # type: ignore[attr-defined]
-    assert handler._followups.canceled == [("co1", "l1")]  # type: ignore[attr-defined]
-    assert handler._msg_repo.saved[0]["content"] == "oi"  # type: ignore[attr-defined]
-    assert handler._short_term.invalidated == ["conv1"]  # type: ignore[attr-defined]
-    assert [c for c, _ in redis.published] == ["lead.created", "debounce.timer"]
-    assert handler._conv_repo.appended  # type: ignore[attr-defined]
-    assert handler._conv_repo.appended[0]["message"] == "oi"  # type: ignore[attr-defined]
+    ingested = handler._msg_repo.ingested[0]  # type: ignore[attr-defined]
+    assert (ingested["company_id"], ingested["phone"], ingested["content"]) == ("co1", "+55119999", "oi")
+    assert ingested["channel_message_id"] == "m"
+    # lead.created is written to the outbox by core.ingest_inbound_message, with the lead row.
+    assert [c for c, _ in redis.published] == ["debounce.timer"]
+    assert handler._debounce.appended[0]["message"] == "oi"  # type: ignore[attr-defined]
+    assert handler._debounce.appended[0]["last_event_id"] == "evt123456"  # type: ignore[attr-defined]
+    assert handler._conv_repo.snapshots[0]["pending_messages"] == ["oi"]  # type: ignore[attr-defined]
+    assert handler._conv_repo.snapshots[0]["state"] == "waiting"  # type: ignore[attr-defined]
 
 
 @pytest.mark.asyncio
@@ -166,22 +130,9 @@ async def test_handle_message_received_processes_audio_media(monkeypatch):
     handler = MessageHandler(db=db, redis=redis)  # type: ignore[arg-type]
     handler._idempotency = _Idempotency()  # type: ignore[attr-defined]
 
-    lead = Lead(id="l1", company_id="co1", phone="+55119999", centurion_id="ct1")
-    handler._lead_repo = _LeadRepo(lead=lead, created=False)  # type: ignore[attr-defined]
-    handler._followups = _Followups()  # type: ignore[attr-defined]
-    handler._config_repo = _ConfigRepo({"id": "ct1", "debounce_wait_ms": 10, "can_process_audio": True})  # type: ignore[attr-defined]
-    handler._conv_repo = _ConvRepo(
-        Conversation(
-            id="conv1",
-            company_id="co1",
-            lead_id="l1",
-            centurion_id="ct1",
-            channel_type="whatsapp",
-            channel_instance_id="inst1",
-        )
-    )  # type: ignore[attr-defined]
-    handler._msg_repo = _MsgRepo()  # type: ignore[attr-defined]
-    handler._short_term = _ShortTerm()  # type: ignore[attr-defined]
+    handler._conv_repo = _ConvRepo()  # type: ignore[attr-defined]
+    handler._msg_repo = _MsgRepo(config={"id": "ct1", "debounce_wait_ms": 10, "can_process_audio": True})  # type: ignore[attr-defined]
+    handler._debounce = _Debounce()  # type: ignore[attr-defined]
 
     async def download(url: str):
         assert url == "http://example.test/a"
@@ -214,5 +165,34 @@ async def test_handle_message_received_processes_audio_media(monkeypatch):
     }
 
     await handler.handle_message_received(json.dumps(event))
-    assert handler._msg_repo.enriched  # type: ignore[attr-defined]
-    assert handler._conv_repo.appended[0]["message"] == "transcribed"  # type: ignore[attr-defined]
+    enriched = handler._msg_repo.enriched  # type: ignore[attr-defined]
+    assert enriched and enriched[0]["created_at"] == datetime(2026, 1, 2, tzinfo=timezone.utc)
+    assert handler._debounce.appended[0]["message"] == "transcribed"  # type: ignore[attr-defined]
+
+
+@pytest.mark.asyncio
+async def test_handle_message_received_skips_duplicate_channel_message():
+    redis = _Redis()
+    handler = MessageHandler(db=_Db(), redis=redis)  # type: ignore[arg-type]
+    handler._idempotency = _Idempotency()  # type: ignore[attr-defined]
+    handler._conv_repo = _ConvRepo()  # type: ignore[attr-defined]
+    handler._msg_repo = _MsgRepo(config={"id": "ct1"}, duplicate=True)  # type: ignore[attr-defined]
+    handler._debounce = _Debounce()  # type: ignore[attr-defined]
+
+    event = {
+        "id": "evt123456",
+        "type": "message.received",
+        "version": 1,
+        "occurred_at": datetime.now(timezone.utc).isoformat(),
+        "company_id": "co1",
+        "source": "evolution-manager",
+        "payload": {"instance_id": "inst1", "from": "+55119999", "body": "oi", "raw": {"message_id": "m"}},
+        "correlation_id": "corr12345",
+        "causation_id": None,
+    }
+
+    await handler.handle_message_received(json.dumps(event))
+
+    assert handler._msg_repo.ingested  # type: ignore[attr-defined]
+    assert handler._debounce.appended == []  # type: ignore[attr-defined]
+    assert redis.published == []
@@ -0,0 +1,104 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from common.infrastructure.events.outbox import EventOutbox, OutboxRelay
+
+
+class _Conn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetch_calls: list[tuple[str, tuple]] = []
+        self.executed: list[tuple[str, tuple]] = []
+
+    async def fetch(self, query: str, *args):
+        self.fetch_calls.append((query, args))
+        rows, self.rows = self.rows[: args[0]], self.rows[args[0] :]
+        return rows
+
+    async def execute(self, query: str, *args):
+        self.executed.append((query, args))
+
+
+class _Db:
+    def __init__(self, rows):
+        self.conn = _Conn(rows)
+        self.commits = 0
+        self.rollbacks = 0
+
+    @asynccontextmanager
+    async def transaction(self):
+        snapshot = list(self.conn.rows)
+        try:
+            yield self.conn
+        except Exception:
+            self.conn.rows = snapshot
+            self.rollbacks += 1
+            raise
+        self.commits += 1
+
+
+class _Redis:
+    def __init__(self):
+        self.batches: list[list[tuple[str, str]]] = []
+        self.fail = False
+
+    async def publish_many(self, messages):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.batches.append(list(messages))
+
+
+def _row(i: int, channel: str = "message.sent"):
+    return {"id": i, "channel": channel, "envelope": f'{{"n": {i}}}', "lag_s": 0.2}
+
+
+@pytest.mark.asyncio
+async def test_relay_publishes_batches_in_id_order():
+    db = _Db([_row(2), _row(1, "lead.created"), _row(3)])
+    redis = _Redis()
+    relay = OutboxRelay(db=db, redis=redis, batch_size=2)  # type: ignore[arg-type]
+
+    assert await relay.relay_once() == 2
+    assert redis.batches[0] == [("lead.created", '{"n": 1}'), ("message.sent", '{"n": 2}')]
+    assert "for update skip locked" in db.conn.fetch_calls[0][0]
+    assert await relay.relay_once() == 1
+    assert await relay.relay_once() == 0
+    assert db.commits == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_publish_keeps_rows_in_outbox():
+    db = _Db([_row(1)])
+    redis = _Redis()
+    redis.fail = True
+    relay = OutboxRelay(db=db, redis=redis)  # type: ignore[arg-type]
+
+    with pytest.raises(ConnectionError):
+        await relay.relay_once()
+    assert db.rollbacks == 1 and len(db.conn.rows) == 1
+
+    redis.fail = False
+    assert await relay.relay_once() == 1
+
+
+@pytest.mark.asyncio
+async def test_outbox_add_many_and_notify_wakes_relay():
+    outbox = EventOutbox()
+    conn = _Conn([])
+    await outbox.add_many(conn, [])
+    await outbox.add_many(conn, [("lead.qualified", "{}", "co1"), ("message.sent", "{}", "co1")])
+    assert len(conn.executed) == 1
+    assert conn.executed[0][1][0] == ["lead.qualified", "message.sent"]
+
+    db = _Db([])
+    relay = OutboxRelay(db=db, redis=_Redis(), outbox=outbox, poll_interval_s=60)  # type: ignore[arg-type]
+    task = asyncio.create_task(relay.run_forever())
+    await asyncio.sleep(0)
+    db.conn.rows = [_row(1)]
+    outbox.notify()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    task.cancel()
+    assert db.conn.rows == []
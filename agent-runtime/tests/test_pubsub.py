@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import asyncio
+import zlib
 
 import pytest
 
+from common.infrastructure.messaging.dispatcher import KeyedDispatcher, envelope_partition_key
 from common.infrastructure.messaging.pubsub import RedisPubSubSubscriber
 
 
@@ -73,3 +75,40 @@ async def test_pubsub_dispatches_messages_to_handler():
     assert pubsub.subscribed == ["c1"]
     assert seen == ["hello"]
 
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_keeps_per_key_order_and_runs_keys_concurrently():
+    dispatcher = KeyedDispatcher(name="test", concurrency=4, queue_size=8)
+    release = asyncio.Event()
+    events: list[str] = []
+
+    def job(name: str, *, wait: bool = False):
+        async def run():
+            if wait:
+                await release.wait()
+            events.append(name)
+
+        return run
+
+    await dispatcher.submit("lead-a", job("a1", wait=True), channel="c")
+    await dispatcher.submit("lead-a", job("a2"), channel="c")
+    # A key that lands on another lane than lead-a.
+    other = next(f"lead-{i}" for i in range(100) if zlib.crc32(f"lead-{i}".encode()) % 4 != zlib.crc32(b"lead-a") % 4)
+    await dispatcher.submit(other, job("b1"), channel="c")
+
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert events == ["b1"]
+
+    release.set()
+    await dispatcher.drain()
+    assert events == ["b1", "a1", "a2"]
+    await dispatcher.close()
+
+
+def test_envelope_partition_key_prefers_lead_fields():
+    raw = '{"id": "e1", "company_id": "co1", "payload": {"lead_external_id": "5511", "from": "x"}}'
+    assert envelope_partition_key(raw) == "co1:5511"
+    assert envelope_partition_key('{"id": "e2", "company_id": "co1", "payload": {}}') == "e2"
+    assert envelope_partition_key("not json") == "not json"
@@ -29,6 +29,7 @@ class _FakeRedis:
         self.pinged = False
         self.closed = False
         self.published: list[tuple[str, str]] = []
+        self.pipelines = 0
 
     async def ping(self):
         self.pinged = True
@@ -52,6 +53,29 @@ class _FakeRedis:
     def pubsub(self):
         return self._pubsub
 
+    def pipeline(self, transaction: bool = True):
+        return _FakePipeline(self, transaction)
+
+
+class _FakePipeline:
+    def __init__(self, redis: _FakeRedis, transaction: bool):
+        self._redis = redis
+        self.transaction = transaction
+        self._queued: list[tuple[str, str]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def publish(self, channel: str, message: str):
+        self._queued.append((channel, message))
+
+    async def execute(self):
+        self._redis.published.extend(self._queued)
+        self._redis.pipelines += 1
+
 
 @pytest.mark.asyncio
 async def test_redis_client_connect_get_set_delete_close(monkeypatch):
@@ -130,3 +154,15 @@ async def test_redis_client_subscribe_invokes_handler(monkeypatch):
 
     await asyncio.wait_for(run(), timeout=1.0)
     assert seen == ["hello", "world"]
+
+
+@pytest.mark.asyncio
+async def test_redis_client_publish_many_uses_one_pipeline(monkeypatch):
+    fake = _FakeRedis()
+    monkeypatch.setattr("common.infrastructure.cache.redis_client.redis.from_url", lambda url, decode_responses=True: fake)  # noqa: ARG005
+
+    client = RedisClient("redis://example")
+    await client.connect()
+    await client.publish_many([("a", "1"), ("b", "2"), ("a", "3")])
+    assert fake.published == [("a", "1"), ("b", "2"), ("a", "3")]
+    assert fake.pipelines == 1
@@ -0,0 +1,43 @@
+import types
+
+from api.container import ServiceContainer
+from common.config.settings import Settings
+
+
+class _Redis:
+    client = None
+
+
+def test_container_shares_one_instance_per_dependency():
+    container = ServiceContainer.build(db=types.SimpleNamespace(), redis=_Redis())  # type: ignore[arg-type]
+
+    centurion = container.centurion
+    assert centurion._followups is container.followups  # noqa: SLF001
+    assert centurion._msg_repo is container.msg_repo  # noqa: SLF001
+    assert centurion._rag._embeddings is container.embeddings  # noqa: SLF001
+    assert container.followups._short_term is container.short_term  # noqa: SLF001
+    assert container.debounce_worker._centurion is centurion  # noqa: SLF001
+    assert container.watchdog._store is container.debounce  # noqa: SLF001
+    assert container.message_handler._stt._openai is container.openai  # noqa: SLF001
+    # Outbound pacing is off unless OUTBOUND_RATE_PER_S is set.
+    assert container.pacer is None
+    assert centurion._sender._pacer is None  # noqa: SLF001
+
+
+def test_container_shares_the_pacer_when_rate_is_set(monkeypatch):
+    monkeypatch.setattr("api.container.get_settings", lambda: Settings(OUTBOUND_RATE_PER_S=2.0))
+    container = ServiceContainer.build(db=types.SimpleNamespace(), redis=_Redis())  # type: ignore[arg-type]
+
+    assert container.pacer is not None
+    assert container.centurion._sender._pacer is container.pacer  # noqa: SLF001
+    assert container.followups._sender._pacer is container.pacer  # noqa: SLF001
+
+
+def test_container_report_lists_shared_entries():
+    container = ServiceContainer.build(db=types.SimpleNamespace(), redis=_Redis())  # type: ignore[arg-type]
+
+    report = container.report()
+    assert report["components"]["centurion"] == "CenturionService"
+    assert "followups" in report["graph"]["centurion"]
+    assert report["shared"]["debounce"] >= 4
+    assert report["shared"]["openai"] >= 3
@@ -0,0 +1,189 @@
+import json
+import types
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from agno.session.summary import SessionSummary
+
+from common.infrastructure.locks.redis_lock import _RELEASE_LUA
+from modules.centurion.domain.message import Message
+from modules.centurion.repository.message_repository import MessageCursor
+from modules.memory.services.session_summarizer import SessionSummarizer
+
+
+class _RedisInner:
+    def __init__(self):
+        self.store: dict[str, str] = {}
+
+    async def set(self, key: str, value: str, *, ex: int | None = None, nx: bool = False):  # noqa: ARG002
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def eval(self, script: str, num_keys: int, key: str, token: str, *args):  # noqa: ARG002
+        assert script == _RELEASE_LUA
+        if self.store.get(key) == token:
+            del self.store[key]
+            return 1
+        return 0
+
+
+class _Redis:
+    def __init__(self):
+        self.client = _RedisInner()
+
+
+class _Db:
+    def __init__(self, row: dict | None):
+        self.row = row
+        self.executed: list[tuple[str, tuple]] = []
+
+    async def fetchrow(self, query: str, *args):  # noqa: ARG002
+        return self.row
+
+    async def execute(self, query: str, *args):
+        self.executed.append((query, args))
+        return "UPDATE 1"
+
+
+class _Repo:
+    def __init__(self, messages: list[Message]):
+        self.messages = messages
+        self.calls: list[MessageCursor | None] = []
+
+    async def list_since(self, *, conversation_id: str, after: MessageCursor | None, limit: int):  # noqa: ARG002
+        self.calls.append(after)
+        fresh = [
+            m for m in self.messages if after is None or (m.created_at, m.id) > (after.created_at, after.message_id or "")
+        ]
+        return fresh[:limit]
+
+
+class _OpenAI:
+    async def resolve_optional(self, *, company_id: str):  # noqa: ARG002
+        return object()
+
+
+class _Manager:
+    def __init__(self):
+        self.inputs = []
+
+    async def acreate_session_summary(self, session):
+        self.inputs.append(session)
+        return SessionSummary(summary="novo resumo", topics=["preço"])
+
+
+def _msg(idx: int, direction: str = "inbound") -> Message:
+    return Message(
+        id=f"m{idx}",
+        conversation_id="conv1",
+        company_id="co1",
+        lead_id="l1",
+        direction=direction,
+        content_type="text",
+        content=f"mensagem {idx}",
+        created_at=datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=idx),
+    )
+
+
+def _settings(monkeypatch, **overrides):
+    base = {"summary_trigger_messages": 4, "summary_trigger_tokens": 1500, "summary_max_messages": 60}
+    base.update(overrides)
+    monkeypatch.setattr(
+        "modules.memory.services.session_summarizer.get_settings", lambda: types.SimpleNamespace(**base)
+    )
+
+
+def _build(db: _Db, repo: _Repo, redis: _Redis | None = None) -> tuple[SessionSummarizer, _Manager]:
+    summarizer = SessionSummarizer(db=db, redis=redis or _Redis(), openai=_OpenAI(), msg_repo=repo)  # type: ignore[arg-type]
+    manager = _Manager()
+    summarizer._build_manager = lambda resolved: manager  # type: ignore[method-assign]  # noqa: ARG005, SLF001
+    return summarizer, manager
+
+
+@pytest.mark.asyncio
+async def test_summarizes_only_messages_after_watermark_once_threshold_is_reached(monkeypatch):
+    _settings(monkeypatch)
+    watermark = _msg(3).created_at
+    db = _Db(
+        {
+            "summary": {"summary": "resumo antigo", "updated_at": "2026-01-01T00:03:00"},
+            "watermark": {"message_id": "m3", "created_at": watermark.isoformat()},
+        }
+    )
+    repo = _Repo([_msg(i, "inbound" if i % 2 else "outbound") for i in range(10)])
+    summarizer, manager = _build(db, repo)
+
+    assert await summarizer.maybe_summarize(company_id="co1", conversation_id="conv1") is True
+
+    assert repo.calls == [MessageCursor(watermark, "m3")]
+    session = manager.inputs[0]
+    assert session.summary.summary == "resumo antigo"
+    assert [m.content for m in session.get_messages()] == [f"mensagem {i}" for i in range(4, 10)]
+    assert [m.role for m in session.get_messages()][:2] == ["assistant", "user"]
+
+    query, args = db.executed[0]
+    assert "update core.agno_sessions" in query
+    assert json.loads(args[1])["summary"] == "novo resumo"
+    assert json.loads(args[2]) == {"message_id": "m9", "created_at": _msg(9).created_at.isoformat()}
+
+
+@pytest.mark.asyncio
+async def test_long_unsummarized_tail_is_paged_oldest_first(monkeypatch):
+    _settings(monkeypatch, summary_max_messages=4)
+    db = _Db({"summary": None, "watermark": None})
+    summarizer, manager = _build(db, _Repo([_msg(i) for i in range(10)]))
+
+    assert await summarizer.maybe_summarize(company_id="co1", conversation_id="conv1") is True
+
+    # The first page is summarized and the watermark points at its last message; nothing is skipped.
+    assert [m.content for m in manager.inputs[0].get_messages()] == [f"mensagem {i}" for i in range(4)]
+    assert json.loads(db.executed[0][1][2])["message_id"] == "m3"
+
+
+@pytest.mark.asyncio
+async def test_skips_llm_below_threshold(monkeypatch):
+    _settings(monkeypatch, summary_trigger_messages=20)
+    db = _Db({"summary": None, "watermark": None})
+    summarizer, manager = _build(db, _Repo([_msg(i) for i in range(3)]))
+
+    assert await summarizer.maybe_summarize(company_id="co1", conversation_id="conv1") is False
+    assert manager.inputs == []
+    assert db.executed == []
+
+
+@pytest.mark.asyncio
+async def test_token_threshold_triggers_without_enough_messages(monkeypatch):
+    _settings(monkeypatch, summary_trigger_messages=20, summary_trigger_tokens=10)
+    long_msg = replace(_msg(1), content="x" * 200)
+    db = _Db({"summary": None, "watermark": None})
+    summarizer, manager = _build(db, _Repo([long_msg]))
+
+    assert await summarizer.maybe_summarize(company_id="co1", conversation_id="conv1") is True
+    assert manager.inputs[0].summary is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_run_for_same_conversation_is_skipped(monkeypatch):
+    _settings(monkeypatch)
+    redis = _Redis()
+    redis.client.store["locks:session_summary:conv1"] = "other"
+    db = _Db({"summary": None, "watermark": None})
+    summarizer, manager = _build(db, _Repo([_msg(i) for i in range(10)]), redis)
+
+    assert await summarizer.maybe_summarize(company_id="co1", conversation_id="conv1") is False
+    assert manager.inputs == []
+
+
+@pytest.mark.asyncio
+async def test_failures_are_swallowed(monkeypatch):
+    _settings(monkeypatch)
+
+    class _BrokenDb(_Db):
+        async def fetchrow(self, query: str, *args):  # noqa: ARG002
+            raise RuntimeError("db down")
+
+    summarizer, _ = _build(_BrokenDb(None), _Repo([]))
+    assert await summarizer.maybe_summarize(company_id="co1", conversation_id="conv1") is False
@@ -1,23 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
 
 from modules.centurion.domain.message import Message
-from modules.memory.services.short_term_memory import ShortTermMemory
+from modules.centurion.repository.message_repository import MessageCursor, MessageRepository
+from modules.memory.services.history_cache import _APPEND_LUA, _FILL_LUA, _REPLACE_LUA, ConversationHistoryCache
+from modules.memory.services.short_term_memory import ShortTermMemory, summary_covered_until
+
+
+class _FakeRedisInner:
+    def __init__(self):
+        self.lists: dict[str, list[str]] = {}
+        self.kv: dict[str, str] = {}
+        self.lrange_calls: list[tuple[str, int, int]] = []
 
+    async def lrange(self, key: str, start: int, end: int):
+        self.lrange_calls.append((key, start, end))
+        items = self.lists.get(key, [])
+        if start < 0:
+            start = max(0, len(items) + start)
+        end = len(items) if end == -1 else end + 1
+        return items[start:end]
 
-class _Redis:
-    def __init__(self, cached):
-        self.cached = cached
-        self.set_calls: list[tuple[str, object, int | None]] = []
-        self.deleted: list[str] = []
+    async def eval(self, script: str, num_keys: int, *args):
+        keys, argv = args[:num_keys], args[num_keys:]
+        if script == _APPEND_LUA:
+            if keys[0] in self.lists:
+                self.lists[keys[0]].append(argv[0])
+                self.lists[keys[0]] = self.lists[keys[0]][-int(argv[1]) :]
+                return 1
+            self.kv[keys[1]] = "1"
+            return 0
+        if script == _FILL_LUA:
+            if keys[0] in self.lists or keys[1] in self.kv:
+                return 0
+            if len(argv) > 1:
+                self.lists[keys[0]] = list(argv[1:])
+            return 1
+        if script == _REPLACE_LUA:
+            items = self.lists.get(keys[0], [])
+            for idx, raw in enumerate(items):
+                if raw == argv[0]:
+                    items[idx] = argv[1]
+                    return 1
+            return 0
+        raise AssertionError("Unexpected Lua script")
 
-    async def get_json(self, key: str):
-        return self.cached.get(key) if isinstance(self.cached, dict) else self.cached
 
-    async def set_json(self, key: str, value, *, ttl_s: int | None = None):
-        self.set_calls.append((key, value, ttl_s))
+class _FakeRedis:
+    def __init__(self):
+        self.client = _FakeRedisInner()
 
     async def delete(self, key: str):
-        self.deleted.append(key)
+        self.client.lists.pop(key, None)
+        self.client.kv.pop(key, None)
 
 
 class _Repo:
@@ -25,74 +61,311 @@ class _Repo:
         self.messages = messages
         self.calls: list[tuple[str, int, bool]] = []
 
-    async def list_recent(self, *, conversation_id: str, limit: int, include_archived: bool = False):  # noqa: ARG002
+    async def list_recent(self, *, conversation_id: str, limit: int, include_archived: bool = False):
         self.calls.append((conversation_id, limit, include_archived))
-        return list(self.messages)
+        return list(self.messages[-limit:])
 
 
 class _Db:
-    def __init__(self, *, agno_session):
+    def __init__(self, *, agno_session=None):
         self.agno_session = agno_session
+        self.rows: list[dict] = []
+        self.queries: list[str] = []
+        self.args: list[tuple] = []
+        self.writes: list[str] = []
 
-    async def fetchrow(self, query: str, *args):  # noqa: ARG002
+    async def note_write(self, key: str) -> None:
+        self.writes.append(key)
+
+    async def fetchrow(self, query: str, *args):
+        self.queries.append(query)
+        self.args.append(args)
+        if self.rows:
+            return self.rows.pop(0)
         return {"agno_session": self.agno_session}
 
 
+def _msg(idx: int, conversation_id: str = "conv1") -> Message:
+    return Message(
+        id=f"m{idx}",
+        conversation_id=conversation_id,
+        company_id="co1",
+        lead_id="l1",
+        direction="inbound",
+        content_type="text",
+        content=f"msg {idx}",
+        metadata={"n": idx},
+        created_at=datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=idx),
+    )
+
+
 @pytest.mark.asyncio
-async def test_get_conversation_history_uses_cache_when_present():
-    cached = {
-        "conv:conv1:history:25": [
-            {"id": "m1", "conversation_id": "conv1", "company_id": "co1", "lead_id": "l1", "direction": "inbound", "content_type": "text", "content": "oi", "metadata": {}},
-        ]
-    }
-    redis = _Redis(cached)
+async def test_cold_history_is_loaded_once_then_served_from_the_list():
+    redis = _FakeRedis()
     memory = ShortTermMemory(db=object(), redis=redis)  # type: ignore[arg-type]
-    memory._repo = _Repo([])  # type: ignore[attr-defined]
+    memory._repo = _Repo([_msg(i) for i in range(30)])  # type: ignore[attr-defined]
+
+    first = await memory.get_conversation_history(conversation_id="conv1", limit=10)
+    assert [m.id for m in first] == [f"m{i}" for i in range(20, 30)]
+    assert memory._repo.calls == [("conv1", 50, False)]  # type: ignore[attr-defined]
 
-    msgs = await memory.get_conversation_history(conversation_id="conv1", limit=25)
-    assert len(msgs) == 1
-    assert msgs[0].content == "oi"
-    assert memory._repo.calls == []  # type: ignore[attr-defined]
+    second = await memory.get_conversation_history(conversation_id="conv1", limit=25)
+    assert [m.id for m in second] == [f"m{i}" for i in range(5, 30)]
+    assert second[0].created_at == _msg(5).created_at
+    assert second[0].metadata == {"n": 5}
+    assert len(memory._repo.calls) == 1  # type: ignore[attr-defined]
 
 
 @pytest.mark.asyncio
-async def test_get_conversation_history_fetches_and_sets_cache_when_missing():
-    redis = _Redis({})
-    m = Message(id="m1", conversation_id="conv1", company_id="co1", lead_id="l1", direction="inbound", content_type="text", content="oi")
-    memory = ShortTermMemory(db=object(), redis=redis)  # type: ignore[arg-type]
-    memory._repo = _Repo([m])  # type: ignore[attr-defined]
+async def test_windows_larger_than_the_cap_go_to_the_db():
+    redis = _FakeRedis()
+    cache = ConversationHistoryCache(redis=redis, max_messages=5)  # type: ignore[arg-type]
+    memory = ShortTermMemory(db=object(), redis=redis, history_cache=cache)  # type: ignore[arg-type]
+    memory._repo = _Repo([_msg(i) for i in range(8)])  # type: ignore[attr-defined]
 
-    msgs = await memory.get_conversation_history(conversation_id="conv1", limit=25)
-    assert msgs[0].content == "oi"
-    assert memory._repo.calls == [("conv1", 25, False)]  # type: ignore[attr-defined]
-    assert redis.set_calls and redis.set_calls[0][2] == 60
+    msgs = await memory.get_conversation_history(conversation_id="conv1", limit=8)
+    assert len(msgs) == 8
+    assert memory._repo.calls == [("conv1", 8, False)]  # type: ignore[attr-defined]
+    assert "conv:conv1:history" not in redis.client.lists
 
 
 @pytest.mark.asyncio
-async def test_invalidate_cache_deletes_known_keys():
-    redis = _Redis({})
-    memory = ShortTermMemory(db=object(), redis=redis)  # type: ignore[arg-type]
-    await memory.invalidate_cache("conv1")
-    assert redis.deleted == ["conv:conv1:history:10", "conv:conv1:history:15", "conv:conv1:history:25"]
+async def test_append_keeps_warm_list_capped_and_fences_cold_fills():
+    redis = _FakeRedis()
+    cache = ConversationHistoryCache(redis=redis, max_messages=3)  # type: ignore[arg-type]
+
+    # Cold: the write misses and blocks a concurrent fill that may have read the DB before the insert.
+    assert await cache.append(_msg(0)) is False
+    assert await cache.fill("conv1", [_msg(0)]) is False
+    assert await cache.get_window("conv1", limit=3) is None
+
+    redis.client.kv.clear()
+    assert await cache.fill("conv1", [_msg(0), _msg(1)]) is True
+    for i in (2, 3):
+        assert await cache.append(_msg(i)) is True
+
+    window = await cache.get_window("conv1", limit=3)
+    assert [m.id for m in window or []] == ["m1", "m2", "m3"]
 
 
 @pytest.mark.asyncio
-async def test_get_conversation_history_uses_smaller_window_when_summary_exists():
-    redis = _Redis({})
-    conversation_id = "00000000-0000-0000-0000-000000000000"
-    m = Message(
-        id="m1",
-        conversation_id=conversation_id,
+async def test_patch_updates_cached_entry_in_place():
+    redis = _FakeRedis()
+    cache = ConversationHistoryCache(redis=redis)  # type: ignore[arg-type]
+    await cache.fill("conv1", [_msg(1), _msg(2)])
+
+    assert await cache.patch("conv1", "m2", audio_transcription="olá") is True
+    assert await cache.patch("conv1", "missing", audio_transcription="x") is False
+
+    window = await cache.get_window("conv1", limit=2)
+    assert window and window[1].audio_transcription == "olá"
+    assert window[0].audio_transcription is None
+
+
+@pytest.mark.asyncio
+async def test_invalid_entries_invalidate_the_list():
+    redis = _FakeRedis()
+    cache = ConversationHistoryCache(redis=redis)  # type: ignore[arg-type]
+    redis.client.lists["conv:conv1:history"] = ["not-json"]
+
+    assert await cache.get_window("conv1", limit=5) is None
+    assert "conv:conv1:history" not in redis.client.lists
+
+
+@pytest.mark.asyncio
+async def test_message_repository_writes_through_to_the_cache():
+    redis = _FakeRedis()
+    cache = ConversationHistoryCache(redis=redis)  # type: ignore[arg-type]
+    await cache.fill("conv1", [_msg(1)])
+
+    db = _Db()
+    created_at = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    db.rows = [
+        {"id": "m2", "created_at": created_at},
+        {"conversation_id": "conv1", "audio_transcription": "transcrito", "image_description": None},
+        {"conversation_id": "conv1"},
+    ]
+    repo = MessageRepository(db, history_cache=cache)  # type: ignore[arg-type]
+
+    message_id = await repo.save_message(
+        conversation_id="conv1",
         company_id="co1",
         lead_id="l1",
         direction="inbound",
+        content_type="audio",
+        content=None,
+    )
+    assert message_id == "m2"
+    window = await cache.get_window("conv1", limit=5)
+    assert [m.id for m in window or []] == ["m1", "m2"]
+    assert window and window[-1].created_at == created_at
+
+    await repo.set_media_enrichment(message_id="m2", created_at=created_at, audio_transcription="transcrito")
+    window = await cache.get_window("conv1", limit=5)
+    assert window and window[-1].as_prompt_text == "[ÁUDIO] transcrito"
+
+    await repo.delete_message(message_id="m2", created_at=created_at)
+    assert await cache.get_window("conv1", limit=5) is None
+    # Both writes filter on the partition key so they touch a single monthly partition.
+    assert "created_at=$4" in db.queries[1] and db.args[1][-1] == created_at
+    assert "created_at=$2" in db.queries[2] and db.args[2] == ("m2", created_at)
+    # Each write pins the conversation's history reads to the primary.
+    assert db.writes == ["conv1", "conv1", "conv1"]
+
+
+@pytest.mark.asyncio
+async def test_ingest_inbound_is_one_round_trip_and_writes_through_to_the_cache():
+    redis = _FakeRedis()
+    cache = ConversationHistoryCache(redis=redis)  # type: ignore[arg-type]
+    await cache.fill("conv1", [_msg(1)])
+
+    db = _Db()
+    created_at = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    db.rows = [
+        {
+            "lead_id": "l1",
+            "lead_created": True,
+            "conversation_id": "conv1",
+            "message_id": "m2",
+            "message_created_at": created_at,
+            "duplicate": False,
+            "followups_canceled": 2,
+            "config": {"id": "ct1", "debounce_wait_ms": 1500},
+        },
+        {"lead_id": "l1", "lead_created": False, "duplicate": True},
+    ]
+    repo = MessageRepository(db, history_cache=cache)  # type: ignore[arg-type]
+
+    ingested = await repo.ingest_inbound(
+        company_id="co1",
+        phone="+5511",
+        channel_type="whatsapp",
+        channel_instance_id="inst1",
+        content_type="text",
+        content="oi",
+        channel_message_id=" wamid.1 ",
+    )
+    assert len(db.queries) == 1 and "core.ingest_inbound_message" in db.queries[0]
+    assert (ingested.lead_created, ingested.conversation_id, ingested.message_id) == (True, "conv1", "m2")
+    assert ingested.message_created_at == created_at
+    assert ingested.config["debounce_wait_ms"] == 1500
+    window = await cache.get_window("conv1", limit=5)
+    assert [m.id for m in window or []] == ["m1", "m2"]
+    assert window and window[-1].channel_message_id == "wamid.1"
+
+    duplicate = await repo.ingest_inbound(
+        company_id="co1",
+        phone="+5511",
+        channel_type="whatsapp",
+        channel_instance_id="inst1",
         content_type="text",
         content="oi",
+        channel_message_id="wamid.1",
     )
-    db = _Db(agno_session={"summary": {"summary": "s"}})
+    assert duplicate.duplicate and duplicate.message_id is None
+    assert [m.id for m in await cache.get_window("conv1", limit=5) or []] == ["m1", "m2"]
+
+
+@pytest.mark.asyncio
+async def test_list_recent_filters_on_archived_at_column():
+    class _FetchDb:
+        def __init__(self):
+            self.queries: list[str] = []
+
+        async def fetch(self, query: str, *args, **options):  # noqa: ARG002
+            self.queries.append(query)
+            self.options = options
+            return [
+                {"id": "m2", "conversation_id": "conv1", "company_id": "co1", "lead_id": "l1", "direction": "inbound"},
+                {"id": "m1", "conversation_id": "conv1", "company_id": "co1", "lead_id": "l1", "direction": "inbound"},
+            ]
+
+    db = _FetchDb()
+    repo = MessageRepository(db)  # type: ignore[arg-type]
+
+    msgs = await repo.list_recent(conversation_id="conv1", limit=2)
+    assert [m.id for m in msgs] == ["m1", "m2"]
+    assert "archived_at is null" in db.queries[0]
+    assert db.options == {"readonly": True, "consistency_key": "conv1"}
+    assert "metadata" not in db.queries[0]
+
+    await repo.list_recent(conversation_id="conv1", limit=2, include_archived=True)
+    assert "archived_at" not in db.queries[1]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_cache_drops_the_list():
+    redis = _FakeRedis()
+    memory = ShortTermMemory(db=object(), redis=redis)  # type: ignore[arg-type]
+    await memory.history_cache.fill("conv1", [_msg(1)])
+
+    await memory.invalidate_cache("conv1")
+    assert "conv:conv1:history" not in redis.client.lists
+
+
+@pytest.mark.asyncio
+async def test_windowed_history_reuses_loaded_summary_and_skips_summarized_messages():
+    redis = _FakeRedis()
+    db = _Db()
     memory = ShortTermMemory(db=db, redis=redis)  # type: ignore[arg-type]
-    memory._repo = _Repo([m])  # type: ignore[attr-defined]
+    memory._repo = _Repo([_msg(i) for i in range(20)])  # type: ignore[attr-defined]
+    covered_until = _msg(11).created_at
+    summary = {"summary": "s", "updated_at": covered_until.isoformat()}
+
+    msgs = await memory.get_windowed_history(conversation_id="conv1", summary=summary, pending_count=2)
+
+    assert db.queries == []
+    # m12..m17 are after the summary; m18/m19 are the pending tail.
+    assert [m.id for m in msgs] == [f"m{i}" for i in range(12, 20)]
+
+
+@pytest.mark.asyncio
+async def test_windowed_history_without_summary_uses_the_token_budget():
+    redis = _FakeRedis()
+    memory = ShortTermMemory(db=object(), redis=redis)  # type: ignore[arg-type]
+    memory._repo = _Repo([_msg(i) for i in range(30)])  # type: ignore[attr-defined]
+
+    msgs = await memory.get_windowed_history(conversation_id="conv1")
+    assert len(msgs) == 25
+    assert msgs[-1].id == "m29"
+
+
+def test_summary_covered_until_parses_session_summary():
+    assert summary_covered_until(None) is None
+    assert summary_covered_until({"summary": ""}) is None
+    assert summary_covered_until({"summary": "s", "updated_at": "bad"}) is None
+    ts = summary_covered_until({"summary": "s", "updated_at": "2026-01-01T10:00:00"})
+    assert ts == datetime(2026, 1, 1, 10, 0)
+    watermarked = summary_covered_until(
+        {"summary": "s", "updated_at": "2026-01-01T10:00:00"},
+        {"message_id": "m9", "created_at": "2026-01-01T09:30:00+00:00"},
+    )
+    assert watermarked == datetime(2026, 1, 1, 9, 30, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_list_since_pages_oldest_first_after_a_created_at_id_cursor():
+    class _FetchDb:
+        def __init__(self):
+            self.calls: list[tuple[str, tuple, dict]] = []
+
+        async def fetch(self, query: str, *args, **kwargs):
+            self.calls.append((query, args, kwargs))
+            return [
+                {"id": "m2", "conversation_id": "conv1", "company_id": "co1", "lead_id": "l1", "content": "a"},
+                {"id": "m3", "conversation_id": "conv1", "company_id": "co1", "lead_id": "l1", "content": "b"},
+            ]
+
+    db = _FetchDb()
+    repo = MessageRepository(db)  # type: ignore[arg-type]
+    created_at = datetime(2026, 1, 2, tzinfo=timezone.utc)
+
+    messages = await repo.list_since(conversation_id="conv1", after=MessageCursor(created_at, "m1"), limit=2)
 
-    msgs = await memory.get_conversation_history(conversation_id=conversation_id)
-    assert msgs and msgs[0].content == "oi"
-    assert memory._repo.calls == [(conversation_id, 15, False)]  # type: ignore[attr-defined]
+    assert [m.id for m in messages] == ["m2", "m3"]
+    query, args, kwargs = db.calls[0]
+    assert "(created_at, id) >" in query and "order by created_at asc, id asc" in query
+    assert args == ("conv1", created_at, "m1", 2)
+    assert kwargs == {"readonly": True, "consistency_key": "conv1"}
+    await repo.list_since(conversation_id="conv1", after=None, limit=5)
+    assert db.calls[1][1] == ("conv1", None, None, 5)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from redis.exceptions import ResponseError
+
+from common.infrastructure.messaging.streams import RedisStreamsConsumer
+
+
+class _FakeClient:
+    def __init__(self, batches, *, claimable=None, deliveries: int = 1):
+        self._batches = list(batches)
+        self._claimable = list(claimable or [])
+        self._deliveries = deliveries
+        self.groups: list[tuple[str, str]] = []
+        self.acked: list[str] = []
+        self.dead: list[tuple[str, dict]] = []
+        self.consumer: RedisStreamsConsumer | None = None
+        self.touched: list[tuple[str, list[str], bool]] = []
+
+    async def xgroup_create(self, name, groupname, id="$", mkstream=False):  # noqa: A002, ARG002
+        if (name, groupname) in self.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        self.groups.append((name, groupname))
+
+    async def xreadgroup(self, *, groupname, consumername, streams, count, block):  # noqa: ARG002
+        if not self._batches:
+            await self.consumer.close()
+            return []
+        return self._batches.pop(0)
+
+    async def xack(self, name, groupname, *ids):  # noqa: ARG002
+        self.acked.extend(ids)
+
+    async def xautoclaim(self, name, groupname, consumername, *, min_idle_time, start_id, count):  # noqa: ARG002
+        entries, self._claimable = self._claimable, []
+        return ["0-0", entries, []]
+
+    async def xpending_range(self, name, groupname, *, min, max, count):  # noqa: A002, ARG002
+        return [{"message_id": min, "times_delivered": self._deliveries}]
+
+    async def xadd(self, name, fields, maxlen=None, approximate=True):  # noqa: ARG002
+        self.dead.append((name, fields))
+
+    async def xclaim(self, name, groupname, consumername, min_idle_time, message_ids, justid=False):  # noqa: ARG002
+        self.touched.append((name, sorted(message_ids), justid))
+
+
+class _FakeRedis:
+    def __init__(self, client: _FakeClient):
+        self.client = client
+
+
+def _consumer(client: _FakeClient, **kwargs) -> RedisStreamsConsumer:
+    consumer = RedisStreamsConsumer(_FakeRedis(client), group="g", consumer="c1", **kwargs)  # type: ignore[arg-type]
+    client.consumer = consumer
+    return consumer
+
+
+@pytest.mark.asyncio
+async def test_streams_acks_handled_entries_and_skips_bad_ones():
+    client = _FakeClient([[("stream:message.received", [("1-0", {"data": "a"}), ("2-0", {"other": "x"})])]])
+    consumer = _consumer(client)
+    seen: list[str] = []
+
+    async def handler(data: str):
+        seen.append(data)
+
+    consumer.register("message.received", handler)
+    await consumer.run_forever()
+
+    assert client.groups == [("stream:message.received", "g")]
+    assert seen == ["a"]
+    assert sorted(client.acked) == ["1-0", "2-0"]
+
+
+@pytest.mark.asyncio
+async def test_streams_leaves_failed_entries_pending(monkeypatch):
+    monkeypatch.setattr("common.infrastructure.messaging.streams.wait_exponential", lambda **_: lambda *_a: 0)
+    client = _FakeClient([[("stream:message.received", [("1-0", {"data": "a"})])]])
+    consumer = _consumer(client)
+
+    async def handler(data: str):  # noqa: ARG001
+        raise RuntimeError("boom")
+
+    consumer.register("message.received", handler)
+    await consumer.run_forever()
+
+    assert client.acked == []
+
+
+@pytest.mark.asyncio
+async def test_streams_reclaims_idle_entries_and_dead_letters_poison():
+    client = _FakeClient([], claimable=[("1-0", {"data": "a"}), ("2-0", None)], deliveries=1)
+    consumer = _consumer(client)
+    seen: list[str] = []
+
+    async def handler(data: str):
+        seen.append(data)
+
+    consumer.register("message.received", handler)
+    await consumer.run_forever()
+    assert seen == ["a"]
+    assert sorted(client.acked) == ["1-0", "2-0"]
+
+    client = _FakeClient([], claimable=[("3-0", {"data": "b"})], deliveries=9)
+    consumer = _consumer(client, max_deliveries=5)
+    consumer.register("message.received", handler)
+    await consumer.run_forever()
+    assert seen == ["a"]
+    assert client.acked == ["3-0"]
+    assert client.dead == [("stream:message.received:dead", {"data": "b", "source_id": "3-0"})]
+
+
+@pytest.mark.asyncio
+async def test_streams_in_flight_entries_are_not_resubmitted_and_stay_claimed():
+    client = _FakeClient([])
+    consumer = _consumer(client)
+    started, release = asyncio.Event(), asyncio.Event()
+    seen: list[str] = []
+
+    async def handler(data: str):
+        seen.append(data)
+        started.set()
+        await release.wait()
+
+    consumer.register("message.received", handler)
+    await consumer._submit("message.received", "1-0", {"data": "a"})  # noqa: SLF001
+    await started.wait()
+
+    # Reclaimed (idle since delivery) while still running: not handled twice.
+    await consumer._submit("message.received", "1-0", {"data": "a"})  # noqa: SLF001
+    await consumer._refresh_inflight()  # noqa: SLF001
+    assert client.touched == [("stream:message.received", ["1-0"], True)]
+
+    release.set()
+    await consumer._dispatcher.drain()  # noqa: SLF001
+    assert seen == ["a"]
+    assert client.acked == ["1-0"]
+
+    await consumer._refresh_inflight()  # noqa: SLF001
+    assert len(client.touched) == 1
+    await consumer._dispatcher.close()  # noqa: SLF001
@@ -0,0 +1,121 @@
+import pytest
+
+from common.infrastructure.ratelimit import token_bucket
+from common.infrastructure.ratelimit.token_bucket import RedisTokenBucket
+
+
+class _GcraRedisInner:
+    """Python port of RESERVE_LUA over a dict."""
+
+    def __init__(self):
+        self.kv: dict[str, int] = {}
+        self.calls = 0
+
+    async def eval(self, script: str, num_keys: int, *args):  # noqa: ARG002
+        self.calls += 1
+        key = args[0]
+        now, interval, tolerance, max_backlog, max_ahead = (int(a) for a in args[num_keys : num_keys + 5])
+        offsets = [int(a) for a in args[num_keys + 5 :]]
+        tat = max(self.kv.get(key, 0), now)
+        backlog = tat - tolerance - now
+        if max_backlog >= 0 and backlog > max_backlog:
+            return [0, backlog - max_backlog]
+        out = [1]
+        for offset in offsets:
+            slot = max(now + offset, tat - tolerance)
+            out.append(slot)
+            tat = max(tat, slot) + interval
+        if max_ahead >= 0 and out[-1] - now > max_ahead:
+            return [0, out[-1] - now - max_ahead]
+        self.kv[key] = tat
+        return out
+
+
+class _Redis:
+    def __init__(self, inner=None):
+        self.client = inner or _GcraRedisInner()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"ms": 1_000_000}
+    sleeps: list[float] = []
+
+    async def fake_sleep(seconds: float):
+        sleeps.append(seconds)
+        now["ms"] += int(seconds * 1000)
+
+    monkeypatch.setattr(token_bucket, "_now_ms", lambda: now["ms"])
+    monkeypatch.setattr(token_bucket.asyncio, "sleep", fake_sleep)
+    return now, sleeps
+
+
+@pytest.mark.asyncio
+async def test_live_reserve_spends_burst_then_spaces_slots(clock):
+    now, sleeps = clock
+    bucket = RedisTokenBucket(_Redis(), rate_per_s=1, burst=3)  # type: ignore[arg-type]
+
+    first = await bucket.reserve("inst1", [0, 0, 0, 0, 0])
+    assert [s - now["ms"] for s in first] == [0, 0, 0, 1000, 2000]
+    # Requested offsets beyond the pacing are kept.
+    second = await bucket.reserve("inst1", [0, 10_000])
+    assert [s - now["ms"] for s in second] == [3000, 10_000]
+    # Other instances have their own bucket.
+    assert await bucket.reserve("inst2", [0]) == [now["ms"]]
+    assert sleeps == []
+    assert await bucket.reserve("inst1", []) == []
+
+
+@pytest.mark.asyncio
+async def test_proactive_waits_for_live_backlog_to_drain(clock):
+    now, sleeps = clock
+    redis = _Redis()
+    bucket = RedisTokenBucket(redis, rate_per_s=1, burst=1, max_wait_s=60)  # type: ignore[arg-type]
+
+    await bucket.reserve("inst1", [0, 0, 0])  # live reply: slots now, +1s, +2s
+    start = now["ms"]
+    slots = await bucket.reserve("inst1", [0], priority="proactive")
+
+    assert sleeps == [3.0]
+    assert slots == [start + 3000]
+
+    # Past max_wait the follow-up reserves anyway instead of starving.
+    impatient = RedisTokenBucket(redis, rate_per_s=1, burst=1, max_wait_s=0)  # type: ignore[arg-type]
+    await impatient.reserve("inst1", [0, 0, 0])
+    queued = await impatient.reserve("inst1", [0], priority="proactive")
+    assert queued[0] > now["ms"]
+
+
+@pytest.mark.asyncio
+async def test_live_slots_stay_within_the_consumer_send_at_horizon(clock):
+    now, sleeps = clock
+    redis = _Redis()
+    bucket = RedisTokenBucket(redis, rate_per_s=1, burst=1, max_wait_s=60, max_schedule_ahead_ms=3000)  # type: ignore[arg-type]
+
+    await bucket.reserve("inst1", [0, 0, 0, 0])  # backlog: slots now .. +3s
+    start = now["ms"]
+    slots = await bucket.reserve("inst1", [0, 0])
+
+    # Would land at +4s/+5s: waits until both fit within 3s instead of scheduling past the horizon.
+    assert sleeps == [2.0]
+    assert [s - now["ms"] for s in slots] == [2000, 3000]
+    assert slots[0] == start + 4000
+
+    # Requested chunk delays beyond the horizon are still honored without waiting.
+    assert [s - now["ms"] for s in await bucket.reserve("inst2", [0, 10_000])] == [0, 10_000]
+
+    impatient = RedisTokenBucket(redis, rate_per_s=1, burst=1, max_wait_s=0, max_schedule_ahead_ms=1000)  # type: ignore[arg-type]
+    late = await impatient.reserve("inst1", [0])
+    assert late[0] - now["ms"] > 1000
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fail_open(clock):
+    now, _ = clock
+
+    class _Down:
+        async def eval(self, *args):  # noqa: ARG002
+            raise ConnectionError("redis down")
+
+    bucket = RedisTokenBucket(_Redis(_Down()), rate_per_s=1)  # type: ignore[arg-type]
+    assert await bucket.reserve("inst1", [0, 1500]) == [now["ms"], now["ms"] + 1500]
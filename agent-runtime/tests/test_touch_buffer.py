@@ -0,0 +1,108 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from modules.centurion.repository.conversation_repository import ConversationRepository
+from modules.centurion.repository.lead_repository import LeadRepository
+from modules.centurion.repository.touch_buffer import ContactTouchBuffer
+
+
+class _FakeDb:
+    def __init__(self):
+        self.execute_calls: list[tuple[str, tuple]] = []
+        self.fail = False
+
+    async def execute(self, query: str, *args):
+        if self.fail:
+            raise RuntimeError("db down")
+        self.execute_calls.append((query, args))
+
+    def rows(self, table: str) -> list[dict]:
+        return [r for q, args in self.execute_calls if f"core.{table}" in q for r in json.loads(args[0])]
+
+
+_T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_touches_coalesce_per_row_and_keep_latest_timestamp():
+    db = _FakeDb()
+    touches = ContactTouchBuffer(db, flush_interval_s=60)  # type: ignore[arg-type]
+    leads = LeadRepository(db, touches=touches)  # type: ignore[arg-type]
+    conversations = ConversationRepository(db, touches=touches)  # type: ignore[arg-type]
+
+    for minutes in (0, 2, 1):
+        at = _T0 + timedelta(minutes=minutes)
+        await leads.touch_outbound(company_id="co1", lead_id="l1", at=at)
+        await conversations.touch_outbound(conversation_id="c1", at=at)
+    await leads.touch_outbound(company_id="co1", lead_id="l2", at=_T0)
+    assert db.execute_calls == []
+    assert touches.pending_count == 3
+
+    assert await touches.flush() == 3
+    assert len(db.execute_calls) == 2
+    assert db.rows("leads") == [
+        {"company_id": "co1", "lead_id": "l1", "at": (_T0 + timedelta(minutes=2)).isoformat()},
+        {"company_id": "co1", "lead_id": "l2", "at": _T0.isoformat()},
+    ]
+    assert db.rows("conversations") == [{"id": "c1", "at": (_T0 + timedelta(minutes=2)).isoformat()}]
+    await touches.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_size_wakes_flusher_and_close_drains():
+    db = _FakeDb()
+    touches = ContactTouchBuffer(db, flush_interval_s=60, batch_size=2)  # type: ignore[arg-type]
+    touches.touch_lead(company_id="co1", lead_id="l1")
+    touches.touch_conversation(conversation_id="c1")
+    await asyncio.sleep(0)  # batch_size reached: flusher wakes up
+    assert touches.pending_count == 0
+    assert len(db.execute_calls) == 2
+
+    touches.touch_lead(company_id="co1", lead_id="l2")
+    await touches.close()
+    assert db.rows("leads")[-1]["lead_id"] == "l2"
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows_until_max_attempts():
+    db = _FakeDb()
+    touches = ContactTouchBuffer(db, flush_interval_s=60)  # type: ignore[arg-type]
+    touches.touch_lead(company_id="co1", lead_id="l1", at=_T0)
+    db.fail = True
+    assert await touches.flush() == 0
+    assert touches.pending_count == 1
+
+    db.fail = False
+    assert await touches.flush() == 1
+    assert db.rows("leads")[0]["at"] == _T0.isoformat()
+
+    touches.touch_lead(company_id="co1", lead_id="l2", at=_T0)
+    db.fail = True
+    for _ in range(3):
+        await touches.flush()
+    assert touches.pending_count == 0
+    await touches.close()
+
+
+@pytest.mark.asyncio
+async def test_flush_touches_writes_only_that_lead_and_direct_mode_is_unbuffered():
+    db = _FakeDb()
+    touches = ContactTouchBuffer(db, flush_interval_s=60)  # type: ignore[arg-type]
+    leads = LeadRepository(db, touches=touches)  # type: ignore[arg-type]
+    await leads.touch_outbound(company_id="co1", lead_id="l1", at=_T0)
+    await leads.touch_outbound(company_id="co1", lead_id="l2", at=_T0)
+
+    await leads.flush_touches(company_id="co1", lead_id="l1")
+    await leads.flush_touches(company_id="co1", lead_id="missing")
+    assert [r["lead_id"] for r in db.rows("leads")] == ["l1"]
+    assert touches.pending_count == 1
+    await touches.close()
+
+    direct = _FakeDb()
+    await LeadRepository(direct).touch_outbound(company_id="co1", lead_id="l1")  # type: ignore[arg-type]
+    await ConversationRepository(direct).touch_outbound(conversation_id="c1")  # type: ignore[arg-type]
+    await LeadRepository(direct).flush_touches(company_id="co1", lead_id="l1")  # type: ignore[arg-type]
+    assert [args for _, args in direct.execute_calls] == [("l1", "co1"), ("c1",)]
@@ -5,18 +5,28 @@ import pytest
 from modules.centurion.jobs.conversation_watchdog import ConversationWatchdog
 
 
-class _Db:
-    def __init__(self, rows):
-        self.rows = rows
-        self.fetch_calls = []
-        self.execute_calls = []
+class _Store:
+    def __init__(self, stuck, requeued):
+        self.stuck = stuck
+        self.requeued = requeued
+        self.find_calls = []
+        self.requeue_calls = []
 
-    async def fetch(self, query: str, *args):
-        self.fetch_calls.append((query, args))
-        return self.rows
+    async def find_stuck(self, *, started_before, limit: int = 50):
+        self.find_calls.append((started_before, limit))
+        return self.stuck
 
-    async def execute(self, query: str, *args):
-        self.execute_calls.append((query, args))
+    async def requeue(self, conversation_id: str, *, started_before):  # noqa: ARG002
+        self.requeue_calls.append(conversation_id)
+        return self.requeued[conversation_id]
+
+
+class _Conversations:
+    def __init__(self):
+        self.cleared = []
+
+    async def clear_pending(self, conversation_id: str):
+        self.cleared.append(conversation_id)
 
 
 @pytest.mark.asyncio
@@ -26,18 +36,14 @@ async def test_watchdog_tick_recovers_processing_conversations(monkeypatch):
         lambda: types.SimpleNamespace(watchdog_stuck_after_s=10, watchdog_batch_size=5),
     )
 
-    db = _Db(
-        [
-            {"id": "c1", "pending_messages": ["hello"]},
-            {"id": "c2", "pending_messages": []},
-            {"id": "", "pending_messages": ["ignored"]},
-        ]
-    )
-    watchdog = ConversationWatchdog(db=db)  # type: ignore[arg-type]
+    watchdog = ConversationWatchdog(db=object(), redis=object())  # type: ignore[arg-type]
+    store = _Store(["c1", "c2", "", "c3"], {"c1": 1, "c2": 0, "c3": None})
+    conversations = _Conversations()
+    watchdog._store = store  # type: ignore[attr-defined]  # noqa: SLF001
+    watchdog._conversations = conversations  # type: ignore[attr-defined]  # noqa: SLF001
     await watchdog._tick()  # noqa: SLF001
 
-    assert db.fetch_calls
-    assert db.fetch_calls[0][1] == (10, 5)
-
-    executed_ids = [args[0] for _, args in db.execute_calls]
-    assert executed_ids == ["c1", "c2"]
+    assert store.find_calls and store.find_calls[0][1] == 5
+    assert store.requeue_calls == ["c1", "c2", "c3"]
+    # Only conversations that ended up idle get a terminal snapshot in Postgres.
+    assert conversations.cleared == ["c2"]
@@ -1,4 +1,5 @@
 import json
+from datetime import datetime, timedelta
 
 import pytest
 
@@ -9,9 +10,29 @@ class _Redis:
     def __init__(self):
         self.published: list[tuple[str, str]] = []
 
+        self.batches = 0
+
     async def publish(self, channel: str, message: str):
         self.published.append((channel, message))
 
+    async def publish_many(self, messages: list[tuple[str, str]]):
+        self.batches += 1
+        self.published.extend(messages)
+
+
+class _Idempotency:
+    def __init__(self, claimed: list[bool]):
+        self.claimed = claimed
+        self.calls: list[dict] = []
+        self.released: list[str] = []
+
+    async def claim_many(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.claimed
+
+    async def release(self, *, company_id: str, consumer: str, key: str):  # noqa: ARG002
+        self.released.append(key)
+
 
 @pytest.mark.asyncio
 async def test_send_text_publishes_message_sent_event():
@@ -62,3 +83,125 @@ async def test_send_message_publishes_media_message_sent_event():
     data = json.loads(payload)
     assert data["payload"]["messages"][0]["type"] == "image"
     assert data["payload"]["messages"][0]["asset_id"] == "asset-1"
+
+
+@pytest.mark.asyncio
+async def test_send_batch_claims_once_and_schedules_text_chunks():
+    redis = _Redis()
+    idem = _Idempotency([True, False, True, True])
+    sender = WhatsAppSender(redis, idempotency=idem)  # type: ignore[arg-type]
+
+    sent = await sender.send_batch(
+        company_id="co1",
+        instance_id="inst1",
+        to_number="+55119999",
+        messages=[
+            {"type": "text", "text": "a"},
+            {"type": "text", "text": "b"},
+            {"type": "image", "asset_id": "asset-1"},
+            {"type": "text", "text": "c"},
+        ],
+        correlation_id="corr1",
+        causation_id=None,
+        metadata=[{"chunk_index": i} for i in range(4)],
+        delay_ms=1500,
+    )
+
+    assert sent == [True, False, True, True]
+    assert len(idem.calls) == 1
+    assert idem.calls[0]["keys"] == ["corr1:0", "corr1:1", "corr1:2", "corr1:3"]
+    assert redis.batches == 1 and len(redis.published) == 3
+
+    payloads = [json.loads(raw)["payload"] for _, raw in redis.published]
+    assert "send_at" not in payloads[0]
+    # "b" (skipped as duplicate) still takes its slot, the image goes with it, "c" follows the image.
+    assert payloads[1]["raw"]["chunk_index"] == 2
+    image_at, text_at = (datetime.fromisoformat(p["send_at"]) for p in payloads[1:])
+    assert image_at == text_at
+
+
+@pytest.mark.asyncio
+async def test_send_batch_releases_claims_when_publish_fails():
+    class _Down(_Redis):
+        async def publish_many(self, messages):  # noqa: ARG002
+            raise ConnectionError("redis down")
+
+    idem = _Idempotency([True, True])
+    sender = WhatsAppSender(_Down(), idempotency=idem)  # type: ignore[arg-type]
+    start = datetime.fromisoformat("2024-01-01T10:00:00+00:00")
+
+    with pytest.raises(ConnectionError):
+        await sender.send_batch(
+            company_id="co1",
+            instance_id="inst1",
+            to_number="+55119999",
+            messages=[{"type": "text", "text": "a"}, {"type": "text", "text": "b"}],
+            correlation_id="corr1",
+            causation_id=None,
+            send_at=start,
+            delay_ms=1000,
+        )
+    assert idem.released == ["corr1:0", "corr1:1"]
+
+    redis = _Redis()
+    await WhatsAppSender(redis).send_batch(  # type: ignore[arg-type]
+        company_id="co1",
+        instance_id="inst1",
+        to_number="+55119999",
+        messages=[{"type": "text", "text": "a"}, {"type": "text", "text": "b"}],
+        correlation_id="corr1",
+        causation_id=None,
+        send_at=start,
+        delay_ms=1000,
+    )
+    send_at = [datetime.fromisoformat(json.loads(raw)["payload"]["send_at"]) for _, raw in redis.published]
+    assert send_at == [start, start + timedelta(seconds=1)]
+
+    with pytest.raises(ValueError):
+        await sender.send_batch(
+            company_id="co1",
+            instance_id="inst1",
+            to_number="+55119999",
+            messages=[{"type": "sticker"}],
+            correlation_id="corr1",
+            causation_id=None,
+        )
+
+
+@pytest.mark.asyncio
+async def test_send_batch_takes_send_at_from_pacer_slots():
+    class _Pacer:
+        def __init__(self):
+            self.calls: list[tuple[str, list[int], str]] = []
+
+        async def reserve(self, instance_id: str, offsets_ms: list[int], *, priority: str = "live"):
+            self.calls.append((instance_id, offsets_ms, priority))
+            return [1_700_000_000_000 + 1000 * i for i in range(len(offsets_ms))]
+
+    redis = _Redis()
+    pacer = _Pacer()
+    sender = WhatsAppSender(redis, idempotency=_Idempotency([True, False, True]), pacer=pacer)  # type: ignore[arg-type]
+
+    await sender.send_batch(
+        company_id="co1",
+        instance_id="inst1",
+        to_number="+55119999",
+        messages=[{"type": "text", "text": t} for t in "abc"],
+        correlation_id="corr1",
+        causation_id=None,
+        delay_ms=500,
+    )
+    await WhatsAppSender(redis, pacer=pacer).send_text(  # type: ignore[arg-type]
+        company_id="co1",
+        instance_id="inst1",
+        to_number="+55119999",
+        text="followup",
+        correlation_id="q1",
+        causation_id="q1",
+        priority="proactive",
+    )
+
+    # Only claimed chunks reserve slots; offsets keep the chunk spacing.
+    assert pacer.calls == [("inst1", [0, 1000], "live"), ("inst1", [0], "proactive")]
+    send_at = [json.loads(raw)["payload"]["send_at"] for _, raw in redis.published]
+    assert [datetime.fromisoformat(s).timestamp() for s in send_at] == [1_700_000_000, 1_700_000_001, 1_700_000_000]
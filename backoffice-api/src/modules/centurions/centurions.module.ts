@@ -1,5 +1,6 @@
 import { Module } from "@nestjs/common";
 
+import { RedisModule } from "../../infrastructure/redis/redis.module";
 import { SupabaseModule } from "../../infrastructure/supabase/supabase.module";
 import { CenturionTestController } from "./controllers/centurion-test.controller";
 import { CenturionsController } from "./controllers/centurions.controller";
@@ -7,7 +8,7 @@ import { CenturionTestService } from "./services/centurion-test.service";
 import { CenturionsService } from "./services/centurions.service";
 
 @Module({
-  imports: [SupabaseModule],
+  imports: [SupabaseModule, RedisModule],
   controllers: [CenturionsController, CenturionTestController],
   providers: [CenturionsService, CenturionTestService],
   exports: [CenturionsService],
@@ -17,11 +17,15 @@ function createQuery(result: any) {
   return q;
 }
 
+function createBus() {
+  return { publish: jest.fn().mockResolvedValue(undefined) } as any;
+}
+
 describe("CenturionsService", () => {
   it("list returns data", async () => {
     const q = createQuery({ data: [{ id: "cent1" }], error: null });
     const admin = { schema: jest.fn(() => ({ from: jest.fn(() => q) })) };
-    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any);
+    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any, createBus());
 
     await expect(service.list("c1")).resolves.toEqual([{ id: "cent1" }]);
   });
@@ -29,7 +33,7 @@ describe("CenturionsService", () => {
   it("get throws NotFoundError when missing", async () => {
     const q = createQuery({ data: null, error: null });
     const admin = { schema: jest.fn(() => ({ from: jest.fn(() => q) })) };
-    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any);
+    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any, createBus());
 
     await expect(service.get("c1", "cent1")).rejects.toBeInstanceOf(NotFoundError);
   });
@@ -37,7 +41,7 @@ describe("CenturionsService", () => {
   it("create applies defaults", async () => {
     const q = createQuery({ data: { id: "cent1" }, error: null });
     const admin = { schema: jest.fn(() => ({ from: jest.fn(() => q) })) };
-    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any);
+    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any, createBus());
 
     await service.create("c1", { name: "Alpha", slug: "alpha", prompt: "Hi" } as any);
 
@@ -62,7 +66,7 @@ describe("CenturionsService", () => {
   it("update builds patch only from provided fields", async () => {
     const q = createQuery({ data: { id: "cent1", name: "New" }, error: null });
     const admin = { schema: jest.fn(() => ({ from: jest.fn(() => q) })) };
-    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any);
+    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any, createBus());
 
     await service.update("c1", "cent1", { name: "New", personality: null } as any);
 
@@ -73,7 +77,7 @@ describe("CenturionsService", () => {
   it("update throws NotFoundError when centurion is missing", async () => {
     const q = createQuery({ data: null, error: null });
     const admin = { schema: jest.fn(() => ({ from: jest.fn(() => q) })) };
-    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any);
+    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any, createBus());
 
     await expect(service.update("c1", "cent1", { name: "New" } as any)).rejects.toBeInstanceOf(NotFoundError);
   });
@@ -81,8 +85,36 @@ describe("CenturionsService", () => {
   it("delete throws ValidationError on error", async () => {
     const q = createQuery({ data: null, error: { message: "fail" } });
     const admin = { schema: jest.fn(() => ({ from: jest.fn(() => q) })) };
-    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any);
+    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any, createBus());
 
     await expect(service.delete("c1", "cent1")).rejects.toBeInstanceOf(ValidationError);
   });
+
+  it("update publishes config.updated so runtime caches are dropped", async () => {
+    const q = createQuery({ data: { id: "cent1", name: "New" }, error: null });
+    const admin = { schema: jest.fn(() => ({ from: jest.fn(() => q) })) };
+    const bus = createBus();
+    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any, bus);
+
+    await service.update("cmp1", "cent1", { name: "New" } as any);
+
+    expect(bus.publish).toHaveBeenCalledWith(
+      "config.updated",
+      expect.objectContaining({
+        type: "config.updated",
+        company_id: "cmp1",
+        payload: { entity: "centurion_config", entity_id: "cent1", action: "updated" },
+      }),
+    );
+  });
+
+  it("publish failures do not fail the write", async () => {
+    const q = createQuery({ data: null, error: null });
+    const admin = { schema: jest.fn(() => ({ from: jest.fn(() => q) })) };
+    const bus = { publish: jest.fn().mockRejectedValue(new Error("redis down")) } as any;
+    const service = new CenturionsService({ getAdminClient: jest.fn(() => admin as any) } as any, bus);
+
+    await expect(service.delete("cmp1", "cent1")).resolves.toBeUndefined();
+    expect(bus.publish).toHaveBeenCalledTimes(1);
+  });
 });
@@ -1,14 +1,27 @@
-import { Injectable } from "@nestjs/common";
+import { Injectable, Logger } from "@nestjs/common";
+import { randomUUID } from "crypto";
 
-import { NotFoundError, ValidationError } from "@wolfgang/contracts";
+import {
+  ConfigUpdatedEventSchema,
+  NotFoundError,
+  RedisChannels,
+  ValidationError,
+  type ConfigUpdatedPayload,
+} from "@wolfgang/contracts";
 
+import { EventBusService } from "../../../infrastructure/messaging/event-bus.service";
 import { SupabaseService } from "../../../infrastructure/supabase/supabase.service";
 import type { CreateCenturionDto, UpdateCenturionDto } from "../dto/create-centurion.dto";
 import type { CenturionResponseDto } from "../dto/centurion-response.dto";
 
 @Injectable()
 export class CenturionsService {
-  constructor(private readonly supabase: SupabaseService) {}
+  private readonly logger = new Logger(CenturionsService.name);
+
+  constructor(
+    private readonly supabase: SupabaseService,
+    private readonly events: EventBusService,
+  ) {}
 
   private toJsonObject(value: unknown): Record<string, unknown> {
     if (!value || typeof value !== "object" || Array.isArray(value)) return {};
@@ -23,6 +36,26 @@ export class CenturionsService {
     return this.supabase.getAdminClient();
   }
 
+  // agent-runtime caches centurion configs per replica; this drops them right away instead of waiting for the TTL.
+  private async publishConfigUpdated(companyId: string, centurionId: string, action: ConfigUpdatedPayload["action"]) {
+    try {
+      const event = ConfigUpdatedEventSchema.parse({
+        id: randomUUID(),
+        type: "config.updated",
+        version: 1,
+        occurred_at: new Date().toISOString(),
+        company_id: companyId,
+        source: "backoffice-api",
+        correlation_id: randomUUID(),
+        causation_id: null,
+        payload: { entity: "centurion_config", entity_id: centurionId, action },
+      });
+      await this.events.publish(RedisChannels.CONFIG_UPDATED, event);
+    } catch (err) {
+      this.logger.warn(`config.updated publish failed: ${(err as Error)?.message ?? err}`);
+    }
+  }
+
   async list(companyId: string): Promise<CenturionResponseDto[]> {
     const { data, error } = await this.admin()
       .schema("core")
@@ -72,7 +105,9 @@ export class CenturionsService {
       .select("*")
       .single();
     if (error) throw new ValidationError("Failed to create centurion", { error });
-    return data as unknown as CenturionResponseDto;
+    const created = data as unknown as CenturionResponseDto;
+    await this.publishConfigUpdated(companyId, created.id, "created");
+    return created;
   }
 
   async update(companyId: string, centurionId: string, dto: UpdateCenturionDto): Promise<CenturionResponseDto> {
@@ -109,6 +144,7 @@ export class CenturionsService {
       .maybeSingle();
     if (error) throw new ValidationError("Failed to update centurion", { error });
     if (!data) throw new NotFoundError("Centurion not found");
+    await this.publishConfigUpdated(companyId, centurionId, "updated");
     return data as unknown as CenturionResponseDto;
   }
 
@@ -120,5 +156,6 @@ export class CenturionsService {
       .eq("company_id", companyId)
       .eq("id", centurionId);
     if (error) throw new ValidationError("Failed to delete centurion", { error });
+    await this.publishConfigUpdated(companyId, centurionId, "deleted");
   }
 }
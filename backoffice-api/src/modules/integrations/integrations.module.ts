@@ -1,5 +1,6 @@
 import { Module } from "@nestjs/common";
 
+import { RedisModule } from "../../infrastructure/redis/redis.module";
 import { SupabaseModule } from "../../infrastructure/supabase/supabase.module";
 import { CompanyIntegrationsController } from "./controllers/company-integrations.controller";
 import { CredentialSetsController } from "./controllers/credential-sets.controller";
@@ -9,7 +10,7 @@ import { IntegrationsResolverService } from "./services/integrations-resolver.se
 import { IntegrationValidatorService } from "./services/integration-validator.service";
 
 @Module({
-  imports: [SupabaseModule],
+  imports: [SupabaseModule, RedisModule],
   controllers: [CredentialSetsController, CompanyIntegrationsController],
   providers: [CredentialSetsService, CompanyIntegrationsService, IntegrationsResolverService, IntegrationValidatorService],
   exports: [IntegrationsResolverService],
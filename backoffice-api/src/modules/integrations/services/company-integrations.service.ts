@@ -1,9 +1,11 @@
-import { Injectable } from "@nestjs/common";
+import { Injectable, Logger } from "@nestjs/common";
+import { randomUUID } from "crypto";
 
-import { ValidationError } from "@wolfgang/contracts";
+import { ConfigUpdatedEventSchema, RedisChannels, ValidationError, type ConfigUpdatedPayload } from "@wolfgang/contracts";
 import { encryptJson } from "@wolfgang/crypto";
 
 import { requireAppEncryptionKey } from "../../../common/utils/require-encryption-key";
+import { EventBusService } from "../../../infrastructure/messaging/event-bus.service";
 import { SupabaseService } from "../../../infrastructure/supabase/supabase.service";
 import type { IntegrationProvider } from "../dto/create-credential-set.dto";
 import type { UpsertCompanyIntegrationDto } from "../dto/upsert-company-integration.dto";
@@ -25,12 +27,37 @@ type CompanyIntegrationRow = {
 
 @Injectable()
 export class CompanyIntegrationsService {
-  constructor(private readonly supabase: SupabaseService) {}
+  private readonly logger = new Logger(CompanyIntegrationsService.name);
+
+  constructor(
+    private readonly supabase: SupabaseService,
+    private readonly events: EventBusService,
+  ) {}
 
   private admin() {
     return this.supabase.getAdminClient();
   }
 
+  // agent-runtime caches resolved integrations per replica; this drops the company's entries right away.
+  private async publishConfigUpdated(companyId: string, provider: IntegrationProvider, action: ConfigUpdatedPayload["action"]) {
+    try {
+      const event = ConfigUpdatedEventSchema.parse({
+        id: randomUUID(),
+        type: "config.updated",
+        version: 1,
+        occurred_at: new Date().toISOString(),
+        company_id: companyId,
+        source: "backoffice-api",
+        correlation_id: randomUUID(),
+        causation_id: null,
+        payload: { entity: "integration", entity_id: provider, action },
+      });
+      await this.events.publish(RedisChannels.CONFIG_UPDATED, event);
+    } catch (err) {
+      this.logger.warn(`config.updated publish failed: ${(err as Error)?.message ?? err}`);
+    }
+  }
+
   async list(companyId: string) {
     const { data, error } = await this.admin()
       .schema("core")
@@ -83,6 +110,7 @@ export class CompanyIntegrationsService {
       .select("company_id, provider, mode, credential_set_id, config_override, secrets_override_enc, status, last_validated_at, last_error, created_at, updated_at")
       .single();
     if (error) throw new ValidationError("Failed to upsert company integration", { error });
+    await this.publishConfigUpdated(companyId, provider, "updated");
 
     const row = data as unknown as CompanyIntegrationRow;
     return {
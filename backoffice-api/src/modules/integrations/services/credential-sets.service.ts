@@ -1,9 +1,11 @@
-import { Injectable } from "@nestjs/common";
+import { Injectable, Logger } from "@nestjs/common";
+import { randomUUID } from "crypto";
 
-import { ValidationError } from "@wolfgang/contracts";
+import { ConfigUpdatedEventSchema, RedisChannels, ValidationError, type ConfigUpdatedPayload } from "@wolfgang/contracts";
 import { encryptJson } from "@wolfgang/crypto";
 
 import { requireAppEncryptionKey } from "../../../common/utils/require-encryption-key";
+import { EventBusService } from "../../../infrastructure/messaging/event-bus.service";
 import { SupabaseService } from "../../../infrastructure/supabase/supabase.service";
 import type { CreateCredentialSetDto, IntegrationProvider } from "../dto/create-credential-set.dto";
 import type { UpdateCredentialSetDto } from "../dto/update-credential-set.dto";
@@ -21,12 +23,37 @@ type CredentialSetRow = {
 
 @Injectable()
 export class CredentialSetsService {
-  constructor(private readonly supabase: SupabaseService) {}
+  private readonly logger = new Logger(CredentialSetsService.name);
+
+  constructor(
+    private readonly supabase: SupabaseService,
+    private readonly events: EventBusService,
+  ) {}
 
   private admin() {
     return this.supabase.getAdminClient();
   }
 
+  // Credential sets are global, so agent-runtime drops every cached integration (company_id "global").
+  private async publishConfigUpdated(setId: string, action: ConfigUpdatedPayload["action"]) {
+    try {
+      const event = ConfigUpdatedEventSchema.parse({
+        id: randomUUID(),
+        type: "config.updated",
+        version: 1,
+        occurred_at: new Date().toISOString(),
+        company_id: "global",
+        source: "backoffice-api",
+        correlation_id: randomUUID(),
+        causation_id: null,
+        payload: { entity: "integration_credential_set", entity_id: setId, action },
+      });
+      await this.events.publish(RedisChannels.CONFIG_UPDATED, event);
+    } catch (err) {
+      this.logger.warn(`config.updated publish failed: ${(err as Error)?.message ?? err}`);
+    }
+  }
+
   async list(provider?: string) {
     let q = this.admin()
       .schema("core")
@@ -114,6 +141,8 @@ export class CredentialSetsService {
     if (dto.is_default) {
       await this.setDefault(row.id);
       row.is_default = true;
+    } else {
+      await this.publishConfigUpdated(row.id, "updated");
     }
 
     return {
@@ -131,10 +160,12 @@ export class CredentialSetsService {
   async remove(id: string): Promise<void> {
     const { error } = await this.admin().schema("core").from("integration_credential_sets").delete().eq("id", id);
     if (error) throw new ValidationError("Failed to delete credential set", { error });
+    await this.publishConfigUpdated(id, "deleted");
   }
 
   async setDefault(id: string): Promise<void> {
     const { error } = await this.admin().schema("core").rpc("fn_set_default_integration_credential_set", { p_id: id });
     if (error) throw new ValidationError("Failed to set default credential set", { error });
+    await this.publishConfigUpdated(id, "updated");
   }
 }
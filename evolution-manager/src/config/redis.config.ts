@@ -1,10 +1,20 @@
+export type EventTransport = "pubsub" | "streams" | "both";
+
 export type RedisConfig = {
   url: string;
+  eventTransport: EventTransport;
+  eventStreamMaxLen: number;
 };
 
+function parseEventTransport(raw: string | undefined): EventTransport {
+  return raw === "streams" || raw === "both" ? raw : "pubsub";
+}
+
 export const redisConfig = () => ({
   redis: {
     url: process.env.REDIS_URL ?? "redis://127.0.0.1:6379",
+    eventTransport: parseEventTransport(process.env.EVENT_TRANSPORT),
+    eventStreamMaxLen: Number(process.env.EVENT_STREAM_MAXLEN ?? 100000),
   } satisfies RedisConfig,
 });
 
@@ -14,6 +14,7 @@ import { PrometheusService } from "./prometheus.service";
       useClass: PrometheusInterceptor,
     },
   ],
+  exports: [PrometheusService],
 })
 export class PrometheusModule {}
 
@@ -25,6 +25,7 @@ export class PrometheusService {
   private readonly enabled = (process.env.PROMETHEUS_ENABLED ?? "true") !== "false";
   private readonly httpRequestsTotal: Counter<HttpLabels>;
   private readonly httpRequestDuration: Histogram<HttpLabels>;
+  private readonly sendAtEarlyTotal: Counter<"channel_type">;
 
   constructor() {
     if (this.enabled) {
@@ -44,6 +45,11 @@ export class PrometheusService {
       "Duração dos requests HTTP em segundos",
       ["method", "route", "status_code"],
     );
+    this.sendAtEarlyTotal = getOrCreateCounter(
+      "message_sent_send_at_early_total",
+      "Envios feitos antes do send_at por exceder MAX_SEND_AT_WAIT_MS (pacing do agent-runtime ignorado)",
+      ["channel_type"],
+    );
   }
 
   observeHttpRequest(args: { method: string; route: string; statusCode: number; durationMs: number }) {
@@ -57,6 +63,11 @@ export class PrometheusService {
     this.httpRequestDuration.observe(labels, args.durationMs / 1000);
   }
 
+  countEarlySend(channelType: string) {
+    if (!this.enabled) return;
+    this.sendAtEarlyTotal.inc({ channel_type: channelType }, 1);
+  }
+
   async metrics(): Promise<string> {
     return register.metrics();
   }
@@ -2,7 +2,7 @@ import { Injectable, OnModuleDestroy } from "@nestjs/common";
 import { ConfigService } from "@nestjs/config";
 import Redis from "ioredis";
 
-import type { RedisConfig } from "../../config/redis.config";
+import type { EventTransport, RedisConfig } from "../../config/redis.config";
 
 type SubscribeHandler = (payload: string) => void | Promise<void>;
 
@@ -11,11 +11,17 @@ export class RedisService implements OnModuleDestroy {
   private readonly client: Redis;
   private readonly publisher: Redis;
   private readonly subscriber: Redis;
+  readonly eventTransport: EventTransport;
+  private readonly eventStreamMaxLen: number;
 
   constructor(private readonly configService: ConfigService) {
     const cfg = this.configService.get<RedisConfig>("redis") ?? {
       url: process.env.REDIS_URL ?? "redis://127.0.0.1:6379",
+      eventTransport: "pubsub",
+      eventStreamMaxLen: 100000,
     };
+    this.eventTransport = cfg.eventTransport;
+    this.eventStreamMaxLen = cfg.eventStreamMaxLen;
 
     const options = { lazyConnect: true } as const;
     this.client = new Redis(cfg.url, options);
@@ -57,6 +63,10 @@ export class RedisService implements OnModuleDestroy {
     return this.publisher.publish(channel, payload);
   }
 
+  async xadd(stream: string, payload: string): Promise<string | null> {
+    return this.publisher.xadd(stream, "MAXLEN", "~", String(this.eventStreamMaxLen), "*", "data", payload);
+  }
+
   async subscribe(channel: string, handler: SubscribeHandler): Promise<() => Promise<void>> {
     const onMessage = async (incomingChannel: string, message: string) => {
       if (incomingChannel !== channel) return;
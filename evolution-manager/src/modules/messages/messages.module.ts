@@ -1,12 +1,13 @@
 import { Module } from "@nestjs/common";
 
 import { InstancesModule } from "../instances/instances.module";
+import { PrometheusModule } from "../../infrastructure/metrics/prometheus.module";
 import { RedisModule } from "../../infrastructure/redis/redis.module";
 import { SupabaseModule } from "../../infrastructure/supabase/supabase.module";
 import { MessagesSubscriber } from "./subscribers/messages.subscriber";
 
 @Module({
-  imports: [RedisModule, InstancesModule, SupabaseModule],
+  imports: [RedisModule, InstancesModule, SupabaseModule, PrometheusModule],
   providers: [MessagesSubscriber],
 })
 export class MessagesModule {}
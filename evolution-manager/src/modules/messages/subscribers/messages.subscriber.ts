@@ -3,6 +3,7 @@ import { Injectable, OnModuleDestroy, OnModuleInit } from "@nestjs/common";
 import { MessageSentEventSchema, RedisChannels } from "@wolfgang/contracts";
 
 import { LoggerService } from "../../../common/logging/logger.service";
+import { PrometheusService } from "../../../infrastructure/metrics/prometheus.service";
 import { RedisService } from "../../../infrastructure/redis/redis.service";
 import { SupabaseService } from "../../../infrastructure/supabase/supabase.service";
 import { InstagramService } from "../../instances/channels/instagram.service";
@@ -13,6 +14,10 @@ import { InstancesService } from "../../instances/services/instances.service";
 const MESSAGE_SENT_DEDUPE_TTL_S = 7 * 24 * 3600;
 const SUBSCRIBE_RETRY_BASE_DELAY_MS = 2000;
 const SUBSCRIBE_RETRY_MAX_DELAY_MS = 30000;
+// Upper bound for honoring payload.send_at (chunk pacing), so a bad clock cannot park a reply.
+// agent-runtime never schedules further ahead than OUTBOUND_MAX_SCHEDULE_AHEAD_MS (50s by default,
+// keep it below this); anything past the cap goes out early and is counted.
+const MAX_SEND_AT_WAIT_MS = 60000;
 
 @Injectable()
 export class MessagesSubscriber implements OnModuleInit, OnModuleDestroy {
@@ -27,6 +32,7 @@ export class MessagesSubscriber implements OnModuleInit, OnModuleDestroy {
     private readonly instagram: InstagramService,
     private readonly supabase: SupabaseService,
     private readonly logger: LoggerService,
+    private readonly prometheus: PrometheusService,
   ) {}
 
   private admin() {
@@ -67,6 +73,22 @@ export class MessagesSubscriber implements OnModuleInit, OnModuleDestroy {
         return;
       }
 
+      if (event.payload.send_at) {
+        const waitMs = Date.parse(event.payload.send_at) - Date.now();
+        if (waitMs > MAX_SEND_AT_WAIT_MS) {
+          this.prometheus.countEarlySend(instance.channel_type);
+          this.logger.warn("message_sent.send_at_capped", {
+            instance_id: instance.id,
+            correlation_id: event.correlation_id,
+            event_id: event.id,
+            early_ms: waitMs - MAX_SEND_AT_WAIT_MS,
+          });
+        }
+        if (waitMs > 0) {
+          await this.sleep(Math.min(waitMs, MAX_SEND_AT_WAIT_MS));
+        }
+      }
+
       for (const [idx, msg] of event.payload.messages.entries()) {
         if (instance.channel_type === "telegram" && !instance.telegram_bot_token_resolved) {
           this.logger.warn("message_sent.telegram_missing_token", {
@@ -5,6 +5,7 @@ import {
   InstanceStatusEventSchema,
   MessageReceivedEventSchema,
   RedisChannels,
+  eventStreamKey,
   type InstanceStatusPayload,
   type MessageReceivedPayload,
 } from "@wolfgang/contracts";
@@ -27,7 +28,14 @@ export class EventPublisherService {
       causation_id: null,
       payload,
     });
-    await this.redis.publish(RedisChannels.MESSAGE_RECEIVED, JSON.stringify(event));
+    const raw = JSON.stringify(event);
+    // "both" is the rollout step: keep pub/sub consumers fed until agent-runtime reads the stream.
+    if (this.redis.eventTransport !== "pubsub") {
+      await this.redis.xadd(eventStreamKey(RedisChannels.MESSAGE_RECEIVED), raw);
+    }
+    if (this.redis.eventTransport !== "streams") {
+      await this.redis.publish(RedisChannels.MESSAGE_RECEIVED, raw);
+    }
   }
 
   async publishInstanceStatus(companyId: string, payload: InstanceStatusPayload, correlationId: string) {
@@ -7,6 +7,11 @@ export const RedisChannels = {
   CONTRACT_CREATED: "contract.created",
   CONTRACT_SIGNED: "contract.signed",
   INSTANCE_STATUS: "instance.status",
+  CONFIG_UPDATED: "config.updated",
 } as const;
 
 export type RedisChannel = (typeof RedisChannels)[keyof typeof RedisChannels];
+
+// EVENT_TRANSPORT=streams: producers XADD `{ data: <envelope JSON> }` here and agent-runtime reads it
+// through a consumer group.
+export const eventStreamKey = (channel: RedisChannel) => `stream:${channel}`;
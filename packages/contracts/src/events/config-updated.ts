@@ -0,0 +1,16 @@
+import { z } from "zod";
+
+import { buildEventSchema, type EventEnvelope } from "./base";
+
+// Credential sets are global: their events carry company_id "global" and drop every company's integrations.
+export const ConfigUpdatedPayloadSchema = z.object({
+  entity: z.enum(["centurion_config", "channel_instance", "integration", "integration_credential_set"]),
+  entity_id: z.string().min(1),
+  action: z.enum(["created", "updated", "deleted"]),
+});
+
+export type ConfigUpdatedPayload = z.infer<typeof ConfigUpdatedPayloadSchema>;
+
+export const ConfigUpdatedEventSchema = buildEventSchema("config.updated", ConfigUpdatedPayloadSchema);
+
+export type ConfigUpdatedEvent = EventEnvelope<"config.updated", ConfigUpdatedPayload>;
@@ -1,4 +1,5 @@
 export * from "./base";
+export * from "./config-updated";
 export * from "./debounce_timer";
 export * from "./contract-created";
 export * from "./contract-signed";
@@ -1,4 +1,4 @@
-import { OutboundMessageSchema } from "./message-sent";
+import { MessageSentPayloadSchema, OutboundMessageSchema } from "./message-sent";
 
 describe("OutboundMessageSchema", () => {
   it("accepts text message", () => {
@@ -20,3 +20,16 @@ describe("OutboundMessageSchema", () => {
   });
 });
 
+
+describe("MessageSentPayloadSchema", () => {
+  const base = { instance_id: "inst1", to: "+5511999", messages: [{ type: "text", text: "oi" }] };
+
+  it("accepts an optional send_at timestamp", () => {
+    expect(MessageSentPayloadSchema.safeParse(base).success).toBe(true);
+    expect(MessageSentPayloadSchema.safeParse({ ...base, send_at: "2024-01-01T10:00:01.500000+00:00" }).success).toBe(true);
+  });
+
+  it("rejects a malformed send_at", () => {
+    expect(MessageSentPayloadSchema.safeParse({ ...base, send_at: "soon" }).success).toBe(false);
+  });
+});
@@ -49,6 +49,8 @@ export const MessageSentPayloadSchema = z.object({
   to: z.string().min(3),
   messages: z.array(OutboundMessageSchema).min(1),
   raw: z.record(z.any()).optional().default({}),
+  // Chunk pacing: do not deliver before this instant.
+  send_at: z.string().datetime({ offset: true }).optional(),
 });
 
 export type MessageSentPayload = z.infer<typeof MessageSentPayloadSchema>;
@@ -0,0 +1,193 @@
+-- core.messages: particionamento mensal por created_at + coluna archived_at.
+-- Leituras de histórico filtravam `not (metadata ? 'archived')` (sem índice possível) e o arquivamento
+-- reescrevia o jsonb de cada linha antiga. Agora:
+--   - `archived_at` é coluna real, servida por índice parcial (conversation_id, created_at desc) where archived_at is null
+--   - filtros por created_at fazem partition pruning
+--   - meses antigos são destacados (detach) inteiros via core.detach_messages_partitions_before() (MemoryCleanupWorker)
+-- A tabela legada não é copiada: vira a partição FROM (MINVALUE) TO (<próximo mês>), sem reescrever linhas.
+-- O flag jsonb 'archived' das linhas legadas fica onde está e não é mais lido; o arquivamento em lotes do
+-- MemoryCleanupWorker preenche archived_at nelas.
+
+-- 1) Tabela legada sai do caminho (FK de followup_queue aponta para ela).
+alter table if exists core.followup_queue drop constraint if exists followup_queue_message_id_fkey;
+
+do $$
+begin
+  if to_regclass('core.messages') is not null
+     and not exists (
+       select 1 from pg_partitioned_table pt
+       where pt.partrelid = 'core.messages'::regclass
+     ) then
+    alter table core.messages rename to messages_legacy;
+    alter table core.messages_legacy rename constraint messages_pkey to messages_legacy_pkey;
+    alter index if exists core.idx_messages_conversation rename to idx_messages_legacy_conversation;
+    alter index if exists core.idx_messages_lead rename to idx_messages_legacy_lead;
+    alter index if exists core.idx_messages_company_created_at rename to idx_messages_legacy_company_created_at;
+  end if;
+end $$;
+
+-- 2) Tabela particionada (PK precisa incluir a chave de partição).
+create table if not exists core.messages (
+  id uuid not null default gen_random_uuid(),
+  conversation_id uuid not null references core.conversations(id) on delete cascade,
+  company_id uuid not null references core.companies(id) on delete cascade,
+  lead_id uuid not null references core.leads(id) on delete cascade,
+
+  direction text not null,
+  content_type text not null,
+  content text,
+
+  audio_transcription text,
+  image_description text,
+  media_url text,
+
+  channel_message_id text,
+  metadata jsonb default '{}'::jsonb,
+
+  created_at timestamptz not null default now(),
+  archived_at timestamptz,
+
+  primary key (id, created_at),
+  -- Mesmos nomes das checks da tabela legada (00009): o ATTACH PARTITION casa constraints por nome.
+  constraint messages_direction_check check (direction in ('inbound', 'outbound')),
+  constraint messages_content_type_check check (content_type in ('text', 'audio', 'image', 'video', 'document'))
+) partition by range (created_at);
+
+comment on column core.messages.content is 'Texto da mensagem ou URL temporária da mídia';
+comment on column core.messages.media_url is 'URL permanente da mídia (se aplicável, ex: Storage)';
+comment on column core.messages.audio_transcription is 'Transcrição do áudio processada via STT (Speech-to-Text)';
+comment on column core.messages.image_description is 'Descrição da imagem processada via Vision API';
+comment on column core.messages.archived_at is 'Quando a mensagem saiu da janela de histórico ativa (null = ativa)';
+
+create table if not exists core.messages_default partition of core.messages default;
+
+-- Índices no pai são propagados para todas as partições (atuais e futuras).
+create index if not exists idx_messages_conversation_active
+  on core.messages(conversation_id, created_at desc)
+  where archived_at is null;
+create index if not exists idx_messages_conversation_created_at on core.messages(conversation_id, created_at desc);
+create index if not exists idx_messages_lead on core.messages(lead_id);
+create index if not exists idx_messages_company_created_at on core.messages(company_id, created_at desc);
+create index if not exists idx_messages_company_channel_message_id
+  on core.messages(company_id, channel_message_id)
+  where channel_message_id is not null;
+
+-- 3) Partições mensais.
+create or replace function core.ensure_messages_partitions(p_from date default null, p_months_ahead int default 2)
+returns int
+language plpgsql
+as $$
+declare
+  v_month date := date_trunc('month', coalesce(p_from, now()::date))::date;
+  v_last date := (date_trunc('month', now()) + make_interval(months => greatest(p_months_ahead, 0)))::date;
+  v_legacy_until date;
+  v_name text;
+  v_created int := 0;
+begin
+  -- Meses cobertos pela tabela legada anexada não ganham partição própria (os ranges não podem se sobrepor).
+  select (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'TO \(''([^'']+)''\)'))[1]::date
+    into v_legacy_until
+  from pg_inherits i
+  join pg_class c on c.oid = i.inhrelid
+  where i.inhparent = 'core.messages'::regclass
+    and c.relname = 'messages_legacy';
+  v_month := greatest(v_month, coalesce(v_legacy_until, v_month));
+
+  while v_month <= v_last loop
+    v_name := format('messages_%s', to_char(v_month, 'YYYY_MM'));
+    if to_regclass(format('core.%I', v_name)) is null then
+      execute format(
+        'create table core.%I partition of core.messages for values from (%L) to (%L)',
+        v_name,
+        v_month::timestamptz,
+        (v_month + interval '1 month')::timestamptz
+      );
+      v_created := v_created + 1;
+    end if;
+    v_month := (v_month + interval '1 month')::date;
+  end loop;
+  return v_created;
+end;
+$$;
+
+revoke all on function core.ensure_messages_partitions(date, int) from public;
+grant execute on function core.ensure_messages_partitions(date, int) to service_role;
+
+-- Destaca partições inteiramente anteriores a p_before (ficam como tabelas avulsas `archived_*` para
+-- auditoria/export; drop é decisão manual). Operação de catálogo, sem reescrever linhas.
+-- Chamada pelo MemoryCleanupWorker (MESSAGES_DETACH_AFTER_MONTHS).
+create or replace function core.detach_messages_partitions_before(p_before timestamptz)
+returns setof text
+language plpgsql
+as $$
+declare
+  r record;
+begin
+  for r in
+    select c.relname,
+           (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'TO \(''([^'']+)''\)'))[1]::timestamptz as upper_bound
+    from pg_inherits i
+    join pg_class c on c.oid = i.inhrelid
+    where i.inhparent = 'core.messages'::regclass
+      and c.relname <> 'messages_default'
+  loop
+    if r.upper_bound is not null and r.upper_bound <= p_before then
+      execute format('alter table core.messages detach partition core.%I', r.relname);
+      execute format('alter table core.%I rename to %I', r.relname, 'archived_' || r.relname);
+      return next 'archived_' || r.relname;
+    end if;
+  end loop;
+end;
+$$;
+
+revoke all on function core.detach_messages_partitions_before(timestamptz) from public;
+grant execute on function core.detach_messages_partitions_before(timestamptz) to service_role;
+
+-- 4) Tabela legada vira partição (sem cópia). O ATTACH varre a tabela uma vez para validar o range e
+-- cria os índices do pai que ela ainda não tem; nenhuma linha é reescrita.
+do $$
+declare
+  v_until timestamptz := date_trunc('month', now()) + interval '1 month';
+begin
+  if to_regclass('core.messages_legacy') is not null
+     and not exists (
+       select 1 from pg_inherits i
+       where i.inhrelid = 'core.messages_legacy'::regclass
+     ) then
+    alter table core.messages_legacy add column if not exists archived_at timestamptz;
+    execute format(
+      'alter table core.messages attach partition core.messages_legacy for values from (minvalue) to (%L)',
+      v_until
+    );
+  end if;
+
+  -- Partições dos próximos meses já existem antes do primeiro tick do worker.
+  perform core.ensure_messages_partitions(null, 3);
+end $$;
+
+-- 5) RLS/grants (recriados na nova tabela).
+alter table core.messages enable row level security;
+
+drop policy if exists messages_tenant_scope on core.messages;
+create policy messages_tenant_scope
+  on core.messages
+  for all
+  to authenticated
+  using (core.can_access_company(company_id))
+  with check (core.can_access_company(company_id));
+
+grant select, insert, update, delete on table core.messages to authenticated;
+grant select, insert, update, delete on table core.messages to service_role;
+
+-- followup_queue.message_id vira referência lógica (FK para tabela particionada exigiria created_at).
+comment on column core.followup_queue.message_id is 'core.messages.id (referência lógica; tabela particionada por created_at)';
+
+-- Down (manual):
+-- create table core.messages_legacy_down (like core.messages including defaults);
+-- insert into core.messages_legacy_down select * from core.messages;
+-- alter table core.messages_legacy_down drop column archived_at;
+-- drop table core.messages cascade;
+-- alter table core.messages_legacy_down rename to messages;
+-- alter table core.messages add primary key (id);
+-- drop function if exists core.ensure_messages_partitions(date, int);
+-- drop function if exists core.detach_messages_partitions_before(timestamptz);
@@ -0,0 +1,58 @@
+-- Agno sessions saem de `core.conversations.metadata->agno_session` para uma tabela estreita.
+-- Cada run do agente reescrevia a linha (larga e quente) de conversations, disputando lock com
+-- debounce/pending/watchdog e gerando bloat. Aqui cada conversa tem uma linha pequena, atualizada via HOT.
+
+create table if not exists core.agno_sessions (
+  conversation_id uuid primary key references core.conversations(id) on delete cascade,
+  company_id uuid not null references core.companies(id) on delete cascade,
+
+  -- AgentSession.to_dict() sem runs e sem summary (state, session_data, ids).
+  session jsonb not null default '{}'::jsonb,
+  -- SessionSummary.to_dict(); escrito apenas pelo SessionSummarizer (background).
+  summary jsonb,
+  -- Última mensagem coberta pelo summary: {"message_id", "created_at"}.
+  summary_watermark jsonb,
+
+  created_at timestamptz not null default now(),
+  updated_at timestamptz not null default now()
+) with (fillfactor = 80);
+
+-- Sem índice em updated_at: toda escrita o altera e perderia o HOT. A limpeza anda por conversation_id.
+create index if not exists idx_agno_sessions_company on core.agno_sessions(company_id);
+
+-- RLS: internal table (service role only).
+alter table core.agno_sessions enable row level security;
+
+drop policy if exists agno_sessions_service_all on core.agno_sessions;
+create policy agno_sessions_service_all
+  on core.agno_sessions
+  for all
+  to service_role
+  using (true)
+  with check (true);
+
+revoke all on table core.agno_sessions from public;
+grant select, insert, update, delete on table core.agno_sessions to service_role;
+
+-- Backfill a partir do blob legado. As chaves antigas ficam em conversations.metadata (um update de
+-- todas as conversas reescreveria a tabela inteira numa transação) e deixam de ser lidas.
+insert into core.agno_sessions (conversation_id, company_id, session, summary, summary_watermark, updated_at)
+select
+  c.id,
+  c.company_id,
+  (c.metadata->'agno_session') - 'summary' - 'runs',
+  c.metadata->'agno_session'->'summary',
+  c.metadata->'summary_watermark',
+  coalesce(c.updated_at, now())
+from core.conversations c
+where jsonb_typeof(c.metadata->'agno_session') = 'object'
+on conflict (conversation_id) do nothing;
+
+-- Down (manual; sessões gravadas depois da 00084 só existem em core.agno_sessions):
+-- update core.conversations c
+-- set metadata = coalesce(c.metadata, '{}'::jsonb)
+--   || jsonb_build_object('agno_session', s.session || jsonb_strip_nulls(jsonb_build_object('summary', s.summary)))
+--   || jsonb_strip_nulls(jsonb_build_object('summary_watermark', s.summary_watermark))
+-- from core.agno_sessions s
+-- where s.conversation_id = c.id;
+-- drop table if exists core.agno_sessions cascade;
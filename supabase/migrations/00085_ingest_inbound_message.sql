@@ -0,0 +1,180 @@
+-- Ingestão de mensagem inbound em uma única chamada.
+-- O handler fazia ~10 round trips sequenciais por mensagem (lead get_or_create + pixel, cancel de
+-- follow-ups, centurion config, conversation get_or_create, exists_channel_message_id, insert da
+-- mensagem, touch_inbound). Em bursts de campanha a vazão ficava presa nessa cadeia.
+-- O pending/debounce vive no Redis (DebounceStore) e fica fora daqui.
+
+-- Dedupe por channel_message_id via ON CONFLICT. core.messages é particionada por created_at e não
+-- aceita unique só em (company_id, channel_message_id); esta tabela estreita guarda as chaves.
+create table if not exists core.inbound_message_keys (
+  id uuid primary key default gen_random_uuid(),
+  company_id uuid not null references core.companies(id) on delete cascade,
+  channel_message_id text not null,
+  created_at timestamptz not null default now(),
+  unique (company_id, channel_message_id)
+);
+
+create index if not exists idx_inbound_message_keys_created_at on core.inbound_message_keys(created_at);
+
+alter table core.inbound_message_keys enable row level security;
+
+drop policy if exists inbound_message_keys_service_all on core.inbound_message_keys;
+create policy inbound_message_keys_service_all
+  on core.inbound_message_keys
+  for all
+  to service_role
+  using (true)
+  with check (true);
+
+revoke all on table core.inbound_message_keys from public;
+grant select, insert, update, delete on table core.inbound_message_keys to service_role;
+
+-- Backfill das chaves recentes (janela de redelivery do provider).
+insert into core.inbound_message_keys (company_id, channel_message_id, created_at)
+select m.company_id, btrim(m.channel_message_id), min(m.created_at)
+from core.messages m
+where m.direction = 'inbound'
+  and m.channel_message_id is not null
+  and btrim(m.channel_message_id) <> ''
+  and m.created_at > now() - interval '30 days'
+group by m.company_id, btrim(m.channel_message_id)
+on conflict (company_id, channel_message_id) do nothing;
+
+create or replace function core.ingest_inbound_message(
+  p_company_id uuid,
+  p_phone text,
+  p_channel_type text,
+  p_channel_instance_id uuid,
+  p_content_type text,
+  p_content text,
+  p_channel_message_id text default null,
+  p_metadata jsonb default '{}'::jsonb
+)
+returns table (
+  lead_id uuid,
+  lead_created boolean,
+  conversation_id uuid,
+  message_id uuid,
+  message_created_at timestamptz,
+  duplicate boolean,
+  followups_canceled int,
+  config jsonb
+)
+language plpgsql
+set search_path = core, public
+as $$
+#variable_conflict use_column
+declare
+  v_lead core.leads%rowtype;
+  v_created boolean := false;
+  v_config core.centurion_configs%rowtype;
+  v_conversation_id uuid;
+  v_message_id uuid;
+  v_message_created_at timestamptz;
+  v_canceled int := 0;
+  v_key text := nullif(btrim(coalesce(p_channel_message_id, '')), '');
+begin
+  -- 1) Lead (pixel ativo só é consultado na criação).
+  select * into v_lead from core.leads l where l.company_id = p_company_id and l.phone = p_phone;
+  if not found then
+    insert into core.leads (company_id, phone, pixel_config_id, first_contact_at, last_contact_at)
+    values (
+      p_company_id,
+      p_phone,
+      (
+        select pc.id
+        from core.pixel_configs pc
+        where pc.company_id = p_company_id and pc.is_active = true
+        order by pc.created_at desc
+        limit 1
+      ),
+      now(),
+      now()
+    )
+    on conflict (company_id, phone) do nothing
+    returning * into v_lead;
+    v_created := found;
+    if not v_created then
+      select * into v_lead from core.leads l where l.company_id = p_company_id and l.phone = p_phone;
+    end if;
+  end if;
+
+  -- 2) Dedupe secundário (o primário é o claim de idempotência por correlation_id).
+  if v_key is not null then
+    insert into core.inbound_message_keys (company_id, channel_message_id)
+    values (p_company_id, v_key)
+    on conflict (company_id, channel_message_id) do nothing;
+    if not found then
+      return query select v_lead.id, v_created, null::uuid, null::uuid, null::timestamptz, true, 0, null::jsonb;
+      return;
+    end if;
+  end if;
+
+  -- 3) Lead respondeu: follow-ups pendentes deixam de fazer sentido.
+  update core.followup_queue f
+  set status = 'canceled', updated_at = now()
+  where f.company_id = p_company_id and f.lead_id = v_lead.id and f.status = 'pending';
+  get diagnostics v_canceled = row_count;
+
+  -- 4) Centurion do lead (se ativo) ou o primeiro ativo da empresa.
+  select * into v_config
+  from core.centurion_configs c
+  where c.company_id = p_company_id and c.is_active = true
+  order by (c.id = v_lead.centurion_id) desc nulls last, c.created_at asc
+  limit 1;
+  if not found then
+    raise exception 'No active centurion_config for company';
+  end if;
+
+  -- 5) Conversa.
+  select c.id into v_conversation_id
+  from core.conversations c
+  where c.company_id = p_company_id
+    and c.lead_id = v_lead.id
+    and c.centurion_id = v_config.id
+    and c.channel_type = p_channel_type
+    and (p_channel_instance_id is null or c.channel_instance_id = p_channel_instance_id)
+  order by c.created_at desc
+  limit 1;
+  if v_conversation_id is null then
+    insert into core.conversations (company_id, lead_id, centurion_id, channel_instance_id, channel_type)
+    values (p_company_id, v_lead.id, v_config.id, p_channel_instance_id, p_channel_type)
+    returning id into v_conversation_id;
+  end if;
+
+  -- 6) Mensagem.
+  insert into core.messages (
+    conversation_id, company_id, lead_id,
+    direction, content_type, content,
+    channel_message_id, metadata
+  )
+  values (
+    v_conversation_id, p_company_id, v_lead.id,
+    'inbound', p_content_type, p_content,
+    v_key, coalesce(p_metadata, '{}'::jsonb)
+  )
+  returning id, created_at into v_message_id, v_message_created_at;
+
+  -- 7) touch_inbound.
+  update core.leads l
+  set
+    last_contact_at = now(),
+    first_contact_at = coalesce(l.first_contact_at, now()),
+    lifecycle_stage = case
+      when l.lifecycle_stage in ('follow_up_pending', 'follow_up_sent', 'proactive_contacted') then 'proactive_replied'
+      else 'contacted'
+    end,
+    updated_at = now()
+  where l.id = v_lead.id and l.lifecycle_stage not in ('qualified', 'handoff_done', 'closed_lost');
+
+  return query select
+    v_lead.id, v_created, v_conversation_id, v_message_id, v_message_created_at, false, v_canceled, to_jsonb(v_config);
+end;
+$$;
+
+revoke all on function core.ingest_inbound_message(uuid, text, text, uuid, text, text, text, jsonb) from public;
+grant execute on function core.ingest_inbound_message(uuid, text, text, uuid, text, text, text, jsonb) to service_role;
+
+-- Down (manual):
+-- drop function if exists core.ingest_inbound_message(uuid, text, text, uuid, text, text, text, jsonb);
+-- drop table if exists core.inbound_message_keys;
@@ -0,0 +1,6 @@
+-- Ambientes que já aplicaram a 00084 com idx_agno_sessions_updated_at: todo upsert de sessão altera
+-- updated_at, então o índice impedia updates HOT (e nenhuma query o usa).
+drop index if exists core.idx_agno_sessions_updated_at;
+
+-- Down (manual):
+-- create index if not exists idx_agno_sessions_updated_at on core.agno_sessions(updated_at);